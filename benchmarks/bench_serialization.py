@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@Description    ：响应序列化基准 - 对比 FastAPI 默认路径（jsonable_encoder + json.dumps）与 FastJSONResponse 的耗时和字节数
+@Author  ：EEric
+@Date    ：2026-10-19
+
+用法: PYTHONPATH=src python benchmarks/bench_serialization.py [--repeat 20]
+
+负载按五个大响应接口的真实结构构造（字段与 main.py 中一致，数值随机）：
+    /api/backtest-results               每页 100 条回测结果
+    /api/kline/{symbol}                 1000 根日K（按行）
+    /api/backtest/tasks                 50 个任务，每个带 300 只股票的 symbols 数组
+    /api/trade-records                  500 条交易信号
+    /api/backtest/tasks/{id}/results    300 条任务结果
+"""
+import argparse
+import gzip
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import JSONResponse
+
+from pytrading.api.responses import FastJSONResponse, orjson
+from pytrading.config import config
+
+
+def _symbol(i: int) -> str:
+    return f"SHSE.{600000 + i}" if i % 2 else f"SZSE.{i:06d}"
+
+
+def _time(i: int) -> str:
+    return (datetime(2025, 1, 1) + timedelta(minutes=i)).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def backtest_results_page(rng: random.Random, per_page: int = 100) -> dict:
+    data = [{
+        'id': i, 'task_id': f"task-{i // 10}", 'symbol': _symbol(i), 'name': f"股票{i}",
+        'strategy_id': 1, 'strategy_name': 'MACD',
+        'backtest_start_time': _time(0), 'backtest_end_time': _time(i),
+        'pnl_ratio': rng.uniform(-0.5, 1.5), 'sharp_ratio': rng.uniform(-2, 3),
+        'max_drawdown': rng.uniform(0, 0.6), 'risk_ratio': rng.uniform(0, 1),
+        'open_count': rng.randint(0, 50), 'close_count': rng.randint(0, 50),
+        'win_count': rng.randint(0, 30), 'lose_count': rng.randint(0, 30),
+        'win_ratio': rng.random(), 'trending_type': 'UpTrend',
+        'current_price': Decimal(f"{rng.uniform(2, 200):.2f}"),
+        'volume_avg_7d': rng.uniform(1e5, 1e8), 'atr': rng.uniform(0, 5), 'is_blacklist': False,
+        'industry': '银行', 'market_cap': rng.uniform(10, 5000), 'max_drawdown_duration': rng.randint(1, 200),
+        'created_at': _time(i),
+    } for i in range(per_page)]
+    return {"data": data, "total": 50000, "page": 1, "per_page": per_page, "total_pages": 500,
+            "next_cursor": "eyJ2IjogMSwgImlkIjogMX0="}
+
+
+def kline_rows(rng: random.Random, bars: int = 1000) -> dict:
+    price = 10.0
+    data = []
+    for i in range(bars):
+        price *= 1 + rng.uniform(-0.03, 0.03)
+        data.append({
+            "date": (datetime(2021, 1, 1) + timedelta(days=i)).strftime('%Y-%m-%d'),
+            "open": price, "high": price * 1.02, "low": price * 0.98, "close": price,
+            "volume": rng.randint(10 ** 5, 10 ** 8),
+            "macd_diff": rng.uniform(-1, 1), "macd_dea": rng.uniform(-1, 1), "macd_hist": rng.uniform(-1, 1),
+        })
+    return {"symbol": "SHSE.600000", "format": "rows", "data": data}
+
+
+def backtest_tasks(rng: random.Random, tasks: int = 50, symbols: int = 300) -> dict:
+    data = [{
+        "id": i, "task_id": f"task-{i}", "strategy_id": 1,
+        "symbols": [_symbol(j) for j in range(symbols)], "symbol_count": symbols,
+        "start_time": _time(0), "end_time": _time(i), "status": "completed", "progress": 100,
+        "parameters": {"mode": "index", "index_symbol": "SHSE.000300"},
+        "result_summary": {"total": symbols, "success": symbols - 3, "failed": 3},
+        "error_message": None, "created_at": _time(i), "updated_at": _time(i + 5), "duration": rng.randint(60, 3600),
+    } for i in range(tasks)]
+    return {"data": data, "total": 400, "page": 1, "per_page": tasks, "total_pages": 8}
+
+
+def trade_records(rng: random.Random, records: int = 500) -> dict:
+    return {"data": [{
+        "action": rng.choice(['build', 'buy', 'sell', 'close']), "label": '买50%',
+        "target_percent": 0.5, "price": rng.uniform(5, 50), "volume": rng.randint(100, 10000),
+        "signal_type": 'macd_golden_cross', "bar_time": (datetime(2024, 1, 1) + timedelta(days=i)).strftime('%Y-%m-%d'),
+    } for i in range(records)]}
+
+
+def task_results(rng: random.Random, results: int = 300) -> dict:
+    return {"data": [{
+        "id": i, "symbol": _symbol(i), "name": f"股票{i}", "strategy_name": 'MACD',
+        "backtest_start_time": _time(0), "backtest_end_time": _time(i),
+        "pnl_ratio": rng.uniform(-0.5, 1.5), "sharp_ratio": rng.uniform(-2, 3), "max_drawdown": rng.uniform(0, 0.6),
+        "win_ratio": rng.random(), "current_price": rng.uniform(2, 200),
+        "open_count": rng.randint(0, 50), "close_count": rng.randint(0, 50),
+        "win_count": rng.randint(0, 30), "lose_count": rng.randint(0, 30),
+    } for i in range(results)]}
+
+
+PAYLOADS = (
+    ("/api/backtest-results", backtest_results_page),
+    ("/api/kline/{symbol}", kline_rows),
+    ("/api/backtest/tasks", backtest_tasks),
+    ("/api/trade-records", trade_records),
+    ("/api/backtest/tasks/{id}/results", task_results),
+)
+
+
+def default_path(payload) -> bytes:
+    """FastAPI 默认：返回 dict -> jsonable_encoder -> JSONResponse(json.dumps)"""
+    return JSONResponse(jsonable_encoder(payload)).body
+
+
+def fast_path(payload) -> bytes:
+    """接口直接返回 FastJSONResponse"""
+    return FastJSONResponse(payload).body
+
+
+def measure(fn, payload, repeat: int) -> float:
+    """中位数耗时（毫秒）"""
+    fn(payload)
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(payload)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="响应序列化基准")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    print(f"序列化后端: {'orjson ' + orjson.__version__ if orjson else '标准库 json（未安装 orjson）'},"
+          f" gzip 级别 {config.gzip_level}, 重复 {args.repeat} 次取中位数\n")
+    header = f"{'接口':<36}{'默认(ms)':>10}{'快速(ms)':>10}{'加速':>8}{'默认字节':>12}{'快速字节':>12}{'gzip字节':>12}"
+    print(header)
+    print('-' * 110)
+    for path, build in PAYLOADS:
+        payload = build(rng)
+        default_ms = measure(default_path, payload, args.repeat)
+        fast_ms = measure(fast_path, payload, args.repeat)
+        default_body, fast_body = default_path(payload), fast_path(payload)
+        gzip_bytes = len(gzip.compress(fast_body, compresslevel=config.gzip_level))
+        print(f"{path:<36}{default_ms:>10.2f}{fast_ms:>10.2f}{default_ms / fast_ms:>7.1f}x"
+              f"{len(default_body):>12,}{len(fast_body):>12,}{gzip_bytes:>12,}")
+
+
+if __name__ == "__main__":
+    main()
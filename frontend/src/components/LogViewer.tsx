@@ -9,6 +9,7 @@ import {
 } from '@ant-design/icons';
 import { BacktestLog } from '../types';
 import { apiService } from '../services/api';
+import { streamService } from '../services/stream';
 import { darkTheme, globalDarkStyles } from '../styles/darkTheme';
 
 const { Search } = Input;
@@ -26,17 +27,16 @@ const LogViewer: React.FC<LogViewerProps> = ({ taskId, symbol, title, height = 5
   const [loading, setLoading] = useState(false);
   const [autoRefresh, setAutoRefresh] = useState(false);
   const [autoScroll] = useState(true);
-  const [lastId, setLastId] = useState(0);
   const [filterLevel, setFilterLevel] = useState<string>('ALL');
   const [searchText, setSearchText] = useState('');
   const logContainerRef = useRef<HTMLDivElement>(null);
-  const autoRefreshTimerRef = useRef<NodeJS.Timeout | null>(null);
+  const lastIdRef = useRef(0);
 
   // 获取日志
   const fetchLogs = useCallback(async (isIncremental: boolean = false) => {
     try {
       setLoading(true);
-      const afterId = isIncremental ? lastId : 0;
+      const afterId = isIncremental ? lastIdRef.current : 0;
 
       const response = symbol
         ? await apiService.getResultLogs(taskId, symbol, afterId, 500)
@@ -48,38 +48,34 @@ const LogViewer: React.FC<LogViewerProps> = ({ taskId, symbol, title, height = 5
         setLogs(response.items);
       }
 
-      if (response.last_id > lastId) {
-        setLastId(response.last_id);
+      if (!isIncremental || response.last_id > lastIdRef.current) {
+        lastIdRef.current = response.last_id;
       }
     } catch (error) {
       console.error('获取日志失败:', error);
     } finally {
       setLoading(false);
     }
-  }, [lastId, symbol, taskId]);
+  }, [symbol, taskId]);
 
   // 初始加载
   useEffect(() => {
     fetchLogs(false);
   }, [taskId, symbol, fetchLogs]);
 
-  // 自动刷新
+  // 自动刷新：订阅服务端推送的新日志（从已加载的最后一条之后开始）
   useEffect(() => {
-    if (autoRefresh) {
-      autoRefreshTimerRef.current = setInterval(() => {
-        fetchLogs(true);
-      }, 2000);
-    } else {
-      if (autoRefreshTimerRef.current) {
-        clearInterval(autoRefreshTimerRef.current);
-      }
+    if (!autoRefresh) {
+      return;
     }
-    return () => {
-      if (autoRefreshTimerRef.current) {
-        clearInterval(autoRefreshTimerRef.current);
+    return streamService.subscribeLogs(taskId, symbol, lastIdRef.current, (log) => {
+      if (log.id <= lastIdRef.current) {
+        return;
       }
-    };
-  }, [autoRefresh, fetchLogs]);
+      lastIdRef.current = log.id;
+      setLogs(prev => [...prev, log]);
+    });
+  }, [autoRefresh, taskId, symbol]);
 
   // 自动滚动到底部
   useEffect(() => {
@@ -46,6 +46,7 @@ import {
 import dayjs from 'dayjs';
 import duration from 'dayjs/plugin/duration';
 import { apiService } from '../services/api';
+import { streamService } from '../services/stream';
 import { Strategy, Symbol, BacktestConfig, BacktestResult } from '../types';
 import LogViewer from '../components/LogViewer';
 import { darkTheme, globalDarkStyles } from '../styles/darkTheme';
@@ -200,6 +201,23 @@ const BacktestManager: React.FC = () => {
     fetchBacktestTasks();
   }, [fetchBacktestTasks]);
 
+  // 服务端推送任务状态/进度变化，直接更新当前页中的任务
+  useEffect(() => {
+    return streamService.subscribeTasks((event) => {
+      setBacktestTasks(prev => prev.map(task =>
+        task.task_id === event.task_id
+          ? {
+              ...task,
+              status: event.status,
+              progress: event.progress,
+              error_message: event.error_message ?? task.error_message,
+              updated_at: event.updated_at ?? task.updated_at,
+            }
+          : task
+      ));
+    });
+  }, []);
+
   const handleModeChange = (e: any) => {
     setBackTestMode(e.target.value);
   };
@@ -16,6 +16,7 @@ import {
   InputNumber,
   Pagination,
   Progress,
+  AutoComplete,
 } from 'antd';
 import type { ColumnsType } from 'antd/es/table/interface';
 import {
@@ -111,6 +112,8 @@ const BacktestResults: React.FC = () => {
     total: 0,
     totalPages: 0
   });
+  // "每页条数:页码" -> 该页的键集分页游标（由上一页响应的 next_cursor 得到），翻到已知游标的页时不走 OFFSET
+  const pageCursorsRef = useRef<Record<string, string>>({});
   const [sortConfig, setSortConfig] = useState<{
     field: string | null;
     order: 'asc' | 'desc' | null;
@@ -127,9 +130,16 @@ const BacktestResults: React.FC = () => {
   ) => {
     try {
       setLoading(true);
+      // 回到第一页意味着筛选、排序或每页条数可能已变化，之前的游标全部作废
+      if (page === 1) {
+        pageCursorsRef.current = {};
+      }
+      // 请求期间若游标被重置，旧请求的 next_cursor 写入已废弃的对象，不会污染新的游标表
+      const cursors = pageCursorsRef.current;
       const params = {
         page: page,
         per_page: pageSize,
+        cursor: page > 1 ? cursors[`${pageSize}:${page}`] : undefined,
         symbol: filters.symbol || undefined,
         trending_type: filters.trending_type || undefined,
         industry: filters.industry || undefined,
@@ -154,6 +164,9 @@ const BacktestResults: React.FC = () => {
 
       const response: PaginatedApiResponse<BacktestResult[]> = await apiService.getBacktestResults(params);
 
+      if (response.next_cursor) {
+        cursors[`${pageSize}:${page + 1}`] = response.next_cursor;
+      }
       setData(response.data);
       setPagination({
         current: response.page,
@@ -207,6 +220,30 @@ const BacktestResults: React.FC = () => {
     setFilters(prev => ({ ...prev, [key]: value }));
   };
 
+  // 股票输入联想（代码/名称/拼音首字母），输入停顿 200ms 后请求
+  const [symbolOptions, setSymbolOptions] = useState<{ value: string; label: string }[]>([]);
+  const symbolSearchTimerRef = useRef<ReturnType<typeof setTimeout>>();
+  const handleSymbolSearch = (value: string) => {
+    if (symbolSearchTimerRef.current) {
+      clearTimeout(symbolSearchTimerRef.current);
+    }
+    if (!value.trim()) {
+      setSymbolOptions([]);
+      return;
+    }
+    symbolSearchTimerRef.current = setTimeout(async () => {
+      try {
+        const response = await apiService.searchSymbols(value.trim());
+        setSymbolOptions(response.data.map(item => ({
+          value: item.symbol,
+          label: `${item.symbol} ${item.name}`,
+        })));
+      } catch (error) {
+        setSymbolOptions([]);
+      }
+    }, 200);
+  };
+
   const clearAllFilters = () => {
     setFilters({
       symbol: '',
@@ -873,15 +910,23 @@ const BacktestResults: React.FC = () => {
           <Row gutter={[8, 8]}>
             <Col xs={24} sm={12} md={6} lg={5}>
               <div className="backtest-search">
-                <Search
-                  placeholder="搜索股票代码或名称"
-                  allowClear
-                  onSearch={(value) => {
+                <AutoComplete
+                  options={symbolOptions}
+                  onSearch={handleSymbolSearch}
+                  onSelect={(value: string) => {
                     handleFilterChange('symbol', value);
                   }}
                   style={{ width: '100%' }}
-                  size="small"
-                />
+                >
+                  <Search
+                    placeholder="搜索股票代码、名称或拼音首字母"
+                    allowClear
+                    onSearch={(value) => {
+                      handleFilterChange('symbol', value);
+                    }}
+                    size="small"
+                  />
+                </AutoComplete>
               </div>
             </Col>
             <Col xs={24} sm={12} md={6} lg={4}>
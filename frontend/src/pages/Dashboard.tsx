@@ -18,6 +18,7 @@ import {
   FileTextOutlined
 } from '@ant-design/icons';
 import { apiService } from '../services/api';
+import { streamService } from '../services/stream';
 import { BacktestResult, TradeRecord } from '../types';
 import StockChart from '../components/StockChart';
 import LogViewer from '../components/LogViewer';
@@ -339,12 +340,16 @@ const Dashboard: React.FC = () => {
 
   useEffect(() => {
     fetchData();
-    // 自动刷新：每5分钟
-    const interval = setInterval(() => {
-      handleRefresh();
-    }, 5 * 60 * 1000);
-    return () => clearInterval(interval);
-  }, [fetchData, handleRefresh]);
+    // 自动刷新：有回测任务完成时（服务端推送）重新加载
+    const taskStatus = new Map<string, string>();
+    return streamService.subscribeTasks((task) => {
+      const previous = taskStatus.get(task.task_id);
+      taskStatus.set(task.task_id, task.status);
+      if (previous && previous !== 'completed' && task.status === 'completed') {
+        fetchData();
+      }
+    });
+  }, [fetchData]);
 
   // 获取已关注的股票代码
   useEffect(() => {
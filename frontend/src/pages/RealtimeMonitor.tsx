@@ -35,6 +35,7 @@ import {
 } from 'chart.js';
 import dayjs from 'dayjs';
 import { apiService } from '../services/api';
+import { streamService } from '../services/stream';
 import { darkTheme, globalDarkStyles } from '../styles/darkTheme';
 
 ChartJS.register(
@@ -90,8 +91,30 @@ const RealtimeMonitor: React.FC = () => {
     fetchRealtimeData();
     
     if (autoRefresh) {
-      const interval = setInterval(fetchRealtimeData, 5000); // 每5秒刷新
-      return () => clearInterval(interval);
+      // 页面数据只由回测结果汇总而来，只在推送的任务状态变为 completed 时刷新，1 秒内的多次完成合并为一次。
+      // 连接时推送的快照只记录状态；首次出现即已完成的任务以 updated_at 是否晚于订阅时间判断是否为新完成
+      let timer: ReturnType<typeof setTimeout> | null = null;
+      const statuses = new Map<string, string>();
+      const since = dayjs();
+      const unsubscribe = streamService.subscribeTasks((task) => {
+        const previous = statuses.get(task.task_id);
+        statuses.set(task.task_id, task.status);
+        const justCompleted = task.status === 'completed' && (previous !== undefined
+          ? previous !== 'completed'
+          : !!task.updated_at && !dayjs(task.updated_at).isBefore(since));
+        if (justCompleted && !timer) {
+          timer = setTimeout(() => {
+            timer = null;
+            fetchRealtimeData();
+          }, 1000);
+        }
+      });
+      return () => {
+        unsubscribe();
+        if (timer) {
+          clearTimeout(timer);
+        }
+      };
     }
   }, [autoRefresh]);
 
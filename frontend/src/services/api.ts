@@ -1,7 +1,7 @@
 import axios from 'axios';
 import { BacktestResult, Strategy, Symbol, BacktestConfig, TaskStatus, SystemConfig, ApiResponse, PaginatedApiResponse, LogQueryResponse, TradeRecord, WatchlistResponse } from '../types';
 
-const API_BASE_URL = process.env.REACT_APP_API_BASE_URL || 'http://localhost:8000';
+export const API_BASE_URL = process.env.REACT_APP_API_BASE_URL || 'http://localhost:8000';
 
 const api = axios.create({
   baseURL: API_BASE_URL,
@@ -32,6 +32,7 @@ export const apiService = {
     per_page?: number;
     sort_by?: string;
     sort_order?: string;
+    cursor?: string; // 上一页返回的 next_cursor，传入时后端按键集分页（不走 OFFSET）
   }): Promise<PaginatedApiResponse<BacktestResult[]>> => {
     const response = await api.get('/api/backtest-results', { params });
     return response.data;
@@ -49,6 +50,12 @@ export const apiService = {
     return response.data;
   },
 
+  // 股票代码/名称/拼音首字母检索（输入联想）
+  searchSymbols: async (q: string, limit: number = 10): Promise<ApiResponse<Symbol[]>> => {
+    const response = await api.get('/api/symbols/search', { params: { q, limit } });
+    return response.data;
+  },
+
   // 回测任务相关
   startBacktest: async (config: BacktestConfig): Promise<{ task_id: string; status: string; message: string }> => {
     const response = await api.post('/api/backtest/start', config);
@@ -181,7 +188,7 @@ export const apiService = {
     max_win_ratio?: number;
     min_market_cap?: number;
     max_market_cap?: number;
-  }): Promise<void> => {
+  }, format: 'csv' | 'parquet' | 'arrow' = 'csv'): Promise<void> => {
     const params = new URLSearchParams();
     if (filters) {
       Object.entries(filters).forEach(([key, value]) => {
@@ -190,22 +197,14 @@ export const apiService = {
         }
       });
     }
+    params.append('format', format);
 
-    const response = await api.get('/api/backtest-results/export', {
-      params,
-      responseType: 'blob'
-    });
-
-    // 创建下载链接
-    const blob = new Blob([response.data], { type: 'text/csv;charset=utf-8' });
-    const url = window.URL.createObjectURL(blob);
+    // 服务端流式输出，直接交给浏览器下载（不经 axios 缓冲整个文件，也不受请求超时限制）
     const link = document.createElement('a');
-    link.href = url;
-    link.download = `backtest_results_${new Date().toISOString().slice(0, 10).replace(/-/g, '')}.csv`;
+    link.href = `${API_BASE_URL}/api/backtest-results/export?${params.toString()}`;
     document.body.appendChild(link);
     link.click();
     document.body.removeChild(link);
-    window.URL.revokeObjectURL(url);
   },
 
   // K线数据相关
@@ -225,11 +224,27 @@ export const apiService = {
     }>;
     message?: string;
   }> => {
-    const params: Record<string, string> = {};
+    // 按列格式传输，体积更小；这里还原为按行数组，调用方无需改动
+    const params: Record<string, string> = { format: 'columnar' };
     if (startDate) params.start_date = startDate;
     if (endDate) params.end_date = endDate;
     const response = await api.get(`/api/kline/${symbol}`, { params });
-    return response.data;
+    const { data, ...rest } = response.data;
+    if (!data || Array.isArray(data)) {
+      return response.data;
+    }
+    const rows = (data.date || []).map((date: string, i: number) => ({
+      date,
+      open: data.open[i],
+      high: data.high[i],
+      low: data.low[i],
+      close: data.close[i],
+      volume: data.volume[i],
+      macd_diff: data.macd_diff[i],
+      macd_dea: data.macd_dea[i],
+      macd_hist: data.macd_hist[i],
+    }));
+    return { ...rest, data: rows };
   },
 
   // 同步K线数据
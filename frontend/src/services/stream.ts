@@ -0,0 +1,52 @@
+import { API_BASE_URL } from './api';
+import { BacktestLog, QuoteData, TaskProgressEvent } from '../types';
+
+type StreamHandlers = Record<string, (data: any) => void>;
+
+/**
+ * 订阅服务端推送（SSE），返回取消订阅函数。
+ * 断线后浏览器会自动重连，日志流通过 Last-Event-ID 从断点继续。
+ */
+export const openStream = (
+  path: string,
+  params: Record<string, string | number | undefined>,
+  handlers: StreamHandlers
+): (() => void) => {
+  if (typeof EventSource === 'undefined') {
+    return () => {};
+  }
+  const url = new URL(path, API_BASE_URL);
+  Object.entries(params).forEach(([key, value]) => {
+    if (value !== undefined && value !== '') {
+      url.searchParams.set(key, String(value));
+    }
+  });
+
+  const source = new EventSource(url.toString());
+  Object.entries(handlers).forEach(([event, handler]) => {
+    source.addEventListener(event, (e) => {
+      try {
+        handler(JSON.parse((e as MessageEvent).data));
+      } catch (error) {
+        console.error(`解析推送事件失败: ${event}`, error);
+      }
+    });
+  });
+  return () => source.close();
+};
+
+export const streamService = {
+  // 新日志（从 afterId 之后开始）
+  subscribeLogs: (taskId: string, symbol: string | undefined, afterId: number, onLog: (log: BacktestLog) => void) =>
+    symbol
+      ? openStream('/api/stream/logs/result', { task_id: taskId, symbol, after_id: afterId }, { log: onLog })
+      : openStream(`/api/stream/logs/task/${taskId}`, { after_id: afterId }, { log: onLog }),
+
+  // 任务状态/进度变化
+  subscribeTasks: (onTask: (task: TaskProgressEvent) => void) =>
+    openStream('/api/stream/tasks', {}, { task: onTask }),
+
+  // 实时行情变化（默认大盘指数）
+  subscribeQuotes: (symbols: string[] | undefined, onQuotes: (quotes: Record<string, QuoteData>) => void) =>
+    openStream('/api/stream/quotes', { symbols: symbols?.join(',') }, { quotes: onQuotes }),
+};
@@ -63,6 +63,21 @@ export interface TaskStatus {
   message: string;
 }
 
+// 服务端推送的任务状态/进度变化（/api/stream/tasks）
+export interface TaskProgressEvent {
+  task_id: string;
+  status: 'pending' | 'running' | 'completed' | 'failed' | 'cancelled';
+  progress: number;
+  error_message?: string | null;
+  updated_at?: string | null;
+}
+
+export interface QuoteData {
+  price: number;
+  change_amount: number;
+  change_pct: number;
+}
+
 export interface SystemConfig {
   trading_mode: string;
   db_type: string;
@@ -78,6 +93,7 @@ export interface PaginatedApiResponse<T> {
   page: number;
   per_page: number;
   total_pages: number;
+  next_cursor?: string | null; // 键集分页游标，请求下一页时原样回传
 }
 
 export interface ApiResponse<T> {
@@ -6,7 +6,8 @@
 @Date    ：2025-08-16
 """
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Query
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from typing import List, Optional, Dict, Any
@@ -17,7 +18,10 @@ import sys
 import asyncio
 import threading
 import time
+import hashlib
 from datetime import datetime, timedelta
+from email.utils import formatdate
+import numpy as np
 
 # 添加项目根目录到Python路径
 project_root = os.path.join(os.path.dirname(__file__), '../../..')
@@ -27,15 +31,23 @@ sys.path.insert(0, os.path.join(project_root, 'src'))
 from pytrading.config.settings import config
 from pytrading.model.back_test import BackTest
 from pytrading.model.back_test_saver_factory import get_backtest_saver
+from pytrading.model.mysql_back_test_saver import MySQLBackTestSaver
 from pytrading.db.mysql import MySQLClient, Strategy, StockSymbol, BacktestTask, SystemConfig, BackTestResult, StockKline
+from pytrading.db.async_session import run_db, run_blocking
+from pytrading.api.responses import FastJSONResponse, SelectiveGZipMiddleware
+from pytrading.service.symbol_index_service import DEFAULT_SYMBOLS, get_symbol_index_service
+from pytrading.utils.gm_client import close_gm_data_clients, get_gm_data_client, gm_client_stats
+from pytrading.utils.blocking import (UpstreamUnavailable, get_loop_lag_monitor, run_upstream,
+                                      shutdown_upstream_executors, upstream_stats)
+from pytrading.service.result_summary_service import ResultSummaryService
+from pytrading.service.log_retention_service import LogRetentionService
+from pytrading.utils.ttl_cache import get_cache, invalidate_on_write, all_stats as api_cache_stats
 from pytrading.py_trading import PyTrading
 from pytrading.logger import logger
 from sqlalchemy import func
-from gm.api import set_token, get_constituents, history, get_instruments
-from pytrading.utils.talib_util import TA_MACD
+from gm.api import set_token, get_constituents
 import akshare as ak
 from pytrading.utils.akshare_util import akshare_util
-import pandas as pd
 
 # 设置掘金量化token
 set_token(config.token)
@@ -73,6 +85,16 @@ async def lifespan(app: FastAPI):
     task_scheduler_thread.start()
     logger.info("回测任务调度器已启动")
 
+    # 全市场行情快照后台刷新
+    from pytrading.service.spot_snapshot_service import get_spot_snapshot_service
+    get_spot_snapshot_service().start()
+
+    # 股票检索索引后台构建
+    get_symbol_index_service().warm_up()
+
+    # 事件循环卡顿监控
+    get_loop_lag_monitor().start()
+
     yield  # 应用运行中
 
     # ====== 关闭事件 ======
@@ -82,12 +104,25 @@ async def lifespan(app: FastAPI):
     task_scheduler_running = False
     logger.info("回测任务调度器已停止")
 
+    get_spot_snapshot_service().stop()
+
+    from pytrading.api.stream_hub import get_stream_hub
+    await get_stream_hub().close()
+
+    from pytrading.utils.quote_client import close_quote_client
+    await close_quote_client()
+
+    await get_loop_lag_monitor().stop()
+    shutdown_upstream_executors()
+    close_gm_data_clients()
+
 
 app = FastAPI(
     title="PyTrading API",
     description="量化交易系统Web API",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
 
 # 配置CORS
@@ -99,6 +134,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 大响应 GZip 压缩（SSE 推送和流式导出路径除外）
+if config.gzip_min_size > 0:
+    app.add_middleware(SelectiveGZipMiddleware, minimum_size=config.gzip_min_size, compresslevel=config.gzip_level)
+
 # 静态文件服务
 if os.path.exists("static"):
     app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -107,6 +146,7 @@ if os.path.exists("static"):
 task_scheduler_running = False
 task_scheduler_thread = None
 _last_scheduled_date = None  # 防止同一天重复触发定时回测
+_last_log_retention_date = None  # 日志归档每天执行一次
 
 def execute_backtest_task(task_id: str):
     """
@@ -167,6 +207,19 @@ def _check_scheduled_backtest(db_client):
         logger.error(f"定时回测检查失败: {e}", exc_info=True)
 
 
+def _check_log_retention():
+    """每天归档一次过期任务日志"""
+    global _last_log_retention_date
+    today_str = datetime.now().strftime('%Y-%m-%d')
+    if config.log_retention_days <= 0 or _last_log_retention_date == today_str:
+        return
+    _last_log_retention_date = today_str
+    try:
+        LogRetentionService.archive_expired()
+    except Exception as e:
+        logger.error(f"日志归档检查失败: {e}", exc_info=True)
+
+
 def task_scheduler():
     """
     定时轮询pending状态的任务并执行
@@ -210,6 +263,9 @@ def task_scheduler():
             # ===== 定时回测检查 =====
             _check_scheduled_backtest(db_client)
 
+            # ===== 过期日志归档 =====
+            _check_log_retention()
+
             # 动态调整检查频率
             # 如果有pending任务，加快检查频率
             if pending_tasks:
@@ -257,7 +313,8 @@ async def get_backtest_results(
     page: int = 1,
     per_page: int = 10,
     sort_by: Optional[str] = None,  # 排序字段
-    sort_order: Optional[str] = 'desc'  # 排序方向：asc/desc
+    sort_order: Optional[str] = 'desc',  # 排序方向：asc/desc
+    cursor: Optional[str] = None  # 键集分页游标（上一页返回的 next_cursor）
 ):
     """获取回测结果列表"""
     try:
@@ -269,8 +326,9 @@ async def get_backtest_results(
         
         # 从数据库获取真实数据
         try:
-            # 直接在数据库层执行筛选与分页
-            result_data = saver.get_all_results(
+            # 直接在数据库层执行筛选与分页（同步查询放到线程池，避免阻塞事件循环）
+            result_data = await run_blocking(
+                saver.get_all_results,
                 symbol=symbol,
                 start_date=start_date,
                 end_date=end_date,
@@ -287,14 +345,17 @@ async def get_backtest_results(
                 page=page,
                 per_page=per_page,
                 sort_by=sort_by,
-                sort_order=sort_order
+                sort_order=sort_order,
+                cursor=cursor
             )
             logger.info(f"数据库分页完成，当前页: {page}, 每页: {per_page}, 总记录数: {result_data['total']}, 排序字段: {sort_by}, 排序方向: {sort_order}")
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         except Exception as db_error:
             logger.error(f"数据库查询失败 - {str(db_error)}")
             raise HTTPException(status_code=500, detail=f"数据库查询失败: {str(db_error)}")
         
-        return result_data
+        return FastJSONResponse(result_data)
     except HTTPException:
         raise
     except Exception as e:
@@ -305,26 +366,19 @@ async def get_backtest_results(
 async def get_system_status():
     """获取系统状态"""
     try:
-        saver = get_backtest_saver()
-        
-        if not saver:
-            logger.error("数据库连接失败 - 无法获取系统状态")
-            raise HTTPException(status_code=500, detail="数据库连接失败，无法获取系统状态")
-        
-        # 从数据库统计真实数据
+        # 从数据库统计真实数据（最近 100 条结果在 SQL 中聚合）
         try:
-            result_data = saver.get_all_results(limit=100, page=1, per_page=100)
-            backtest_results = result_data['data']
-            logger.info(f"成功从数据库获取 {len(backtest_results)} 条数据用于统计系统状态")
-            
-            active_strategies = len([r for r in backtest_results if r.get("pnl_ratio", 0) > 0])
-            total_pnl = sum([r.get("pnl_ratio", 0) for r in backtest_results]) * 100000  # 计算总资金
-            
+            overview = await run_db(ResultSummaryService.system_overview, 100)
+            logger.info(f"成功从数据库统计 {overview['result_count']} 条数据用于系统状态")
+
+            active_strategies = overview['profitable_count']
+            total_pnl = overview['pnl_ratio_sum'] * 100000  # 计算总资金
+
         except Exception as db_error:
             logger.error(f"获取系统状态数据失败 - {str(db_error)}")
             raise HTTPException(status_code=500, detail=f"数据库查询失败: {str(db_error)}")
 
-        if not backtest_results:
+        if not overview['result_count']:
             logger.warning("数据库中没有回测结果数据")
             raise HTTPException(status_code=404, detail="数据库中没有回测结果数据")
         
@@ -346,6 +400,39 @@ async def get_system_status():
         logger.error(f"获取系统状态时发生未知错误 - {str(e)}")
         raise HTTPException(status_code=500, detail=f"服务器内部错误: {str(e)}")
 
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    """获取行情缓存命中统计"""
+    from pytrading.utils.history_cache import get_history_cache
+    stats = get_history_cache().stats()
+    stats["enabled"] = config.history_cache_enabled
+    stats["api"] = {"enabled": config.api_cache_enabled, "caches": api_cache_stats()}
+    from pytrading.service.spot_snapshot_service import get_spot_snapshot_service
+    stats["spot_snapshot"] = get_spot_snapshot_service().stats()
+    stats["symbol_index"] = get_symbol_index_service().stats()
+    return stats
+
+
+@app.get("/api/runtime/stats")
+async def get_runtime_stats():
+    """获取上游线程池使用情况与事件循环卡顿统计"""
+    return {"upstreams": upstream_stats(), "gm_clients": gm_client_stats(), "loop_lag": get_loop_lag_monitor().stats()}
+
+
+@app.get("/api/db/pool")
+async def get_db_pool_status():
+    """获取数据库连接池状态"""
+    from pytrading.db.engine import pool_status
+    return {"pid": os.getpid(), "engines": pool_status()}
+
+
+@app.get("/api/db/slow-queries")
+async def get_slow_queries(limit: int = 20, explain: bool = True):
+    """获取慢查询及执行计划建议"""
+    from pytrading.db.query_advisor import advise
+    return {"data": await run_blocking(advise, limit=limit, run_explain=explain)}
+
+
 @app.get("/api/backtest-results/export")
 async def export_backtest_results(
     symbol: Optional[str] = None,
@@ -359,8 +446,15 @@ async def export_backtest_results(
     max_win_ratio: Optional[float] = None,
     min_market_cap: Optional[float] = None,
     max_market_cap: Optional[float] = None,
+    format: str = "csv",
 ):
-    """导出回测结果为CSV"""
+    """流式导出回测结果：csv（默认）/ parquet / arrow（Arrow IPC 流，parquet 与 arrow 需要 pyarrow）"""
+    from pytrading.service.result_export_service import EXPORT_FORMATS, ResultExportService
+
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format 必须为: {', '.join(EXPORT_FORMATS)}")
+    if format != "csv" and not ResultExportService.arrow_available():
+        raise HTTPException(status_code=400, detail=f"导出 {format} 需要安装 pyarrow")
     try:
         saver = get_backtest_saver()
 
@@ -368,62 +462,25 @@ async def export_backtest_results(
             logger.error("数据库连接失败 - BackTest saver 初始化失败")
             raise HTTPException(status_code=500, detail="数据库连接失败，无法导出回测结果")
 
-        # 获取所有数据（不限制数量）
-        result_data = saver.get_all_results(
-            symbol=symbol,
-            start_date=start_date,
-            end_date=end_date,
-            trending_type=trending_type,
-            industry=industry,
-            min_pnl_ratio=min_pnl_ratio,
-            max_pnl_ratio=max_pnl_ratio,
-            min_win_ratio=min_win_ratio,
-            max_win_ratio=max_win_ratio,
-            min_market_cap=min_market_cap,
-            max_market_cap=max_market_cap,
-            limit=100000,  # 获取足够多的数据
-            page=1,
-            per_page=100000
+        filters = dict(
+            symbol=symbol, start_date=start_date, end_date=end_date, trending_type=trending_type,
+            industry=industry, min_pnl_ratio=min_pnl_ratio, max_pnl_ratio=max_pnl_ratio,
+            min_win_ratio=min_win_ratio, max_win_ratio=max_win_ratio,
+            min_market_cap=min_market_cap, max_market_cap=max_market_cap,
         )
-
-        backtest_results = result_data.get('data', [])
-
-        if not backtest_results:
+        if not await run_blocking(saver.has_results, **filters):
             raise HTTPException(status_code=404, detail="没有可导出的回测结果")
 
-        # 构建CSV内容
-        headers = ['股票代码', '股票名称', '策略名称', '趋势类型', '收益率', '夏普比率', '最大回撤', '胜率', '开仓次数', '平仓次数', '开始时间', '结束时间']
-        csv_lines = [','.join(headers)]
-
-        for item in backtest_results:
-            # 处理可能为None的值，转换为字符串
-            def safe_str(val):
-                return '' if val is None else str(val)
-
-            row = [
-                safe_str(item.get('symbol')),
-                safe_str(item.get('name')),
-                safe_str(item.get('strategy_name')),
-                safe_str(item.get('trending_type')),
-                f"{(float(item.get('pnl_ratio') or 0)) * 100:.2f}%",
-                f"{float(item.get('sharp_ratio') or 0):.2f}",
-                f"{float(item.get('max_drawdown') or 0) * 100:.2f}%",
-                f"{float(item.get('win_ratio') or 0) * 100:.2f}%",
-                str(item.get('open_count') or 0),
-                str(item.get('close_count') or 0),
-                safe_str(item.get('backtest_start_time')),
-                safe_str(item.get('backtest_end_time'))
-            ]
-            csv_lines.append(','.join(row))
-
-        csv_content = '\n'.join(csv_lines)
-
-        # 返回CSV文件，使用UTF-8-BOM编码解决Excel打开乱码问题
-        from fastapi.responses import Response
-        return Response(
-            content='\ufeff' + csv_content,  # UTF-8 BOM
-            media_type='text/csv;charset=utf-8',
-            headers={'Content-Disposition': f'attachment; filename=backtest_results_{datetime.now().strftime("%Y%m%d")}.csv'}
+        if format == "csv":
+            chunks = ResultExportService.iter_csv(saver, filters)
+        else:
+            chunks = ResultExportService.iter_arrow(saver, filters, fmt=format)
+        media_type, extension = EXPORT_FORMATS[format]
+        # 同步生成器由 StreamingResponse 在线程池中迭代，逐批查询、逐批发送
+        return StreamingResponse(
+            chunks,
+            media_type=media_type,
+            headers={'Content-Disposition': f'attachment; filename=backtest_results_{datetime.now().strftime("%Y%m%d")}.{extension}'}
         )
 
     except HTTPException:
@@ -442,141 +499,280 @@ def get_db_client():
         password=config.mysql_password
     )
 
+def _query_logs(session, task_id: str, symbol: Optional[str], after_id: int, limit: int):
+    from pytrading.db.log_repository import LogRepository
+    repo = LogRepository(engine=session.get_bind())
+    # 已归档（可能仍在分批清理）的日志从归档文件读取，归档之后的日志从数据库接续
+    return LogRetentionService.query_with_archive(
+        task_id, symbol, after_id, limit,
+        lambda after, size: repo.query_logs(task_id=task_id, symbol=symbol, after_id=after, limit=size))
+
+
 @app.get("/api/logs/task/{task_id}")
 async def get_task_logs(task_id: str, after_id: int = 0, limit: int = 500):
     """获取任务级日志(增量)"""
     try:
-        from pytrading.db.log_repository import LogRepository
-        db_client = get_db_client()
-        log_repo = LogRepository(db_client=db_client)
-        result = log_repo.query_logs(task_id=task_id, symbol=None, after_id=after_id, limit=min(max(limit, 1), 2000))
-        return result
+        return await run_db(_query_logs, task_id, None, after_id, min(max(limit, 1), 2000))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取任务日志失败: {str(e)}")
 
 
+@app.post("/api/logs/archive")
+async def archive_logs(retention_days: Optional[int] = None):
+    """立即归档过期任务日志（默认使用 LOG_RETENTION_DAYS）"""
+    try:
+        return await run_blocking(LogRetentionService.archive_expired, retention_days)
+    except Exception as e:
+        logger.error(f"日志归档失败 - {str(e)}")
+        raise HTTPException(status_code=500, detail=f"日志归档失败: {str(e)}")
+
+
 @app.get("/api/logs/result")
 async def get_result_logs(task_id: str, symbol: str, after_id: int = 0, limit: int = 500):
     """获取个股级日志(增量)"""
     if not task_id or not symbol:
         raise HTTPException(status_code=400, detail="task_id 和 symbol 为必填")
     try:
-        from pytrading.db.log_repository import LogRepository
-        db_client = get_db_client()
-        log_repo = LogRepository(db_client=db_client)
-        result = log_repo.query_logs(task_id=task_id, symbol=symbol, after_id=after_id, limit=min(max(limit, 1), 2000))
-        return result
+        return await run_db(_query_logs, task_id, symbol, after_id, min(max(limit, 1), 2000))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取个股日志失败: {str(e)}")
 
+# ==================== 服务端推送（SSE） ====================
+
+# 进度推送包含的已结束任务时间窗口（分钟）
+TASK_STREAM_RECENT_MINUTES = 10
+
+
+def _sse_response(generator) -> StreamingResponse:
+    return StreamingResponse(generator, media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+def _last_event_id(request: Request, after_id: int) -> int:
+    """浏览器自动重连时通过 Last-Event-ID 带回最后收到的日志 ID"""
+    try:
+        return max(after_id, int(request.headers.get("last-event-id", 0)))
+    except ValueError:
+        return after_id
+
+
+async def _stream_logs(request: Request, task_id: str, symbol: Optional[str], after_id: int):
+    from pytrading.api.stream_hub import LogTopic, get_stream_hub, sse_stream
+
+    async def query(task_id, symbol, cursor, limit):
+        return await run_db(_query_logs, task_id, symbol, cursor, limit)
+
+    after_id = _last_event_id(request, after_id)
+    key = ("logs", task_id, symbol)
+
+    async def catch_up():
+        # 主题已存在时其游标可能在 after_id 之后，先从数据库补齐中间的日志
+        events = []
+        cursor = after_id
+        while True:
+            result = await query(task_id, symbol, cursor, LogTopic.PAGE_SIZE)
+            events.extend(("log", item, item["id"]) for item in result["items"])
+            if len(result["items"]) < LogTopic.PAGE_SIZE:
+                return events
+            cursor = result["last_id"]
+
+    return _sse_response(sse_stream(get_stream_hub(), key,
+                                    lambda: LogTopic(key, query, task_id, symbol, after_id),
+                                    request.is_disconnected, before=catch_up, min_id=after_id))
+
+
+@app.get("/api/stream/logs/task/{task_id}")
+async def stream_task_logs(request: Request, task_id: str, after_id: int = 0):
+    """推送任务级新日志（SSE，event: log）"""
+    return await _stream_logs(request, task_id, None, after_id)
+
+
+@app.get("/api/stream/logs/result")
+async def stream_result_logs(request: Request, task_id: str, symbol: str, after_id: int = 0):
+    """推送个股级新日志（SSE，event: log）"""
+    return await _stream_logs(request, task_id, symbol, after_id)
+
+
+def _query_task_progress(session) -> List[Dict[str, Any]]:
+    """进行中及最近结束的任务状态（进度推送生产者使用）"""
+    recent = datetime.now() - timedelta(minutes=TASK_STREAM_RECENT_MINUTES)
+    rows = session.query(BacktestTask.task_id, BacktestTask.status, BacktestTask.progress,
+                         BacktestTask.error_message, BacktestTask.updated_at) \
+        .filter((BacktestTask.status.in_(['pending', 'running'])) | (BacktestTask.updated_at >= recent)) \
+        .order_by(BacktestTask.id.desc()).limit(200).all()
+    return [{
+        "task_id": row.task_id,
+        "status": row.status,
+        "progress": row.progress or 0,
+        "error_message": row.error_message,
+        "updated_at": row.updated_at.strftime('%Y-%m-%d %H:%M:%S') if row.updated_at else None,
+    } for row in rows]
+
+
+@app.get("/api/stream/tasks")
+async def stream_task_progress(request: Request):
+    """推送回测任务状态/进度变化（SSE，event: task）"""
+    from pytrading.api.stream_hub import TaskProgressTopic, get_stream_hub, sse_stream
+
+    async def query():
+        return await run_db(_query_task_progress)
+
+    return _sse_response(sse_stream(get_stream_hub(), "tasks", lambda: TaskProgressTopic("tasks", query),
+                                    request.is_disconnected))
+
+
+@app.get("/api/stream/quotes")
+async def stream_quotes(request: Request, symbols: Optional[str] = None):
+    """推送实时行情变化（SSE，event: quotes），symbols 逗号分隔，默认大盘指数"""
+    from pytrading.api.stream_hub import QuoteTopic, get_stream_hub, sse_stream
+    from pytrading.utils.quote_client import get_quote_client
+
+    codes = sorted({s.strip() for s in symbols.split(",") if s.strip()}) if symbols \
+        else [idx['symbol'] for idx in MARKET_INDICES]
+    if len(codes) > 200:
+        raise HTTPException(status_code=400, detail="symbols 最多 200 个")
+    key = ("quotes", tuple(codes))
+    return _sse_response(sse_stream(get_stream_hub(), key,
+                                    lambda: QuoteTopic(key, get_quote_client().fetch_quotes, codes),
+                                    request.is_disconnected))
+
+
+@app.get("/api/stream/stats")
+async def get_stream_stats():
+    """推送主题及订阅数"""
+    from pytrading.api.stream_hub import get_stream_hub
+    return get_stream_hub().stats()
+
+
+async def _cached(name: str, key, ttl: float, loader, *args):
+    """接口缓存：命中直接返回，未命中执行 loader（同步函数在线程池中执行，并发未命中只执行一次）"""
+    if asyncio.iscoroutinefunction(loader):
+        load = lambda: loader(*args)
+    else:
+        load = lambda: run_blocking(loader, *args)
+    if not config.api_cache_enabled:
+        return await load()
+    cache = get_cache(name, ttl, config.api_cache_maxsize)
+    return await cache.get_or_load(key, load)
+
+
+# 表写入提交后失效对应缓存
+invalidate_on_write(Strategy, "strategies")
+invalidate_on_write(StockSymbol, "symbols")
+invalidate_on_write(SystemConfig, "config")
+
+
+def _load_strategies() -> dict:
+    session = get_db_client().get_session()
+    try:
+        strategies = session.query(Strategy).filter_by(is_active=True).all()
+        
+        # 如果数据库中没有策略,返回默认策略
+        if not strategies:
+            default_strategies = [
+                {
+                    "name": "MACD",
+                    "display_name": "MACD趋势策略",
+                    "description": "基于MACD指标的趋势跟踪策略，使用ATR进行仓位管理",
+                    "parameters": [
+                        {"name": "fast_period", "type": "int", "default": 12, "description": "快速EMA周期"},
+                        {"name": "slow_period", "type": "int", "default": 26, "description": "慢速EMA周期"},
+                        {"name": "signal_period", "type": "int", "default": 9, "description": "信号线周期"}
+                    ]
+                },
+                {
+                    "name": "BOLL",
+                    "display_name": "布林带策略", 
+                    "description": "基于布林带的均值回归策略",
+                    "parameters": [
+                        {"name": "period", "type": "int", "default": 20, "description": "均线周期"},
+                        {"name": "std_dev", "type": "float", "default": 2.0, "description": "标准差倍数"}
+                    ]
+                },
+                {
+                    "name": "TURTLE",
+                    "display_name": "海龟策略",
+                    "description": "经典的海龟交易突破策略",
+                    "parameters": [
+                        {"name": "entry_period", "type": "int", "default": 20, "description": "入场突破周期"},
+                        {"name": "exit_period", "type": "int", "default": 10, "description": "出场突破周期"}
+                    ]
+                }
+            ]
+            return {"data": default_strategies}
+        
+        result = []
+        for strategy in strategies:
+            params = strategy.parameters if strategy.parameters else []
+            result.append({
+                "id": strategy.id,
+                "name": strategy.name,
+                "display_name": strategy.display_name,
+                "description": strategy.description,
+                "strategy_type": strategy.strategy_type,
+                "parameters": params
+            })
+        
+        return {"data": result}
+
+    finally:
+        session.close()
+
+
 @app.get("/api/strategies")
 async def get_strategies():
     """获取可用策略列表"""
     try:
-        db_client = get_db_client()
-        session = db_client.get_session()
-        
-        try:
-            strategies = session.query(Strategy).filter_by(is_active=True).all()
-            
-            # 如果数据库中没有策略,返回默认策略
-            if not strategies:
-                default_strategies = [
-                    {
-                        "name": "MACD",
-                        "display_name": "MACD趋势策略",
-                        "description": "基于MACD指标的趋势跟踪策略，使用ATR进行仓位管理",
-                        "parameters": [
-                            {"name": "fast_period", "type": "int", "default": 12, "description": "快速EMA周期"},
-                            {"name": "slow_period", "type": "int", "default": 26, "description": "慢速EMA周期"},
-                            {"name": "signal_period", "type": "int", "default": 9, "description": "信号线周期"}
-                        ]
-                    },
-                    {
-                        "name": "BOLL",
-                        "display_name": "布林带策略", 
-                        "description": "基于布林带的均值回归策略",
-                        "parameters": [
-                            {"name": "period", "type": "int", "default": 20, "description": "均线周期"},
-                            {"name": "std_dev", "type": "float", "default": 2.0, "description": "标准差倍数"}
-                        ]
-                    },
-                    {
-                        "name": "TURTLE",
-                        "display_name": "海龟策略",
-                        "description": "经典的海龟交易突破策略",
-                        "parameters": [
-                            {"name": "entry_period", "type": "int", "default": 20, "description": "入场突破周期"},
-                            {"name": "exit_period", "type": "int", "default": 10, "description": "出场突破周期"}
-                        ]
-                    }
-                ]
-                return {"data": default_strategies}
-            
-            result = []
-            for strategy in strategies:
-                params = strategy.parameters if strategy.parameters else []
-                result.append({
-                    "id": strategy.id,
-                    "name": strategy.name,
-                    "display_name": strategy.display_name,
-                    "description": strategy.description,
-                    "strategy_type": strategy.strategy_type,
-                    "parameters": params
-                })
-            
-            return {"data": result}
-            
-        finally:
-            session.close()
-            
+        return await _cached("strategies", "active", config.api_cache_meta_ttl, _load_strategies)
     except Exception as e:
         logger.error(f"获取策略列表失败 - {str(e)}")
         raise HTTPException(status_code=500, detail=f"获取策略列表失败: {str(e)}")
 
+def _load_symbols() -> dict:
+    session = get_db_client().get_session()
+    try:
+        symbols = session.query(StockSymbol).filter_by(is_active=True).all()
+        
+        # 如果数据库中没有股票,返回默认股票池
+        if not symbols:
+            default_symbols = [{"symbol": s["symbol"], "name": s["name"]} for s in DEFAULT_SYMBOLS]
+            return {"data": default_symbols}
+        
+        result = []
+        for symbol in symbols:
+            result.append({
+                "id": symbol.id,
+                "symbol": symbol.symbol,
+                "name": symbol.name,
+                "market": symbol.market,
+                "industry": symbol.industry
+            })
+        
+        return {"data": result}
+
+    finally:
+        session.close()
+
+
 @app.get("/api/symbols")
 async def get_symbols():
     """获取股票代码列表"""
     try:
-        db_client = get_db_client()
-        session = db_client.get_session()
-        
-        try:
-            symbols = session.query(StockSymbol).filter_by(is_active=True).all()
-            
-            # 如果数据库中没有股票,返回默认股票池
-            if not symbols:
-                default_symbols = [
-                    {"symbol": "SHSE.600000", "name": "浦发银行"},
-                    {"symbol": "SHSE.600036", "name": "招商银行"},
-                    {"symbol": "SHSE.600519", "name": "贵州茅台"},
-                    {"symbol": "SHSE.600887", "name": "伊利股份"},
-                    {"symbol": "SZSE.000001", "name": "平安银行"},
-                    {"symbol": "SZSE.000002", "name": "万科A"},
-                    {"symbol": "SZSE.000625", "name": "长安汽车"},
-                    {"symbol": "SZSE.000858", "name": "五粮液"},
-                ]
-                return {"data": default_symbols}
-            
-            result = []
-            for symbol in symbols:
-                result.append({
-                    "id": symbol.id,
-                    "symbol": symbol.symbol,
-                    "name": symbol.name,
-                    "market": symbol.market,
-                    "industry": symbol.industry
-                })
-            
-            return {"data": result}
-            
-        finally:
-            session.close()
-            
+        return await _cached("symbols", "active", config.api_cache_meta_ttl, _load_symbols)
     except Exception as e:
         logger.error(f"获取股票列表失败 - {str(e)}")
         raise HTTPException(status_code=500, detail=f"获取股票列表失败: {str(e)}")
 
+
+@app.get("/api/symbols/search")
+async def search_symbols(q: str = "", limit: int = 10):
+    """股票代码/名称/拼音首字母检索（输入联想）"""
+    try:
+        return {"data": await run_blocking(get_symbol_index_service().search, q, min(max(limit, 1), 50))}
+    except Exception as e:
+        logger.error(f"股票检索失败 - {str(e)}")
+        raise HTTPException(status_code=500, detail=f"股票检索失败: {str(e)}")
+
 @app.post("/api/backtest/start")
 async def start_backtest(backtest_config: dict):
     """启动回测任务"""
@@ -687,31 +883,29 @@ async def start_backtest(backtest_config: dict):
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"创建回测任务失败: {str(e)}")
 
+def _query_backtest_status(session, task_id: str):
+    task = session.query(BacktestTask).filter_by(task_id=task_id).first()
+    if not task:
+        return None
+    return {
+        "task_id": task.task_id,
+        "status": task.status,
+        "progress": task.progress,
+        "start_time": task.start_time.strftime('%Y-%m-%d %H:%M:%S') if task.start_time else None,
+        "end_time": task.end_time.strftime('%Y-%m-%d %H:%M:%S') if task.end_time else None,
+        "message": task.error_message if task.error_message else "任务进行中" if task.status == 'running' else "任务完成"
+    }
+
+
 @app.get("/api/backtest/status/{task_id}")
 async def get_backtest_status(task_id: str):
     """获取回测任务状态"""
     try:
-        db_client = get_db_client()
-        session = db_client.get_session()
-        
-        try:
-            task = session.query(BacktestTask).filter_by(task_id=task_id).first()
-            
-            if not task:
-                raise HTTPException(status_code=404, detail="任务不存在")
-            
-            return {
-                "task_id": task.task_id,
-                "status": task.status,
-                "progress": task.progress,
-                "start_time": task.start_time.strftime('%Y-%m-%d %H:%M:%S') if task.start_time else None,
-                "end_time": task.end_time.strftime('%Y-%m-%d %H:%M:%S') if task.end_time else None,
-                "message": task.error_message if task.error_message else "任务进行中" if task.status == 'running' else "任务完成"
-            }
-            
-        finally:
-            session.close()
-            
+        status = await run_db(_query_backtest_status, task_id)
+        if not status:
+            raise HTTPException(status_code=404, detail="任务不存在")
+        return status
+
     except HTTPException:
         raise
     except Exception as e:
@@ -832,6 +1026,53 @@ async def restart_backtest(task_id: str):
         logger.error(f"重启任务失败 - {str(e)}")
         raise HTTPException(status_code=500, detail=f"重启任务失败: {str(e)}")
 
+def _query_backtest_tasks(session, status: Optional[str], page: int, per_page: int):
+    query = session.query(BacktestTask)
+
+    # 状态筛选
+    if status:
+        query = query.filter_by(status=status)
+
+    # 获取总数
+    total_count = query.count()
+
+    # 分页
+    offset = (page - 1) * per_page
+    tasks = query.order_by(BacktestTask.created_at.desc()).offset(offset).limit(per_page).all()
+
+    result = []
+    for task in tasks:
+        # 计算耗时：running 状态用当前时间，其他状态用 updated_at
+        end_time = datetime.now() if task.status == 'running' else task.updated_at
+        duration = int((end_time - task.created_at).total_seconds()) if end_time and task.created_at else None
+
+        result.append({
+            "id": task.id,
+            "task_id": task.task_id,
+            "strategy_id": task.strategy_id,
+            "symbols": task.symbols,
+            "symbol_count": len(task.symbols) if task.symbols else 0,
+            "start_time": task.start_time.strftime('%Y-%m-%d %H:%M:%S') if task.start_time else None,
+            "end_time": task.end_time.strftime('%Y-%m-%d %H:%M:%S') if task.end_time else None,
+            "status": task.status,
+            "progress": task.progress,
+            "parameters": task.parameters,
+            "result_summary": task.result_summary,
+            "error_message": task.error_message,
+            "created_at": task.created_at.strftime('%Y-%m-%d %H:%M:%S') if task.created_at else None,
+            "updated_at": task.updated_at.strftime('%Y-%m-%d %H:%M:%S') if task.updated_at else None,
+            "duration": duration
+        })
+
+    return {
+        "data": result,
+        "total": total_count,
+        "page": page,
+        "per_page": per_page,
+        "total_pages": (total_count + per_page - 1) // per_page
+    }
+
+
 @app.get("/api/backtest/tasks")
 async def get_backtest_tasks(
     status: Optional[str] = None,
@@ -840,58 +1081,7 @@ async def get_backtest_tasks(
 ):
     """获取回测任务列表"""
     try:
-        db_client = get_db_client()
-        session = db_client.get_session()
-        
-        try:
-            query = session.query(BacktestTask)
-            
-            # 状态筛选
-            if status:
-                query = query.filter_by(status=status)
-            
-            # 获取总数
-            total_count = query.count()
-            
-            # 分页
-            offset = (page - 1) * per_page
-            tasks = query.order_by(BacktestTask.created_at.desc()).offset(offset).limit(per_page).all()
-            
-            result = []
-            for task in tasks:
-                # 计算耗时：running 状态用当前时间，其他状态用 updated_at
-                end_time = datetime.now() if task.status == 'running' else task.updated_at
-                duration = int((end_time - task.created_at).total_seconds()) if end_time and task.created_at else None
-
-                result.append({
-                    "id": task.id,
-                    "task_id": task.task_id,
-                    "strategy_id": task.strategy_id,
-                    "symbols": task.symbols,
-                    "symbol_count": len(task.symbols) if task.symbols else 0,
-                    "start_time": task.start_time.strftime('%Y-%m-%d %H:%M:%S') if task.start_time else None,
-                    "end_time": task.end_time.strftime('%Y-%m-%d %H:%M:%S') if task.end_time else None,
-                    "status": task.status,
-                    "progress": task.progress,
-                    "parameters": task.parameters,
-                    "result_summary": task.result_summary,
-                    "error_message": task.error_message,
-                    "created_at": task.created_at.strftime('%Y-%m-%d %H:%M:%S') if task.created_at else None,
-                    "updated_at": task.updated_at.strftime('%Y-%m-%d %H:%M:%S') if task.updated_at else None,
-                    "duration": duration
-                })
-            
-            return {
-                "data": result,
-                "total": total_count,
-                "page": page,
-                "per_page": per_page,
-                "total_pages": (total_count + per_page - 1) // per_page
-            }
-            
-        finally:
-            session.close()
-            
+        return FastJSONResponse(await run_db(_query_backtest_tasks, status, page, per_page))
     except Exception as e:
         logger.error(f"获取任务列表失败 - {str(e)}")
         raise HTTPException(status_code=500, detail=f"获取任务列表失败: {str(e)}")
@@ -936,9 +1126,9 @@ async def get_task_results(task_id: str):
                     "lose_count": r.lose_count,
                 })
             
-            return {
+            return FastJSONResponse({
                 "data": result_list
-            }
+            })
         finally:
             session.close()
     except HTTPException:
@@ -946,9 +1136,21 @@ async def get_task_results(task_id: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取任务结果失败: {str(e)}")
 
+@app.get("/api/backtest/tasks/{task_id}/summary")
+async def get_task_summary(task_id: str):
+    """获取任务结果汇总（均值、分位数、胜率分布、趋势类型计数）"""
+    try:
+        summary = await run_blocking(ResultSummaryService.get_task_summary, task_id)
+    except Exception as e:
+        logger.error(f"获取任务汇总失败 - {str(e)}")
+        raise HTTPException(status_code=500, detail=f"获取任务汇总失败: {str(e)}")
+    if summary is None:
+        raise HTTPException(status_code=404, detail="任务不存在")
+    return summary
+
 @app.delete("/api/backtest/tasks/{task_id}")
 async def delete_backtest_task(task_id: str):
-    """删除回测任务及其关联的回测结果"""
+    """删除回测任务及其关联的回测结果和日志"""
     try:
         db_client = get_db_client()
         session = db_client.get_session()
@@ -967,13 +1169,16 @@ async def delete_backtest_task(task_id: str):
             # 删除任务
             session.delete(task)
             session.commit()
+            MySQLBackTestSaver.invalidate_cache()
 
-            logger.info(f"任务已删除 - task_id: {task_id}")
+            # 分批删除任务日志及归档文件（在线程池中执行，不阻塞事件循环）
+            deleted_logs = await run_blocking(LogRetentionService.purge_task, task_id)
+            logger.info(f"任务已删除 - task_id: {task_id}, 删除日志 {deleted_logs} 条")
 
             return {
                 "task_id": task_id,
                 "status": "deleted",
-                "message": f"任务已删除，同时删除了 {deleted_results} 条关联回测结果"
+                "message": f"任务已删除，同时删除了 {deleted_results} 条关联回测结果和 {deleted_logs} 条日志"
             }
 
         finally:
@@ -1006,6 +1211,7 @@ async def delete_backtest_result(result_id: int):
             # 删除回测结果
             session.delete(result)
             session.commit()
+            MySQLBackTestSaver.invalidate_cache()
 
             logger.info(f"回测结果已删除 - result_id: {result_id}, task_id: {task_id}, symbol: {symbol}")
 
@@ -1024,41 +1230,53 @@ async def delete_backtest_result(result_id: int):
         logger.error(f"删除回测结果失败 - {str(e)}")
         raise HTTPException(status_code=500, detail=f"删除回测结果失败: {str(e)}")
 
-@app.get("/api/config")
-async def get_config():
-    """获取系统配置"""
-    base_config = {
+def _base_config() -> dict:
+    return {
         "trading_mode": os.getenv("TRADING_MODE", "backtest"),
         "db_type": os.getenv("DB_TYPE", "mysql"),
         "save_db": os.getenv("SAVE_DB", "true").lower() == "true",
         "symbols": os.getenv("SYMBOLS", "").split(",") if os.getenv("SYMBOLS") else []
     }
 
+
+def _load_config() -> dict:
+    """读取系统配置；数据库异常直接抛出（不进入缓存）"""
+    base_config = _base_config()
+
     # 从 SystemConfig 表读取定时回测配置
+    db_client = get_db_client()
+    session = db_client.get_session()
     try:
-        db_client = get_db_client()
-        session = db_client.get_session()
-        try:
-            for key in ["watchlist_auto_backtest_enabled", "watchlist_auto_backtest_time"]:
-                row = session.query(SystemConfig).filter_by(config_key=key).first()
-                if row:
-                    if key == "watchlist_auto_backtest_enabled":
-                        base_config[key] = row.config_value == "true"
-                    else:
-                        base_config[key] = row.config_value
+        for key in ["watchlist_auto_backtest_enabled", "watchlist_auto_backtest_time"]:
+            row = session.query(SystemConfig).filter_by(config_key=key).first()
+            if row:
+                if key == "watchlist_auto_backtest_enabled":
+                    base_config[key] = row.config_value == "true"
                 else:
-                    if key == "watchlist_auto_backtest_enabled":
-                        base_config[key] = False
-                    else:
-                        base_config[key] = "17:00"
-        finally:
-            session.close()
+                    base_config[key] = row.config_value
+            else:
+                if key == "watchlist_auto_backtest_enabled":
+                    base_config[key] = False
+                else:
+                    base_config[key] = "17:00"
+    finally:
+        session.close()
+
+    return base_config
+
+
+@app.get("/api/config")
+async def get_config():
+    """获取系统配置"""
+    try:
+        return await _cached("config", "system", config.api_cache_meta_ttl, _load_config)
     except Exception as e:
+        # 数据库临时异常时返回默认值，但不缓存，下次请求重新读取
         logger.warning(f"读取定时回测配置失败: {e}")
+        base_config = _base_config()
         base_config["watchlist_auto_backtest_enabled"] = False
         base_config["watchlist_auto_backtest_time"] = "17:00"
-
-    return base_config
+        return base_config
 
 @app.post("/api/config")
 async def update_config(config: dict):
@@ -1100,115 +1318,20 @@ async def update_config(config: dict):
 
 def sync_kline_data(symbol: str, days: int = 365, start_date: str = None, end_date: str = None):
     """
-    同步K线数据到数据库
+    增量同步K线数据到数据库（只拉取缺失的交易日）
     Args:
         symbol: 股票代码
         days: 获取天数，默认为365天（仅在未指定 start_date/end_date 时使用）
         start_date: 可选，回测开始日期 (YYYY-MM-DD)
         end_date: 可选，回测结束日期 (YYYY-MM-DD)
+    Returns:
+        bool: 同步成功（含数据已最新）返回 True；上游无数据（代码无效或拉取失败）或出错返回 False
     """
-    from datetime import datetime, timedelta
+    from pytrading.service.kline_service import KlineService
 
     try:
-        # 计算日期范围
-        if start_date and end_date:
-            # 使用指定日期范围，多取60天确保MACD预热
-            fetch_start = (datetime.strptime(start_date, '%Y-%m-%d') - timedelta(days=60)).strftime('%Y-%m-%d')
-            fetch_end = end_date
-        else:
-            fetch_end = datetime.now().strftime('%Y-%m-%d')
-            fetch_start = (datetime.now() - timedelta(days=days + 60)).strftime('%Y-%m-%d')  # 多取60天以确保有足够数据计算MACD
-
-        # 获取历史K线数据
-        bars = history(
-            symbol=symbol,
-            frequency='1d',
-            start_time=fetch_start,
-            end_time=fetch_end,
-            fields='symbol,open,high,low,close,volume,eob',
-            df=True
-        )
-
-        if bars is None or bars.empty:
-            logger.warning(f"获取K线数据失败: {symbol}")
-            return False
-
-        # 计算MACD
-        close_prices = bars['close'].values.astype(float)
-        diff, dea, macd_hist = TA_MACD(close_prices, fastperiod=12, slowperiod=26, signalperiod=9)
-
-        # 获取数据库连接
-        db_client = get_db_client()
-        session = db_client.get_session()
-
-        try:
-            # 裁剪到目标范围
-            if start_date and end_date:
-                # 按日期范围过滤：保留 start_date ~ end_date 的数据
-                # eob 是 tz-aware datetime64，用 pd.Timestamp 对齐类型
-                target_start = pd.Timestamp(start_date).tz_localize(bars['eob'].dt.tz) if bars['eob'].dt.tz else pd.Timestamp(start_date)
-                mask = bars['eob'] >= target_start
-                trim_idx = mask.idxmax() if mask.any() else 0
-                bars = bars.loc[trim_idx:].reset_index(drop=True)
-                diff = diff[trim_idx:]
-                dea = dea[trim_idx:]
-                macd_hist = macd_hist[trim_idx:]
-            else:
-                # 保留最近的 days 天数据
-                bars = bars.tail(days).reset_index(drop=True)
-                diff = diff[-days:]
-                dea = dea[-days:]
-                macd_hist = macd_hist[-days:]
-
-            saved_count = 0
-            for i in range(len(bars)):
-                row = bars.iloc[i]
-                # 解析日期
-                if 'eob' in row:
-                    date_val = row['eob']
-                else:
-                    continue
-
-                # 检查是否已存在
-                existing = session.query(StockKline).filter_by(
-                    symbol=symbol,
-                    date=date_val.date() if isinstance(date_val, datetime) else date_val
-                ).first()
-
-                if existing:
-                    # 更新
-                    existing.open = float(row['open']) if pd.notna(row['open']) else None
-                    existing.high = float(row['high']) if pd.notna(row['high']) else None
-                    existing.low = float(row['low']) if pd.notna(row['low']) else None
-                    existing.close = float(row['close']) if pd.notna(row['close']) else None
-                    existing.volume = int(row['volume']) if pd.notna(row['volume']) and row['volume'] else 0
-                    existing.macd_diff = float(diff[i]) if i < len(diff) and pd.notna(diff[i]) else None
-                    existing.macd_dea = float(dea[i]) if i < len(dea) and pd.notna(dea[i]) else None
-                    existing.macd_hist = float(macd_hist[i]) if i < len(macd_hist) and pd.notna(macd_hist[i]) else None
-                else:
-                    # 新增
-                    kline = StockKline(
-                        symbol=symbol,
-                        date=date_val.date() if isinstance(date_val, datetime) else date_val,
-                        open=float(row['open']) if pd.notna(row['open']) else None,
-                        high=float(row['high']) if pd.notna(row['high']) else None,
-                        low=float(row['low']) if pd.notna(row['low']) else None,
-                        close=float(row['close']) if pd.notna(row['close']) else None,
-                        volume=int(row['volume']) if pd.notna(row['volume']) and row['volume'] else 0,
-                        macd_diff=float(diff[i]) if i < len(diff) and pd.notna(diff[i]) else None,
-                        macd_dea=float(dea[i]) if i < len(dea) and pd.notna(dea[i]) else None,
-                        macd_hist=float(macd_hist[i]) if i < len(macd_hist) and pd.notna(macd_hist[i]) else None
-                    )
-                    session.add(kline)
-                    saved_count += 1
-
-            session.commit()
-            logger.info(f"K线数据同步完成: {symbol}, 新增/更新 {saved_count} 条")
-            return True
-
-        finally:
-            session.close()
-
+        KlineService.sync(symbol, days, start_date=start_date, end_date=end_date)
+        return True
     except Exception as e:
         logger.error(f"同步K线数据失败: {symbol}, error: {str(e)}")
         return False
@@ -1237,7 +1360,7 @@ async def get_trade_records(task_id: str, symbol: Optional[str] = None):
                 return '平'
             return r.action
 
-        return {
+        return FastJSONResponse({
             "data": [
                 {
                     "action": r.action,
@@ -1250,68 +1373,126 @@ async def get_trade_records(task_id: str, symbol: Optional[str] = None):
                 }
                 for r in records
             ]
-        }
+        })
     except Exception as e:
         logger.error(f"获取交易记录失败: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/api/kline/{symbol}")
-async def get_kline_data(symbol: str, start_date: Optional[str] = None, end_date: Optional[str] = None):
-    """获取K线数据"""
-    try:
-        db_client = get_db_client()
-        session = db_client.get_session()
+def _kline_float(value):
+    return float(value) if value is not None else None
 
-        try:
-            # 查询K线数据，按日期升序排列
-            query = session.query(StockKline).filter_by(
-                symbol=symbol
-            )
 
-            # MACD预热需要额外60天数据
-            macd_warmup_days = 60
+def _query_kline(session, symbol: str, start_date: Optional[str], end_date: Optional[str],
+                 if_none_match: Optional[str], stamp: tuple):
+    """查询K线明细
 
-            # 日期范围过滤（包含预热期）
-            if start_date:
-                from datetime import datetime as dt, timedelta
-                start_dt = dt.strptime(start_date, '%Y-%m-%d') - timedelta(days=macd_warmup_days)
-                query = query.filter(StockKline.date >= start_dt.date())
-            if end_date:
-                from datetime import datetime as dt
-                query = query.filter(StockKline.date <= dt.strptime(end_date, '%Y-%m-%d').date())
+    Returns:
+        None: 无数据
+        (headers, None): 与客户端 ETag 一致，应返回 304
+        (headers, rows): K线行
+    """
+    filters = [StockKline.symbol == symbol]
+
+    # MACD预热需要额外60天数据
+    macd_warmup_days = 60
+
+    # 日期范围过滤（包含预热期）
+    if start_date:
+        start_dt = datetime.strptime(start_date, '%Y-%m-%d') - timedelta(days=macd_warmup_days)
+        filters.append(StockKline.date >= start_dt.date())
+    if end_date:
+        filters.append(StockKline.date <= datetime.strptime(end_date, '%Y-%m-%d').date())
+
+    # 先用聚合查询生成校验值，数据未变化时不再读取明细；
+    # upsert 原地更新不会改变 created_at，因此把各数值列的合计一并计入校验值
+    content_sums = [func.sum(column) for column in (
+        StockKline.open, StockKline.high, StockKline.low, StockKline.close, StockKline.volume,
+        StockKline.macd_diff, StockKline.macd_dea, StockKline.macd_hist)]
+    count, max_date, last_modified, *checksum = session.query(
+        func.count(StockKline.id), func.max(StockKline.date), func.max(StockKline.created_at), *content_sums
+    ).filter(*filters).one()
+    if not count:
+        return None
+
+    etag_source = stamp + (count, max_date, last_modified) + tuple(checksum)
+    etag = '"' + hashlib.md5("|".join(map(str, etag_source)).encode()).hexdigest() + '"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified:
+        headers["Last-Modified"] = formatdate(last_modified.timestamp(), usegmt=True)
+    if if_none_match == etag:
+        return headers, None
+
+    # 只查询需要的列，避免构造 ORM 对象
+    rows = session.query(
+        StockKline.date, StockKline.open, StockKline.high, StockKline.low, StockKline.close,
+        StockKline.volume, StockKline.macd_diff, StockKline.macd_dea, StockKline.macd_hist
+    ).filter(*filters).order_by(StockKline.date.asc()).all()
+    return headers, rows
 
-            klines = query.order_by(StockKline.date.asc()).all()
 
-            if not klines:
-                # 如果没有数据，返回提示信息
-                return {
-                    "symbol": symbol,
-                    "data": [],
-                    "message": "暂无K线数据，请先同步"
-                }
+@app.get("/api/kline/{symbol}")
+async def get_kline_data(symbol: str, request: Request, start_date: Optional[str] = None,
+                         end_date: Optional[str] = None, format: Optional[str] = None,
+                         max_points: Optional[int] = Query(None, ge=3)):
+    """获取K线数据
 
-            result = []
-            for k in klines:
-                result.append({
-                    "date": k.date.strftime('%Y-%m-%d') if k.date else None,
-                    "open": float(k.open) if k.open else None,
-                    "high": float(k.high) if k.high else None,
-                    "low": float(k.low) if k.low else None,
-                    "close": float(k.close) if k.close else None,
-                    "volume": k.volume,
-                    "macd_diff": float(k.macd_diff) if k.macd_diff else None,
-                    "macd_dea": float(k.macd_dea) if k.macd_dea else None,
-                    "macd_hist": float(k.macd_hist) if k.macd_hist else None
-                })
+    Args:
+        format: 'columnar' 时按列返回（date/open/high/... 各为一个数组），否则按行返回
+        max_points: 可选，超过该点数时按收盘价做 LTTB 降采样
 
+    响应带 ETag / Last-Modified，数据未变化时返回 304。
+    """
+    try:
+        stamp = (symbol, start_date, end_date, format, max_points)
+        result = await run_db(_query_kline, symbol, start_date, end_date, request.headers.get("if-none-match"), stamp)
+        if result is None:
             return {
                 "symbol": symbol,
-                "data": result
+                "data": [],
+                "message": "暂无K线数据，请先同步"
             }
+        headers, rows = result
+        if rows is None:
+            return Response(status_code=304, headers=headers)
+
+        if max_points and len(rows) > max_points:
+            from pytrading.utils.downsample import lttb_indices
+            closes = [_kline_float(r.close) for r in rows]
+            rows = [rows[i] for i in lttb_indices(np.array(closes, dtype=float), max_points)]
+
+        if format == 'columnar':
+            data = {
+                "date": [r.date.strftime('%Y-%m-%d') for r in rows],
+                "open": [_kline_float(r.open) for r in rows],
+                "high": [_kline_float(r.high) for r in rows],
+                "low": [_kline_float(r.low) for r in rows],
+                "close": [_kline_float(r.close) for r in rows],
+                "volume": [r.volume for r in rows],
+                "macd_diff": [_kline_float(r.macd_diff) for r in rows],
+                "macd_dea": [_kline_float(r.macd_dea) for r in rows],
+                "macd_hist": [_kline_float(r.macd_hist) for r in rows],
+            }
+        else:
+            data = [
+                {
+                    "date": r.date.strftime('%Y-%m-%d') if r.date else None,
+                    "open": _kline_float(r.open),
+                    "high": _kline_float(r.high),
+                    "low": _kline_float(r.low),
+                    "close": _kline_float(r.close),
+                    "volume": r.volume,
+                    "macd_diff": _kline_float(r.macd_diff),
+                    "macd_dea": _kline_float(r.macd_dea),
+                    "macd_hist": _kline_float(r.macd_hist)
+                }
+                for r in rows
+            ]
 
-        finally:
-            session.close()
+        return FastJSONResponse(
+            content={"symbol": symbol, "format": format or "rows", "data": data},
+            headers=headers,
+        )
 
     except Exception as e:
         logger.error(f"获取K线数据失败: {symbol}, error: {str(e)}")
@@ -1320,18 +1501,38 @@ async def get_kline_data(symbol: str, start_date: Optional[str] = None, end_date
 
 @app.post("/api/kline/sync")
 async def sync_kline(sync_request: dict):
-    """同步K线数据"""
+    """同步K线数据
+
+    - symbol: 同步单只股票（同步执行）
+    - symbols / index_symbol: 批量同步股票列表或指数成分股（后台任务，返回 job_id）
+    """
     try:
         symbol = sync_request.get("symbol")
+        symbols = sync_request.get("symbols")
+        index_symbol = sync_request.get("index_symbol")
         days = sync_request.get("days", 365)  # 默认365天
         start_date = sync_request.get("start_date")
         end_date = sync_request.get("end_date")
 
+        if symbols or index_symbol:
+            from pytrading.service.kline_sync_job import KlineSyncJob
+            if isinstance(symbols, str):
+                symbols = [s.strip() for s in symbols.split(',') if s.strip()]
+            if isinstance(index_symbol, str):
+                index_symbol = [s.strip() for s in index_symbol.split(',') if s.strip()]
+            job = KlineSyncJob.submit(symbols=symbols, index_symbols=index_symbol, days=days,
+                                      start_date=start_date, end_date=end_date)
+            return {
+                "status": "accepted",
+                "message": "K线批量同步任务已创建",
+                "job_id": job.job_id,
+            }
+
         if not symbol:
             raise HTTPException(status_code=400, detail="缺少symbol参数")
 
-        # 调用同步函数
-        success = sync_kline_data(symbol, days, start_date=start_date, end_date=end_date)
+        # 单只同步在K线专用线程池中执行（受并发上限和超时约束）
+        success = await run_upstream('kline', sync_kline_data, symbol, days, start_date=start_date, end_date=end_date)
 
         if success:
             return {
@@ -1345,78 +1546,73 @@ async def sync_kline(sync_request: dict):
 
     except HTTPException:
         raise
+    except UpstreamUnavailable as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
     except Exception as e:
         logger.error(f"同步K线数据失败: {str(e)}")
         raise HTTPException(status_code=500, detail=f"同步K线数据失败: {str(e)}")
 
-@app.get("/api/stock-info/{symbol}")
-async def get_stock_info(symbol: str):
-    """获取股票基本信息"""
-    try:
-        # 先从数据库获取股票基本信息（复用 /api/symbols 的逻辑）
-        db_client = get_db_client()
-        session = db_client.get_session()
+@app.get("/api/kline/sync/jobs")
+async def list_kline_sync_jobs():
+    """获取K线批量同步任务列表"""
+    from pytrading.service.kline_sync_job import KlineSyncJob
+    return {"data": [job.to_dict() for job in KlineSyncJob.list_jobs()]}
 
-        db_name = None
-        db_industry = None
 
-        try:
-            # 获取所有活跃的股票
-            all_symbols = session.query(StockSymbol).filter_by(is_active=True).all()
-
-            if all_symbols:
-                # 精确匹配或部分匹配
-                symbol_lower = symbol.lower()
-                for s in all_symbols:
-                    if s.symbol.lower() == symbol_lower or symbol_lower.endswith(s.symbol.lower()) or s.symbol.lower().endswith(symbol_lower):
-                        db_name = s.name
-                        db_industry = s.industry
-                        break
-            else:
-                # 如果数据库没有，返回默认股票池中查找
-                default_symbols = [
-                    {"symbol": "SHSE.600000", "name": "浦发银行", "industry": "银行"},
-                    {"symbol": "SHSE.600036", "name": "招商银行", "industry": "银行"},
-                    {"symbol": "SHSE.600519", "name": "贵州茅台", "industry": "白酒"},
-                    {"symbol": "SHSE.600887", "name": "伊利股份", "industry": "食品饮料"},
-                    {"symbol": "SZSE.000001", "name": "平安银行", "industry": "银行"},
-                    {"symbol": "SZSE.000002", "name": "万科A", "industry": "房地产"},
-                    {"symbol": "SZSE.000625", "name": "长安汽车", "industry": "汽车"},
-                    {"symbol": "SZSE.000858", "name": "五粮液", "industry": "白酒"},
-                ]
-                for ds in default_symbols:
-                    if ds["symbol"].lower() == symbol.lower():
-                        db_name = ds["name"]
-                        db_industry = ds["industry"]
-                        break
+@app.get("/api/kline/sync/jobs/{job_id}")
+async def get_kline_sync_job(job_id: str):
+    """获取K线批量同步任务进度"""
+    from pytrading.service.kline_sync_job import KlineSyncJob
+    job = KlineSyncJob.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="同步任务不存在")
+    return job.to_dict()
 
-        finally:
-            session.close()
 
-        # 调用掘金API获取更多股票信息
-        try:
-            # 使用回测token获取股票信息（live token没有数据查询权限）
-            original_token = config.token
-            config.token = config.backtest_trading_token
-            set_token(config.token)
-            stock_info_list = get_instruments(symbols=symbol)
-            # 恢复原token
-            config.token = original_token
-            set_token(config.token)
-            stock_info = stock_info_list[0] if stock_info_list and len(stock_info_list) > 0 else {}
-        except Exception as e:
-            logger.warning(f"掘金API获取失败: {symbol}, error: {str(e)}")
-            stock_info = {}
+@app.post("/api/kline/sync/jobs/{job_id}/cancel")
+async def cancel_kline_sync_job(job_id: str):
+    """取消K线批量同步任务"""
+    from pytrading.service.kline_sync_job import KlineSyncJob
+    job = KlineSyncJob.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="同步任务不存在")
+    job.cancel()
+    return {"status": "success", "message": "已请求取消同步任务", "job_id": job_id}
+
+
+def _fetch_gm_instrument(symbol: str) -> dict:
+    """掘金标的信息（回测 token 的数据客户端工作进程中执行，不切换本进程的全局 token）"""
+    stock_info_list = get_gm_data_client().get_instruments(symbols=symbol)
+    return stock_info_list[0] if stock_info_list and len(stock_info_list) > 0 else {}
 
 
-        # 使用AkShare工具类获取详细信息
+@app.get("/api/stock-info/{symbol}")
+async def get_stock_info(symbol: str):
+    """获取股票基本信息"""
+    try:
+        # 先从股票索引获取名称和行业（代码精确或后缀匹配）
+        entry = await run_blocking(get_symbol_index_service().lookup, symbol) or {}
+        db_name, db_industry = entry.get("name"), entry.get("industry")
+
+        # 掘金与AkShare各自在专用线程池中并发获取，任一失败或超时不影响另一个
+        gm_result, akshare_result = await asyncio.gather(
+            run_upstream('gm', _fetch_gm_instrument, symbol),
+            run_upstream('akshare', akshare_util.get_stock_individual_info, symbol),
+            return_exceptions=True,
+        )
+        if isinstance(gm_result, Exception):
+            logger.warning(f"掘金API获取失败: {symbol}, error: {str(gm_result)}")
+            stock_info = {}
+        else:
+            stock_info = gm_result
+
         # 尝试使用AkShare获取详细信息，失败则使用掘金数据
-        try:
-            akshare_info = akshare_util.get_stock_individual_info(symbol)
-        except Exception as e:
-            logger.warning(f"AkShare调用失败，使用掘金数据: {str(e)}")
+        if isinstance(akshare_result, Exception):
+            logger.warning(f"AkShare调用失败，使用掘金数据: {str(akshare_result)}")
             akshare_info = {}
-        
+        else:
+            akshare_info = akshare_result
+
         # 构建返回数据（优先使用AkShare数据，丰富掘金API字段）
         # 计算市值（如果AkShare失败，使用昨收价*股本估算）
         total_shares = akshare_info.get("总股本")
@@ -1539,7 +1735,8 @@ async def get_watchlist(
     try:
         from pytrading.service.watchlist_service import WatchlistService
 
-        result = WatchlistService.get_watchlist(
+        result = await run_blocking(
+            WatchlistService.get_watchlist,
             sort_by=sort_by,
             sort_order=sort_order,
             watch_type=watch_type,
@@ -1549,23 +1746,12 @@ async def get_watchlist(
         data = []
         for entry in result["data"]:
             item = entry["item"]
-            # 获取策略名称
-            strategy_name = None
-            from pytrading.db.mysql import Strategy
-            session = WatchlistService._get_session()
-            try:
-                strategy = session.query(Strategy).filter(Strategy.id == item.strategy_id).first()
-                if strategy:
-                    strategy_name = strategy.name
-            finally:
-                session.close()
-
             data.append({
                 "id": item.id,
                 "symbol": item.symbol,
                 "name": item.name,
                 "strategy_id": item.strategy_id,
-                "strategy_name": strategy_name,
+                "strategy_name": entry["strategy_name"],
                 "watch_type": item.watch_type,
                 "previous_watch_type": item.previous_watch_type,
                 "type_changed": item.type_changed,
@@ -1658,133 +1844,92 @@ async def start_watchlist_backtest():
 
 # ==================== 实时行情 API ====================
 
-def fetch_tencent_quote(code: str) -> dict:
-    """从腾讯财经获取行情"""
-    import requests
-    import json
-    
-    # 转换代码格式
-    if code.startswith('SHSE.'):
-        symbol = 'sh' + code.split('.')[-1]
-    elif code.startswith('SZSE.'):
-        symbol = 'sz' + code.split('.')[-1]
-    else:
-        symbol = code
-    
-    url = f"https://web.ifzq.gtimg.cn/appstock/app/fqkline/get?param={symbol},day,,,1,qf"
-    try:
-        resp = requests.get(url, timeout=10)
-        data = resp.json()
-        qt = data.get('data', {}).get(symbol, {}).get('qt', {}).get(symbol, [])
-        if len(qt) > 32:
-            # qt[3] = 当前价, qt[31] = 涨跌额, qt[32] = 涨跌幅%
-            return {
-                "price": float(qt[3]),
-                "change_amount": float(qt[31]),
-                "change_pct": float(qt[32]),
-            }
-    except Exception as e:
-        logger.warning(f"获取行情失败: {code}, {e}")
-    return {}
+MARKET_INDICES = [
+    {"code": "000001", "name": "上证指数", "symbol": "SHSE.000001"},
+    {"code": "399001", "name": "深证成指", "symbol": "SZSE.399001"},
+    {"code": "399006", "name": "创业板指", "symbol": "SZSE.399006"},
+    {"code": "000300", "name": "沪深300", "symbol": "SHSE.000300"},
+]
+
+
+async def _load_market_indices() -> dict:
+    """一次批量请求获取全部指数行情"""
+    from pytrading.utils.quote_client import get_quote_client
+    quotes = await get_quote_client().fetch_quotes([idx['symbol'] for idx in MARKET_INDICES])
+
+    result = []
+    for idx in MARKET_INDICES:
+        quote = quotes.get(idx['symbol'])
+        if quote:
+            result.append({
+                "code": idx['code'],
+                "name": idx['name'],
+                "symbol": idx['symbol'],
+                "price": quote.get('price'),
+                "change_pct": quote.get('change_pct'),
+                "change_amount": quote.get('change_amount'),
+            })
+
+    return {"data": result}
 
 
 @app.get("/api/market/indices")
 async def get_market_indices():
     """获取大盘指数实时行情"""
     try:
-        indices = [
-            {"code": "000001", "name": "上证指数", "symbol": "SHSE.000001"},
-            {"code": "399001", "name": "深证成指", "symbol": "SZSE.399001"},
-            {"code": "399006", "name": "创业板指", "symbol": "SZSE.399006"},
-            {"code": "000300", "name": "沪深300", "symbol": "SHSE.000300"},
-        ]
-        
-        result = []
-        for idx in indices:
-            quote = fetch_tencent_quote(idx['symbol'])
-            if quote:
-                result.append({
-                    "code": idx['code'],
-                    "name": idx['name'],
-                    "symbol": idx['symbol'],
-                    "price": quote.get('price'),
-                    "change_pct": quote.get('change_pct'),
-                    "change_amount": quote.get('change_amount'),
-                })
-        
-        return {"data": result}
+        return await _cached("market_indices", "all", config.api_cache_market_ttl, _load_market_indices)
+    except UpstreamUnavailable as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
     except Exception as e:
         logger.error(f"获取大盘指数失败: {str(e)}")
         raise HTTPException(status_code=500, detail=f"获取大盘指数失败: {str(e)}")
 
 
+async def _load_market_summary() -> dict:
+    from pytrading.service.spot_snapshot_service import get_spot_snapshot_service
+    snapshot = await run_upstream('akshare', get_spot_snapshot_service().get)
+    return {"data": snapshot.summary()}
+
+
 @app.get("/api/market/summary")
 async def get_market_summary():
     """获取市场整体情况（涨跌停、成交额等）"""
     try:
-        import akshare as ak
-        spot = ak.stock_zh_a_spot_em()
-        
-        # 涨跌停统计
-        limit_up = len(spot[spot['涨跌幅'] >= 9.9])
-        limit_down = len(spot[spot['涨跌幅'] <= -9.9])
-        
-        # 上涨下跌家数
-        up_count = len(spot[spot['涨跌幅'] > 0])
-        down_count = len(spot[spot['涨跌幅'] < 0])
-        flat_count = len(spot[spot['涨跌幅'] == 0])
-        
-        # 成交总额（亿）
-        total_amount = spot['成交额'].sum() / 1e8
-        
-        return {
-            "data": {
-                "limit_up": limit_up,
-                "limit_down": limit_down,
-                "up_count": up_count,
-                "down_count": down_count,
-                "flat_count": flat_count,
-                "total_amount": round(total_amount, 0),
-                "total_stocks": len(spot),
-            }
-        }
+        return await _cached("market_summary", "all", config.api_cache_market_ttl, _load_market_summary)
+    except UpstreamUnavailable as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
     except Exception as e:
         logger.error(f"获取市场概况失败: {str(e)}")
         raise HTTPException(status_code=500, detail=f"获取市场概况失败: {str(e)}")
 
 
+# 排行类型 -> (快照列, 是否取最大)
+MARKET_TOP_TYPES = {
+    "rise": ("change_pct", True),
+    "fall": ("change_pct", False),
+    "volume": ("amount", True),
+}
+
+
+async def _load_market_top(type: str) -> dict:
+    from pytrading.service.spot_snapshot_service import get_spot_snapshot_service
+    field, largest = MARKET_TOP_TYPES[type]
+    snapshot = await run_upstream('akshare', get_spot_snapshot_service().get)
+    return {"data": snapshot.top(field, 10, largest=largest)}
+
+
 @app.get("/api/market/top/{type}")
 async def get_market_top(type: str):
     """
     获取涨跌幅排行
     type: rise (涨幅榜) / fall (跌幅榜) / volume (成交额榜)
     """
+    if type not in MARKET_TOP_TYPES:
+        raise HTTPException(status_code=400, detail="type must be: rise, fall, volume")
     try:
-        import akshare as ak
-        spot = ak.stock_zh_a_spot_em()
-        
-        if type == "rise":
-            df = spot.nlargest(10, '涨跌幅')
-        elif type == "fall":
-            df = spot.nsmallest(10, '涨跌幅')
-        elif type == "volume":
-            df = spot.nlargest(10, '成交额')
-        else:
-            raise HTTPException(status_code=400, detail="type must be: rise, fall, volume")
-        
-        result = []
-        for _, r in df.iterrows():
-            result.append({
-                "code": r['代码'],
-                "name": r['名称'],
-                "price": float(r['最新价']) if r['最新价'] else None,
-                "change_pct": float(r['涨跌幅']) if r['涨跌幅'] else None,
-                "amount": float(r['成交额']) if r['成交额'] else None,
-            })
-
-        return {"data": result}
-    except HTTPException:
-        raise
+        return await _cached("market_top", type, config.api_cache_market_ttl, _load_market_top, type)
+    except UpstreamUnavailable as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
     except Exception as e:
         logger.error(f"获取排行失败: {str(e)}")
         raise HTTPException(status_code=500, detail=f"获取排行失败: {str(e)}")
@@ -2028,7 +2173,7 @@ async def get_company_events(symbol: str, start_date: Optional[str] = None, end_
             from datetime import datetime as dt
             days = (dt.strptime(end_date, '%Y-%m-%d') - dt.strptime(start_date, '%Y-%m-%d')).days
 
-        result = processor.process_events(symbol, days)
+        result = await run_upstream('akshare', processor.process_events, symbol, days)
 
         events = []
         for signal in result.get("event_signals", []):
@@ -2045,6 +2190,8 @@ async def get_company_events(symbol: str, start_date: Optional[str] = None, end_
             total_count=result.get("event_count", 0),
         )
 
+    except UpstreamUnavailable as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
     except Exception as e:
         logger.error(f"获取公司事件失败: {symbol}, {str(e)}")
         raise HTTPException(status_code=500, detail=f"获取公司事件失败: {str(e)}")
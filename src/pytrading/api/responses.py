@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@Description    ：快速 JSON 响应 - orjson 直接序列化 NumPy/Decimal/datetime（未安装 orjson 时退回标准库），以及按大小压缩的 GZip
+@Author  ：EEric
+@Date    ：2026-10-19
+"""
+import datetime
+import decimal
+import json
+import math
+from typing import Any, Tuple
+
+import numpy as np
+from fastapi.responses import JSONResponse
+from starlette.middleware.gzip import GZipMiddleware
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 取决于部署环境
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    """orjson/标准库都不能原生处理的类型"""
+    if isinstance(obj, decimal.Decimal):
+        # 与 FastAPI jsonable_encoder 一致：整数值输出 int，其余输出 float
+        return int(obj) if obj.as_tuple().exponent >= 0 else float(obj)
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if hasattr(obj, 'model_dump'):
+        return obj.model_dump()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def _sanitize(obj: Any) -> Any:
+    """标准库路径：NaN/Inf 转为 null（与 orjson 行为一致，避免输出非法 JSON）"""
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {key: _sanitize(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_sanitize(value) for value in obj]
+    return obj
+
+
+def dumps(content: Any) -> bytes:
+    """序列化为 UTF-8 JSON 字节"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default,
+                            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(_sanitize(content), default=_default, ensure_ascii=False, allow_nan=False,
+                      separators=(',', ':')).encode('utf-8')
+
+
+class FastJSONResponse(JSONResponse):
+    """默认响应类
+
+    作为 default_response_class 时，FastAPI 仍会先对返回的 dict 执行 jsonable_encoder；
+    大数据量接口直接 return FastJSONResponse(content) 可跳过这一步，由 orjson 一次完成序列化。
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class SelectiveGZipMiddleware:
+    """超过 minimum_size 的响应 GZip 压缩
+
+    SSE 推送和流式导出路径不压缩：压缩缓冲会延迟事件送达和导出首字节，导出的 Parquet/Arrow 本身已压缩。
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, compresslevel: int = 5,
+                 exclude_prefixes: Tuple[str, ...] = ('/api/stream/', '/api/backtest-results/export')):
+        self.app = app
+        self.gzip = GZipMiddleware(app, minimum_size=minimum_size, compresslevel=compresslevel)
+        self.exclude_prefixes = exclude_prefixes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and not scope["path"].startswith(self.exclude_prefixes):
+            await self.gzip(scope, receive, send)
+        else:
+            await self.app(scope, receive, send)
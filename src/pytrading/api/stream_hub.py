@@ -0,0 +1,259 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@Description    ：服务端推送（SSE）- 每个主题一个生产者轮询数据源，结果广播给全部订阅者
+@Author  ：EEric
+@Date    ：2026-10-19
+"""
+import asyncio
+import json
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from pytrading.config.settings import config
+from pytrading.logger import logger
+
+# (事件名, 数据, 事件 ID)
+Event = Tuple[str, Any, Optional[Any]]
+
+
+def format_sse(event: str, data: Any, event_id: Optional[Any] = None) -> str:
+    """按 text/event-stream 格式编码一条事件"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False, default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+
+class Subscription:
+    """一个订阅者的事件队列；消费过慢导致队列满时标记为 lagged，由客户端重连补齐"""
+
+    def __init__(self, topic: "Topic", maxsize: int):
+        self.topic = topic
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.lagged = False
+
+    def put(self, event: Event):
+        if self.lagged:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.lagged = True
+
+    async def get(self, timeout: float) -> Optional[Event]:
+        """等待下一条事件，超时返回 None（用于发送心跳）"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class Topic(ABC):
+    """推送主题：第一个订阅者到来时启动生产者，最后一个订阅者离开时停止"""
+
+    interval: float = 1.0
+
+    def __init__(self, key: Hashable):
+        self.key = key
+        self.subscribers: List[Subscription] = []
+        self.task: Optional[asyncio.Task] = None
+        self.poll_count = 0
+        self.published = 0
+
+    @abstractmethod
+    async def poll(self) -> List[Event]:
+        """拉取一次数据源，返回需要广播的事件"""
+
+    def snapshot(self) -> List[Event]:
+        """新订阅者加入时先收到的当前状态"""
+        return []
+
+    def publish(self, event: Event):
+        self.published += 1
+        for subscription in list(self.subscribers):
+            subscription.put(event)
+
+    async def run(self):
+        while True:
+            try:
+                events = await self.poll()
+                self.poll_count += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"推送主题轮询失败: {self.key}, {e}")
+                events = []
+            for event in events:
+                self.publish(event)
+            await asyncio.sleep(self.interval)
+
+
+class LogTopic(Topic):
+    """任务/个股日志：按 after_id 游标增量拉取新日志"""
+
+    PAGE_SIZE = 500
+
+    def __init__(self, key: Hashable, query: Callable[..., Awaitable[Dict]], task_id: str,
+                 symbol: Optional[str], after_id: int):
+        super().__init__(key)
+        self.interval = config.stream_log_interval
+        self.query = query
+        self.task_id = task_id
+        self.symbol = symbol
+        self.cursor = after_id
+
+    async def poll(self) -> List[Event]:
+        events = []
+        while True:
+            result = await self.query(self.task_id, self.symbol, self.cursor, self.PAGE_SIZE)
+            items = result["items"]
+            events.extend(("log", item, item["id"]) for item in items)
+            if items:
+                self.cursor = max(self.cursor, result["last_id"])
+            if len(items) < self.PAGE_SIZE:
+                return events
+
+
+class TaskProgressTopic(Topic):
+    """回测任务进度：只推送状态或进度有变化的任务"""
+
+    def __init__(self, key: Hashable, query: Callable[[], Awaitable[List[Dict]]]):
+        super().__init__(key)
+        self.interval = config.stream_task_interval
+        self.query = query
+        self.state: Dict[str, Dict] = {}
+
+    async def poll(self) -> List[Event]:
+        events = []
+        for task in await self.query():
+            previous = self.state.get(task["task_id"])
+            if previous is None or previous["status"] != task["status"] or previous["progress"] != task["progress"]:
+                events.append(("task", task, None))
+            self.state[task["task_id"]] = task
+        return events
+
+    def snapshot(self) -> List[Event]:
+        return [("task", task, None) for task in self.state.values()]
+
+
+class QuoteTopic(Topic):
+    """实时行情：一组代码一次批量请求，只推送变化的行情"""
+
+    def __init__(self, key: Hashable, fetch: Callable[[List[str]], Awaitable[Dict]], symbols: List[str]):
+        super().__init__(key)
+        self.interval = config.stream_quote_interval
+        self.fetch = fetch
+        self.symbols = symbols
+        self.quotes: Dict[str, Dict] = {}
+
+    async def poll(self) -> List[Event]:
+        changed = {}
+        for symbol, quote in (await self.fetch(self.symbols)).items():
+            if self.quotes.get(symbol) != quote:
+                changed[symbol] = quote
+                self.quotes[symbol] = quote
+        return [("quotes", changed, None)] if changed else []
+
+    def snapshot(self) -> List[Event]:
+        return [("quotes", dict(self.quotes), None)] if self.quotes else []
+
+
+class StreamHub:
+    """主题注册表：相同 key 的订阅共享一个主题（一个生产者）"""
+
+    def __init__(self, queue_size: Optional[int] = None):
+        self.queue_size = queue_size or config.stream_queue_size
+        self._topics: Dict[Hashable, Topic] = {}
+
+    def subscribe(self, key: Hashable, factory: Callable[[], Topic]) -> Tuple[Subscription, bool]:
+        """订阅主题，返回 (订阅, 是否新建了主题)"""
+        topic = self._topics.get(key)
+        created = topic is None
+        if created:
+            topic = factory()
+            self._topics[key] = topic
+        subscription = Subscription(topic, self.queue_size)
+        for event in topic.snapshot():
+            subscription.put(event)
+        topic.subscribers.append(subscription)
+        if topic.task is None:
+            topic.task = asyncio.get_running_loop().create_task(topic.run())
+        return subscription, created
+
+    def unsubscribe(self, subscription: Subscription):
+        topic = subscription.topic
+        if subscription in topic.subscribers:
+            topic.subscribers.remove(subscription)
+        if not topic.subscribers and self._topics.get(topic.key) is topic:
+            self._topics.pop(topic.key, None)
+            if topic.task is not None:
+                topic.task.cancel()
+                topic.task = None
+
+    async def close(self):
+        for topic in list(self._topics.values()):
+            if topic.task is not None:
+                topic.task.cancel()
+        self._topics.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "topics": [
+                {"key": str(topic.key), "subscribers": len(topic.subscribers),
+                 "polls": topic.poll_count, "published": topic.published}
+                for topic in self._topics.values()
+            ],
+        }
+
+
+async def sse_stream(hub: StreamHub, key: Hashable, factory: Callable[[], Topic],
+                     is_disconnected: Callable[[], Awaitable[bool]],
+                     before: Optional[Callable[[], Awaitable[List[Event]]]] = None, min_id: Optional[int] = None):
+    """订阅主题并转成 SSE 文本流
+
+    订阅在生成器开始迭代时才建立：客户端在响应开始前断开时生成器不会运行，也就不会留下订阅和生产者。
+    before: 加入已存在的主题时，进入实时推送前先发送的补齐事件（例如从数据库补齐主题游标之前的日志）；
+    min_id: 只发送事件 ID 大于该值的事件（补齐与实时推送重叠部分去重）。
+    """
+    subscription, created = hub.subscribe(key, factory)
+    try:
+        yield f"retry: {int(config.stream_retry_ms)}\n\n"
+        if before is not None and not created:
+            for event, data, event_id in await before():
+                if min_id is not None and event_id is not None:
+                    if event_id <= min_id:
+                        continue
+                    min_id = event_id
+                yield format_sse(event, data, event_id)
+        while True:
+            item = await subscription.get(config.stream_heartbeat)
+            if item is None:
+                if await is_disconnected():
+                    break
+                yield ": ping\n\n"
+                continue
+            event, data, event_id = item
+            if min_id is not None and event_id is not None:
+                if event_id <= min_id:
+                    continue
+                min_id = event_id
+            yield format_sse(event, data, event_id)
+            if subscription.lagged and subscription.queue.empty():
+                # 已丢弃事件：通知客户端后断开，浏览器带 Last-Event-ID 自动重连补齐
+                yield format_sse("lagged", {})
+                break
+    finally:
+        hub.unsubscribe(subscription)
+
+
+_hub: Optional[StreamHub] = None
+
+
+def get_stream_hub() -> StreamHub:
+    global _hub
+    if _hub is None:
+        _hub = StreamHub()
+    return _hub
@@ -26,7 +26,9 @@ class Config:
     # 基础配置
     app_root_dir: Path = APP_ROOT_DIR
     save_db: bool = os.getenv('SAVE_DB', "false").lower() == "true"
-    db_type: str = os.getenv('DB_TYPE', 'mysql')  # 支持 'mysql'
+    db_type: str = os.getenv('DB_TYPE', 'mysql')  # 支持 'mysql' / 'sqlite'
+    sqlite_path: str = os.getenv('SQLITE_PATH', str(APP_ROOT_DIR / "data" / "pytrading.db"))
+    duckdb_analytics: bool = os.getenv('DUCKDB_ANALYTICS', "true").lower() == "true"  # sqlite 模式下用 DuckDB 做分析查询
     
     # 日志配置
     log_level: str = os.getenv('LOG_LEVEL', 'INFO')
@@ -53,7 +55,98 @@ class Config:
     mysql_username: str = os.getenv('MYSQL_USERNAME', '')
     mysql_password: str = os.getenv('MYSQL_PASSWORD', '')
     mysql_database: str = os.getenv('MYSQL_DATABASE', 'pytrading')
-    
+
+    # 连接池配置（每个进程共享一个连接池）
+    db_pool_size: int = int(os.getenv('DB_POOL_SIZE', '10'))
+    db_max_overflow: int = int(os.getenv('DB_MAX_OVERFLOW', '20'))
+    db_pool_recycle: int = int(os.getenv('DB_POOL_RECYCLE', '3600'))
+    db_pool_timeout: int = int(os.getenv('DB_POOL_TIMEOUT', '30'))
+    # API 异步查询：安装 aiomysql 时走异步驱动，否则在有界线程池中执行
+    db_async_enabled: bool = os.getenv('DB_ASYNC_ENABLED', "true").lower() == "true"
+    db_executor_workers: int = int(os.getenv('DB_EXECUTOR_WORKERS', '16'))
+    # 回测结果列表总数缓存秒数（其他进程原地更新结果时的最大延迟）
+    result_count_ttl: int = int(os.getenv('RESULT_COUNT_TTL', '60'))
+    # 回测结果批量写入：子进程结果由主进程缓冲，满 N 行或每 T 秒多行 upsert 一次
+    result_batch_enabled: bool = os.getenv('RESULT_BATCH_ENABLED', "true").lower() == "true"
+    result_batch_rows: int = int(os.getenv('RESULT_BATCH_ROWS', '200'))
+    result_batch_interval: float = float(os.getenv('RESULT_BATCH_INTERVAL', '5'))
+    # 子进程结果文件目录：结果写库提交后才删除，主进程异常退出时下次启动重新读入
+    result_spool_dir: str = os.getenv('RESULT_SPOOL_DIR', str(APP_ROOT_DIR / "data" / "result_spool"))
+    # 交易信号缓冲：回测结束时批量写库；实盘按间隔（秒）定时写库
+    trade_record_buffer_rows: int = int(os.getenv('TRADE_RECORD_BUFFER_ROWS', '5000'))
+    trade_record_flush_interval: float = float(os.getenv('TRADE_RECORD_FLUSH_INTERVAL', '10'))
+    # 写库失败后的重试间隔（秒），期间缓冲写满时溢出到 TRADE_RECORD_SPILL_DIR 下的文件
+    trade_record_retry_interval: float = float(os.getenv('TRADE_RECORD_RETRY_INTERVAL', '30'))
+    trade_record_spill_dir: str = os.getenv('TRADE_RECORD_SPILL_DIR', str(APP_ROOT_DIR / "data" / "trade_record_spill"))
+    # 数据库日志异步批量写入：队列上限、每批条数、最长等待秒数，队列满时 WARN/ERROR 的最长等待毫秒
+    log_queue_size: int = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+    log_batch_size: int = int(os.getenv('LOG_BATCH_SIZE', '500'))
+    log_flush_interval: float = float(os.getenv('LOG_FLUSH_INTERVAL', '1'))
+    log_queue_block_ms: int = int(os.getenv('LOG_QUEUE_BLOCK_MS', '50'))
+    # 回测日志保留：已结束超过 N 天的任务日志归档为 gzip 文件后分批删除（0 表示不归档）
+    log_retention_days: int = int(os.getenv('LOG_RETENTION_DAYS', '30'))
+    log_archive_dir: str = os.getenv('LOG_ARCHIVE_DIR', str(APP_ROOT_DIR / "data" / "log_archive"))
+    log_purge_chunk: int = int(os.getenv('LOG_PURGE_CHUNK', '5000'))
+    # 热点只读接口缓存：元数据（策略/股票/配置）和行情接口分别设置 TTL（秒），写入时显式失效
+    api_cache_enabled: bool = os.getenv('API_CACHE_ENABLED', 'true').lower() == 'true'
+    api_cache_maxsize: int = int(os.getenv('API_CACHE_MAXSIZE', '64'))
+    api_cache_meta_ttl: float = float(os.getenv('API_CACHE_META_TTL', '300'))
+    api_cache_market_ttl: float = float(os.getenv('API_CACHE_MARKET_TTL', '10'))
+    # 全市场行情快照：交易时段后台刷新间隔（秒，0 表示不启动后台刷新），非交易时段快照有效期（秒）
+    spot_snapshot_interval: float = float(os.getenv('SPOT_SNAPSHOT_INTERVAL', '30'))
+    spot_snapshot_idle_ttl: float = float(os.getenv('SPOT_SNAPSHOT_IDLE_TTL', '1800'))
+    # 实时行情（腾讯）：请求超时（秒）、连接池大小、单个代码行情缓存时间（秒）
+    quote_timeout: float = float(os.getenv('QUOTE_TIMEOUT', '3'))
+    quote_max_connections: int = int(os.getenv('QUOTE_MAX_CONNECTIONS', '10'))
+    quote_cache_ttl: float = float(os.getenv('QUOTE_CACHE_TTL', '5'))
+    # 服务端推送（SSE）：各主题轮询间隔（秒）、订阅者队列长度、心跳间隔（秒）、客户端重连间隔（毫秒）
+    stream_log_interval: float = float(os.getenv('STREAM_LOG_INTERVAL', '1'))
+    stream_task_interval: float = float(os.getenv('STREAM_TASK_INTERVAL', '2'))
+    stream_quote_interval: float = float(os.getenv('STREAM_QUOTE_INTERVAL', '5'))
+    stream_queue_size: int = int(os.getenv('STREAM_QUEUE_SIZE', '2000'))
+    stream_heartbeat: float = float(os.getenv('STREAM_HEARTBEAT', '15'))
+    stream_retry_ms: int = int(os.getenv('STREAM_RETRY_MS', '3000'))
+    # 回测结果导出：每批从数据库读取并写出的行数
+    export_chunk_rows: int = int(os.getenv('EXPORT_CHUNK_ROWS', '2000'))
+    # 股票检索索引最长使用时间（秒，0 表示只在 symbols 表写入后重建）
+    symbol_index_ttl: float = float(os.getenv('SYMBOL_INDEX_TTL', '3600'))
+    # 响应压缩：超过该字节数的响应启用 GZip（0 表示关闭）及压缩级别
+    gzip_min_size: int = int(os.getenv('GZIP_MIN_SIZE', '1024'))
+    gzip_level: int = int(os.getenv('GZIP_LEVEL', '5'))
+    # 慢查询采集阈值（毫秒，0 表示关闭），结果见 /api/db/slow-queries
+    slow_query_ms: float = float(os.getenv('SLOW_QUERY_MS', '200'))
+
+    # 上游限流配置（每秒请求数，0 表示不限流）
+    gm_rate_limit: float = float(os.getenv('GM_RATE_LIMIT', '20'))
+    gm_rate_burst: int = int(os.getenv('GM_RATE_BURST', '40'))
+    akshare_rate_limit: float = float(os.getenv('AKSHARE_RATE_LIMIT', '5'))
+    akshare_rate_burst: int = int(os.getenv('AKSHARE_RATE_BURST', '10'))
+
+    # 阻塞上游调用的独立线程池（并发上限/超时秒数/排队上限），慢调用不占用事件循环和数据库线程池
+    gm_executor_workers: int = int(os.getenv('GM_EXECUTOR_WORKERS', '4'))
+    gm_call_timeout: float = float(os.getenv('GM_CALL_TIMEOUT', '15'))
+    akshare_executor_workers: int = int(os.getenv('AKSHARE_EXECUTOR_WORKERS', '4'))
+    akshare_call_timeout: float = float(os.getenv('AKSHARE_CALL_TIMEOUT', '20'))
+    kline_executor_workers: int = int(os.getenv('KLINE_EXECUTOR_WORKERS', '2'))
+    kline_call_timeout: float = float(os.getenv('KLINE_CALL_TIMEOUT', '120'))
+    upstream_max_pending: int = int(os.getenv('UPSTREAM_MAX_PENDING', '32'))
+    # 掘金数据查询工作进程数（每个 token 一组，进程内固定 token，不切换全局 token）
+    gm_data_workers: int = int(os.getenv('GM_DATA_WORKERS', '2'))
+    # 事件循环卡顿监控（检测间隔秒数 / 告警阈值毫秒，0 表示关闭），结果见 /api/runtime/stats
+    loop_lag_interval: float = float(os.getenv('LOOP_LAG_INTERVAL', '0.5'))
+    loop_lag_threshold_ms: float = float(os.getenv('LOOP_LAG_THRESHOLD_MS', '200'))
+
+    # K线同步配置
+    kline_sync_source: str = os.getenv('KLINE_SYNC_SOURCE', 'gm')  # 支持 'gm' / 'akshare'
+    kline_sync_workers: int = int(os.getenv('KLINE_SYNC_WORKERS', '16'))
+    kline_sync_batch_rows: int = int(os.getenv('KLINE_SYNC_BATCH_ROWS', '5000'))
+
+    # 行情缓存配置（掘金 history 本地磁盘缓存）
+    history_cache_enabled: bool = os.getenv('HISTORY_CACHE_ENABLED', "true").lower() == "true"
+    history_cache_dir: str = os.getenv('HISTORY_CACHE_DIR', str(APP_ROOT_DIR / "data" / "history_cache"))
+    history_cache_today_ttl: int = int(os.getenv('HISTORY_CACHE_TODAY_TTL', '300'))  # 当日数据缓存秒数
+    history_cache_empty_ttl: int = int(os.getenv('HISTORY_CACHE_EMPTY_TTL', '3600'))  # 上游返回空结果的区间缓存秒数
+
 
     def __post_init__(self):
         # 设置交易模式
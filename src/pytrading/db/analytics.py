@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@Description    ：DuckDB 分析查询 - 嵌入式(SQLite)部署下用列式引擎执行大范围扫描
+@Author  ：EEric
+@Date    ：2026-10-19
+"""
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+
+from pytrading.config import config
+from pytrading.logger import logger
+
+
+class DuckDBAnalytics:
+    """DuckDB 只读分析连接
+
+    以 READ_ONLY 方式 ATTACH SQLite 数据库文件为 src，事务写入仍由 SQLAlchemy/SQLite 完成，
+    筛选、排序、聚合等扫描类查询交给 DuckDB 的列式执行。
+    duckdb 为可选依赖；未安装、非 sqlite 模式或 ATTACH 失败时 available() 返回 False，调用方走 ORM 查询。
+    """
+
+    SCHEMA = 'src'
+    _local = threading.local()
+    _disabled = False
+
+    @classmethod
+    def available(cls) -> bool:
+        if cls._disabled or config.db_type != 'sqlite' or not config.duckdb_analytics:
+            return False
+        try:
+            import duckdb  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    @classmethod
+    def disable(cls, reason: Exception):
+        """分析查询出错时关闭 DuckDB 路径，本进程后续查询回退到 ORM"""
+        cls._disabled = True
+        logger.warning(f"DuckDB 分析查询不可用，回退到 SQLite 查询: {reason}")
+
+    @classmethod
+    def _connect(cls):
+        import duckdb
+        connection = duckdb.connect()
+        path = config.sqlite_path.replace("'", "''")
+        connection.execute(f"ATTACH '{path}' AS {cls.SCHEMA} (TYPE SQLITE, READ_ONLY)")
+        return connection
+
+    @classmethod
+    def _connection(cls):
+        """每个线程一个连接（DuckDB 连接不能跨线程并发使用）"""
+        connection = getattr(cls._local, 'connection', None)
+        if connection is None:
+            connection = cls._connect()
+            cls._local.connection = connection
+        return connection
+
+    @classmethod
+    def query(cls, sql: str, params: Optional[Sequence[Any]] = None) -> List[Dict[str, Any]]:
+        """执行查询（? 占位符），返回字典列表"""
+        cursor = cls._connection().execute(sql, list(params or []))
+        columns = [d[0] for d in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    @classmethod
+    def table(cls, name: str) -> str:
+        return f"{cls.SCHEMA}.{name}"
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@Description    ：异步数据库访问 - FastAPI 协程中执行查询而不阻塞事件循环
+@Author  ：EEric
+@Date    ：2026-10-19
+"""
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from pytrading.config import config
+from pytrading.logger import logger
+
+_async_engine = None
+_async_checked = False
+_executor: Optional[ThreadPoolExecutor] = None
+_lock = threading.Lock()
+
+
+def build_async_mysql_url() -> str:
+    """aiomysql 连接串"""
+    return (f"mysql+aiomysql://{config.mysql_username}:{config.mysql_password}@{config.mysql_host}:"
+            f"{config.mysql_port}/{config.mysql_database}?charset=utf8mb4")
+
+
+def get_async_engine():
+    """获取共享的 AsyncEngine；未安装 aiomysql 或已禁用时返回 None（退化为线程池）"""
+    global _async_engine, _async_checked
+    if _async_checked:
+        return _async_engine
+    with _lock:
+        if not _async_checked:
+            _async_checked = True
+            if config.db_async_enabled and config.db_type == 'mysql':
+                try:
+                    import aiomysql  # noqa: F401
+                    from sqlalchemy.ext.asyncio import create_async_engine
+                    _async_engine = create_async_engine(
+                        build_async_mysql_url(),
+                        pool_size=config.db_pool_size,
+                        max_overflow=config.db_max_overflow,
+                        pool_recycle=config.db_pool_recycle,
+                        pool_timeout=config.db_pool_timeout,
+                        pool_pre_ping=True,
+                    )
+                    logger.info("异步数据库引擎已启用 (aiomysql)")
+                except ImportError:
+                    logger.info("未安装 aiomysql，数据库查询在线程池中执行")
+    return _async_engine
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """有界线程池：同步查询最多占用 DB_EXECUTOR_WORKERS 个线程"""
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=config.db_executor_workers, thread_name_prefix='db')
+    return _executor
+
+
+async def run_blocking(fn: Callable, *args, **kwargs) -> Any:
+    """在有界线程池中执行同步函数（尚未移植的同步 helper 使用）"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), functools.partial(fn, *args, **kwargs))
+
+
+def _sync_session():
+    from pytrading.db.engine import get_sessionmaker
+    return get_sessionmaker()()
+
+
+def _run_with_sync_session(fn: Callable, *args, **kwargs) -> Any:
+    session = _sync_session()
+    try:
+        return fn(session, *args, **kwargs)
+    finally:
+        session.close()
+
+
+async def run_db(fn: Callable, *args, **kwargs) -> Any:
+    """执行查询函数 fn(session, *args, **kwargs)
+
+    有 AsyncEngine 时通过 AsyncSession.run_sync 在异步驱动上执行（不占线程）；
+    否则用同步会话在有界线程池中执行。fn 内部按普通同步 Session 写法即可，
+    返回值应为已序列化的数据（会话关闭后 ORM 对象不可再访问）。
+    """
+    engine = get_async_engine()
+    if engine is None:
+        return await run_blocking(_run_with_sync_session, fn, *args, **kwargs)
+
+    from sqlalchemy.ext.asyncio import AsyncSession
+    async with AsyncSession(engine) as session:
+        return await session.run_sync(fn, *args, **kwargs)
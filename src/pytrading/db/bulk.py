@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@Description    ：批量写入工具 - 多行 upsert / insert-ignore
+@Author  ：EEric
+@Date    ：2026-10-19
+"""
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy.orm import Session
+
+# 单条 SQL 的最大行数，避免超过 MySQL max_allowed_packet
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def _chunks(rows: List[Dict], size: int) -> Iterable[List[Dict]]:
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+def bulk_upsert(session: Session, model, rows: Sequence[Dict], conflict_columns: Sequence[str],
+                update_columns: Optional[Sequence[str]] = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """按唯一键批量写入多行数据
+
+    - MySQL: INSERT ... ON DUPLICATE KEY UPDATE
+    - SQLite: INSERT ... ON CONFLICT(...) DO UPDATE
+    - update_columns 为空列表时退化为 insert-ignore（冲突行保持不变）
+
+    Args:
+        session: 数据库会话（调用方负责 commit）
+        model: ORM 模型类
+        rows: 待写入的行（列名 -> 值）
+        conflict_columns: 唯一键列名（SQLite 需要用于 ON CONFLICT）
+        update_columns: 冲突时需要更新的列，None 表示除唯一键外的全部列
+        chunk_size: 每条 SQL 的行数
+
+    Returns:
+        int: 提交写入的行数
+    """
+    rows = list(rows)
+    if not rows:
+        return 0
+
+    table = model.__table__
+    if update_columns is None:
+        update_columns = [c for c in rows[0].keys() if c not in conflict_columns]
+    update_columns = list(update_columns)
+    # ON DUPLICATE / ON CONFLICT 不会触发 Column.onupdate，需要显式刷新 updated_at
+    touch_updated_at = bool(update_columns) and 'updated_at' in table.c and 'updated_at' not in update_columns
+
+    dialect = session.get_bind().dialect.name
+    for chunk in _chunks(rows, chunk_size):
+        if dialect == 'mysql':
+            from sqlalchemy.dialects.mysql import insert
+            stmt = insert(table)
+            if update_columns:
+                set_ = {c: stmt.inserted[c] for c in update_columns}
+                if touch_updated_at:
+                    set_['updated_at'] = datetime.now()
+                stmt = stmt.on_duplicate_key_update(set_)
+            else:
+                stmt = stmt.prefix_with('IGNORE')
+        elif dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+            stmt = insert(table)
+            if update_columns:
+                set_ = {c: stmt.excluded[c] for c in update_columns}
+                if touch_updated_at:
+                    set_['updated_at'] = datetime.now()
+                stmt = stmt.on_conflict_do_update(index_elements=list(conflict_columns), set_=set_)
+            else:
+                stmt = stmt.on_conflict_do_nothing(index_elements=list(conflict_columns))
+        else:
+            # 其他方言回退到逐行 merge
+            for row in chunk:
+                session.merge(model(**row))
+            continue
+        session.execute(stmt, chunk)
+    return len(rows)
+
+
+def bulk_insert_ignore(session: Session, model, rows: Sequence[Dict], conflict_columns: Sequence[str],
+                       chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """批量插入，唯一键冲突的行直接忽略"""
+    return bulk_upsert(session, model, rows, conflict_columns, update_columns=[], chunk_size=chunk_size)
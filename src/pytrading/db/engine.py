@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@Description    ：进程级数据库引擎注册表 - 同一连接串在进程内只创建一个 Engine
+@Author  ：EEric
+@Date    ：2026-10-19
+"""
+import os
+import threading
+from typing import Dict, List, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.orm import sessionmaker
+
+from pytrading.config import config
+
+_engines: Dict[str, Engine] = {}
+_sessionmakers: Dict[str, sessionmaker] = {}
+_lock = threading.Lock()
+
+
+def build_mysql_url(host: str, db_name: str, port: int = 3306, username: str = "", password: str = "") -> str:
+    """拼接 PyMySQL 连接串"""
+    return f"mysql+pymysql://{username}:{password}@{host}:{port}/{db_name}?charset=utf8mb4"
+
+
+def build_sqlite_url(path: str) -> str:
+    """拼接 SQLite 连接串"""
+    return f"sqlite:///{path}"
+
+
+def default_url() -> str:
+    """按全局配置生成连接串（DB_TYPE=sqlite 时使用嵌入式 SQLite 文件）"""
+    if config.db_type == 'sqlite':
+        return build_sqlite_url(config.sqlite_path)
+    return build_mysql_url(config.mysql_host, config.mysql_database, config.mysql_port,
+                           config.mysql_username, config.mysql_password)
+
+
+def _set_sqlite_pragma(dbapi_conn, connection_record):
+    """WAL 模式允许读写并发，外键约束与 MySQL 行为保持一致"""
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+def _create_engine(url: str) -> Engine:
+    parsed = make_url(url)
+    if parsed.get_backend_name() != 'sqlite':
+        return create_engine(url, echo=False, **_pool_kwargs(url))
+
+    # SQLite：多线程共享连接，写锁等待 30 秒
+    if parsed.database and parsed.database != ':memory:':
+        os.makedirs(os.path.dirname(os.path.abspath(parsed.database)), exist_ok=True)
+    engine = create_engine(url, echo=False, connect_args={"check_same_thread": False, "timeout": 30})
+    event.listen(engine, "connect", _set_sqlite_pragma)
+    return engine
+
+
+def _pool_kwargs(url: str) -> dict:
+    """连接池参数"""
+    return {
+        "pool_size": config.db_pool_size,
+        "max_overflow": config.db_max_overflow,
+        "pool_recycle": config.db_pool_recycle,
+        "pool_timeout": config.db_pool_timeout,
+        "pool_pre_ping": True,
+    }
+
+
+def _install_hooks(engine: Engine) -> Engine:
+    from pytrading.db.query_advisor import install_slow_query_capture
+    install_slow_query_capture(engine, config.slow_query_ms)
+    return engine
+
+
+def get_engine(url: Optional[str] = None) -> Engine:
+    """获取连接串对应的共享 Engine（不存在时创建）"""
+    url = url or default_url()
+    engine = _engines.get(url)
+    if engine is not None:
+        return engine
+    with _lock:
+        engine = _engines.get(url)
+        if engine is None:
+            engine = _install_hooks(_create_engine(url))
+            _engines[url] = engine
+            _sessionmakers[url] = sessionmaker(bind=engine)
+        return engine
+
+
+def get_sessionmaker(url: Optional[str] = None) -> sessionmaker:
+    """获取连接串对应的共享 sessionmaker"""
+    url = url or default_url()
+    if url not in _sessionmakers:
+        get_engine(url)
+    return _sessionmakers[url]
+
+
+def pool_status() -> List[dict]:
+    """各 Engine 的连接池状态（连接串中的密码已隐藏）"""
+    status = []
+    for url, engine in list(_engines.items()):
+        pool = engine.pool
+        item = {"url": make_url(url).render_as_string(hide_password=True), "pool": pool.__class__.__name__}
+        for name in ("size", "checkedin", "checkedout", "overflow"):
+            method = getattr(pool, name, None)
+            if callable(method):
+                item[name] = method()
+        status.append(item)
+    return status
+
+
+def dispose_all():
+    """关闭所有 Engine 的连接池"""
+    with _lock:
+        for engine in _engines.values():
+            engine.dispose()
+
+
+def _after_fork_in_child():
+    """fork 出的子进程不能复用父进程的连接：丢弃池中连接但不关闭父进程的 socket"""
+    global _lock
+    # fork 时锁可能被其他线程持有，子进程中重建
+    _lock = threading.Lock()
+    for engine in list(_engines.values()):
+        engine.dispose(close=False)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -28,12 +28,29 @@ def init_mysql():
         raise
 
 
+def init_sqlite():
+    """初始化嵌入式SQLite数据库"""
+    try:
+        from .engine import get_engine, default_url
+        from .migrations import run_migrations
+        from .mysql import Base
+        engine = get_engine(default_url())
+        Base.metadata.create_all(engine)
+        run_migrations(engine)
+        logger.info(f"SQLite数据库初始化成功: {config.sqlite_path}")
+    except Exception as e:
+        logger.error(f"SQLite数据库初始化失败: {e}")
+        raise
+
+
 def init_database():
     """根据配置初始化数据库"""
     db_type = getattr(config, 'db_type', 'mysql').lower()
     
     if db_type == 'mysql':
         init_mysql()
+    elif db_type == 'sqlite':
+        init_sqlite()
     else:
         logger.warning(f"不支持的数据库类型: {db_type}")
 
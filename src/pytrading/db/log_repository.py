@@ -5,7 +5,6 @@
 @Author  ：Claude
 @Date    ：2025-10-05
 """
-from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
 from typing import Optional, List, Dict, Union
@@ -33,16 +32,9 @@ class LogRepository:
     
     @classmethod
     def from_config(cls, host: str, db_name: str, port: int = 3306, username: str = "", password: str = ""):
-        """从配置创建独立实例（不推荐，建议复用 MySQLClient）"""
-        engine = create_engine(
-            f"mysql+pymysql://{username}:{password}@{host}:{port}/{db_name}?charset=utf8mb4",
-            pool_size=5,
-            max_overflow=10,
-            pool_recycle=3600,
-            pool_pre_ping=True,
-            echo=False
-        )
-        return cls(engine=engine)
+        """从配置创建实例（复用进程级共享 Engine）"""
+        from pytrading.db.engine import build_mysql_url, get_engine
+        return cls(engine=get_engine(build_mysql_url(host, db_name, port, username, password)))
     
     def append_log(self, task_id: str, message: str, level: str = 'INFO', symbol: Optional[str] = None) -> Optional[int]:
         """追加一条日志到 backtest_logs"""
@@ -64,6 +56,38 @@ class LogRepository:
         finally:
             session.close()
     
+    def append_logs(self, rows: List[Dict]) -> int:
+        """批量追加日志（单条多行 INSERT）
+
+        Args:
+            rows: [{'task_id', 'symbol', 'level', 'message', 'created_at'}]
+        Returns:
+            int: 写入行数
+        """
+        from sqlalchemy import insert
+        from pytrading.db.mysql import BacktestLog
+        if not rows:
+            return 0
+        level_mapping = {'WARNING': 'WARN', 'WARN': 'WARN', 'INFO': 'INFO', 'DEBUG': 'DEBUG', 'ERROR': 'ERROR',
+                         'CRITICAL': 'ERROR'}
+        values = [{
+            "task_id": r["task_id"],
+            "symbol": r.get("symbol"),
+            "level": level_mapping.get(str(r.get("level", 'INFO')).upper(), 'INFO'),
+            "message": r["message"],
+            "created_at": r.get("created_at") or datetime.now(),
+        } for r in rows]
+        session = self.Session()
+        try:
+            session.execute(insert(BacktestLog), values)
+            session.commit()
+            return len(values)
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
     def append_task_log(self, task_id: str, message: str, level: str = 'INFO') -> Optional[int]:
         """追加任务级日志"""
         return self.append_log(task_id=task_id, message=message, level=level, symbol=None)
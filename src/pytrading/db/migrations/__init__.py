@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@Description    ：数据库迁移 - 按版本号顺序执行，已执行的版本记录在 schema_migrations 表
+@Author  ：EEric
+@Date    ：2026-10-19
+"""
+from datetime import datetime
+from typing import Callable, List, NamedTuple
+
+from sqlalchemy import Column, DateTime, Index, MetaData, String, Table, inspect, select
+from sqlalchemy.engine import Connection, Engine
+
+from pytrading.logger import logger
+
+
+class Migration(NamedTuple):
+    version: str
+    description: str
+    upgrade: Callable[[Connection], None]
+
+
+_metadata = MetaData()
+schema_migrations = Table(
+    'schema_migrations', _metadata,
+    Column('version', String(32), primary_key=True, comment='迁移版本号'),
+    Column('description', String(255), comment='迁移说明'),
+    Column('applied_at', DateTime, default=datetime.now, comment='执行时间'),
+)
+
+
+def create_index_if_missing(connection: Connection, table: str, name: str, columns: List[str]) -> bool:
+    """索引不存在时创建（新库由 create_all 按模型建好索引时跳过）"""
+    existing = {ix['name'] for ix in inspect(connection).get_indexes(table)}
+    if name in existing:
+        return False
+    # 反射到独立的 MetaData，避免把索引挂到模型表上（否则后续 create_all 会重复建索引）
+    reflected = Table(table, MetaData(), autoload_with=connection)
+    Index(name, *[reflected.c[c] for c in columns]).create(connection)
+    logger.info(f"已创建索引: {table}.{name}({', '.join(columns)})")
+    return True
+
+
+def all_migrations() -> List[Migration]:
+    """全部迁移，按版本号排序"""
+    from pytrading.db.migrations import m0001_access_path_indexes
+    modules = [m0001_access_path_indexes]
+    return sorted((Migration(m.VERSION, m.DESCRIPTION, m.upgrade) for m in modules), key=lambda m: m.version)
+
+
+def run_migrations(engine: Engine) -> List[str]:
+    """执行尚未执行的迁移
+
+    Returns:
+        List[str]: 本次执行的版本号
+    """
+    _metadata.create_all(engine)
+    applied_now = []
+    with engine.connect() as connection:
+        applied = {row[0] for row in connection.execute(select(schema_migrations.c.version))}
+    for migration in all_migrations():
+        if migration.version in applied:
+            continue
+        with engine.begin() as connection:
+            migration.upgrade(connection)
+            connection.execute(schema_migrations.insert().values(
+                version=migration.version, description=migration.description, applied_at=datetime.now()))
+        logger.info(f"数据库迁移完成: {migration.version} {migration.description}")
+        applied_now.append(migration.version)
+    return applied_now
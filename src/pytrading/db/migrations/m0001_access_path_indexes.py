@@ -0,0 +1,30 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@Description    ：为回测结果、交易记录、回测日志补充访问路径索引
+@Author  ：EEric
+@Date    ：2026-10-19
+"""
+from sqlalchemy.engine import Connection
+
+from pytrading.db.migrations import create_index_if_missing
+
+VERSION = '0001'
+DESCRIPTION = 'backtest_results / trade_records / backtest_logs 复合索引'
+
+INDEXES = [
+    ('backtest_results', 'idx_result_task_symbol', ['task_id', 'symbol']),
+    ('backtest_results', 'idx_result_task_status', ['task_id', 'status']),
+    ('backtest_results', 'idx_result_strategy_time', ['strategy_name', 'backtest_start_time', 'backtest_end_time']),
+    ('backtest_results', 'idx_result_pnl', ['pnl_ratio', 'id']),
+    ('backtest_results', 'idx_result_sharp', ['sharp_ratio', 'id']),
+    ('backtest_results', 'idx_result_drawdown', ['max_drawdown', 'id']),
+    ('backtest_results', 'idx_result_created', ['created_at', 'id']),
+    ('trade_records', 'idx_trade_task_time', ['task_id', 'bar_time']),
+    ('backtest_logs', 'idx_log_task_symbol_id', ['task_id', 'symbol', 'id']),
+]
+
+
+def upgrade(connection: Connection):
+    for table, name, columns in INDEXES:
+        create_index_if_missing(connection, table, name, columns)
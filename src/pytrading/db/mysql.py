@@ -6,9 +6,9 @@
 @Email  : yflying7@gmail.com
 @Date    ：2022/11/20 21:36 
 """
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, UniqueConstraint, text, Boolean, JSON, Enum as SQLEnum, ForeignKey, DECIMAL, Text, BigInteger, Date, Index
+from sqlalchemy import Column, Integer, String, Float, DateTime, UniqueConstraint, text, Boolean, JSON, Enum as SQLEnum, ForeignKey, DECIMAL, Text, BigInteger, Date, Index
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
 
@@ -113,6 +113,16 @@ class BackTestResult(Base):
     
     __table_args__ = (
         UniqueConstraint('symbol', 'backtest_start_time', 'backtest_end_time', name='uq_symbol_time'),
+        # 按任务查询结果/统计进度（get_task_results、update_task_progress、关注列表）
+        Index('idx_result_task_symbol', 'task_id', 'symbol'),
+        Index('idx_result_task_status', 'task_id', 'status'),
+        # 按策略和回测区间汇总（run_backtest_task）
+        Index('idx_result_strategy_time', 'strategy_name', 'backtest_start_time', 'backtest_end_time'),
+        # 结果列表排序 + 键集分页
+        Index('idx_result_pnl', 'pnl_ratio', 'id'),
+        Index('idx_result_sharp', 'sharp_ratio', 'id'),
+        Index('idx_result_drawdown', 'max_drawdown', 'id'),
+        Index('idx_result_created', 'created_at', 'id'),
     )
 
 
@@ -131,24 +141,31 @@ class SystemConfig(Base):
 
 class MySQLClient:
     def __init__(self, host, db_name, port=3306, username="", password=""):
+        from pytrading.config import config
+        from pytrading.db.engine import build_mysql_url, default_url, get_engine, get_sessionmaker
         self.host = host
         self.db_name = db_name
         self.port = port
-        # 使用 PyMySQL 驱动替代 mysql-connector-python
-        self.engine = create_engine(
-            f"mysql+pymysql://{username}:{password}@{self.host}:{self.port}/{self.db_name}?charset=utf8mb4",
-            # 添加连接池配置
-            pool_size=10,
-            max_overflow=20,
-            pool_recycle=3600,
-            pool_pre_ping=True,
-            echo=False
-        )
-        self.Session = sessionmaker(bind=self.engine)
+        # 同一连接串在进程内复用同一个 Engine 和连接池（PyMySQL 驱动）
+        # DB_TYPE=sqlite 时所有调用方统一切换到嵌入式 SQLite
+        if config.db_type == 'sqlite':
+            url = default_url()
+        else:
+            url = build_mysql_url(host, db_name, port, username, password)
+        self.engine = get_engine(url)
+        self.Session = get_sessionmaker(url)
         
+    # 本进程已建表/迁移过的 Engine（saver 等每次构造都会调用 create_tables）
+    _initialized_engines = set()
+
     def create_tables(self):
-        """创建数据表"""
+        """创建数据表并执行未完成的迁移"""
+        if id(self.engine) in MySQLClient._initialized_engines:
+            return
+        from pytrading.db.migrations import run_migrations
         Base.metadata.create_all(self.engine)
+        run_migrations(self.engine)
+        MySQLClient._initialized_engines.add(id(self.engine))
         
     def get_session(self):
         """获取数据库会话"""
@@ -182,6 +199,8 @@ class TradeRecord(Base):
 
     __table_args__ = (
         UniqueConstraint('task_id', 'symbol', 'bar_time', 'action', name='uq_trade_record'),
+        # 不指定股票时按任务拉取并按时间排序
+        Index('idx_trade_task_time', 'task_id', 'bar_time'),
     )
 
 
@@ -196,6 +215,11 @@ class BacktestLog(Base):
     message = Column(Text, nullable=False, comment='日志内容')
     created_at = Column(DateTime, default=datetime.now, comment='创建时间')
 
+    __table_args__ = (
+        # LogRepository.query_logs 按 (task_id, symbol) 过滤并按 id 增量翻页
+        Index('idx_log_task_symbol_id', 'task_id', 'symbol', 'id'),
+    )
+
 
 class StockKline(Base):
     """股票K线数据表"""
@@ -220,6 +244,21 @@ class StockKline(Base):
     )
 
 
+class StockKlineGap(Base):
+    """已确认上游无K线的日期段（停牌、上市前），增量同步时不再当作缺口重复拉取"""
+    __tablename__ = 'stock_kline_gaps'
+
+    id = Column(Integer, primary_key=True, autoincrement=True, comment='主键ID')
+    symbol = Column(String(20), nullable=False, comment='股票代码')
+    start_date = Column(Date, nullable=False, comment='开始日期')
+    end_date = Column(Date, nullable=False, comment='结束日期')
+    created_at = Column(DateTime, default=datetime.now, comment='创建时间')
+
+    __table_args__ = (
+        UniqueConstraint('symbol', 'start_date', 'end_date', name='uq_kline_gap'),
+    )
+
+
 class WatchlistItem(Base):
     """股票关注列表条目
 
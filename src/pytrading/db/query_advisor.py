@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@Description    ：慢查询采集与 EXPLAIN 索引建议
+@Author  ：EEric
+@Date    ：2026-10-19
+"""
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from pytrading.logger import logger
+
+
+class SlowQueryRecorder:
+    """按 SQL 语句（参数化文本）聚合超过阈值的查询
+
+    记录次数、总耗时、最大耗时和最近一次参数，供 EXPLAIN 复现执行计划。
+    """
+
+    MAX_STATEMENTS = 200
+
+    def __init__(self, threshold_ms: float):
+        self.threshold_ms = threshold_ms
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, engine: Engine, statement: str, parameters, elapsed_ms: float):
+        if elapsed_ms < self.threshold_ms:
+            return
+        with self._lock:
+            item = self._stats.get(statement)
+            if item is None:
+                if len(self._stats) >= self.MAX_STATEMENTS:
+                    # 淘汰总耗时最小的语句
+                    victim = min(self._stats, key=lambda k: self._stats[k]['total_ms'])
+                    self._stats.pop(victim)
+                item = {'statement': statement, 'engine': engine, 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0}
+                self._stats[statement] = item
+            item['count'] += 1
+            item['total_ms'] += elapsed_ms
+            item['max_ms'] = max(item['max_ms'], elapsed_ms)
+            item['parameters'] = parameters
+        logger.debug(f"慢查询 {elapsed_ms:.1f}ms: {statement[:200]}")
+
+    def top(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """按总耗时降序"""
+        with self._lock:
+            items = sorted(self._stats.values(), key=lambda i: i['total_ms'], reverse=True)[:limit]
+            return [dict(i) for i in items]
+
+    def clear(self):
+        with self._lock:
+            self._stats.clear()
+
+
+_recorder: Optional[SlowQueryRecorder] = None
+
+
+def get_recorder() -> Optional[SlowQueryRecorder]:
+    return _recorder
+
+
+def install_slow_query_capture(engine: Engine, threshold_ms: float):
+    """为 Engine 挂载慢查询采集（threshold_ms <= 0 时不采集）"""
+    global _recorder
+    if threshold_ms <= 0:
+        return
+    if _recorder is None:
+        _recorder = SlowQueryRecorder(threshold_ms)
+    recorder = _recorder
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('_query_start', []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get('_query_start')
+        if not starts:
+            return
+        elapsed_ms = (time.perf_counter() - starts.pop()) * 1000
+        if not executemany:
+            recorder.record(engine, statement, parameters, elapsed_ms)
+
+
+# ==================== EXPLAIN ====================
+
+def explain(engine: Engine, statement: str, parameters=None) -> List[Dict[str, Any]]:
+    """获取执行计划（MySQL: EXPLAIN；SQLite: EXPLAIN QUERY PLAN）"""
+    prefix = 'EXPLAIN QUERY PLAN ' if engine.dialect.name == 'sqlite' else 'EXPLAIN '
+    with engine.connect() as connection:
+        result = connection.exec_driver_sql(prefix + statement, parameters if parameters is not None else ())
+        columns = list(result.keys())
+        return [dict(zip(columns, row)) for row in result.fetchall()]
+
+
+def _plan_warnings(dialect: str, plan: List[Dict[str, Any]]) -> List[str]:
+    """从执行计划中找出全表扫描和额外排序"""
+    warnings = []
+    for step in plan:
+        if dialect == 'sqlite':
+            detail = str(step.get('detail', ''))
+            if detail.startswith('SCAN') and 'USING' not in detail:
+                warnings.append(f"全表扫描: {detail}")
+            if 'TEMP B-TREE' in detail:
+                warnings.append(f"额外排序: {detail}")
+        else:
+            table = step.get('table')
+            if step.get('type') == 'ALL':
+                warnings.append(f"全表扫描: {table}（预计 {step.get('rows')} 行）")
+            extra = str(step.get('Extra') or '')
+            if 'Using filesort' in extra:
+                warnings.append(f"额外排序: {table}")
+            if 'Using temporary' in extra:
+                warnings.append(f"临时表: {table}")
+    return warnings
+
+
+def advise(limit: int = 20, run_explain: bool = True) -> List[Dict[str, Any]]:
+    """慢查询列表及执行计划建议（只对 SELECT 执行 EXPLAIN）"""
+    recorder = get_recorder()
+    if recorder is None:
+        return []
+    report = []
+    for item in recorder.top(limit):
+        engine = item.pop('engine')
+        parameters = item.pop('parameters', None)
+        item['avg_ms'] = round(item['total_ms'] / item['count'], 2)
+        item['total_ms'] = round(item['total_ms'], 2)
+        item['max_ms'] = round(item['max_ms'], 2)
+        if run_explain and item['statement'].lstrip().upper().startswith('SELECT'):
+            try:
+                plan = explain(engine, item['statement'], parameters)
+                item['plan'] = plan
+                item['warnings'] = _plan_warnings(engine.dialect.name, plan)
+            except Exception as e:
+                item['explain_error'] = str(e)
+        report.append(item)
+    return report
@@ -1,7 +1,11 @@
 # -*- coding:utf-8 -*-
 import os
+import queue
 import logging
+import threading
+import time
 import contextvars
+from datetime import datetime
 
 # 可选：数据库日志写入
 try:
@@ -36,12 +40,43 @@ logger.setLevel(logging.INFO)
 
 
 class DBLogHandler(logging.Handler):
-    """将日志写入 backtest_logs（仅当设置了 task_id 时）"""
+    """将日志写入 backtest_logs（仅当设置了 task_id 时）
+
+    emit 只把记录放入有界队列，后台线程按批（LOG_BATCH_SIZE 条或 LOG_FLUSH_INTERVAL 秒）多行 INSERT，
+    日志调用方不再等待数据库。队列满时丢弃 DEBUG/INFO，WARN/ERROR 最多等待 LOG_QUEUE_BLOCK_MS 毫秒后丢弃；
+    丢弃条数按任务汇总成一条 WARN 日志写入。进程退出时 logging.shutdown 会调用 close() 写出剩余日志。
+    """
+
+    _STOP = object()
+
     def __init__(self, task_id: str = None, symbol: str = None):
         super().__init__()
         self._repo = None
         self._fixed_task_id = task_id
         self._fixed_symbol = symbol
+        self.queue_size = getattr(config, 'log_queue_size', 10000)
+        self.batch_size = getattr(config, 'log_batch_size', 500)
+        self.flush_interval = getattr(config, 'log_flush_interval', 1.0)
+        self.block_timeout = getattr(config, 'log_queue_block_ms', 50) / 1000
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self._drop_lock = threading.Lock()
+        self._dropped = {}
+        self._stats = {'enqueued': 0, 'written': 0, 'dropped': 0, 'failed': 0}
+
+    def _ensure_worker(self):
+        """首次写入时启动后台线程（fork 出的子进程重新创建队列和线程）"""
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._queue = queue.Queue(maxsize=self.queue_size)
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._worker, name='db-log-writer', daemon=True)
+            self._thread.start()
 
     def emit(self, record: logging.LogRecord) -> None:
         try:
@@ -49,37 +84,141 @@ class DBLogHandler(logging.Handler):
             task_id = getattr(record, 'task_id', None)
             symbol = getattr(record, 'symbol', None)
 
-            # 如果 record 中没有，尝试从 contextvars 获取
+            # 如果 record 中没有，尝试从 contextvars 获取（必须在调用线程中读取）
             if not task_id:
                 task_id = self._fixed_task_id if self._fixed_task_id is not None else _ctx_task_id.get()
             if not symbol:
                 symbol = self._fixed_symbol if self._fixed_symbol is not None else _ctx_symbol.get()
 
             # 必须有 task_id 才能记录
-            if not task_id:
+            if not task_id or LogRepository is None or config is None:
                 return
 
-            message = record.getMessage()
-            level = record.levelname
-            if LogRepository is None or config is None:
-                return
-            if self._repo is None:
-                # 使用便捷方法创建（内部创建独立 engine）
-                self._repo = LogRepository.from_config(
-                    host=getattr(config, 'mysql_host', ''),
-                    db_name=getattr(config, 'mysql_database', ''),
-                    port=getattr(config, 'mysql_port', 3306),
-                    username=getattr(config, 'mysql_username', ''),
-                    password=getattr(config, 'mysql_password', ''),
-                )
-            if symbol:
-                self._repo.append_result_log(task_id, symbol, message, level=level)
-            else:
-                self._repo.append_task_log(task_id, message, level=level)
+            item = {
+                "task_id": task_id,
+                "symbol": symbol or None,
+                "level": record.levelname,
+                "message": record.getMessage(),
+                "created_at": datetime.fromtimestamp(record.created),
+            }
+            self._ensure_worker()
+            try:
+                self._queue.put_nowait(item)
+            except queue.Full:
+                # 背压：低级别日志直接丢弃，WARN/ERROR 短暂等待
+                if record.levelno < logging.WARNING or not self._put_with_timeout(item):
+                    self._drop(task_id)
+                    return
+            self._stats['enqueued'] += 1
         except Exception:
             # 避免日志写入失败影响主流程
             pass
 
+    def _put_with_timeout(self, item) -> bool:
+        try:
+            self._queue.put(item, timeout=self.block_timeout)
+            return True
+        except queue.Full:
+            return False
+
+    def _drop(self, task_id: str):
+        with self._drop_lock:
+            self._dropped[task_id] = self._dropped.get(task_id, 0) + 1
+            self._stats['dropped'] += 1
+
+    def _take_drop_notices(self):
+        with self._drop_lock:
+            dropped, self._dropped = self._dropped, {}
+        return [{
+            "task_id": task_id,
+            "symbol": None,
+            "level": 'WARN',
+            "message": f"日志队列已满，丢弃 {count} 条日志",
+            "created_at": datetime.now(),
+        } for task_id, count in dropped.items()]
+
+    def _get_repo(self):
+        if self._repo is None:
+            # 使用便捷方法创建（复用进程级共享 Engine）
+            self._repo = LogRepository.from_config(
+                host=getattr(config, 'mysql_host', ''),
+                db_name=getattr(config, 'mysql_database', ''),
+                port=getattr(config, 'mysql_port', 3306),
+                username=getattr(config, 'mysql_username', ''),
+                password=getattr(config, 'mysql_password', ''),
+            )
+        return self._repo
+
+    def _write(self, batch):
+        batch = batch + self._take_drop_notices()
+        if not batch:
+            return
+        try:
+            self._stats['written'] += self._get_repo().append_logs(batch)
+        except Exception:
+            # 数据库不可用时丢弃本批，避免阻塞队列
+            self._stats['failed'] += len(batch)
+
+    def _worker(self):
+        q = self._queue
+        while True:
+            batch, waiters, stop = [], [], False
+            try:
+                item = q.get(timeout=self.flush_interval)
+            except queue.Empty:
+                self._write([])
+                continue
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is self._STOP:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    batch.append(item)
+                # flush() 请求或攒够一批时立即写库
+                if stop or waiters or len(batch) >= self.batch_size:
+                    break
+                remaining = deadline - time.monotonic()
+                try:
+                    item = q.get(timeout=remaining) if remaining > 0 else q.get_nowait()
+                except queue.Empty:
+                    break
+            self._write(batch)
+            for event in waiters:
+                event.set()
+            if stop:
+                return
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """等待队列中已有的日志写入数据库"""
+        if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+            return
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return
+        done.wait(timeout)
+
+    def close(self) -> None:
+        """停止后台线程并写出剩余日志"""
+        try:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                self._queue.put(self._STOP, timeout=5.0)
+                self._thread.join(timeout=10.0)
+            self._thread = None
+        except Exception:
+            pass
+        finally:
+            super().close()
+
+    def stats(self) -> dict:
+        """入队/写入/丢弃/失败条数和当前队列长度"""
+        result = dict(self._stats)
+        result['queued'] = self._queue.qsize() if self._queue is not None else 0
+        return result
+
 
 def set_log_context(task_id: str = None, symbol: str = None, enable_db: bool = False):
     """设置日志上下文（线程/协程局部）"""
@@ -82,6 +82,14 @@ class BackTest:
         }
     
     def save(self):
-        """保存回测数据"""
+        """保存回测数据
+
+        由主进程批量写库时（设置了 PYTRADING_RESULT_SINK 结果文件）只写结果文件，不直接连接数据库。
+        """
+        from .batch_back_test_saver import emit_result, result_sink_path
+        path = result_sink_path()
+        if path:
+            emit_result(self, path)
+            return
         saver = get_backtest_saver()
         saver.save(self)
@@ -9,7 +9,15 @@
 
 
 def get_backtest_saver():
-    """获取MySQL回测数据保存器"""
+    """获取回测数据保存器
+
+    DB_TYPE=mysql / sqlite 共用基于 SQLAlchemy 的实现，连接由 MySQLClient 按 DB_TYPE 选择。
+    """
+    from pytrading.config import config
+    db_type = getattr(config, 'db_type', 'mysql').lower()
+    if db_type not in ('mysql', 'sqlite'):
+        print(f"ERROR: 不支持的数据库类型: {db_type}")
+        return None
     try:
         from .mysql_back_test_saver import MySQLBackTestSaver
         saver = MySQLBackTestSaver()
@@ -17,5 +25,5 @@ def get_backtest_saver():
         saver.test_connection()
         return saver
     except Exception as e:
-        print(f"ERROR: MySQL数据库连接失败 - {str(e)}")
+        print(f"ERROR: {db_type}数据库连接失败 - {str(e)}")
         return None
\ No newline at end of file
@@ -0,0 +1,272 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@Description    ：回测结果批量写入（write-behind）- 子进程把结果写入结果文件，主进程缓冲后按唯一键多行 upsert
+@Author  ：EEric
+@Date    ：2026-10-19
+"""
+import atexit
+import enum
+import json
+import glob
+import os
+import re
+import tempfile
+import threading
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+import psutil
+
+from pytrading.config import config
+from pytrading.logger import logger
+
+# 子进程结果文件：设置后 BackTest.save() 只把结果追加到该文件（每行一个 JSON），由主进程批量写库。
+# 结果不经 stdout 传递，子进程的日志和 stderr 输出不会截断或混入结果行
+RESULT_SINK_ENV = 'PYTRADING_RESULT_SINK'
+# 结果文件名带主进程 pid，据此判断遗留文件的主进程是否已退出
+_SINK_PREFIX = 'pytrading-result-'
+_SINK_PID = re.compile(rf'^{_SINK_PREFIX}(\d+)-')
+
+
+def result_sink_path() -> Optional[str]:
+    return os.getenv(RESULT_SINK_ENV) or None
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+def emit_result(backtest_obj, path: Optional[str] = None):
+    """子进程：把回测结果作为单独一行追加到结果文件"""
+    line = json.dumps(backtest_obj.to_dict(), default=_json_default, ensure_ascii=False)
+    with open(path or result_sink_path(), 'a', encoding='utf-8') as f:
+        f.write(f"{line}\n")
+
+
+def parse_result_line(line: str) -> Optional[Dict]:
+    """主进程：解析结果行，空行或无法解析的行返回 None"""
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        logger.warning(f"回测结果行解析失败: {e}")
+        return None
+
+
+class BatchBackTestSaver:
+    """回测结果写缓冲
+
+    子进程结果经 run_process/save 进入缓冲区（同一 symbol+回测区间只保留最后一次），
+    满 flush_rows 行或每 flush_interval 秒按 uq_symbol_time 多行 upsert 一次，
+    写库后刷新任务进度。close() 在任务结束时写出剩余结果；进程退出时 atexit 兜底。
+    写库失败的行放回缓冲区，下次 flush 重试。
+
+    子进程结果文件保存在 spool_dir，其中的结果全部提交后才删除；主进程异常退出遗留的文件
+    由下一次 start() 重新读入。
+    """
+
+    def __init__(self, task_id: Optional[str] = None, flush_rows: Optional[int] = None,
+                 flush_interval: Optional[float] = None, mysql_client=None, spool_dir: Optional[str] = None):
+        from pytrading.db.mysql import MySQLClient
+        self.task_id = task_id
+        self.flush_rows = flush_rows or config.result_batch_rows
+        self.flush_interval = flush_interval if flush_interval is not None else config.result_batch_interval
+        self.mysql_client = mysql_client or MySQLClient(
+            host=config.mysql_host,
+            db_name=config.mysql_database,
+            port=config.mysql_port,
+            username=config.mysql_username,
+            password=config.mysql_password
+        )
+        self.spool_dir = spool_dir or config.result_spool_dir
+        self._buffer: Dict[tuple, Dict] = {}
+        # 已读入缓冲区、但其中结果尚未全部提交的结果文件
+        self._files: List[str] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.saved_count = 0
+        self.flush_count = 0
+
+    # ==================== 写入 ====================
+
+    def add(self, data: Dict):
+        """缓冲一条回测结果（to_dict() 或结果行解析出的字典）"""
+        from pytrading.model.mysql_back_test_saver import MySQLBackTestSaver
+        row = MySQLBackTestSaver._prepare_row(data)
+        key = tuple(row.get(k) for k in MySQLBackTestSaver.UPSERT_KEYS)
+        with self._lock:
+            self._buffer[key] = row
+            full = len(self._buffer) >= self.flush_rows
+        if full:
+            self.flush()
+
+    def save(self, backtest_obj):
+        """与 BackTestSaver.save 相同的接口"""
+        self.add(backtest_obj.to_dict())
+
+    def consume_file(self, path: str) -> int:
+        """读取子进程结果文件，结果进入缓冲区，返回条数；文件在其中结果提交后由 flush 删除"""
+        count = 0
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                data = parse_result_line(line)
+                if data is not None:
+                    self.add(data)
+                    count += 1
+        # 全部结果进入缓冲区后再登记：包含该文件的 flush 快照一定包含它的全部结果
+        with self._lock:
+            self._files.append(path)
+        return count
+
+    def run_process(self, cmd, env: Optional[Dict] = None, cwd: Optional[str] = None, pool=None) -> int:
+        """为子进程分配独立的结果文件并执行，子进程退出后读取结果进入缓冲区"""
+        from pytrading.utils.process import exec_process
+        os.makedirs(self.spool_dir, exist_ok=True)
+        fd, path = tempfile.mkstemp(prefix=f'{_SINK_PREFIX}{os.getpid()}-', suffix='.jsonl', dir=self.spool_dir)
+        os.close(fd)
+        try:
+            return exec_process(cmd, env={**(env or {}), RESULT_SINK_ENV: path}, cwd=cwd, pool=pool)
+        finally:
+            try:
+                self.consume_file(path)
+            except Exception as e:
+                # 保留文件，下次启动时重新读入
+                logger.error(f"读取回测结果文件失败: {path}, error: {e}")
+
+    def recover(self) -> int:
+        """读入主进程已退出的遗留结果文件（上次异常退出时未提交的结果），返回条数"""
+        count = 0
+        for path in sorted(glob.glob(os.path.join(self.spool_dir, f'{_SINK_PREFIX}*.jsonl'))):
+            match = _SINK_PID.match(os.path.basename(path))
+            if not match or psutil.pid_exists(int(match.group(1))):
+                continue
+            try:
+                count += self.consume_file(path)
+            except Exception as e:
+                logger.error(f"读取遗留回测结果文件失败: {path}, error: {e}")
+        if count:
+            logger.info(f"读入遗留回测结果 {count} 条")
+        return count
+
+    def _remove_files(self, files: List[str]):
+        for path in files:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"删除回测结果文件失败: {path}, error: {e}")
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._buffer)
+
+    def flush(self) -> int:
+        """写出缓冲区，返回写入行数"""
+        from pytrading.model.mysql_back_test_saver import MySQLBackTestSaver
+        with self._flush_lock:
+            with self._lock:
+                rows: List[Dict] = list(self._buffer.values())
+                self._buffer = {}
+                files, self._files = self._files, []
+            if not rows:
+                self._remove_files(files)
+                return 0
+
+            session = self.mysql_client.get_session()
+            try:
+                MySQLBackTestSaver.upsert_rows(session, rows)
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                # 放回缓冲区等待重试（期间新到的同键结果优先）
+                with self._lock:
+                    for row in rows:
+                        key = tuple(row.get(k) for k in MySQLBackTestSaver.UPSERT_KEYS)
+                        self._buffer.setdefault(key, row)
+                    self._files = files + self._files
+                logger.error(f"批量写入回测结果失败({len(rows)} 行)，稍后重试: {e}")
+                return 0
+            finally:
+                session.close()
+
+            self._remove_files(files)
+            MySQLBackTestSaver.invalidate_cache()
+            self.saved_count += len(rows)
+            self.flush_count += 1
+            logger.info(f"批量写入回测结果 {len(rows)} 行, Task ID: {self.task_id}")
+            self._update_progress()
+            return len(rows)
+
+    def _update_progress(self):
+        """按已落库的完成结果更新任务进度（最多 99%，100% 由主任务设置）"""
+        if not self.task_id:
+            return
+        from pytrading.db.mysql import BacktestStatus, BacktestTask, BackTestResult
+        session = self.mysql_client.get_session()
+        try:
+            task = session.query(BacktestTask).filter_by(task_id=self.task_id).first()
+            if not task:
+                return
+            completed_count = session.query(BackTestResult).filter_by(
+                task_id=self.task_id, status=BacktestStatus.finished).count()
+            total_count = len(task.symbols) if isinstance(task.symbols, list) else 1
+            if total_count > 0:
+                task.progress = min(int((completed_count / total_count) * 100), 99)
+                session.commit()
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Update task progress failed: {str(e)}, Task ID: {self.task_id}")
+        finally:
+            session.close()
+
+    # ==================== 生命周期 ====================
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def start(self) -> 'BatchBackTestSaver':
+        """读入遗留结果文件，启动定时 flush 线程并注册退出兜底"""
+        self.recover()
+        if self._thread is None and self.flush_interval > 0:
+            self._thread = threading.Thread(target=self._run, name='result-flush', daemon=True)
+            self._thread.start()
+        atexit.register(self.close)
+        return self
+
+    def close(self):
+        """停止定时线程并写出剩余结果（可重复调用）"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        atexit.unregister(self.close)
+        self.flush()
+        remaining = self.pending()
+        if remaining:
+            # 最后再重试一次，仍失败则记录未写入的标的
+            self.flush()
+            with self._lock:
+                symbols = [row.get('symbol') for row in self._buffer.values()]
+            if symbols:
+                logger.error(f"回测结果未能写入数据库: {len(symbols)} 行, Task ID: {self.task_id}, 标的: {symbols},"
+                             f" 结果文件保留在 {self.spool_dir}，下次启动时重新写入")
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -6,21 +6,39 @@
 @Email  : yflying7@gmail.com
 @Date    ：2022/11/20 21:50 
 """
+import base64
+import json
+import threading
+import time
 import traceback
 import enum
 from decimal import Decimal
 from datetime import datetime
+from types import SimpleNamespace
+from typing import List
 
 from .back_test_saver import BackTestSaver
-from sqlalchemy import or_, func, and_
+from sqlalchemy import or_, func, and_, DateTime
 from pytrading.logger import logger
 from pytrading.db.mysql import MySQLClient, BackTestResult
+from pytrading.db.analytics import DuckDBAnalytics
+from pytrading.db.bulk import bulk_upsert
 from pytrading.config import config
 from pytrading.utils import float_fmt
 
 
 class MySQLBackTestSaver(BackTestSaver):
     """MySQL回测数据保存实现"""
+
+    # 列表总数缓存：{筛选条件: (版本, 总数, 缓存时间)}
+    _count_cache = {}
+    _cache_lock = threading.Lock()
+    _results_version = 0
+    COUNT_CACHE_SIZE = 256
+    # 策略映射缓存
+    _strategy_map = None
+    _strategy_map_at = 0.0
+    STRATEGY_MAP_TTL = 300
     
     def __init__(self):
         self.mysql_client = MySQLClient(
@@ -53,140 +71,71 @@ class MySQLBackTestSaver(BackTestSaver):
                         min_market_cap=None, max_market_cap=None,
                         min_drawdown_duration=None, max_drawdown_duration=None,
                         limit=100, page=1, per_page=10,
-                        sort_by=None, sort_order='desc'):
-        """获取所有回测结果，支持分页、筛选和排序（全部在数据库查询层完成）"""
+                        sort_by=None, sort_order='desc', cursor=None):
+        """获取所有回测结果，支持分页、筛选和排序（全部在数据库查询层完成）
+
+        传入 cursor（上一页返回的 next_cursor）时按 (排序字段, id) 键集分页，
+        深分页不再随 OFFSET 线性变慢；总数按筛选条件缓存，结果写入后失效。
+        """
         logger.info(
             f"从MySQL获取回测结果，参数: symbol={symbol}, trending_type={trending_type},"
             f" pnl[{min_pnl_ratio},{max_pnl_ratio}], win[{min_win_ratio},{max_win_ratio}],"
-            f" page={page}, per_page={per_page}, sort_by={sort_by}, sort_order={sort_order}"
+            f" page={page}, per_page={per_page}, sort_by={sort_by}, sort_order={sort_order}, cursor={cursor}"
         )
+        filters = dict(
+            symbol=symbol, start_date=start_date, end_date=end_date, trending_type=trending_type,
+            industry=industry, min_pnl_ratio=min_pnl_ratio, max_pnl_ratio=max_pnl_ratio,
+            min_win_ratio=min_win_ratio, max_win_ratio=max_win_ratio, min_market_cap=min_market_cap,
+            max_market_cap=max_market_cap, min_drawdown_duration=min_drawdown_duration,
+            max_drawdown_duration=max_drawdown_duration)
+
+        if DuckDBAnalytics.available() and not cursor:
+            try:
+                return self._screen_results_duckdb(page=page, per_page=per_page, sort_by=sort_by,
+                                                   sort_order=sort_order, **filters)
+            except Exception as e:
+                DuckDBAnalytics.disable(e)
+
         session = self.mysql_client.get_session()
         
         try:
-            # 基础查询
-            query = session.query(BackTestResult)
-            
-            # 应用过滤条件
-            if symbol:
-                # 同时支持股票代码与名称的模糊匹配
-                like_expr = f'%{symbol}%'
-                query = query.filter(or_(
-                    BackTestResult.symbol.like(like_expr),
-                    BackTestResult.name.like(like_expr)
-                ))
-            if start_date:
-                query = query.filter(BackTestResult.backtest_start_time >= start_date)
-            if end_date:
-                query = query.filter(BackTestResult.backtest_end_time <= end_date)
-            if trending_type:
-                query = query.filter(BackTestResult.trending_type == trending_type)
-            if industry:
-                query = query.filter(BackTestResult.industry == industry)
-            # 市值筛选（亿元）
-            if min_market_cap is not None:
-                query = query.filter(BackTestResult.market_cap >= min_market_cap)
-            if max_market_cap is not None:
-                query = query.filter(BackTestResult.market_cap <= max_market_cap)
-            # 回撤持续时间筛选（天）
-            if min_drawdown_duration is not None:
-                query = query.filter(BackTestResult.max_drawdown_duration >= min_drawdown_duration)
-            if max_drawdown_duration is not None:
-                query = query.filter(BackTestResult.max_drawdown_duration <= max_drawdown_duration)
-            # 注意：数据库中存储的 pnl_ratio / win_ratio 通常为小数(0-1)
-            if min_pnl_ratio is not None:
-                query = query.filter(BackTestResult.pnl_ratio >= (min_pnl_ratio / 100.0))
-            if max_pnl_ratio is not None:
-                query = query.filter(BackTestResult.pnl_ratio <= (max_pnl_ratio / 100.0))
-            if min_win_ratio is not None:
-                query = query.filter(BackTestResult.win_ratio >= (min_win_ratio / 100.0))
-            if max_win_ratio is not None:
-                query = query.filter(BackTestResult.win_ratio <= (max_win_ratio / 100.0))
-            
-            # 获取总记录数
-            total_count = query.count()
-            
-            # 计算分页参数
-            offset = (page - 1) * per_page
-            
-            # 应用排序
-            sort_field_map = {
-                'pnl_ratio': BackTestResult.pnl_ratio,
-                'win_ratio': BackTestResult.win_ratio,
-                'sharp_ratio': BackTestResult.sharp_ratio,
-                'max_drawdown': BackTestResult.max_drawdown,
-                'market_cap': BackTestResult.market_cap,
-                'max_drawdown_duration': BackTestResult.max_drawdown_duration,
-                'created_at': BackTestResult.created_at
-            }
-            
-            if sort_by and sort_by in sort_field_map:
-                sort_field = sort_field_map[sort_by]
-                if sort_order.lower() == 'asc':
-                    query = query.order_by(sort_field.asc())
-                else:
-                    query = query.order_by(sort_field.desc())
+            query = self._apply_filters(session.query(BackTestResult), **filters)
+
+            # 获取总记录数（按筛选条件缓存）
+            total_count = self._cached_count(session, query, filters)
+
+            # 应用排序：无有效排序字段时默认按创建时间倒序；id 作为唯一的次级排序键
+            sort_name = sort_by if sort_by in self.SORT_COLUMNS else 'created_at'
+            ascending = sort_by in self.SORT_COLUMNS and (sort_order or 'desc').lower() == 'asc'
+            sort_field = getattr(BackTestResult, sort_name)
+            if ascending:
+                query = query.order_by(sort_field.asc(), BackTestResult.id.asc())
             else:
-                # 默认按创建时间倒序
-                query = query.order_by(BackTestResult.created_at.desc())
-            
+                query = query.order_by(sort_field.desc(), BackTestResult.id.desc())
+
             # 应用分页
-            query = query.offset(offset).limit(per_page)
-            
-            results = []
+            if cursor:
+                query = query.filter(self._keyset_condition(sort_field, ascending, self._decode_cursor(cursor)))
+            else:
+                query = query.offset((page - 1) * per_page)
+            rows = query.limit(per_page).all()
+
+            strategy_map = self._get_strategy_map(session)
+            results = [self._result_to_dict(row, strategy_map) for row in rows]
+
+            next_cursor = None
+            if len(rows) == per_page:
+                last = rows[-1]
+                next_cursor = self._encode_cursor(getattr(last, sort_name), last.id)
 
-            # 预先加载所有策略映射 (strategy_name -> strategy_id)
-            strategy_map = {}
-            try:
-                from pytrading.db.mysql import Strategy
-                strategy_rows = session.query(Strategy.id, Strategy.name).all()
-                strategy_map = {row.name: row.id for row in strategy_rows}
-            except Exception:
-                pass  # 忽略查询错误
-
-            for row in query.all():
-                # 如果 strategy_id 为空，尝试从 strategy_name 查找
-                strategy_id = row.strategy_id
-                if strategy_id is None and row.strategy_name:
-                    strategy_id = strategy_map.get(row.strategy_name)
-
-                result_dict = {
-                    'id': row.id,
-                    'task_id': row.task_id,
-                    'symbol': row.symbol,
-                    'name': row.name,
-                    'strategy_id': strategy_id,  # 策略ID
-                    # 优先取strategy_name字段，如果没有则回退到none
-                    'strategy_name': row.strategy_name if hasattr(row, 'strategy_name') else None,
-                    'backtest_start_time': row.backtest_start_time.strftime('%Y-%m-%d %H:%M:%S') if row.backtest_start_time else None,
-                    'backtest_end_time': row.backtest_end_time.strftime('%Y-%m-%d %H:%M:%S') if row.backtest_end_time else None,
-                    'pnl_ratio': float(row.pnl_ratio) if row.pnl_ratio else 0.0,
-                    'sharp_ratio': float(row.sharp_ratio) if row.sharp_ratio else 0.0,
-                    'max_drawdown': float(row.max_drawdown) if row.max_drawdown else 0.0,
-                    'risk_ratio': float(row.risk_ratio) if row.risk_ratio else 0.0,
-                    'open_count': row.open_count or 0,
-                    'close_count': row.close_count or 0,
-                    'win_count': row.win_count or 0,
-                    'lose_count': row.lose_count or 0,
-                    'win_ratio': float(row.win_ratio) if row.win_ratio else 0.0,
-                    'trending_type': row.trending_type,
-                    'current_price': row.current_price,
-                    'volume_avg_7d': float(row.volume_avg_7d) if row.volume_avg_7d else None,
-                    'atr': float(row.atr) if row.atr else None,
-                    'is_blacklist': row.is_blacklist or False,
-                    'industry': row.industry,
-                    'market_cap': float(row.market_cap) if row.market_cap else None,
-                    'max_drawdown_duration': row.max_drawdown_duration or None,
-                    'created_at': row.created_at.strftime('%Y-%m-%d %H:%M:%S') if row.created_at else None,
-                }
-                results.append(result_dict)
-            
             logger.info(f"成功从MySQL获取 {len(results)} 条回测结果，总记录数: {total_count}")
             return {
                 'data': results,
                 'total': total_count,
                 'page': page,
                 'per_page': per_page,
-                'total_pages': (total_count + per_page - 1) // per_page
+                'total_pages': (total_count + per_page - 1) // per_page,
+                'next_cursor': next_cursor,
             }
             
         except Exception as e:
@@ -194,54 +143,338 @@ class MySQLBackTestSaver(BackTestSaver):
             raise e
         finally:
             session.close()
-    
+
+    def iter_result_rows(self, columns, chunk_size=2000, **filters):
+        """按列表默认排序（created_at, id 倒序）流式读取筛选结果，每次产出不超过 chunk_size 行
+
+        使用服务端游标（stream_results）逐批取行，只查询 columns 指定的列，不构造 ORM 对象，
+        内存占用与总行数无关。生成器关闭时释放会话。
+        """
+        session = self.mysql_client.get_session()
+        try:
+            query = self._apply_filters(session.query(*columns), **filters) \
+                .order_by(BackTestResult.created_at.desc(), BackTestResult.id.desc()) \
+                .execution_options(stream_results=True, yield_per=chunk_size)
+            for partition in session.execute(query.statement).partitions(chunk_size):
+                yield partition
+        finally:
+            session.close()
+
+    def has_results(self, **filters) -> bool:
+        session = self.mysql_client.get_session()
+        try:
+            query = self._apply_filters(session.query(BackTestResult.id), **filters)
+            return session.query(query.exists()).scalar()
+        finally:
+            session.close()
+
+    @staticmethod
+    def _pinyin_symbols(keyword: str) -> List[str]:
+        """通过已构建的股票索引把拼音首字母解析为代码列表；索引未构建或命中过多时返回空列表"""
+        from pytrading.service.symbol_index_service import get_symbol_index_service
+        index = get_symbol_index_service().peek()
+        return (index.match_pinyin(keyword) or []) if index is not None else []
+
+    @staticmethod
+    def _apply_filters(query, symbol=None, start_date=None, end_date=None,
+                       trending_type=None, industry=None,
+                       min_pnl_ratio=None, max_pnl_ratio=None,
+                       min_win_ratio=None, max_win_ratio=None,
+                       min_market_cap=None, max_market_cap=None,
+                       min_drawdown_duration=None, max_drawdown_duration=None):
+        """应用列表筛选条件"""
+        if symbol:
+            if '.' in symbol:
+                # 完整代码（如 SHSE.600000）走唯一前缀匹配，可使用索引
+                query = query.filter(BackTestResult.symbol.like(f'{symbol}%'))
+            else:
+                # 同时支持股票代码与名称的模糊匹配，并补充股票索引解析出的拼音首字母命中
+                like_expr = f'%{symbol}%'
+                conditions = [BackTestResult.symbol.like(like_expr), BackTestResult.name.like(like_expr)]
+                pinyin_symbols = MySQLBackTestSaver._pinyin_symbols(symbol)
+                if pinyin_symbols:
+                    conditions.append(BackTestResult.symbol.in_(pinyin_symbols))
+                query = query.filter(or_(*conditions))
+        if start_date:
+            query = query.filter(BackTestResult.backtest_start_time >= start_date)
+        if end_date:
+            query = query.filter(BackTestResult.backtest_end_time <= end_date)
+        if trending_type:
+            query = query.filter(BackTestResult.trending_type == trending_type)
+        if industry:
+            query = query.filter(BackTestResult.industry == industry)
+        # 市值筛选（亿元）
+        if min_market_cap is not None:
+            query = query.filter(BackTestResult.market_cap >= min_market_cap)
+        if max_market_cap is not None:
+            query = query.filter(BackTestResult.market_cap <= max_market_cap)
+        # 回撤持续时间筛选（天）
+        if min_drawdown_duration is not None:
+            query = query.filter(BackTestResult.max_drawdown_duration >= min_drawdown_duration)
+        if max_drawdown_duration is not None:
+            query = query.filter(BackTestResult.max_drawdown_duration <= max_drawdown_duration)
+        # 注意：数据库中存储的 pnl_ratio / win_ratio 通常为小数(0-1)
+        if min_pnl_ratio is not None:
+            query = query.filter(BackTestResult.pnl_ratio >= (min_pnl_ratio / 100.0))
+        if max_pnl_ratio is not None:
+            query = query.filter(BackTestResult.pnl_ratio <= (max_pnl_ratio / 100.0))
+        if min_win_ratio is not None:
+            query = query.filter(BackTestResult.win_ratio >= (min_win_ratio / 100.0))
+        if max_win_ratio is not None:
+            query = query.filter(BackTestResult.win_ratio <= (max_win_ratio / 100.0))
+        return query
+
+    # ==================== 键集分页 ====================
+
+    @staticmethod
+    def _encode_cursor(value, row_id) -> str:
+        """游标编码：排序字段值 + id（值统一转为字符串，NULL 单独标记）"""
+        if isinstance(value, datetime):
+            value = value.strftime('%Y-%m-%d %H:%M:%S.%f')
+        payload = {"v": None if value is None else str(value), "id": row_id}
+        return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor: str):
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+            return payload["v"], int(payload["id"])
+        except Exception:
+            raise ValueError(f"无效的分页游标: {cursor}")
+
+    @staticmethod
+    def _keyset_condition(sort_field, ascending: bool, position):
+        """(排序字段, id) 严格位于游标之后的条件
+
+        与 MySQL/SQLite 的排序规则一致，NULL 视为最小值：升序时在最前，降序时在最后。
+        """
+        value, row_id = position
+        if value is not None:
+            if isinstance(sort_field.type, DateTime):
+                value = datetime.strptime(value, '%Y-%m-%d %H:%M:%S.%f')
+            else:
+                value = sort_field.type.python_type(value)
+        id_field = BackTestResult.id
+        if ascending:
+            if value is None:
+                return or_(and_(sort_field.is_(None), id_field > row_id), sort_field.isnot(None))
+            return or_(sort_field > value, and_(sort_field == value, id_field > row_id))
+        if value is None:
+            return and_(sort_field.is_(None), id_field < row_id)
+        return or_(sort_field < value, and_(sort_field == value, id_field < row_id), sort_field.is_(None))
+
+    # ==================== 缓存 ====================
+
+    @classmethod
+    def invalidate_cache(cls):
+        """回测结果写入/删除后调用，使计数缓存失效"""
+        with cls._cache_lock:
+            cls._results_version += 1
+            cls._count_cache.clear()
+
+    @classmethod
+    def _cached_count(cls, session, query, filters: dict) -> int:
+        """按筛选条件缓存总数
+
+        同进程写入通过 invalidate_cache 立即失效；其他进程（回测子进程）写入通过
+        MAX(id) 变化感知，原地更新则最多延迟 RESULT_COUNT_TTL 秒。
+        """
+        max_id = session.query(func.max(BackTestResult.id)).scalar()
+        key = tuple(sorted(filters.items()))
+        now = time.monotonic()
+        with cls._cache_lock:
+            version = (cls._results_version, max_id)
+            cached = cls._count_cache.get(key)
+            if cached and cached[0] == version and now - cached[2] < config.result_count_ttl:
+                return cached[1]
+
+        total = query.order_by(None).count()
+        with cls._cache_lock:
+            if len(cls._count_cache) >= cls.COUNT_CACHE_SIZE:
+                cls._count_cache.clear()
+            cls._count_cache[key] = (version, total, now)
+        return total
+
+    @classmethod
+    def _get_strategy_map(cls, session) -> dict:
+        """策略映射 (strategy_name -> strategy_id)，进程内缓存"""
+        now = time.monotonic()
+        if cls._strategy_map is not None and now - cls._strategy_map_at < cls.STRATEGY_MAP_TTL:
+            return cls._strategy_map
+        try:
+            from pytrading.db.mysql import Strategy
+            strategy_rows = session.query(Strategy.id, Strategy.name).all()
+            cls._strategy_map = {row.name: row.id for row in strategy_rows}
+            cls._strategy_map_at = now
+        except Exception:
+            return cls._strategy_map or {}  # 忽略查询错误
+        return cls._strategy_map
+
+    # DuckDB 列式筛选与 ORM 查询使用相同的排序字段
+    SORT_COLUMNS = ('pnl_ratio', 'win_ratio', 'sharp_ratio', 'max_drawdown', 'market_cap',
+                    'max_drawdown_duration', 'created_at')
+
+    def _screen_results_duckdb(self, symbol=None, start_date=None, end_date=None,
+                               trending_type=None, industry=None,
+                               min_pnl_ratio=None, max_pnl_ratio=None,
+                               min_win_ratio=None, max_win_ratio=None,
+                               min_market_cap=None, max_market_cap=None,
+                               min_drawdown_duration=None, max_drawdown_duration=None,
+                               page=1, per_page=10, sort_by=None, sort_order='desc'):
+        """嵌入式部署下通过 DuckDB 执行回测结果筛选（条件与 ORM 查询一致）"""
+        conditions, params = [], []
+        if symbol:
+            pinyin_symbols = self._pinyin_symbols(symbol)
+            pinyin_clause = f" OR symbol IN ({', '.join('?' * len(pinyin_symbols))})" if pinyin_symbols else ""
+            conditions.append(f"(symbol ILIKE ? OR name ILIKE ?{pinyin_clause})")
+            params += [f'%{symbol}%', f'%{symbol}%', *pinyin_symbols]
+        range_filters = [
+            ("backtest_start_time >= ?", start_date),
+            ("backtest_end_time <= ?", end_date),
+            ("trending_type = ?", trending_type),
+            ("industry = ?", industry),
+            ("market_cap >= ?", min_market_cap),
+            ("market_cap <= ?", max_market_cap),
+            ("max_drawdown_duration >= ?", min_drawdown_duration),
+            ("max_drawdown_duration <= ?", max_drawdown_duration),
+            ("pnl_ratio >= ?", min_pnl_ratio / 100.0 if min_pnl_ratio is not None else None),
+            ("pnl_ratio <= ?", max_pnl_ratio / 100.0 if max_pnl_ratio is not None else None),
+            ("win_ratio >= ?", min_win_ratio / 100.0 if min_win_ratio is not None else None),
+            ("win_ratio <= ?", max_win_ratio / 100.0 if max_win_ratio is not None else None),
+        ]
+        for clause, value in range_filters:
+            if value is not None and value != '':
+                conditions.append(clause)
+                params.append(value)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        sort_column = sort_by if sort_by in self.SORT_COLUMNS else 'created_at'
+        # 与 MySQL/SQLite 一致：升序时 NULL 在前，降序时 NULL 在后；id 作为唯一的次级排序键
+        ascending = sort_by in self.SORT_COLUMNS and (sort_order or 'desc').lower() == 'asc'
+        direction = 'ASC NULLS FIRST' if ascending else 'DESC NULLS LAST'
+        id_direction = 'ASC' if ascending else 'DESC'
+
+        table = DuckDBAnalytics.table(BackTestResult.__tablename__)
+        total_count = DuckDBAnalytics.query(f"SELECT COUNT(*) AS cnt FROM {table} {where}", params)[0]['cnt']
+        rows = DuckDBAnalytics.query(
+            f"SELECT * FROM {table} {where} ORDER BY {sort_column} {direction}, id {id_direction} LIMIT ? OFFSET ?",
+            params + [per_page, (page - 1) * per_page])
+
+        strategy_map = {
+            r['name']: r['id'] for r in DuckDBAnalytics.query(f"SELECT id, name FROM {DuckDBAnalytics.table('strategies')}")
+        }
+        results = [self._result_to_dict(SimpleNamespace(**r), strategy_map) for r in rows]
+
+        # 与 ORM 路径相同的游标，客户端可从 DuckDB 返回的页继续键集分页
+        next_cursor = None
+        if len(rows) == per_page:
+            last = rows[-1]
+            next_cursor = self._encode_cursor(last[sort_column], last['id'])
+
+        logger.info(f"DuckDB 筛选回测结果 {len(results)} 条，总记录数: {total_count}")
+        return {
+            'data': results,
+            'total': total_count,
+            'page': page,
+            'per_page': per_page,
+            'total_pages': (total_count + per_page - 1) // per_page,
+            'next_cursor': next_cursor,
+        }
+
+    @staticmethod
+    def _result_to_dict(row, strategy_map):
+        """回测结果行转为接口字典（ORM 对象与 DuckDB 行通用）"""
+        # 如果 strategy_id 为空，尝试从 strategy_name 查找
+        strategy_id = row.strategy_id
+        if strategy_id is None and row.strategy_name:
+            strategy_id = strategy_map.get(row.strategy_name)
+
+        return {
+            'id': row.id,
+            'task_id': row.task_id,
+            'symbol': row.symbol,
+            'name': row.name,
+            'strategy_id': strategy_id,  # 策略ID
+            # 优先取strategy_name字段，如果没有则回退到none
+            'strategy_name': row.strategy_name if hasattr(row, 'strategy_name') else None,
+            'backtest_start_time': row.backtest_start_time.strftime('%Y-%m-%d %H:%M:%S') if row.backtest_start_time else None,
+            'backtest_end_time': row.backtest_end_time.strftime('%Y-%m-%d %H:%M:%S') if row.backtest_end_time else None,
+            'pnl_ratio': float(row.pnl_ratio) if row.pnl_ratio else 0.0,
+            'sharp_ratio': float(row.sharp_ratio) if row.sharp_ratio else 0.0,
+            'max_drawdown': float(row.max_drawdown) if row.max_drawdown else 0.0,
+            'risk_ratio': float(row.risk_ratio) if row.risk_ratio else 0.0,
+            'open_count': row.open_count or 0,
+            'close_count': row.close_count or 0,
+            'win_count': row.win_count or 0,
+            'lose_count': row.lose_count or 0,
+            'win_ratio': float(row.win_ratio) if row.win_ratio else 0.0,
+            'trending_type': row.trending_type,
+            'current_price': row.current_price,
+            'volume_avg_7d': float(row.volume_avg_7d) if row.volume_avg_7d else None,
+            'atr': float(row.atr) if row.atr else None,
+            'is_blacklist': row.is_blacklist or False,
+            'industry': row.industry,
+            'market_cap': float(row.market_cap) if row.market_cap else None,
+            'max_drawdown_duration': row.max_drawdown_duration or None,
+            'created_at': row.created_at.strftime('%Y-%m-%d %H:%M:%S') if row.created_at else None,
+        }
+
+    # 回测结果唯一键（uq_symbol_time）
+    UPSERT_KEYS = ('symbol', 'backtest_start_time', 'backtest_end_time')
+
+    @staticmethod
+    def _prepare_row(data):
+        """回测结果字典转换为可写入 backtest_results 的行（安全的数据类型转换）"""
+        columns = BackTestResult.__table__.c
+        row = dict()
+        for key, value in data.items():
+            if key not in columns:
+                continue
+            if value is None:
+                row[key] = None
+            elif isinstance(value, enum.Enum):
+                # 枚举类型转换为其值
+                row[key] = value.value
+            elif isinstance(value, str) and isinstance(columns[key].type, DateTime):
+                # 命令行参数/JSON 传入的时间字符串
+                row[key] = datetime.fromisoformat(value)
+            elif isinstance(value, (int, str)):
+                row[key] = value
+            elif isinstance(value, float):
+                # 转换为Decimal避免精度问题
+                row[key] = Decimal(str(float_fmt(value)))
+            elif isinstance(value, datetime):
+                row[key] = value
+            else:
+                row[key] = str(value)
+        now = datetime.now()
+        row['created_at'] = row.get('created_at') or now
+        row['updated_at'] = now
+        row.pop('id', None)
+        return row
+
+    @classmethod
+    def upsert_rows(cls, session, rows):
+        """按 uq_symbol_time 多行 upsert（调用方负责 commit），已存在的行保留 created_at"""
+        if not rows:
+            return 0
+        update_columns = [c for c in rows[0].keys() if c not in cls.UPSERT_KEYS and c != 'created_at']
+        return bulk_upsert(session, BackTestResult, rows, conflict_columns=cls.UPSERT_KEYS,
+                           update_columns=update_columns)
+
     def save(self, backtest_obj):
-        """保存回测数据到MySQL"""
+        """保存回测数据到MySQL（单行 upsert）"""
         session = self.mysql_client.get_session()
-        # 安全的数据类型转换
         safe_data = dict()
         
         try:
-            # 获取数据并转换
-            data = backtest_obj.to_dict()
-            for key, value in data.items():
-                if value is None:
-                    safe_data[key] = None
-                elif isinstance(value, enum.Enum):
-                    # 枚举类型转换为其值
-                    safe_data[key] = value.value
-                elif isinstance(value, (int, str)):
-                    safe_data[key] = value
-                elif isinstance(value, float):
-                    # 转换为Decimal避免精度问题
-                    safe_data[key] = Decimal(str(float_fmt(value)))
-                elif isinstance(value, datetime):
-                    safe_data[key] = value
-                else:
-                    safe_data[key] = str(value)
-            
-            # 检查是否已存在相同记录
-            existing = session.query(BackTestResult).filter_by(
-                symbol=safe_data['symbol'],
-                strategy_name=safe_data['strategy_name']
-            ).first()
-            
-            if existing:
-                # 更新现有记录
-                for key, value in safe_data.items():
-                    if hasattr(existing, key):
-                        setattr(existing, key, value)
-                existing.updated_at = datetime.now()
-            else:
-                # 创建新记录
-                safe_data['created_at'] = datetime.now()
-                safe_data['updated_at'] = datetime.now()
-                result = BackTestResult(**safe_data)
-                session.add(result)
+            safe_data = self._prepare_row(backtest_obj.to_dict())
+            self.upsert_rows(session, [safe_data])
             logger.info(f"Create/Update backtest record: {safe_data['symbol']}, Task ID: {safe_data['task_id']}")
             
             # 提交事务
             session.commit()
+            self.invalidate_cache()
             
         except Exception as e:
             logger.error(f"Save backtest data to MySQL failed: {e}\n, DATA:{safe_data}")
@@ -249,4 +482,4 @@ class MySQLBackTestSaver(BackTestSaver):
             session.rollback()
             raise
         finally:
-            session.close() 
\ No newline at end of file
+            session.close() 
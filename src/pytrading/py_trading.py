@@ -18,6 +18,7 @@ from pytrading.utils.thread_pool import ThreadPool, Queue
 from pytrading.utils import clear_disk_space
 from pytrading.utils.process import exec_process, is_windows
 from pytrading.db.mysql import MySQLClient, BacktestTask, Strategy, BackTestResult
+from pytrading.model.batch_back_test_saver import BatchBackTestSaver
 
 
 class PyTrading:
@@ -82,6 +83,13 @@ class PyTrading:
         start_time = self.start_time
         end_time = self.end_time
 
+        # 回测结果由主进程缓冲后批量写库，子进程只把结果写入各自的结果文件
+        batch_saver = None
+        run_func = exec_process
+        if config.save_db and config.result_batch_enabled:
+            batch_saver = BatchBackTestSaver(task_id=self.task_id)
+            run_func = batch_saver.run_process
+
         session = self.db_client.get_session()
         try:
             from pytrading.db.mysql import BacktestStatus
@@ -120,7 +128,7 @@ class PyTrading:
                 # 直接传递列表，避免字符串解析问题
                 cmd_args = (cmd,)
                 kwargs = {}
-                run_queue.put((exec_process, cmd_args, kwargs))
+                run_queue.put((run_func, cmd_args, kwargs))
         finally:
             session.close()
 
@@ -131,9 +139,13 @@ class PyTrading:
         if self.task_id:
             PyTrading._active_pools[self.task_id] = threader
 
+        if batch_saver:
+            batch_saver.start()
         try:
             threader.run()
         finally:
+            if batch_saver:
+                batch_saver.close()
             if self.task_id and self.task_id in PyTrading._active_pools:
                 del PyTrading._active_pools[self.task_id]
 
@@ -236,26 +248,10 @@ class PyTrading:
 
             logger.info("Subtask execution completed, start summarizing results")
 
-            # 汇总结果
-            results = session.query(BackTestResult).filter_by(
-                strategy_name=strategy.name
-            ).filter(
-                BackTestResult.backtest_start_time == task.start_time,
-                BackTestResult.backtest_end_time == task.end_time
-            ).all()
-
-            if results:
-                total = len(results)
-                task.result_summary = {
-                    "total_count": total,
-                    "avg_pnl_ratio": round(sum([float(r.pnl_ratio or 0) for r in results]) / total, 4),
-                    "avg_sharp_ratio": round(sum([float(r.sharp_ratio or 0) for r in results]) / total, 4),
-                    "avg_max_drawdown": round(sum([float(r.max_drawdown or 0) for r in results]) / total, 4),
-                    "avg_win_ratio": round(sum([float(r.win_ratio or 0) for r in results]) / total, 4),
-                    "completed_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                }
-            else:
-                task.result_summary = {"total_count": 0, "message": "No backtest results found"}
+            # 汇总结果（在数据库中聚合，不加载逐条结果）
+            from pytrading.service.result_summary_service import ResultSummaryService
+            task.result_summary = ResultSummaryService.summarize(
+                session, strategy.name, task.start_time, task.end_time)
 
             task.status = 'completed'
             task.symbols = symbol_list
@@ -266,17 +262,8 @@ class PyTrading:
 
             # 更新关注列表中对应股票的指标
             try:
-                from pytrading.db.mysql import WatchlistItem
                 from pytrading.service.watchlist_service import WatchlistService
-
-                watched_items = session.query(WatchlistItem).filter(
-                    WatchlistItem.symbol.in_(symbol_list),
-                    WatchlistItem.strategy_id == task.strategy_id,
-                ).all()
-
-                if watched_items:
-                    for item in watched_items:
-                        WatchlistService.update_metrics(item.id, task_id)
+                WatchlistService.update_metrics_bulk(task_id)
             except Exception as watch_err:
                 logger.warning(f"更新关注列表指标失败: {watch_err}")
 
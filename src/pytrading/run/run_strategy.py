@@ -23,6 +23,7 @@ from pytrading.strategy.strategy_macd import MacdStrategy
 from pytrading.strategy.strategy_boll import BollStrategy
 from pytrading.strategy.strategy_turtle import TurtleStrategy
 from pytrading.model.back_test import BackTest
+from pytrading.model.batch_back_test_saver import result_sink_path
 from pytrading.logger import logger, set_log_context, clear_log_context
 from pytrading.config import config
 from pytrading.utils import is_live_mode
@@ -31,6 +32,7 @@ from pytrading.utils.myquant import get_current_price
 from pytrading.db.mysql import BacktestStatus
 from pytrading.utils.talib_util import ATR
 from pytrading.service.trade_record_service import TradeRecordService
+from pytrading.utils.history_cache import cached_history
 
 order_controller = OrderController()
 
@@ -45,8 +47,8 @@ def get_market_data(symbol):
         start_date = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
 
         # 获取历史行情数据
-        bars = history(symbol=symbol, frequency='1d', start_time=start_date, end_time=end_date,
-                       fields='symbol,open,high,low,close,volume', df=True)
+        bars = cached_history(symbol=symbol, frequency='1d', start_time=start_date, end_time=end_date,
+                              fields='symbol,open,high,low,close,volume', df=True)
 
         if bars is None or bars.empty:
             return None, None, None
@@ -168,6 +170,12 @@ def on_backtest_finished(context, indicator):
     # 使用 extra 参数传递 task_id 和 symbol（解决多线程问题）
     log_extra = {'task_id': task_id, 'symbol': symbol} if task_id else {}
 
+    # 回测期间缓冲的交易信号一次写库
+    try:
+        TradeRecordService.flush_trade_records()
+    except Exception as e:
+        logger.warning(f"保存交易记录失败: {e}", extra=log_extra)
+
     try:
         back_test_obj = BackTest()
         back_test_obj.symbol = context.symbol
@@ -223,8 +231,8 @@ def on_backtest_finished(context, indicator):
         except Exception as e:
             logger.warning(f"保存K线数据失败: {context.symbol}, error: {e}")
 
-        # 更新任务进度
-        if hasattr(context, 'task_id') and context.task_id:
+        # 更新任务进度（结果由主进程批量写库时，进度在写库后由主进程更新）
+        if hasattr(context, 'task_id') and context.task_id and not result_sink_path():
             update_task_progress(context.task_id)
             
     except Exception as ex:
@@ -273,98 +281,11 @@ def update_task_progress(task_id: str):
 
 
 def save_kline_data(symbol: str, days: int = 365):
-    """保存K线数据到数据库"""
-    from datetime import datetime, timedelta
-    from pytrading.db.mysql import MySQLClient, StockKline
-    from pytrading.utils.talib_util import TA_MACD
-    import pandas as pd
+    """增量保存K线数据到数据库（只拉取缺失的交易日）"""
+    from pytrading.service.kline_service import KlineService
 
     try:
-        # 计算日期范围
-        end_date = datetime.now().strftime('%Y-%m-%d')
-        start_date = (datetime.now() - timedelta(days=days + 60)).strftime('%Y-%m-%d')
-
-        # 获取历史K线数据
-        bars = history(
-            symbol=symbol,
-            frequency='1d',
-            start_time=start_date,
-            end_time=end_date,
-            fields='symbol,open,high,low,close,volume,eob',
-            df=True
-        )
-
-        if bars is None or bars.empty:
-            logger.warning(f"获取K线数据失败: {symbol}")
-            return
-
-        # 计算MACD
-        close_prices = bars['close'].values.astype(float)
-        diff, dea, macd_hist = TA_MACD(close_prices, fastperiod=12, slowperiod=26, signalperiod=9)
-
-        # 获取数据库连接
-        db_client = MySQLClient(
-            host=config.mysql_host,
-            db_name=config.mysql_database,
-            port=config.mysql_port,
-            username=config.mysql_username,
-            password=config.mysql_password
-        )
-        session = db_client.get_session()
-
-        try:
-            # 保留最近的 days 天数据
-            bars = bars.tail(days).reset_index(drop=True)
-            diff = diff[-days:] if len(diff) >= days else diff
-            dea = dea[-days:] if len(dea) >= days else dea
-            macd_hist = macd_hist[-days:] if len(macd_hist) >= days else macd_hist
-
-            for i in range(len(bars)):
-                row = bars.iloc[i]
-                # 解析日期
-                if 'eob' in row:
-                    date_val = row['eob']
-                else:
-                    continue
-
-                # 检查是否已存在
-                existing = session.query(StockKline).filter_by(
-                    symbol=symbol,
-                    date=date_val.date() if isinstance(date_val, datetime) else date_val
-                ).first()
-
-                if existing:
-                    # 更新
-                    existing.open = float(row['open']) if pd.notna(row['open']) else None
-                    existing.high = float(row['high']) if pd.notna(row['high']) else None
-                    existing.low = float(row['low']) if pd.notna(row['low']) else None
-                    existing.close = float(row['close']) if pd.notna(row['close']) else None
-                    existing.volume = int(row['volume']) if pd.notna(row['volume']) and row['volume'] else 0
-                    existing.macd_diff = float(diff[i]) if i < len(diff) and pd.notna(diff[i]) else None
-                    existing.macd_dea = float(dea[i]) if i < len(dea) and pd.notna(dea[i]) else None
-                    existing.macd_hist = float(macd_hist[i]) if i < len(macd_hist) and pd.notna(macd_hist[i]) else None
-                else:
-                    # 新增
-                    kline = StockKline(
-                        symbol=symbol,
-                        date=date_val.date() if isinstance(date_val, datetime) else date_val,
-                        open=float(row['open']) if pd.notna(row['open']) else None,
-                        high=float(row['high']) if pd.notna(row['high']) else None,
-                        low=float(row['low']) if pd.notna(row['low']) else None,
-                        close=float(row['close']) if pd.notna(row['close']) else None,
-                        volume=int(row['volume']) if pd.notna(row['volume']) and row['volume'] else 0,
-                        macd_diff=float(diff[i]) if i < len(diff) and pd.notna(diff[i]) else None,
-                        macd_dea=float(dea[i]) if i < len(dea) and pd.notna(dea[i]) else None,
-                        macd_hist=float(macd_hist[i]) if i < len(macd_hist) and pd.notna(macd_hist[i]) else None
-                    )
-                    session.add(kline)
-
-            session.commit()
-            logger.info(f"K线数据保存完成: {symbol}")
-
-        finally:
-            session.close()
-
+        KlineService.sync(symbol, days)
     except Exception as e:
         logger.error(f"保存K线数据失败: {symbol}, error: {str(e)}")
 
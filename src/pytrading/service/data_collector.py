@@ -238,26 +238,12 @@ class DataCollectorService:
             MarketSentimentData: 市场情绪数据
         """
         try:
-            # 获取市场整体行情
-            import akshare as ak
-            spot = ak.stock_zh_a_spot_em()
-
-            if spot is None or spot.empty:
-                return MarketSentimentData(
-                    sentiment="neutral",
-                    score=0.0,
-                    description="数据获取失败",
-                    timestamp=datetime.now().isoformat(),
-                )
-
-            # 计算涨跌家数
-            up_count = len(spot[spot['涨跌幅'] > 0])
-            down_count = len(spot[spot['涨跌幅'] < 0])
-            flat_count = len(spot[spot['涨跌幅'] == 0])
-            total = len(spot)
-
-            # 计算上涨比例
-            up_ratio = up_count / total if total > 0 else 0.5
+            from pytrading.service.spot_snapshot_service import get_spot_snapshot_service
+            from pytrading.utils.blocking import run_upstream
+
+            # 全市场行情快照（与市场概况/排行共享，快照过期时在 AkShare 线程池中刷新）
+            snapshot = await run_upstream('akshare', get_spot_snapshot_service().get)
+            up_ratio = snapshot.breadth()["up_ratio"]
 
             # 判断情绪
             if up_ratio > 0.6:
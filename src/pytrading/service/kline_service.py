@@ -0,0 +1,364 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@Description    ：K线同步服务 - 按缺口增量同步K线及MACD指标
+@Author  ：EEric
+@Date    ：2026-10-19
+"""
+import threading
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy.orm import Session
+
+from pytrading.config.settings import config
+from pytrading.db.bulk import bulk_insert_ignore, bulk_upsert
+from pytrading.db.mysql import StockKline, StockKlineGap, StockSymbol
+from pytrading.logger import logger
+from pytrading.utils.rate_limiter import get_rate_limiter
+from pytrading.utils.ttl_cache import TTLCache
+
+
+class KlineDataUnavailable(Exception):
+    """上游未返回任何K线且库中也没有该股票的数据（代码无效或拉取失败）"""
+
+
+class KlineService:
+    """K线同步服务
+
+    只拉取数据库中缺失的交易日：
+    1. 以交易日历为准找出目标区间内缺失的日期（尾部 + 中间空洞），上市日期之前和已确认无数据的日期段除外
+    2. 每段连续缺口调用一次 history；上游无数据且之后已有K线的缺口记为已确认无数据（停牌、上市前）
+    3. MACD 预热优先使用库中已有收盘价，只有库中不足时才向上游多取预热数据
+    """
+
+    # 延续 EMA 所需的预热K线数（MACD 12/26/9）
+    WARMUP_BARS = 120
+    # 库中预热数据不足时，向上游多取的自然日数：每周 5 个交易日约合 1.4 倍自然日，
+    # 按 1.6 倍并额外留出春节/国庆长假，保证首次同步能取满 WARMUP_BARS 条
+    WARMUP_DAYS = int(WARMUP_BARS * 1.6) + 20
+    FETCH_FIELDS = 'symbol,open,high,low,close,volume,eob'
+    # 交易日历按 (交易所, 起止日期) 缓存，批量同步时同一交易所只请求一次上游
+    CALENDAR_TTL = 3600
+    _calendar_cache = TTLCache("trading_calendar", CALENDAR_TTL, maxsize=64)
+    _calendar_lock = threading.Lock()
+
+    @staticmethod
+    def _get_session() -> Session:
+        """获取数据库会话"""
+        from pytrading.db.mysql import MySQLClient
+        client = MySQLClient(
+            host=config.mysql_host,
+            port=config.mysql_port,
+            username=config.mysql_username,
+            password=config.mysql_password,
+            db_name=config.mysql_database,
+        )
+        return client.get_session()
+
+    # ==================== 上游数据 ====================
+
+    @staticmethod
+    def _fetch_bars(symbol: str, start: date, end: date) -> Optional[pd.DataFrame]:
+        """获取日K线（数据源由 KLINE_SYNC_SOURCE 决定，受上游限流约束）"""
+        if config.kline_sync_source == 'akshare':
+            get_rate_limiter('akshare').acquire()
+            return KlineService._fetch_bars_akshare(symbol, start, end)
+
+        # 掘金数据走本地磁盘缓存，限流在真正请求上游时进行
+        from pytrading.utils.history_cache import cached_history
+        return cached_history(
+            symbol=symbol,
+            frequency='1d',
+            start_time=start.strftime('%Y-%m-%d'),
+            end_time=end.strftime('%Y-%m-%d'),
+            fields=KlineService.FETCH_FIELDS,
+            df=True
+        )
+
+    @staticmethod
+    def _fetch_bars_akshare(symbol: str, start: date, end: date) -> Optional[pd.DataFrame]:
+        """从AkShare获取日K线，并转换为与掘金 history 相同的列"""
+        import akshare as ak
+        code = symbol.split('.')[-1] if '.' in symbol else symbol
+        df = ak.stock_zh_a_hist(symbol=code, period='daily', start_date=start.strftime('%Y%m%d'),
+                                end_date=end.strftime('%Y%m%d'), adjust='')
+        if df is None or df.empty:
+            return None
+        return pd.DataFrame({
+            'symbol': symbol,
+            'open': df['开盘'].values,
+            'high': df['最高'].values,
+            'low': df['最低'].values,
+            'close': df['收盘'].values,
+            'volume': df['成交量'].values * 100,  # AkShare 成交量单位为手
+            'eob': pd.to_datetime(df['日期']).dt.to_pydatetime(),
+        })
+
+    @classmethod
+    def _trading_dates(cls, symbol: str, start: date, end: date) -> Optional[List[date]]:
+        """获取交易日历，失败时返回 None（退化为仅同步尾部）；成功结果按交易所和区间缓存"""
+        exchange = symbol.split('.')[0] if '.' in symbol else 'SHSE'
+        key = (exchange, start, end)
+        calendar = cls._calendar_cache.get(key)
+        if calendar is not None:
+            return calendar
+        # 并发工作线程未命中同一区间时只请求一次上游
+        with cls._calendar_lock:
+            calendar = cls._calendar_cache.get(key)
+            if calendar is not None:
+                return calendar
+            try:
+                from gm.api import get_trading_dates
+                get_rate_limiter('gm').acquire()
+                dates = get_trading_dates(exchange=exchange, start_date=start.strftime('%Y-%m-%d'),
+                                          end_date=end.strftime('%Y-%m-%d'))
+                if not dates:
+                    return None
+                calendar = [datetime.strptime(str(d)[:10], '%Y-%m-%d').date() for d in dates]
+            except Exception as e:
+                logger.warning(f"获取交易日历失败，仅同步尾部缺口: {symbol}, error: {e}")
+                return None
+            cls._calendar_cache.set(key, calendar)
+            return calendar
+
+    @staticmethod
+    def _compute_macd(closes: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """计算MACD"""
+        from pytrading.utils.talib_util import TA_MACD
+        return TA_MACD(closes, fastperiod=12, slowperiod=26, signalperiod=9)
+
+    # ==================== 缺口计算 ====================
+
+    @staticmethod
+    def resolve_range(days: int = 365, start_date: str = None, end_date: str = None) -> Tuple[date, date]:
+        """解析目标同步区间"""
+        if start_date and end_date:
+            return (datetime.strptime(start_date, '%Y-%m-%d').date(),
+                    datetime.strptime(end_date, '%Y-%m-%d').date())
+        today = datetime.now().date()
+        return today - timedelta(days=days), today
+
+    @classmethod
+    def find_missing_ranges(cls, session: Session, symbol: str, start: date, end: date) -> List[Tuple[date, date]]:
+        """找出目标区间内缺失的连续日期段
+
+        有交易日历时精确比对（可发现中间空洞）；否则仅补齐库中最大日期之后的尾部。
+        上市日期之前、以及已确认上游无数据的日期段（见 _record_empty_gaps）不算缺失。
+        """
+        list_date = session.query(StockSymbol.list_date).filter(StockSymbol.symbol == symbol).scalar()
+        if list_date is not None and list_date > start:
+            start = list_date
+        if start > end:
+            return []
+
+        stored = {
+            row[0] for row in session.query(StockKline.date).filter(
+                StockKline.symbol == symbol,
+                StockKline.date >= start,
+                StockKline.date <= end,
+            ).all()
+        }
+
+        calendar = cls._trading_dates(symbol, start, end)
+        if calendar is None:
+            if not stored:
+                return [(start, end)]
+            tail_start = max(stored) + timedelta(days=1)
+            return [(tail_start, end)] if tail_start <= end else []
+
+        gaps = session.query(StockKlineGap.start_date, StockKlineGap.end_date).filter(
+            StockKlineGap.symbol == symbol,
+            StockKlineGap.end_date >= start,
+            StockKlineGap.start_date <= end,
+        ).all()
+
+        # 按交易日历把缺失日期合并为连续区间
+        ranges = []
+        run_start = run_end = None
+        for d in calendar:
+            if d < start or d in stored or any(a <= d <= b for a, b in gaps):
+                if run_start is not None:
+                    ranges.append((run_start, run_end))
+                    run_start = run_end = None
+                continue
+            if run_start is None:
+                run_start = d
+            run_end = d
+        if run_start is not None:
+            ranges.append((run_start, run_end))
+        return ranges
+
+    @staticmethod
+    def _record_empty_gaps(session: Session, symbol: str, missing: List[Tuple[date, date]],
+                           fetched_dates: List[date], latest: Optional[date]):
+        """记录已确认上游无数据的缺口段
+
+        只记录早于最新一根K线的部分：之后已有数据说明这些日期确实无K线（停牌、上市前），
+        尾部缺口可能只是当日数据尚未发布，不记录。
+        """
+        if latest is None:
+            return
+        gaps = []
+        for range_start, range_end in missing:
+            inside = [d for d in fetched_dates if range_start <= d <= range_end]
+            gap_end = min(inside) - timedelta(days=1) if inside else min(range_end, latest - timedelta(days=1))
+            if range_start <= gap_end:
+                gaps.append({'symbol': symbol, 'start_date': range_start, 'end_date': gap_end})
+        if gaps:
+            bulk_insert_ignore(session, StockKlineGap, gaps, conflict_columns=['symbol', 'start_date', 'end_date'])
+            logger.info(f"K线缺口上游无数据，不再重复拉取: {symbol}, {[(g['start_date'], g['end_date']) for g in gaps]}")
+
+    # ==================== 同步 ====================
+
+    @staticmethod
+    def _bars_to_frame(bars: pd.DataFrame) -> pd.DataFrame:
+        """把 history 返回值规整为 date/open/high/low/close/volume"""
+        frame = pd.DataFrame({
+            'date': [v.date() if isinstance(v, datetime) else v for v in bars['eob']],
+            'open': bars['open'].values,
+            'high': bars['high'].values,
+            'low': bars['low'].values,
+            'close': bars['close'].values,
+            'volume': bars['volume'].values,
+        })
+        return frame
+
+    @classmethod
+    def _load_stored(cls, session: Session, symbol: str, since: date) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """读取预热段（since 之前最近 WARMUP_BARS 条）和 since 之后的已有K线"""
+        columns = [StockKline.date, StockKline.open, StockKline.high, StockKline.low,
+                   StockKline.close, StockKline.volume]
+        names = ['date', 'open', 'high', 'low', 'close', 'volume']
+
+        warmup_rows = session.query(*columns).filter(
+            StockKline.symbol == symbol,
+            StockKline.date < since,
+        ).order_by(StockKline.date.desc()).limit(cls.WARMUP_BARS).all()
+        tail_rows = session.query(*columns).filter(
+            StockKline.symbol == symbol,
+            StockKline.date >= since,
+        ).order_by(StockKline.date.asc()).all()
+
+        warmup = pd.DataFrame([tuple(r) for r in reversed(warmup_rows)], columns=names)
+        tail = pd.DataFrame([tuple(r) for r in tail_rows], columns=names)
+        return warmup, tail
+
+    @staticmethod
+    def _to_float(value) -> Optional[float]:
+        return float(value) if value is not None and pd.notna(value) else None
+
+    @classmethod
+    def build_rows(cls, session: Session, symbol: str, days: int = 365,
+                   start_date: str = None, end_date: str = None) -> List[Dict]:
+        """拉取缺失K线并计算需要写入的行（K线不写库；已确认无数据的缺口段加入会话，由调用方提交）
+
+        Returns:
+            List[Dict]: 待 upsert 的 stock_kline 行；数据已最新或缺口内无新数据（停牌、当日未收盘）时为空列表
+
+        Raises:
+            KlineDataUnavailable: 上游未返回任何K线且库中没有该股票的数据
+        """
+        start, end = cls.resolve_range(days, start_date, end_date)
+        missing = cls.find_missing_ranges(session, symbol, start, end)
+        if not missing:
+            logger.info(f"K线数据已是最新: {symbol}")
+            return []
+
+        earliest = missing[0][0]
+        warmup, tail = cls._load_stored(session, symbol, earliest)
+
+        fetch_ranges = list(missing)
+        if len(warmup) < cls.WARMUP_BARS:
+            # 库中预热数据不足（首次同步），第一段缺口向前多取预热数据
+            first_start, first_end = fetch_ranges[0]
+            fetch_ranges[0] = (first_start - timedelta(days=cls.WARMUP_DAYS), first_end)
+
+        fetched = []
+        for range_start, range_end in fetch_ranges:
+            bars = cls._fetch_bars(symbol, range_start, range_end)
+            if bars is not None and not bars.empty:
+                fetched.append(cls._bars_to_frame(bars))
+        stored_dates = list(tail['date']) or list(warmup['date'])
+        if not fetched:
+            if not stored_dates:
+                raise KlineDataUnavailable(f"获取K线数据失败: {symbol}, 缺口: {missing}")
+            cls._record_empty_gaps(session, symbol, missing, [], max(stored_dates))
+            logger.info(f"K线缺口无新数据(可能停牌或尚未收盘): {symbol}, 缺口: {missing}")
+            return []
+
+        new_bars = pd.concat(fetched, ignore_index=True)
+        cls._record_empty_gaps(session, symbol, missing, list(new_bars['date']),
+                               max([*new_bars['date'], *stored_dates]))
+        # 合并顺序决定重复日期的取舍：上游新数据优先
+        merged = pd.concat([new_bars, tail, warmup], ignore_index=True)
+        merged = merged.drop_duplicates(subset='date', keep='first').sort_values('date').reset_index(drop=True)
+
+        fetched_dates = {d for d in new_bars['date'] if any(a <= d <= b for a, b in missing)}
+        if not fetched_dates:
+            logger.info(f"K线缺口无新数据(可能停牌): {symbol}, 缺口: {missing}")
+            return []
+        # 新数据之后的已有K线，其 MACD 也会因 EMA 递推而改变，需要一并更新
+        first_changed = min(fetched_dates)
+
+        diff, dea, macd_hist = cls._compute_macd(merged['close'].values.astype(float))
+
+        rows = []
+        for i, row in merged.iterrows():
+            d = row['date']
+            if d < first_changed or d > end:
+                continue
+            rows.append({
+                'symbol': symbol,
+                'date': d,
+                'open': cls._to_float(row['open']),
+                'high': cls._to_float(row['high']),
+                'low': cls._to_float(row['low']),
+                'close': cls._to_float(row['close']),
+                'volume': int(row['volume']) if pd.notna(row['volume']) and row['volume'] else 0,
+                'macd_diff': cls._to_float(diff[i]) if i < len(diff) else None,
+                'macd_dea': cls._to_float(dea[i]) if i < len(dea) else None,
+                'macd_hist': cls._to_float(macd_hist[i]) if i < len(macd_hist) else None,
+            })
+        return rows
+
+    @staticmethod
+    def write_rows(session: Session, rows: List[Dict]) -> int:
+        """按 (symbol, date) 唯一键批量 upsert"""
+        return bulk_upsert(session, StockKline, rows, conflict_columns=['symbol', 'date'])
+
+    @classmethod
+    def sync(cls, symbol: str, days: int = 365, start_date: str = None, end_date: str = None,
+             session: Optional[Session] = None) -> int:
+        """增量同步单只股票K线
+
+        Args:
+            symbol: 股票代码
+            days: 同步最近多少天（未指定 start_date/end_date 时使用）
+            start_date: 可选，开始日期 (YYYY-MM-DD)
+            end_date: 可选，结束日期 (YYYY-MM-DD)
+            session: 可选，外部会话（由调用方负责关闭）
+
+        Returns:
+            int: 新增/更新的K线条数
+
+        Raises:
+            KlineDataUnavailable: 上游未返回任何K线且库中没有该股票的数据
+        """
+        own_session = session is None
+        session = session or cls._get_session()
+        try:
+            rows = cls.build_rows(session, symbol, days, start_date=start_date, end_date=end_date)
+            if rows:
+                cls.write_rows(session, rows)
+            session.commit()
+            logger.info(f"K线数据同步完成: {symbol}, 新增/更新 {len(rows)} 条")
+            return len(rows)
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            if own_session:
+                session.close()
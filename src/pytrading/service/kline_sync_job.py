@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@Description    ：K线批量同步任务 - 后台并发同步股票池/指数成分股K线
+@Author  ：EEric
+@Date    ：2026-10-19
+"""
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from pytrading.config.settings import config
+from pytrading.logger import logger
+from pytrading.service.kline_service import KlineService
+
+
+class KlineSyncJob:
+    """K线批量同步任务
+
+    工作线程并发拉取缺失K线并计算指标（上游请求经令牌桶限流），
+    由任务线程统一按 kline_sync_batch_rows 攒批 upsert 写库。
+    """
+
+    _jobs: Dict[str, "KlineSyncJob"] = {}
+    _jobs_lock = threading.Lock()
+    # 内存中保留的历史任务数
+    MAX_JOBS = 50
+    # 进度中保留的最近错误数
+    MAX_ERRORS = 20
+
+    def __init__(self, symbols: Optional[List[str]] = None, index_symbols: Optional[List[str]] = None,
+                 days: int = 365, start_date: str = None, end_date: str = None):
+        self.job_id = f"kline_sync_{datetime.now().strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:6]}"
+        self.symbols = list(dict.fromkeys(symbols or []))
+        self.index_symbols = list(index_symbols or [])
+        self.days = days
+        self.start_date = start_date
+        self.end_date = end_date
+
+        self.status = 'pending'
+        self.total = len(self.symbols)
+        self.completed = 0
+        self.failed = 0
+        self.rows_written = 0
+        self.errors: List[Dict[str, str]] = []
+        self.created_at = datetime.now()
+        self.started_at = None
+        self.finished_at = None
+        self._cancelled = False
+        self._lock = threading.Lock()
+
+    # ==================== 任务注册 ====================
+
+    @classmethod
+    def submit(cls, symbols: Optional[List[str]] = None, index_symbols: Optional[List[str]] = None,
+               days: int = 365, start_date: str = None, end_date: str = None) -> "KlineSyncJob":
+        """创建任务并在后台线程中执行"""
+        job = cls(symbols=symbols, index_symbols=index_symbols, days=days,
+                  start_date=start_date, end_date=end_date)
+        with cls._jobs_lock:
+            cls._jobs[job.job_id] = job
+            # 淘汰最早的已结束任务
+            finished = [j for j in cls._jobs.values() if j.status not in ('pending', 'running')]
+            for old in sorted(finished, key=lambda j: j.created_at)[:max(0, len(cls._jobs) - cls.MAX_JOBS)]:
+                cls._jobs.pop(old.job_id, None)
+
+        thread = threading.Thread(target=job.run, name=job.job_id)
+        thread.daemon = True
+        thread.start()
+        return job
+
+    @classmethod
+    def get(cls, job_id: str) -> Optional["KlineSyncJob"]:
+        with cls._jobs_lock:
+            return cls._jobs.get(job_id)
+
+    @classmethod
+    def list_jobs(cls) -> List["KlineSyncJob"]:
+        with cls._jobs_lock:
+            return sorted(cls._jobs.values(), key=lambda j: j.created_at, reverse=True)
+
+    def cancel(self):
+        """取消任务：未开始的股票不再同步，已拉取的数据仍会写库"""
+        self._cancelled = True
+
+    # ==================== 执行 ====================
+
+    def _resolve_symbols(self) -> List[str]:
+        """合并显式股票列表和指数成分股"""
+        symbols = list(self.symbols)
+        if self.index_symbols:
+            from pytrading.py_trading import PyTrading
+            for idx in self.index_symbols:
+                idx_symbols = PyTrading.get_index_symbols(idx)
+                # 成分股为空（可能是ETF）时同步其本身
+                symbols.extend(idx_symbols or [idx])
+        return list(dict.fromkeys(symbols))
+
+    def _build_symbol_rows(self, symbol: str) -> List[Dict]:
+        """工作线程：计算单只股票需要写入的K线"""
+        if self._cancelled:
+            return []
+        session = KlineService._get_session()
+        try:
+            rows = KlineService.build_rows(session, symbol, self.days,
+                                           start_date=self.start_date, end_date=self.end_date)
+            # 提交 build_rows 记录的无数据缺口段；K线行由任务线程攒批写库
+            session.commit()
+            return rows
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def _flush(self, rows: List[Dict]):
+        """批量 upsert 写库"""
+        if not rows:
+            return
+        session = KlineService._get_session()
+        try:
+            KlineService.write_rows(session, rows)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+        with self._lock:
+            self.rows_written += len(rows)
+
+    def _record_error(self, symbol: str, error: Exception):
+        with self._lock:
+            self.failed += 1
+            self.errors.append({"symbol": symbol, "error": str(error)})
+            self.errors = self.errors[-self.MAX_ERRORS:]
+
+    def run(self):
+        """执行同步（在后台线程中调用）"""
+        self.status = 'running'
+        self.started_at = datetime.now()
+        pending_rows: List[Dict] = []
+        try:
+            symbols = self._resolve_symbols()
+            self.total = len(symbols)
+            logger.info(f"K线批量同步开始: {self.job_id}, 股票数: {self.total}, 并发: {config.kline_sync_workers}")
+
+            with ThreadPoolExecutor(max_workers=max(1, config.kline_sync_workers),
+                                    thread_name_prefix='kline_sync') as executor:
+                futures = {executor.submit(self._build_symbol_rows, s): s for s in symbols}
+                for future in as_completed(futures):
+                    symbol = futures[future]
+                    try:
+                        pending_rows.extend(future.result())
+                        with self._lock:
+                            self.completed += 1
+                    except Exception as e:
+                        logger.warning(f"K线同步失败: {symbol}, error: {e}")
+                        self._record_error(symbol, e)
+
+                    if len(pending_rows) >= config.kline_sync_batch_rows:
+                        self._flush(pending_rows)
+                        pending_rows = []
+                    if self._cancelled:
+                        executor.shutdown(wait=False, cancel_futures=True)
+                        break
+
+            self._flush(pending_rows)
+            self.status = 'cancelled' if self._cancelled else 'completed'
+        except Exception as e:
+            logger.error(f"K线批量同步失败: {self.job_id}, error: {e}", exc_info=True)
+            self.status = 'failed'
+            self.errors.append({"symbol": None, "error": str(e)})
+        finally:
+            self.finished_at = datetime.now()
+            logger.info(f"K线批量同步结束: {self.job_id}, 状态: {self.status}, 完成: {self.completed}/{self.total},"
+                        f" 失败: {self.failed}, 写入: {self.rows_written} 条")
+
+    # ==================== 进度 ====================
+
+    def to_dict(self) -> Dict[str, Any]:
+        """任务进度"""
+        done = self.completed + self.failed
+        end = self.finished_at or datetime.now()
+        elapsed = (end - self.started_at).total_seconds() if self.started_at else 0
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "total": self.total,
+            "completed": self.completed,
+            "failed": self.failed,
+            "progress": int(done * 100 / self.total) if self.total else (100 if self.finished_at else 0),
+            "rows_written": self.rows_written,
+            "symbols_per_second": round(done / elapsed, 2) if elapsed > 0 else None,
+            "errors": list(self.errors),
+            "created_at": self.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+            "started_at": self.started_at.strftime('%Y-%m-%d %H:%M:%S') if self.started_at else None,
+            "finished_at": self.finished_at.strftime('%Y-%m-%d %H:%M:%S') if self.finished_at else None,
+        }
@@ -0,0 +1,370 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@Description    ：回测日志保留策略 - 过期任务日志归档为 gzip 文件，分批清理 backtest_logs
+@Author  ：EEric
+@Date    ：2026-10-19
+"""
+import bisect
+import gzip
+import json
+import os
+import re
+import shutil
+from contextlib import closing
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterator, List, Optional
+
+from pytrading.config.settings import config
+from pytrading.db.mysql import BacktestLog, BacktestTask, MySQLClient
+from pytrading.logger import logger
+from pytrading.utils.ttl_cache import TTLCache
+
+
+class _ArchiveWriter:
+    """按 chunk_size 行一个 gzip member 写归档，并记录每个 member 的偏移、长度、id 范围和股票代码"""
+
+    def __init__(self, raw, chunk_size: int):
+        self.raw = raw
+        self.chunk_size = chunk_size
+        self.chunks: List[Dict] = []
+        self._gz = None
+        self._chunk = None
+
+    def write(self, item: Dict):
+        if self._gz is None:
+            self._chunk = {"offset": self.raw.tell(), "first_id": item["id"], "count": 0, "symbols": set()}
+            self._gz = gzip.GzipFile(filename='', mode='wb', fileobj=self.raw)
+        self._gz.write((json.dumps(item, ensure_ascii=False) + "\n").encode('utf-8'))
+        self._chunk["last_id"] = item["id"]
+        self._chunk["count"] += 1
+        self._chunk["symbols"].add(item.get("symbol"))
+        if self._chunk["count"] >= self.chunk_size:
+            self.close()
+
+    def close(self):
+        """结束当前 member（不关闭底层文件）"""
+        if self._gz is None:
+            return
+        self._gz.close()
+        chunk = self._chunk
+        chunk["length"] = self.raw.tell() - chunk["offset"]
+        chunk["symbols"] = sorted(chunk["symbols"], key=lambda symbol: symbol or '')
+        self.chunks.append(chunk)
+        self._gz = self._chunk = None
+
+
+class LogRetentionService:
+    """回测日志归档与清理
+
+    已结束（completed/failed/cancelled）且超过 LOG_RETENTION_DAYS 天的任务，以及任务已删除的孤儿日志，
+    按任务导出为 {task_id}.jsonl.gz 后从 backtest_logs 中删除。删除按主键分批提交，每批只锁少量行。
+    日志查询在 after_id 落在归档范围内时先读归档、不足一页再从数据库接续（query_with_archive），
+    清理进行到一半时也不会漏掉已删除的低 id 日志，返回结构与 LogRepository.query_logs 相同。
+
+    归档由多个 gzip member 拼接而成（每 LOG_PURGE_CHUNK 行一个），{task_id}.idx.json 记录各 member 的
+    偏移、id 范围和股票代码；分页查询只解压 after_id 之后且包含目标股票的 member，每页耗时与归档大小无关。
+    """
+
+    FINISHED_STATUSES = ('completed', 'failed', 'cancelled')
+    # 只查询需要的列，不构造 ORM 对象（避免大任务的行堆积在 session 的 identity map 中）
+    LOG_COLUMNS = (BacktestLog.id, BacktestLog.task_id, BacktestLog.symbol, BacktestLog.level,
+                   BacktestLog.message, BacktestLog.created_at)
+    # 归档索引按 (归档路径, 大小, 修改时间) 缓存，归档重写后自然失效，轮询日志时不必每页重读索引
+    _index_cache = TTLCache("log_archive_index", 600, maxsize=256)
+
+    @staticmethod
+    def _get_session():
+        db_client = MySQLClient(
+            host=config.mysql_host,
+            db_name=config.mysql_database,
+            port=config.mysql_port,
+            username=config.mysql_username,
+            password=config.mysql_password
+        )
+        return db_client.get_session()
+
+    # ==================== 归档文件 ====================
+
+    @staticmethod
+    def archive_path(task_id: str) -> str:
+        safe_name = re.sub(r'[^\w.-]', '_', task_id)
+        return os.path.join(config.log_archive_dir, f"{safe_name}.jsonl.gz")
+
+    @classmethod
+    def has_archive(cls, task_id: str) -> bool:
+        return os.path.exists(cls.archive_path(task_id))
+
+    @staticmethod
+    def _row_to_dict(row) -> Dict:
+        return {
+            "id": row.id,
+            "task_id": row.task_id,
+            "symbol": row.symbol,
+            "level": row.level,
+            "message": row.message,
+            "created_at": row.created_at.strftime('%Y-%m-%d %H:%M:%S') if row.created_at else None,
+        }
+
+    @staticmethod
+    def index_path(task_id: str) -> str:
+        safe_name = re.sub(r'[^\w.-]', '_', task_id)
+        return os.path.join(config.log_archive_dir, f"{safe_name}.idx.json")
+
+    @classmethod
+    def _iter_archive(cls, task_id: str) -> Iterator[Dict]:
+        """逐行读取整个归档（按 id 升序）"""
+        with gzip.open(cls.archive_path(task_id), 'rt', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    @classmethod
+    def _write_index(cls, task_id: str, chunks: List[Dict]):
+        index = {
+            "size": os.path.getsize(cls.archive_path(task_id)),
+            "last_id": chunks[-1]["last_id"] if chunks else 0,
+            "chunks": chunks,
+        }
+        path = cls.index_path(task_id)
+        with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False)
+        os.replace(f"{path}.tmp", path)
+
+    @classmethod
+    def _load_index(cls, task_id: str) -> Optional[Dict]:
+        """读取与当前归档文件匹配的索引；不存在或已过期（归档大小不符）时返回 None"""
+        try:
+            path = cls.archive_path(task_id)
+            stat = os.stat(path)
+            key = (path, stat.st_size, stat.st_mtime_ns)
+            index = cls._index_cache.get(key)
+            if index is not None:
+                return index
+            with open(cls.index_path(task_id), encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if index.get("size") != stat.st_size:
+            return None
+        cls._index_cache.set(key, index)
+        return index
+
+    @classmethod
+    def _get_index(cls, task_id: str) -> Dict:
+        """归档索引；没有有效索引（旧格式归档）时把整个文件当作一个 member 扫描一遍生成并保存"""
+        index = cls._load_index(task_id)
+        if index is not None:
+            return index
+        chunk = {"offset": 0, "length": os.path.getsize(cls.archive_path(task_id)), "first_id": 0, "last_id": 0,
+                 "count": 0, "symbols": set()}
+        with closing(cls._iter_archive(task_id)) as archived:
+            for item in archived:
+                chunk["first_id"] = chunk["first_id"] or item["id"]
+                chunk["last_id"] = item["id"]
+                chunk["count"] += 1
+                chunk["symbols"].add(item.get("symbol"))
+        chunk["symbols"] = sorted(chunk["symbols"], key=lambda symbol: symbol or '')
+        chunks = [chunk] if chunk["count"] else []
+        # 只为旧格式归档补写索引；索引存在但过期说明 archive_task 正在更新，由它写入新索引
+        if not os.path.exists(cls.index_path(task_id)):
+            cls._write_index(task_id, chunks)
+        return {"last_id": chunk["last_id"], "chunks": chunks}
+
+    @classmethod
+    def archive_max_id(cls, task_id: str) -> Optional[int]:
+        """归档中最大的日志 id；没有归档时返回 None"""
+        if not cls.has_archive(task_id):
+            return None
+        return cls._get_index(task_id)["last_id"]
+
+    @staticmethod
+    def _iter_chunk(f, chunk: Dict) -> Iterator[Dict]:
+        """定位并解压单个 member（旧格式归档为整个文件）"""
+        f.seek(chunk["offset"])
+        read = 0
+        with gzip.GzipFile(fileobj=f, mode='rb') as gz:
+            for line in gz:
+                if read >= chunk["count"]:
+                    return
+                if line.strip():
+                    read += 1
+                    yield json.loads(line)
+
+    @classmethod
+    def query_archived(cls, task_id: str, symbol: Optional[str] = None, after_id: int = 0,
+                       limit: int = 500) -> Dict:
+        """从归档中按 task_id(+symbol) 增量拉取日志
+
+        按索引二分定位到 after_id 之后的 member，跳过不含目标股票的 member，取满 limit 条即停止读取。
+        """
+        chunks = cls._get_index(task_id)["chunks"]
+        start = bisect.bisect_right([chunk["last_id"] for chunk in chunks], after_id or 0)
+        items = []
+        last_id = after_id
+        with open(cls.archive_path(task_id), 'rb') as f:
+            for chunk in chunks[start:]:
+                if (symbol or None) not in chunk["symbols"]:
+                    continue
+                with closing(cls._iter_chunk(f, chunk)) as archived:
+                    for item in archived:
+                        if item["id"] <= (after_id or 0) or item.get("symbol") != (symbol or None):
+                            continue
+                        items.append(item)
+                        last_id = item["id"]
+                        if len(items) >= limit:
+                            return {"items": items, "last_id": last_id, "archived": True}
+        return {"items": items, "last_id": last_id, "archived": True}
+
+    @classmethod
+    def query_with_archive(cls, task_id: str, symbol: Optional[str], after_id: int, limit: int,
+                           query_db: Callable[[int, int], Dict]) -> Dict:
+        """归档与数据库合并查询
+
+        after_id 小于归档最大 id 时先读归档，不足一页再从归档最大 id 之后接续数据库。
+        归档写完才开始清理，归档最大 id 及之前的日志都在归档中，尚未清理完的行不会重复返回。
+
+        Args:
+            query_db: (after_id, limit) -> 与 LogRepository.query_logs 结构相同的结果
+        """
+        max_id = cls.archive_max_id(task_id)
+        if not max_id or (after_id or 0) >= max_id:
+            return query_db(after_id, limit)
+        archived = cls.query_archived(task_id, symbol=symbol, after_id=after_id, limit=limit)
+        if len(archived["items"]) >= limit:
+            return archived
+        result = query_db(max_id, limit - len(archived["items"]))
+        return {"items": archived["items"] + result["items"], "last_id": result["last_id"], "archived": True}
+
+    # ==================== 归档与清理 ====================
+
+    @staticmethod
+    def _purge_rows(session, task_id: str, max_id: Optional[int] = None, chunk_size: Optional[int] = None) -> int:
+        """按主键分批删除任务日志，每批单独提交，避免长事务和大范围锁"""
+        chunk_size = chunk_size or config.log_purge_chunk
+        deleted = 0
+        while True:
+            query = session.query(BacktestLog.id).filter(BacktestLog.task_id == task_id)
+            if max_id is not None:
+                query = query.filter(BacktestLog.id <= max_id)
+            ids = [row[0] for row in query.order_by(BacktestLog.id).limit(chunk_size).all()]
+            if not ids:
+                return deleted
+            deleted += session.query(BacktestLog).filter(BacktestLog.id.in_(ids)) \
+                .delete(synchronize_session=False)
+            session.commit()
+
+    @classmethod
+    def archive_task(cls, task_id: str, chunk_size: Optional[int] = None) -> int:
+        """归档并删除一个任务的数据库日志，返回本次归档条数
+
+        先把已有归档复制到临时文件（有有效索引时按字节复制，旧格式归档逐行重写），再按主键分批把数据库日志
+        追加为新的 member，完成后原子替换（rename）并更新索引。
+        日志 id 自增，新日志总是排在已有归档之后；已在归档中的行（上次清理失败遗留）不重复写入。
+        """
+        chunk_size = chunk_size or config.log_purge_chunk
+        path = cls.archive_path(task_id)
+        tmp_path = f"{path}.tmp"
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        session = cls._get_session()
+        try:
+            count = 0
+            last_id = 0
+            with open(tmp_path, 'wb') as raw:
+                writer = _ArchiveWriter(raw, chunk_size)
+                if os.path.exists(path):
+                    index = cls._load_index(task_id)
+                    if index is not None:
+                        with open(path, 'rb') as src:
+                            shutil.copyfileobj(src, raw)
+                        writer.chunks = list(index["chunks"])
+                        last_id = index["last_id"]
+                    else:
+                        for item in cls._iter_archive(task_id):
+                            writer.write(item)
+                            last_id = max(last_id, item["id"])
+                        writer.close()
+                while True:
+                    rows = session.query(*cls.LOG_COLUMNS) \
+                        .filter(BacktestLog.task_id == task_id, BacktestLog.id > last_id) \
+                        .order_by(BacktestLog.id).limit(chunk_size).all()
+                    if not rows:
+                        break
+                    for row in rows:
+                        writer.write(cls._row_to_dict(row))
+                    count += len(rows)
+                    last_id = rows[-1].id
+                writer.close()
+            if count:
+                os.replace(tmp_path, path)
+                cls._write_index(task_id, writer.chunks)
+                logger.info(f"任务日志已归档: {task_id}, {count} 条 -> {path}")
+            else:
+                os.remove(tmp_path)
+            # 只删除已写入归档的行（归档期间新写入的日志留待下次）
+            if last_id:
+                cls._purge_rows(session, task_id, max_id=last_id, chunk_size=chunk_size)
+            return count
+        except Exception:
+            session.rollback()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        finally:
+            session.close()
+
+    @classmethod
+    def expired_task_ids(cls, retention_days: Optional[int] = None) -> List[str]:
+        """超过保留天数的已结束任务，以及任务已删除的孤儿日志"""
+        retention_days = config.log_retention_days if retention_days is None else retention_days
+        cutoff = datetime.now() - timedelta(days=retention_days)
+        session = cls._get_session()
+        try:
+            log_task_ids = {row[0] for row in session.query(BacktestLog.task_id).distinct().all()}
+            if not log_task_ids:
+                return []
+            tasks = {t.task_id: t for t in session.query(BacktestTask.task_id, BacktestTask.status,
+                                                          BacktestTask.updated_at)
+                     .filter(BacktestTask.task_id.in_(log_task_ids)).all()}
+            expired = []
+            for task_id in sorted(log_task_ids):
+                task = tasks.get(task_id)
+                if task is None or (task.status in cls.FINISHED_STATUSES
+                                    and task.updated_at is not None and task.updated_at < cutoff):
+                    expired.append(task_id)
+            return expired
+        finally:
+            session.close()
+
+    @classmethod
+    def archive_expired(cls, retention_days: Optional[int] = None) -> Dict:
+        """归档所有过期任务日志"""
+        archived_tasks, archived_rows = 0, 0
+        for task_id in cls.expired_task_ids(retention_days):
+            try:
+                count = cls.archive_task(task_id)
+            except Exception as e:
+                logger.error(f"任务日志归档失败: {task_id}, {e}")
+                continue
+            if count:
+                archived_tasks += 1
+                archived_rows += count
+        if archived_tasks:
+            logger.info(f"日志归档完成: {archived_tasks} 个任务, {archived_rows} 条")
+        return {"archived_tasks": archived_tasks, "archived_rows": archived_rows}
+
+    @classmethod
+    def purge_task(cls, task_id: str) -> int:
+        """删除任务的全部日志（数据库 + 归档文件），返回删除的数据库行数"""
+        session = cls._get_session()
+        try:
+            deleted = cls._purge_rows(session, task_id)
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+        for path in (cls.archive_path(task_id), cls.index_path(task_id)):
+            if os.path.exists(path):
+                os.remove(path)
+        return deleted
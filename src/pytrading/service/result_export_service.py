@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@Description    ：回测结果流式导出 - CSV 逐批写出，Parquet/Arrow 按 RecordBatch 写出（需安装 pyarrow）
+@Author  ：EEric
+@Date    ：2026-10-19
+"""
+import csv
+import io
+from typing import Dict, Iterator
+
+from pytrading.config.settings import config
+from pytrading.db.mysql import BackTestResult
+
+# (列名, CSV 表头, Arrow 类型)
+EXPORT_COLUMNS = (
+    ('symbol', '股票代码', 'string'),
+    ('name', '股票名称', 'string'),
+    ('strategy_name', '策略名称', 'string'),
+    ('trending_type', '趋势类型', 'string'),
+    ('pnl_ratio', '收益率', 'float64'),
+    ('sharp_ratio', '夏普比率', 'float64'),
+    ('max_drawdown', '最大回撤', 'float64'),
+    ('win_ratio', '胜率', 'float64'),
+    ('open_count', '开仓次数', 'int64'),
+    ('close_count', '平仓次数', 'int64'),
+    ('backtest_start_time', '开始时间', 'timestamp'),
+    ('backtest_end_time', '结束时间', 'timestamp'),
+)
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv;charset=utf-8', 'csv'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows'),
+}
+
+
+class ResultExportService:
+    """回测结果导出
+
+    行数据来自 MySQLBackTestSaver.iter_result_rows（服务端游标分批读取），每批编码后立即交给
+    StreamingResponse 发送，内存只保留一批数据；响应头和 CSV 表头在查询第一批之前就发出。
+    """
+
+    @staticmethod
+    def columns():
+        return [getattr(BackTestResult, name) for name, _, _ in EXPORT_COLUMNS]
+
+    @staticmethod
+    def arrow_available() -> bool:
+        try:
+            import pyarrow  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    @staticmethod
+    def _csv_row(row) -> list:
+        (symbol, name, strategy_name, trending_type, pnl_ratio, sharp_ratio, max_drawdown, win_ratio,
+         open_count, close_count, start_time, end_time) = row
+        return [
+            symbol or '',
+            name or '',
+            strategy_name or '',
+            trending_type or '',
+            f"{float(pnl_ratio or 0) * 100:.2f}%",
+            f"{float(sharp_ratio or 0):.2f}",
+            f"{float(max_drawdown or 0) * 100:.2f}%",
+            f"{float(win_ratio or 0) * 100:.2f}%",
+            str(open_count or 0),
+            str(close_count or 0),
+            start_time.strftime('%Y-%m-%d %H:%M:%S') if start_time else '',
+            end_time.strftime('%Y-%m-%d %H:%M:%S') if end_time else '',
+        ]
+
+    @classmethod
+    def iter_csv(cls, saver, filters: Dict, chunk_size: int = None) -> Iterator[bytes]:
+        """CSV（UTF-8 BOM，Excel 打开不乱码），每批行编码为一个 bytes 块"""
+        chunk_size = chunk_size or config.export_chunk_rows
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+        writer.writerow([header for _, header, _ in EXPORT_COLUMNS])
+        yield ('\ufeff' + buffer.getvalue()).encode('utf-8')
+        for rows in saver.iter_result_rows(cls.columns(), chunk_size=chunk_size, **filters):
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(cls._csv_row(row) for row in rows)
+            yield buffer.getvalue().encode('utf-8')
+
+    @staticmethod
+    def _arrow_schema():
+        import pyarrow as pa
+        types = {'string': pa.string(), 'float64': pa.float64(), 'int64': pa.int64(),
+                 'timestamp': pa.timestamp('s')}
+        return pa.schema([(name, types[kind]) for name, _, kind in EXPORT_COLUMNS])
+
+    @classmethod
+    def _record_batch(cls, rows, schema):
+        """一批行转为 RecordBatch（保留原始数值，不做百分比格式化）"""
+        import pyarrow as pa
+        arrays = []
+        for index, field in enumerate(schema):
+            values = [row[index] for row in rows]
+            if pa.types.is_floating(field.type):
+                values = [None if v is None else float(v) for v in values]
+            arrays.append(pa.array(values, type=field.type))
+        return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+    @classmethod
+    def iter_arrow(cls, saver, filters: Dict, fmt: str = 'parquet', chunk_size: int = None) -> Iterator[bytes]:
+        """Parquet（每批一个 row group）或 Arrow IPC 流，每批写出的字节立即取出发送"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        chunk_size = chunk_size or config.export_chunk_rows
+        schema = cls._arrow_schema()
+        sink = _ChunkSink()
+        if fmt == 'parquet':
+            writer = pq.ParquetWriter(sink, schema, compression='zstd')
+        else:
+            writer = pa.ipc.new_stream(sink, schema)
+
+        try:
+            for rows in saver.iter_result_rows(cls.columns(), chunk_size=chunk_size, **filters):
+                writer.write_batch(cls._record_batch(rows, schema))
+                data = sink.drain()
+                if data:
+                    yield data
+        finally:
+            writer.close()
+        data = sink.drain()
+        if data:
+            yield data
+
+
+class _ChunkSink(io.RawIOBase):
+    """只追加的写入目标：tell() 返回累计写入量（Parquet 页脚记录的偏移依赖它），drain() 取走已写出的字节"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@Description    ：回测结果汇总服务 - 均值、分位数、胜率分布等统计全部在数据库中完成
+@Author  ：EEric
+@Date    ：2026-10-19
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import case, func
+
+from pytrading.config.settings import config
+from pytrading.db.mysql import BacktestTask, BackTestResult, MySQLClient, Strategy
+from pytrading.logger import logger
+
+
+class ResultSummaryService:
+    """回测结果汇总
+
+    只向数据库取聚合后的标量（COUNT/AVG/GROUP BY），分位数按 ORDER BY + OFFSET 取相邻两行插值，
+    不再把整个任务的 BackTestResult 加载成 ORM 对象。任务完成后的汇总保存在 task.result_summary 中复用。
+    """
+
+    # 汇总结构版本，旧版本的 result_summary 会重新计算
+    SUMMARY_VERSION = 2
+    PERCENTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+    # 胜率分布区间 [下界, 上界)，最后一档包含 1
+    WIN_RATIO_BUCKETS = ((0.0, 0.2), (0.2, 0.4), (0.4, 0.6), (0.6, 0.8), (0.8, 1.0))
+
+    @staticmethod
+    def _get_session():
+        db_client = MySQLClient(
+            host=config.mysql_host,
+            db_name=config.mysql_database,
+            port=config.mysql_port,
+            username=config.mysql_username,
+            password=config.mysql_password
+        )
+        return db_client.get_session()
+
+    @staticmethod
+    def _conditions(strategy_name: str, start_time: datetime, end_time: datetime) -> List:
+        return [
+            BackTestResult.strategy_name == strategy_name,
+            BackTestResult.backtest_start_time == start_time,
+            BackTestResult.backtest_end_time == end_time,
+        ]
+
+    @staticmethod
+    def _percentiles(session, conditions: List, column, total: int, points) -> Dict[str, float]:
+        """线性插值分位数（与 numpy.percentile 默认算法一致），每个分位点只取两行"""
+        value = func.coalesce(column, 0)
+        result = {}
+        for p in points:
+            position = p * (total - 1)
+            lower = int(position)
+            rows = session.query(value).filter(*conditions).order_by(value.asc()) \
+                .offset(lower).limit(2).all()
+            low = float(rows[0][0])
+            high = float(rows[-1][0])
+            result[f"p{int(round(p * 100))}"] = round(low + (high - low) * (position - lower), 4)
+        return result
+
+    @classmethod
+    def summarize(cls, session, strategy_name: str, start_time: datetime, end_time: datetime) -> Dict[str, Any]:
+        """按策略和回测区间汇总结果"""
+        conditions = cls._conditions(strategy_name, start_time, end_time)
+        pnl = func.coalesce(BackTestResult.pnl_ratio, 0)
+        win = func.coalesce(BackTestResult.win_ratio, 0)
+
+        total, avg_pnl, avg_sharp, avg_drawdown, avg_win, profitable = session.query(
+            func.count(BackTestResult.id),
+            func.avg(pnl),
+            func.avg(func.coalesce(BackTestResult.sharp_ratio, 0)),
+            func.avg(func.coalesce(BackTestResult.max_drawdown, 0)),
+            func.avg(win),
+            func.sum(case((BackTestResult.pnl_ratio > 0, 1), else_=0)),
+        ).filter(*conditions).one()
+
+        if not total:
+            return {"summary_version": cls.SUMMARY_VERSION, "total_count": 0,
+                    "message": "No backtest results found"}
+
+        percentiles = cls._percentiles(session, conditions, BackTestResult.pnl_ratio, total, cls.PERCENTILES)
+
+        bucket = case(
+            *[(win < upper, index) for index, (_, upper) in enumerate(cls.WIN_RATIO_BUCKETS[:-1])],
+            else_=len(cls.WIN_RATIO_BUCKETS) - 1,
+        )
+        bucket_counts = dict(session.query(bucket, func.count(BackTestResult.id))
+                             .filter(*conditions).group_by(bucket).all())
+        win_ratio_distribution = [
+            {"range": f"{int(lower * 100)}-{int(upper * 100)}%", "count": int(bucket_counts.get(index, 0))}
+            for index, (lower, upper) in enumerate(cls.WIN_RATIO_BUCKETS)
+        ]
+
+        trending_type_counts = {
+            (trending_type or 'unknown'): int(count)
+            for trending_type, count in session.query(BackTestResult.trending_type, func.count(BackTestResult.id))
+            .filter(*conditions).group_by(BackTestResult.trending_type).all()
+        }
+
+        return {
+            "summary_version": cls.SUMMARY_VERSION,
+            "total_count": int(total),
+            "avg_pnl_ratio": round(float(avg_pnl or 0), 4),
+            "avg_sharp_ratio": round(float(avg_sharp or 0), 4),
+            "avg_max_drawdown": round(float(avg_drawdown or 0), 4),
+            "avg_win_ratio": round(float(avg_win or 0), 4),
+            "median_pnl_ratio": percentiles["p50"],
+            "pnl_ratio_percentiles": percentiles,
+            "profitable_count": int(profitable or 0),
+            "win_ratio_distribution": win_ratio_distribution,
+            "trending_type_counts": trending_type_counts,
+            "completed_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        }
+
+    @classmethod
+    def task_summary(cls, session, task: BacktestTask, strategy_name: Optional[str] = None) -> Dict[str, Any]:
+        """任务汇总：已完成且已缓存的直接返回，否则重新计算；已完成任务的计算结果写回 result_summary"""
+        cached = task.result_summary
+        if task.status == 'completed' and isinstance(cached, dict) \
+                and cached.get("summary_version") == cls.SUMMARY_VERSION:
+            return cached
+
+        if strategy_name is None:
+            strategy = session.query(Strategy).filter_by(id=task.strategy_id).first()
+            strategy_name = strategy.name if strategy else None
+        summary = cls.summarize(session, strategy_name, task.start_time, task.end_time)
+        if task.status == 'completed':
+            task.result_summary = summary
+            session.commit()
+            logger.info(f"任务汇总已缓存: {task.task_id}")
+        return summary
+
+    @classmethod
+    def get_task_summary(cls, task_id: str) -> Optional[Dict[str, Any]]:
+        """按 task_id 获取汇总，任务不存在时返回 None"""
+        session = cls._get_session()
+        try:
+            task = session.query(BacktestTask).filter_by(task_id=task_id).first()
+            if not task:
+                return None
+            return cls.task_summary(session, task)
+        finally:
+            session.close()
+
+    @staticmethod
+    def system_overview(session, sample: int = 100) -> Dict[str, Any]:
+        """最近 sample 条回测结果的盈利数量和收益率合计（系统状态页使用）"""
+        recent = session.query(BackTestResult.pnl_ratio.label('pnl_ratio')) \
+            .order_by(BackTestResult.created_at.desc(), BackTestResult.id.desc()) \
+            .limit(sample).subquery()
+        count, profitable, pnl_sum = session.query(
+            func.count(),
+            func.sum(case((recent.c.pnl_ratio > 0, 1), else_=0)),
+            func.sum(func.coalesce(recent.c.pnl_ratio, 0)),
+        ).select_from(recent).one()
+        return {
+            "result_count": int(count or 0),
+            "profitable_count": int(profitable or 0),
+            "pnl_ratio_sum": float(pnl_sum or 0),
+        }
@@ -111,25 +111,15 @@ class SentimentAnalyzer:
             MarketSentimentData: 市场情绪数据
         """
         try:
-            import akshare as ak
-
-            # 获取全市场行情
-            spot = ak.stock_zh_a_spot_em()
-
-            if spot is None or spot.empty:
-                return MarketSentimentData(
-                    sentiment="neutral",
-                    score=0.0,
-                    description="数据获取失败",
-                    timestamp="",
-                )
-
-            # 计算涨跌家数
-            up_count = len(spot[spot['涨跌幅'] > 0])
-            down_count = len(spot[spot['涨跌幅'] < 0])
-            total = len(spot)
-
-            up_ratio = up_count / total if total > 0 else 0.5
+            from pytrading.service.spot_snapshot_service import get_spot_snapshot_service
+            from pytrading.utils.blocking import run_upstream
+
+            # 全市场行情快照（与市场概况/排行共享，快照过期时在 AkShare 线程池中刷新）
+            snapshot = await run_upstream('akshare', get_spot_snapshot_service().get)
+            breadth = snapshot.breadth()
+            up_count = breadth["up_count"]
+            down_count = breadth["down_count"]
+            up_ratio = breadth["up_ratio"]
 
             # 判断情绪
             if up_ratio > 0.6:
@@ -0,0 +1,235 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@Description    ：A股实时行情快照 - 全市场 spot 数据后台定时刷新，内存中以列式数组共享给市场概况/排行/情绪计算
+@Author  ：EEric
+@Date    ：2026-10-19
+"""
+import threading
+import time
+from datetime import datetime
+from datetime import time as dtime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from pytrading.config.settings import config
+from pytrading.logger import logger
+
+
+class SpotSnapshot:
+    """一次全市场行情快照（只读）
+
+    只保留用到的列：代码、名称为定长字符串数组，最新价、涨跌幅、成交额为 float64 数组（缺失为 NaN）。
+    """
+
+    # 涨跌停判定阈值（%）
+    LIMIT_PCT = 9.9
+
+    def __init__(self, code, name, price, change_pct, amount, updated_at: Optional[datetime] = None):
+        self.code = np.asarray(code, dtype=str)
+        self.name = np.asarray(name, dtype=str)
+        self.price = np.asarray(price, dtype=np.float64)
+        self.change_pct = np.asarray(change_pct, dtype=np.float64)
+        self.amount = np.asarray(amount, dtype=np.float64)
+        self.updated_at = updated_at or datetime.now()
+        self.created_monotonic = time.monotonic()
+
+    @classmethod
+    def from_dataframe(cls, spot) -> "SpotSnapshot":
+        """由 ak.stock_zh_a_spot_em() 的 DataFrame 构建"""
+        import pandas as pd
+
+        def numeric(column):
+            return pd.to_numeric(spot[column], errors='coerce').to_numpy(dtype=np.float64)
+
+        return cls(
+            code=spot['代码'].astype(str).to_numpy(),
+            name=spot['名称'].astype(str).to_numpy(),
+            price=numeric('最新价'),
+            change_pct=numeric('涨跌幅'),
+            amount=numeric('成交额'),
+        )
+
+    def __len__(self):
+        return len(self.code)
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.created_monotonic
+
+    def summary(self) -> Dict[str, Any]:
+        """涨跌停、涨跌家数和成交总额（亿）"""
+        pct = self.change_pct
+        return {
+            "limit_up": int(np.count_nonzero(pct >= self.LIMIT_PCT)),
+            "limit_down": int(np.count_nonzero(pct <= -self.LIMIT_PCT)),
+            "up_count": int(np.count_nonzero(pct > 0)),
+            "down_count": int(np.count_nonzero(pct < 0)),
+            "flat_count": int(np.count_nonzero(pct == 0)),
+            "total_amount": round(float(np.nansum(self.amount)) / 1e8, 0),
+            "total_stocks": len(self),
+        }
+
+    def top(self, field: str, n: int = 10, largest: bool = True) -> List[Dict[str, Any]]:
+        """按 field 取前 n 名（argpartition 选出 n 个后只对这 n 个排序），NaN 不参与排名"""
+        values = getattr(self, field)
+        valid = np.flatnonzero(~np.isnan(values))
+        n = min(n, len(valid))
+        if n <= 0:
+            return []
+        key = values[valid] if largest else -values[valid]
+        picked = np.argpartition(key, -n)[-n:]
+        picked = picked[np.argsort(-key[picked], kind='stable')]
+        return [self._row(i) for i in valid[picked]]
+
+    def _row(self, i: int) -> Dict[str, Any]:
+        def number(array):
+            value = array[i]
+            return None if np.isnan(value) else float(value)
+
+        return {
+            "code": str(self.code[i]),
+            "name": str(self.name[i]),
+            "price": number(self.price),
+            "change_pct": number(self.change_pct),
+            "amount": number(self.amount),
+        }
+
+    def breadth(self) -> Dict[str, Any]:
+        """市场宽度：涨跌平家数和上涨占比（情绪计算使用）"""
+        summary = self.summary()
+        total = summary["total_stocks"]
+        return {
+            "up_count": summary["up_count"],
+            "down_count": summary["down_count"],
+            "flat_count": summary["flat_count"],
+            "total": total,
+            "up_ratio": summary["up_count"] / total if total > 0 else 0.5,
+        }
+
+
+class SpotSnapshotService:
+    """全市场行情快照服务（进程内单例）
+
+    交易时段内后台线程每 SPOT_SNAPSHOT_INTERVAL 秒刷新一次；非交易时段快照有效期放宽到 SPOT_SNAPSHOT_IDLE_TTL。
+    get() 发现快照过期时同步刷新，并发调用只请求一次上游；刷新失败时返回旧快照。
+    """
+
+    # 交易时段（含集合竞价）
+    TRADING_SESSIONS = ((dtime(9, 15), dtime(11, 30)), (dtime(13, 0), dtime(15, 0)))
+
+    def __init__(self, interval: Optional[float] = None, idle_ttl: Optional[float] = None, fetcher=None):
+        self.interval = interval if interval is not None else config.spot_snapshot_interval
+        self.idle_ttl = idle_ttl if idle_ttl is not None else config.spot_snapshot_idle_ttl
+        self._fetcher = fetcher or self._fetch_upstream
+        self._snapshot: Optional[SpotSnapshot] = None
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.refresh_count = 0
+        self.failure_count = 0
+        self.last_error: Optional[str] = None
+
+    @staticmethod
+    def _fetch_upstream():
+        import akshare as ak
+        return ak.stock_zh_a_spot_em()
+
+    @classmethod
+    def is_trading_time(cls, now: Optional[datetime] = None) -> bool:
+        now = now or datetime.now()
+        if now.weekday() >= 5:
+            return False
+        return any(start <= now.time() <= end for start, end in cls.TRADING_SESSIONS)
+
+    def max_age(self, now: Optional[datetime] = None) -> float:
+        return self.interval if self.is_trading_time(now) else max(self.idle_ttl, self.interval)
+
+    # ==================== 刷新 ====================
+
+    def refresh(self) -> SpotSnapshot:
+        """请求上游并替换快照"""
+        started = time.perf_counter()
+        spot = self._fetcher()
+        if spot is None or len(spot) == 0:
+            raise ValueError("行情快照为空")
+        snapshot = SpotSnapshot.from_dataframe(spot)
+        self._snapshot = snapshot
+        self.refresh_count += 1
+        self.last_error = None
+        logger.debug(f"行情快照已刷新: {len(snapshot)} 只, 耗时 {time.perf_counter() - started:.2f}s")
+        return snapshot
+
+    def get(self) -> SpotSnapshot:
+        """获取快照，过期时刷新（并发调用共享一次刷新）"""
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.age < self.max_age():
+            return snapshot
+        with self._refresh_lock:
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot.age < self.max_age():
+                return snapshot
+            try:
+                return self.refresh()
+            except Exception as e:
+                self.failure_count += 1
+                self.last_error = str(e)
+                if snapshot is None:
+                    raise
+                logger.warning(f"行情快照刷新失败，使用 {snapshot.age:.0f}s 前的快照: {e}")
+                return snapshot
+
+    # ==================== 后台刷新 ====================
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self.is_trading_time():
+                with self._refresh_lock:
+                    try:
+                        self.refresh()
+                    except Exception as e:
+                        self.failure_count += 1
+                        self.last_error = str(e)
+                        logger.warning(f"行情快照后台刷新失败: {e}")
+            self._stop.wait(self.interval)
+
+    def start(self) -> "SpotSnapshotService":
+        if self._thread is None and self.interval > 0:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='spot-snapshot', daemon=True)
+            self._thread.start()
+            logger.info(f"行情快照后台刷新已启动，交易时段每 {self.interval}s 刷新")
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        return {
+            "rows": len(snapshot) if snapshot is not None else 0,
+            "updated_at": snapshot.updated_at.strftime('%Y-%m-%d %H:%M:%S') if snapshot is not None else None,
+            "age_seconds": round(snapshot.age, 1) if snapshot is not None else None,
+            "refresh_count": self.refresh_count,
+            "failure_count": self.failure_count,
+            "last_error": self.last_error,
+            "background": self._thread is not None,
+            "interval": self.interval,
+        }
+
+
+_spot_snapshot_service: Optional[SpotSnapshotService] = None
+_spot_snapshot_lock = threading.Lock()
+
+
+def get_spot_snapshot_service() -> SpotSnapshotService:
+    """获取进程级行情快照服务实例"""
+    global _spot_snapshot_service
+    with _spot_snapshot_lock:
+        if _spot_snapshot_service is None:
+            _spot_snapshot_service = SpotSnapshotService()
+        return _spot_snapshot_service
@@ -0,0 +1,307 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@Description    ：股票代码内存索引 - 代码精确/后缀、代码前缀、名称前缀、拼音首字母检索（拼音需安装 pypinyin）
+@Author  ：EEric
+@Date    ：2026-10-19
+"""
+import re
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional
+
+from pytrading.config.settings import config
+from pytrading.logger import logger
+
+# 数据库无股票列表时的默认股票池
+DEFAULT_SYMBOLS = [
+    {"symbol": "SHSE.600000", "name": "浦发银行", "industry": "银行"},
+    {"symbol": "SHSE.600036", "name": "招商银行", "industry": "银行"},
+    {"symbol": "SHSE.600519", "name": "贵州茅台", "industry": "白酒"},
+    {"symbol": "SHSE.600887", "name": "伊利股份", "industry": "食品饮料"},
+    {"symbol": "SZSE.000001", "name": "平安银行", "industry": "银行"},
+    {"symbol": "SZSE.000002", "name": "万科A", "industry": "房地产"},
+    {"symbol": "SZSE.000625", "name": "长安汽车", "industry": "汽车"},
+    {"symbol": "SZSE.000858", "name": "五粮液", "industry": "白酒"},
+]
+
+# sh600000 / 600000.SH / SHSE.600000 等写法中的数字代码
+_CODE_PATTERN = re.compile(r'^(?:[a-z]+\.?)?(\d{1,6})(?:\.[a-z]+)?$')
+
+
+def _pinyin_initials():
+    """返回 name -> 拼音首字母 的函数；未安装 pypinyin 时返回 None"""
+    try:
+        from pypinyin import Style, lazy_pinyin
+    except ImportError:
+        return None
+
+    def initials(name: str) -> str:
+        return ''.join(part[:1] for part in lazy_pinyin(name, style=Style.FIRST_LETTER)
+                       if part.strip()).lower()
+    return initials
+
+
+def _prefix_range(keys: List[str], prefix: str) -> range:
+    """有序列表中以 prefix 开头的下标区间（二分查找）"""
+    return range(bisect_left(keys, prefix), bisect_left(keys, prefix + '\uffff'))
+
+
+class SymbolIndex:
+    """不可变的股票检索索引
+
+    代码/完整代码走哈希表，代码前缀、名称前缀和拼音首字母前缀走有序列表二分查找，
+    名称包含匹配走单字/双字倒排表，检索耗时只与命中数相关，不随股票池大小线性增长。
+    """
+
+    def __init__(self, rows: Iterable[Dict], initials: Optional[Callable[[str], str]] = None):
+        self.entries: List[Dict] = []
+        self._by_symbol: Dict[str, int] = {}
+        self._by_code: Dict[str, List[int]] = {}
+        self._lower_names: List[str] = []
+        self._grams: Dict[str, List[int]] = {}
+        codes, names, pinyins = [], [], []
+        for row in rows:
+            symbol = row.get('symbol')
+            if not symbol:
+                continue
+            position = len(self.entries)
+            entry = {key: row.get(key) for key in ('id', 'symbol', 'name', 'market', 'industry')}
+            self.entries.append(entry)
+            self._by_symbol[symbol.lower()] = position
+            code = symbol.rsplit('.', 1)[-1].lower()
+            self._by_code.setdefault(code, []).append(position)
+            codes.append((code, position))
+            name = (entry['name'] or '').lower()
+            self._lower_names.append(name)
+            for gram in set(name) | {name[i:i + 2] for i in range(len(name) - 1)}:
+                self._grams.setdefault(gram, []).append(position)
+            if name:
+                names.append((name, position))
+                if initials is not None:
+                    pinyins.append((initials(name), position))
+        codes.sort()
+        names.sort()
+        pinyins.sort()
+        self._codes = [key for key, _ in codes]
+        self._code_positions = [position for _, position in codes]
+        self._names = [key for key, _ in names]
+        self._name_positions = [position for _, position in names]
+        self._pinyins = [key for key, _ in pinyins]
+        self._pinyin_positions = [position for _, position in pinyins]
+        self.pinyin_enabled = initials is not None
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def _code_of(keyword: str) -> Optional[str]:
+        match = _CODE_PATTERN.match(keyword)
+        return match.group(1) if match else None
+
+    def lookup(self, symbol: str) -> Optional[Dict]:
+        """按完整代码或纯数字代码查找单只股票"""
+        keyword = (symbol or '').strip().lower()
+        position = self._by_symbol.get(keyword)
+        if position is None:
+            code = self._code_of(keyword)
+            positions = self._by_code.get(code) if code and len(code) == 6 else None
+            position = positions[0] if positions else None
+        return self.entries[position] if position is not None else None
+
+    def _name_contains(self, keyword: str):
+        """名称包含 keyword 的位置：取最短的单字/双字倒排表逐一校验"""
+        if len(keyword) == 1:
+            candidates = self._grams.get(keyword, [])
+        else:
+            candidates = min((self._grams.get(keyword[i:i + 2], []) for i in range(len(keyword) - 1)), key=len)
+        return (position for position in candidates if keyword in self._lower_names[position])
+
+    def search(self, keyword: str, limit: int = 10) -> List[Dict]:
+        """检索顺序：完整代码 > 代码 > 代码前缀 > 名称前缀 > 拼音首字母前缀 > 名称包含"""
+        keyword = (keyword or '').strip().lower()
+        if not keyword or limit <= 0:
+            return []
+
+        found: List[int] = []
+        seen = set()
+
+        def collect(positions) -> bool:
+            for position in positions:
+                if position not in seen:
+                    seen.add(position)
+                    found.append(position)
+                    if len(found) >= limit:
+                        return True
+            return False
+
+        position = self._by_symbol.get(keyword)
+        if position is not None and collect([position]):
+            return self._entries(found)
+
+        code = self._code_of(keyword)
+        if code:
+            if collect(self._by_code.get(code, [])):
+                return self._entries(found)
+            if collect(self._code_positions[i] for i in _prefix_range(self._codes, code)):
+                return self._entries(found)
+
+        if collect(self._name_positions[i] for i in _prefix_range(self._names, keyword)):
+            return self._entries(found)
+
+        if self.pinyin_enabled and keyword.isascii() and keyword.isalpha():
+            if collect(self._pinyin_positions[i] for i in _prefix_range(self._pinyins, keyword)):
+                return self._entries(found)
+
+        collect(self._name_contains(keyword))
+        return self._entries(found)
+
+    def match_pinyin(self, keyword: str, limit: int = 1000) -> Optional[List[str]]:
+        """拼音首字母前缀命中的完整代码（供结果列表筛选时与模糊匹配 OR 组合）；未开启拼音或关键字
+        不是纯字母时返回空列表，命中超过 limit 只时返回 None"""
+        keyword = (keyword or '').strip().lower()
+        if not (self.pinyin_enabled and keyword.isascii() and keyword.isalpha()):
+            return []
+        hits = _prefix_range(self._pinyins, keyword)
+        if len(hits) > limit:
+            return None
+        return [self.entries[self._pinyin_positions[i]]['symbol'] for i in hits]
+
+    def _entries(self, positions: List[int]) -> List[Dict]:
+        return [self.entries[position] for position in positions]
+
+
+class SymbolIndexService:
+    """进程内共享的股票检索索引
+
+    启动时后台构建；symbols 表写入提交后（见 utils.ttl_cache.invalidate_on_write）或超过
+    SYMBOL_INDEX_TTL 秒后标记过期，下次访问在后台重建，重建完成前继续使用旧索引。
+    """
+
+    def __init__(self, loader: Optional[Callable[[], List[Dict]]] = None, ttl: Optional[float] = None):
+        self._loader = loader or self._load_rows
+        self.ttl = config.symbol_index_ttl if ttl is None else ttl
+        self._index: Optional[SymbolIndex] = None
+        self._built_at = 0.0
+        self._stale = False
+        self._generation = 0
+        self._builds = 0
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._refreshing = False
+
+    @staticmethod
+    def _get_session():
+        from pytrading.db.mysql import MySQLClient
+        client = MySQLClient(
+            host=config.mysql_host,
+            port=config.mysql_port,
+            username=config.mysql_username,
+            password=config.mysql_password,
+            db_name=config.mysql_database,
+        )
+        return client.get_session()
+
+    @classmethod
+    def _load_rows(cls) -> List[Dict]:
+        from pytrading.db.mysql import StockSymbol
+        session = cls._get_session()
+        try:
+            rows = session.query(StockSymbol.id, StockSymbol.symbol, StockSymbol.name,
+                                 StockSymbol.market, StockSymbol.industry) \
+                .filter(StockSymbol.is_active.is_(True)).all()
+        finally:
+            session.close()
+        if not rows:
+            return DEFAULT_SYMBOLS
+        return [row._asdict() for row in rows]
+
+    def refresh(self) -> SymbolIndex:
+        """同步重建索引"""
+        started = time.monotonic()
+        generation = self._generation
+        index = SymbolIndex(self._loader(), initials=_pinyin_initials())
+        with self._lock:
+            self._index = index
+            self._built_at = time.time()
+            # 加载期间又有写入时保持过期，下次访问再重建
+            self._stale = self._generation != generation
+            self._builds += 1
+        logger.info(f"股票索引已构建: {len(index)} 只, 拼音检索={'开启' if index.pinyin_enabled else '未安装 pypinyin'},"
+                    f" 耗时 {(time.monotonic() - started) * 1000:.0f}ms")
+        return index
+
+    def _is_stale(self) -> bool:
+        return self._stale or (self.ttl > 0 and time.time() - self._built_at > self.ttl)
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning(f"股票索引重建失败，继续使用旧索引: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=run, name='symbol-index-refresh', daemon=True).start()
+
+    def warm_up(self):
+        """后台构建首个索引（应用启动时调用，不阻塞启动）"""
+        self._refresh_in_background()
+
+    def get(self) -> SymbolIndex:
+        """获取索引：尚未构建时同步构建，已过期时返回旧索引并后台重建"""
+        index = self._index
+        if index is None:
+            with self._build_lock:
+                index = self._index
+                if index is None:
+                    return self.refresh()
+        if self._is_stale():
+            self._refresh_in_background()
+        return index
+
+    def peek(self) -> Optional[SymbolIndex]:
+        """当前索引（可能已过期）；尚未构建时返回 None，不触发加载"""
+        return self._index
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._stale = True
+
+    def search(self, keyword: str, limit: int = 10) -> List[Dict]:
+        return self.get().search(keyword, limit)
+
+    def lookup(self, symbol: str) -> Optional[Dict]:
+        return self.get().lookup(symbol)
+
+    def stats(self) -> Dict:
+        index = self._index
+        return {
+            "size": len(index) if index else 0,
+            "pinyin": bool(index and index.pinyin_enabled),
+            "builds": self._builds,
+            "built_at": time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self._built_at)) if index else None,
+            "stale": self._is_stale() if index else True,
+        }
+
+
+_service: Optional[SymbolIndexService] = None
+
+
+def get_symbol_index_service() -> SymbolIndexService:
+    """进程级股票索引实例（symbols 缓存失效时同步标记过期）"""
+    global _service
+    if _service is None:
+        from pytrading.utils.ttl_cache import on_invalidate
+        _service = SymbolIndexService()
+        on_invalidate("symbols", _service.invalidate)
+    return _service
@@ -5,12 +5,199 @@
 @Author  ：EEric
 @Date    ：2026-03-07
 """
+import atexit
+import glob
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import psutil
 from pytrading.db.mysql import MySQLClient, TradeRecord
+from pytrading.db.bulk import bulk_insert_ignore
 from pytrading.config.settings import config
 from pytrading.logger import logger
 from datetime import datetime
 
 
+class TradeRecordBuffer:
+    """交易信号写缓冲
+
+    策略循环只把信号追加到内存，flush 时按 uq_trade_record 一次批量 insert-ignore。
+    flush_interval > 0 时后台线程定时写库（实盘）；缓冲达到 max_rows 时立即写库，避免内存无限增长；
+    进程退出时 atexit 兜底写出。写库失败的行保留在缓冲区，下次 flush 重试。
+
+    写库失败后 retry_interval 秒内 add 不再同步写库（避免数据库不可用时每根K线都等待连接超时），
+    期间缓冲写满则溢出到 spill_dir 下的文件；溢出文件在下次成功 flush 时一并写库后删除，
+    主进程已退出的遗留溢出文件同样会被写入。
+    """
+
+    UNIQUE_KEYS = ('task_id', 'symbol', 'bar_time', 'action')
+    _DATETIME_FIELDS = ('bar_time', 'created_at')
+    _SPILL_PREFIX = 'trade-records-'
+    _SPILL_PID = re.compile(r'^trade-records-(\d+)-')
+
+    def __init__(self, max_rows=None, flush_interval=0, retry_interval=None, spill_dir=None):
+        self.max_rows = max_rows or config.trade_record_buffer_rows
+        self.flush_interval = flush_interval
+        self.retry_interval = config.trade_record_retry_interval if retry_interval is None else retry_interval
+        self.spill_dir = spill_dir or config.trade_record_spill_dir
+        self._rows = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._retry_at = 0.0
+        self.saved_count = 0
+        self.spilled_count = 0
+
+    def add(self, task_id, symbol, action, target_percent, price, volume, signal_type, bar_time):
+        """缓冲一条信号；bar_time 无法解析时记录日志并跳过，不中断策略"""
+        if not isinstance(bar_time, datetime):
+            try:
+                bar_time = datetime.strptime(str(bar_time), '%Y-%m-%d %H:%M:%S')
+            except ValueError as e:
+                logger.warning(f"保存交易记录失败，bar_time 无法解析: {symbol} {action} {bar_time!r}, {e}")
+                return
+        row = {
+            "task_id": task_id,
+            "symbol": symbol,
+            "action": action,
+            "target_percent": target_percent,
+            "price": price,
+            "volume": volume,
+            "signal_type": signal_type,
+            "bar_time": bar_time,
+            "created_at": datetime.now(),
+        }
+        key = tuple(row[k] for k in self.UNIQUE_KEYS)
+        with self._lock:
+            self._rows.setdefault(key, row)
+            full = len(self._rows) >= self.max_rows
+        if full:
+            if time.monotonic() >= self._retry_at:
+                self.flush()
+            else:
+                # 写库失败后的重试间隔内不访问数据库，缓冲溢出到磁盘
+                self._spill()
+
+    def pending(self):
+        """内存中待写入的行数（不含已溢出到磁盘的行）"""
+        with self._lock:
+            return len(self._rows)
+
+    # ==================== 溢出文件 ====================
+
+    def _spill(self):
+        """把内存缓冲写入新的溢出文件；写文件失败时保留在内存"""
+        with self._lock:
+            rows = list(self._rows.values())
+            self._rows = {}
+        if not rows:
+            return
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            fd, path = tempfile.mkstemp(prefix=f'{self._SPILL_PREFIX}{os.getpid()}-', suffix='.jsonl',
+                                        dir=self.spill_dir)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                for row in rows:
+                    data = {k: (v.isoformat() if k in self._DATETIME_FIELDS else v) for k, v in row.items()}
+                    f.write(json.dumps(data, ensure_ascii=False) + '\n')
+            self.spilled_count += len(rows)
+            logger.warning(f"交易记录写库暂不可用，{len(rows)} 条溢出到 {path}")
+        except Exception as e:
+            self._restore(rows)
+            logger.error(f"交易记录溢出到磁盘失败，保留在内存: {e}")
+
+    def _spill_files(self):
+        """本进程及已退出进程留下的溢出文件"""
+        files = []
+        for path in sorted(glob.glob(os.path.join(self.spill_dir, f'{self._SPILL_PREFIX}*.jsonl'))):
+            match = self._SPILL_PID.match(os.path.basename(path))
+            if not match:
+                continue
+            pid = int(match.group(1))
+            if pid == os.getpid() or not psutil.pid_exists(pid):
+                files.append(path)
+        return files
+
+    def _load_spilled(self, files):
+        rows = []
+        for path in files:
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        data = json.loads(line)
+                        for k in self._DATETIME_FIELDS:
+                            data[k] = datetime.fromisoformat(data[k])
+                        rows.append(data)
+        return rows
+
+    def _restore(self, rows):
+        with self._lock:
+            for row in rows:
+                self._rows.setdefault(tuple(row[k] for k in self.UNIQUE_KEYS), row)
+
+    def flush(self):
+        """写出缓冲区和溢出文件，返回提交的行数"""
+        with self._flush_lock:
+            with self._lock:
+                rows = list(self._rows.values())
+                self._rows = {}
+            files = self._spill_files()
+            try:
+                spilled = self._load_spilled(files)
+            except Exception as e:
+                logger.error(f"读取交易记录溢出文件失败: {e}")
+                files, spilled = [], []
+            if not rows and not spilled:
+                return 0
+            session = TradeRecordService._get_session()
+            try:
+                bulk_insert_ignore(session, TradeRecord, spilled + rows, conflict_columns=self.UNIQUE_KEYS)
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                self._retry_at = time.monotonic() + self.retry_interval
+                self._restore(rows)
+                logger.warning(f"保存交易记录失败({len(spilled) + len(rows)} 条)，{self.retry_interval}s 后重试: {e}")
+                if self.pending() >= self.max_rows:
+                    self._spill()
+                return 0
+            finally:
+                session.close()
+            for path in files:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._retry_at = 0.0
+            count = len(spilled) + len(rows)
+            self.saved_count += count
+            logger.debug(f"批量写入交易记录 {count} 条")
+            return count
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def start(self):
+        if self._thread is None and self.flush_interval > 0:
+            self._thread = threading.Thread(target=self._run, name='trade-record-flush', daemon=True)
+            self._thread.start()
+        atexit.register(self.close)
+        return self
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        atexit.unregister(self.close)
+        self.flush()
+
+
 class TradeRecordService:
     """交易记录服务"""
 
@@ -25,30 +212,42 @@ class TradeRecordService:
         )
         return db_client.get_session()
 
+    _buffer = None
+    _buffer_lock = threading.Lock()
+
+    @staticmethod
+    def get_buffer():
+        """进程内共享的交易信号缓冲（实盘模式定时写库，回测模式在回测结束时写库）"""
+        if TradeRecordService._buffer is None:
+            with TradeRecordService._buffer_lock:
+                if TradeRecordService._buffer is None:
+                    from pytrading.utils import is_live_mode
+                    interval = config.trade_record_flush_interval if is_live_mode() else 0
+                    TradeRecordService._buffer = TradeRecordBuffer(flush_interval=interval).start()
+        return TradeRecordService._buffer
+
     @staticmethod
     def save_trade_record(task_id, symbol, action, target_percent, price, volume, signal_type, bar_time):
-        """保存交易信号记录"""
+        """记录交易信号（只写入内存缓冲，不在策略循环中访问数据库）"""
         if not config.save_db or not task_id:
             return
-        session = TradeRecordService._get_session()
-        try:
-            record = TradeRecord(
-                task_id=task_id,
-                symbol=symbol,
-                action=action,
-                target_percent=target_percent,
-                price=price,
-                volume=volume,
-                signal_type=signal_type,
-                bar_time=bar_time if isinstance(bar_time, datetime) else datetime.strptime(str(bar_time), '%Y-%m-%d %H:%M:%S'),
-            )
-            session.merge(record)
-            session.commit()
-        except Exception as e:
-            session.rollback()
-            logger.warning(f"保存交易记录失败: {e}")
-        finally:
-            session.close()
+        TradeRecordService.get_buffer().add(
+            task_id=task_id,
+            symbol=symbol,
+            action=action,
+            target_percent=target_percent,
+            price=price,
+            volume=volume,
+            signal_type=signal_type,
+            bar_time=bar_time,
+        )
+
+    @staticmethod
+    def flush_trade_records():
+        """把缓冲的交易信号写入数据库"""
+        if TradeRecordService._buffer is None:
+            return 0
+        return TradeRecordService._buffer.flush()
 
     @staticmethod
     def get_trade_records(task_id, symbol=None):
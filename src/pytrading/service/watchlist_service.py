@@ -9,6 +9,7 @@ from datetime import datetime
 from typing import List, Optional, Dict, Any
 from collections import defaultdict
 
+from sqlalchemy import and_, func
 from sqlalchemy.orm import Session
 
 from pytrading.config.settings import config
@@ -127,67 +128,79 @@ class WatchlistService:
         """
         session = cls._get_session()
         try:
-            query = session.query(WatchlistItem)
+            base = session.query(WatchlistItem)
 
             # 筛选
             if watch_type:
-                query = query.filter(WatchlistItem.watch_type == watch_type)
+                base = base.filter(WatchlistItem.watch_type == watch_type)
 
             # 统计有变化的条数
-            type_changed_count = query.filter(WatchlistItem.type_changed == True).count()
+            type_changed_count = base.filter(WatchlistItem.type_changed == True).count()
+
+            # 每个条目最近一次回测任务中的结果（同一任务同一股票取最新一行）
+            latest = session.query(
+                func.max(BackTestResult.id).label("result_id"),
+                BackTestResult.task_id,
+                BackTestResult.symbol,
+            ).filter(
+                BackTestResult.task_id.in_(
+                    session.query(WatchlistItem.last_backtest_task_id).filter(
+                        WatchlistItem.last_backtest_task_id.isnot(None))
+                )
+            ).group_by(BackTestResult.task_id, BackTestResult.symbol).subquery()
+
+            # 条目 + 回测指标 + 策略名称一次查询
+            query = base.outerjoin(latest, and_(
+                latest.c.task_id == WatchlistItem.last_backtest_task_id,
+                latest.c.symbol == WatchlistItem.symbol,
+            )).outerjoin(
+                BackTestResult, BackTestResult.id == latest.c.result_id
+            ).outerjoin(
+                Strategy, Strategy.id == WatchlistItem.strategy_id
+            ).add_columns(
+                Strategy.name.label("strategy_name"),
+                BackTestResult.pnl_ratio,
+                BackTestResult.sharp_ratio,
+                BackTestResult.max_drawdown,
+                BackTestResult.win_ratio,
+                BackTestResult.current_price,
+                BackTestResult.backtest_start_time,
+                BackTestResult.backtest_end_time,
+            )
 
-            # 回测指标字段需要从 BackTestResult JOIN 获取，不支持直接排序
-            # 对于指标排序，先获取全部数据再在 Python 中排序
+            # 排序全部在数据库完成：type_changed=True 置顶；指标为空的条目排在最后
             metrics_sort_fields = {"pnl_ratio", "sharp_ratio", "max_drawdown", "win_ratio"}
+            if sort_by in metrics_sort_fields:
+                sort_column = getattr(BackTestResult, sort_by)
+            else:
+                sort_column = WatchlistItem.__table__.c.get(sort_by, WatchlistItem.created_at)
+            ordered = sort_column.desc() if sort_order == "desc" else sort_column.asc()
+            query = query.order_by(WatchlistItem.type_changed.desc(), sort_column.is_(None), ordered,
+                                   WatchlistItem.id.desc())
 
-            if sort_by not in metrics_sort_fields:
-                # 非指标字段直接在数据库排序
-                sort_column = getattr(WatchlistItem, sort_by, WatchlistItem.created_at)
-                if sort_order == "desc":
-                    query = query.order_by(WatchlistItem.type_changed.desc(), sort_column.desc())
-                else:
-                    query = query.order_by(WatchlistItem.type_changed.desc(), sort_column.asc())
-
-            items = query.all()
-            total = len(items)
+            def _float(value):
+                return float(value) if value else None
 
-            # JOIN BackTestResult 获取指标数据
             result_data = []
-            for item in items:
-                backtest = None
-                if item.last_backtest_task_id:
-                    backtest = session.query(BackTestResult).filter(
-                        BackTestResult.task_id == item.last_backtest_task_id,
-                        BackTestResult.symbol == item.symbol,
-                    ).first()
-
+            for row in query.all():
+                item = row[0]
                 result_data.append({
                     "item": item,
-                    "pnl_ratio": float(backtest.pnl_ratio) if backtest and backtest.pnl_ratio else None,
-                    "sharp_ratio": float(backtest.sharp_ratio) if backtest and backtest.sharp_ratio else None,
-                    "max_drawdown": float(backtest.max_drawdown) if backtest and backtest.max_drawdown else None,
-                    "win_ratio": float(backtest.win_ratio) if backtest and backtest.win_ratio else None,
-                    "current_price": float(backtest.current_price) if backtest and backtest.current_price else None,
+                    "strategy_name": row.strategy_name,
+                    "pnl_ratio": _float(row.pnl_ratio),
+                    "sharp_ratio": _float(row.sharp_ratio),
+                    "max_drawdown": _float(row.max_drawdown),
+                    "win_ratio": _float(row.win_ratio),
+                    "current_price": _float(row.current_price),
                     "last_backtest_task_id": item.last_backtest_task_id,
-                    "last_backtest_time": backtest.backtest_end_time if backtest else None,
-                    "backtest_start_time": backtest.backtest_start_time if backtest else None,
-                    "backtest_end_time": backtest.backtest_end_time if backtest else None,
+                    "last_backtest_time": row.backtest_end_time,
+                    "backtest_start_time": row.backtest_start_time,
+                    "backtest_end_time": row.backtest_end_time,
                 })
 
-            # 对于指标排序，在 Python 中排序
-            if sort_by in metrics_sort_fields:
-                reverse = sort_order == "desc"
-                result_data.sort(
-                    key=lambda x: (
-                        not (x["item"].type_changed or False),  # type_changed=True 置顶
-                        x[sort_by] if x[sort_by] is not None else float('-inf') if reverse else float('inf'),
-                    ),
-                    reverse=reverse,
-                )
-
             return {
                 "data": result_data,
-                "total": total,
+                "total": len(result_data),
                 "type_changed_count": type_changed_count,
             }
         finally:
@@ -279,21 +292,7 @@ class WatchlistService:
                 has_close_signal=has_close_signal,
             )
 
-            # 检测关注类型变化
-            if new_watch_type.participates_in_change_detection():
-                current_watch_type = WatchType(item.watch_type)
-                if current_watch_type != new_watch_type and current_watch_type != WatchType.NO_STATE:
-                    # 记录变化
-                    item.previous_watch_type = item.watch_type
-                    item.watch_type = new_watch_type.value
-                    item.type_changed = True
-                    item.type_changed_at = datetime.now()
-                elif current_watch_type == WatchType.NO_STATE:
-                    # 从无状态变为有效状态
-                    item.watch_type = new_watch_type.value
-            else:
-                # "无状态"不参与变化，但更新显示值
-                item.watch_type = new_watch_type.value
+            cls._apply_watch_type(item, new_watch_type)
 
             session.commit()
             session.refresh(item)
@@ -304,6 +303,89 @@ class WatchlistService:
         finally:
             session.close()
 
+    @staticmethod
+    def _apply_watch_type(item: WatchlistItem, new_watch_type: WatchType) -> None:
+        """按新的关注类型更新条目，并检测关注类型变化"""
+        if new_watch_type.participates_in_change_detection():
+            current_watch_type = WatchType(item.watch_type)
+            if current_watch_type != new_watch_type and current_watch_type != WatchType.NO_STATE:
+                # 记录变化
+                item.previous_watch_type = item.watch_type
+                item.watch_type = new_watch_type.value
+                item.type_changed = True
+                item.type_changed_at = datetime.now()
+            elif current_watch_type == WatchType.NO_STATE:
+                # 从无状态变为有效状态
+                item.watch_type = new_watch_type.value
+        else:
+            # "无状态"不参与变化，但更新显示值
+            item.watch_type = new_watch_type.value
+
+    @classmethod
+    def update_metrics_bulk(cls, task_id: str) -> int:
+        """回测任务完成后批量更新该任务涉及的全部关注条目
+
+        与逐条调用 update_metrics 结果相同：一次查询取出 (条目, 结果趋势类型)，
+        一次查询取出各股票最后一根K线上的交易动作，在同一事务中提交。
+
+        Args:
+            task_id: 回测任务ID
+
+        Returns:
+            int: 更新的条目数
+        """
+        session = cls._get_session()
+        try:
+            # 该任务每只股票的最新结果
+            latest = session.query(
+                func.max(BackTestResult.id).label("result_id"),
+                BackTestResult.symbol,
+            ).filter(BackTestResult.task_id == task_id).group_by(BackTestResult.symbol).subquery()
+
+            rows = session.query(WatchlistItem, BackTestResult.trending_type).join(
+                BacktestTask, and_(BacktestTask.task_id == task_id,
+                                   BacktestTask.strategy_id == WatchlistItem.strategy_id)
+            ).join(
+                latest, latest.c.symbol == WatchlistItem.symbol
+            ).join(
+                BackTestResult, BackTestResult.id == latest.c.result_id
+            ).all()
+            if not rows:
+                return 0
+
+            # 各股票最后一根K线上是否有清仓信号
+            symbols = [item.symbol for item, _ in rows]
+            last_bar = session.query(
+                TradeRecord.symbol,
+                func.max(TradeRecord.bar_time).label("bar_time"),
+            ).filter(
+                TradeRecord.task_id == task_id,
+                TradeRecord.symbol.in_(symbols),
+            ).group_by(TradeRecord.symbol).subquery()
+            close_symbols = {symbol for (symbol,) in session.query(TradeRecord.symbol).join(
+                last_bar, and_(last_bar.c.symbol == TradeRecord.symbol, last_bar.c.bar_time == TradeRecord.bar_time)
+            ).filter(
+                TradeRecord.task_id == task_id,
+                TradeRecord.action == "close",
+            ).all()}
+
+            for item, trending_type in rows:
+                item.last_backtest_task_id = task_id
+                new_watch_type = WatchType.from_trending_type(
+                    trending_type,
+                    has_close_signal=item.symbol in close_symbols,
+                )
+                cls._apply_watch_type(item, new_watch_type)
+
+            session.commit()
+            logger.info(f"关注列表指标已批量更新: task_id={task_id}, 条目数={len(rows)}")
+            return len(rows)
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
     @classmethod
     def mark_as_read(cls, item_id: int) -> Optional[WatchlistItem]:
         """标记关注类型变化为已读
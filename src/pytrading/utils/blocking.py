@@ -0,0 +1,275 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@Description    ：阻塞调用隔离 - 掘金/AkShare 等同步上游按上游划分独立线程池（并发上限 + 超时），并监控事件循环卡顿
+@Author  ：EEric
+@Date    ：2026-10-19
+"""
+import asyncio
+import functools
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from pytrading.config import config
+from pytrading.logger import logger
+
+
+class UpstreamUnavailable(Exception):
+    """上游暂不可用（接口层据 status_code 返回 503/504）"""
+    status_code = 503
+
+
+class UpstreamBusy(UpstreamUnavailable):
+    """排队已满，直接拒绝而不是继续堆积"""
+    status_code = 503
+
+
+class UpstreamTimeout(UpstreamUnavailable):
+    """调用超时"""
+    status_code = 504
+
+
+class UpstreamExecutor:
+    """单个上游的有界线程池
+
+    workers 为并发上限，排队数超过 max_pending 时立即拒绝；超时后仍在排队的调用被取消，
+    已在执行的线程无法中断，结束后才释放名额，因此排队上限同时限制了被超时调用占住的线程数。
+    """
+
+    def __init__(self, name: str, workers: int, timeout: float, max_pending: int):
+        self.name = name
+        self.workers = max(1, int(workers))
+        self.timeout = timeout
+        self.max_pending = max(0, int(max_pending))
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=f'upstream-{name}')
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._calls = 0
+        self._errors = 0
+        self._timeouts = 0
+        self._rejected = 0
+        self._max_ms = 0.0
+
+    def _release(self, _future):
+        with self._lock:
+            self._in_flight -= 1
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        with self._lock:
+            if self._in_flight >= self.workers + self.max_pending:
+                self._rejected += 1
+                raise UpstreamBusy(f"{self.name} 上游调用繁忙（进行中 {self._in_flight}）")
+            self._in_flight += 1
+            self._calls += 1
+
+        started = time.monotonic()
+        try:
+            future = self._executor.submit(functools.partial(fn, *args, **kwargs))
+        except RuntimeError:
+            self._release(None)
+            raise UpstreamBusy(f"{self.name} 上游线程池已关闭")
+        future.add_done_callback(self._release)
+
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout if self.timeout > 0 else None)
+        except asyncio.TimeoutError:
+            future.cancel()
+            with self._lock:
+                self._timeouts += 1
+            logger.warning(f"上游调用超时: {self.name} {getattr(fn, '__name__', fn)} 超过 {self.timeout}s")
+            raise UpstreamTimeout(f"{self.name} 上游调用超时（{self.timeout}s）") from None
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception:
+            with self._lock:
+                self._errors += 1
+            raise
+        finally:
+            elapsed_ms = (time.monotonic() - started) * 1000
+            with self._lock:
+                self._max_ms = max(self._max_ms, elapsed_ms)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "timeout": self.timeout,
+                "max_pending": self.max_pending,
+                "in_flight": self._in_flight,
+                "calls": self._calls,
+                "errors": self._errors,
+                "timeouts": self._timeouts,
+                "rejected": self._rejected,
+                "max_ms": round(self._max_ms, 1),
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_executors: Dict[str, UpstreamExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def get_upstream_executor(upstream: str) -> UpstreamExecutor:
+    """获取上游对应的进程级线程池
+
+    Args:
+        upstream: 上游名称，'gm' / 'akshare' / 'kline'，配置项为 {upstream}_executor_workers、{upstream}_call_timeout
+    """
+    with _executors_lock:
+        executor = _executors.get(upstream)
+        if executor is None:
+            executor = UpstreamExecutor(
+                upstream,
+                workers=config.get(f'{upstream}_executor_workers', 2),
+                timeout=config.get(f'{upstream}_call_timeout', 30),
+                max_pending=config.upstream_max_pending,
+            )
+            _executors[upstream] = executor
+        return executor
+
+
+async def run_upstream(upstream: str, fn: Callable, *args, **kwargs) -> Any:
+    """在上游专用线程池中执行同步调用，超时抛 UpstreamTimeout，排队已满抛 UpstreamBusy"""
+    return await get_upstream_executor(upstream).run(fn, *args, **kwargs)
+
+
+def upstream_stats() -> Dict[str, Dict[str, Any]]:
+    with _executors_lock:
+        executors = list(_executors.values())
+    return {executor.name: executor.stats() for executor in executors}
+
+
+def shutdown_upstream_executors():
+    with _executors_lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown()
+
+
+class LoopLagMonitor:
+    """事件循环卡顿监控
+
+    协程每 interval 秒醒来一次，实际醒来时间比预期晚的部分即为卡顿时长；同时由一个看门狗线程
+    在卡顿期间抓取事件循环线程的调用栈，卡顿结束后与时长一起记录日志，便于定位是哪个同步调用。
+    """
+
+    STACK_LIMIT = 8
+
+    def __init__(self, interval: Optional[float] = None, threshold_ms: Optional[float] = None):
+        self.interval = config.loop_lag_interval if interval is None else interval
+        self.threshold_ms = config.loop_lag_threshold_ms if threshold_ms is None else threshold_ms
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._loop_thread_id: Optional[int] = None
+        self._last_tick = time.monotonic()
+        self._stall_stack: Optional[list] = None
+        self._lock = threading.Lock()
+        self._samples = 0
+        self._stalls = 0
+        self._max_lag_ms = 0.0
+        self._last_lag_ms = 0.0
+        self._recent = deque(maxlen=20)
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold_ms > 0 and self.interval > 0
+
+    def start(self):
+        """在事件循环中调用"""
+        if not self.enabled or self._task is not None:
+            return
+        self._stop.clear()
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        self._watchdog = threading.Thread(target=self._watch, name='loop-lag-watchdog', daemon=True)
+        self._watchdog.start()
+        logger.info(f"事件循环卡顿监控已启动（阈值 {self.threshold_ms}ms）")
+
+    async def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=self.interval * 2)
+            self._watchdog = None
+
+    async def _run(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._last_tick = now
+            self._record((now - expected) * 1000)
+
+    def _record(self, lag_ms: float):
+        lag_ms = max(0.0, lag_ms)
+        with self._lock:
+            self._samples += 1
+            self._last_lag_ms = lag_ms
+            self._max_lag_ms = max(self._max_lag_ms, lag_ms)
+            stack, self._stall_stack = self._stall_stack, None
+            if lag_ms < self.threshold_ms:
+                return
+            self._stalls += 1
+            self._recent.append({
+                "time": time.strftime('%Y-%m-%d %H:%M:%S'),
+                "lag_ms": round(lag_ms, 1),
+                "stack": stack or [],
+            })
+        where = f"，卡顿时位于: {' <- '.join(reversed(stack))}" if stack else ""
+        logger.warning(f"事件循环卡顿 {lag_ms:.0f}ms{where}")
+
+    def _watch(self):
+        """卡顿进行中（超过预期醒来时间 + 阈值仍未醒来）时抓取事件循环线程的调用栈，每次卡顿只抓一次"""
+        deadline = self.interval + self.threshold_ms / 1000
+        while not self._stop.wait(min(self.interval, self.threshold_ms / 1000)):
+            if time.monotonic() - self._last_tick < deadline or self._stall_stack is not None:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            summary = traceback.extract_stack(frame, limit=self.STACK_LIMIT)
+            with self._lock:
+                self._stall_stack = [f"{entry.name} ({entry.filename.rsplit('/', 1)[-1]}:{entry.lineno})"
+                                     for entry in summary]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "running": self._task is not None,
+                "interval": self.interval,
+                "threshold_ms": self.threshold_ms,
+                "samples": self._samples,
+                "stalls": self._stalls,
+                "max_lag_ms": round(self._max_lag_ms, 1),
+                "last_lag_ms": round(self._last_lag_ms, 1),
+                "recent": list(self._recent),
+            }
+
+
+_monitor: Optional[LoopLagMonitor] = None
+
+
+def get_loop_lag_monitor() -> LoopLagMonitor:
+    """进程级卡顿监控实例"""
+    global _monitor
+    if _monitor is None:
+        _monitor = LoopLagMonitor()
+    return _monitor
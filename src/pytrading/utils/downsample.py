@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@Description    ：时间序列降采样 - LTTB (Largest-Triangle-Three-Buckets)
+@Author  ：EEric
+@Date    ：2026-10-19
+"""
+import numpy as np
+
+
+def lttb_indices(y, threshold: int) -> np.ndarray:
+    """LTTB 降采样，返回保留点的下标（升序，始终包含首尾两点）
+
+    以序号作为横轴，在每个桶中选取与前一选中点、下一桶均值构成三角形面积最大的点，
+    能在大幅减少点数的同时保留走势的峰谷形态。
+
+    Args:
+        y: 数值序列（如收盘价），NaN 按 0 处理
+        threshold: 目标点数，小于 3 或不小于序列长度时不降采样
+
+    Returns:
+        np.ndarray: 保留点的下标
+    """
+    y = np.nan_to_num(np.asarray(y, dtype=float))
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.arange(n, dtype=float)
+    # 首尾点单独保留，中间 n-2 个点均分为 threshold-2 个桶
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+
+    indices = np.empty(threshold, dtype=int)
+    indices[0] = 0
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # 下一个桶的均值点（最后一个桶用末尾点）
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], edges[i + 2]
+            avg_x = x[next_start:next_end].mean()
+            avg_y = y[next_start:next_end].mean()
+        else:
+            avg_x, avg_y = x[n - 1], y[n - 1]
+
+        bx, by = x[start:end], y[start:end]
+        area = np.abs((x[a] - avg_x) * (by - y[a]) - (x[a] - bx) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        indices[i + 1] = a
+    indices[-1] = n - 1
+    return indices
@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@Description    ：掘金数据客户端 - 每个 token 一组常驻工作进程，查询不再切换进程级全局 token
+@Author  ：EEric
+@Date    ：2026-10-19
+"""
+import importlib
+import multiprocessing
+import os
+import threading
+import weakref
+from concurrent.futures import CancelledError, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional
+
+from pytrading.config import config
+from pytrading.logger import logger
+from pytrading.utils.blocking import UpstreamTimeout, UpstreamUnavailable
+
+# 工作进程内的上游模块与 token（由 _init_worker 设置）
+_worker_module = None
+_worker_token: Optional[str] = None
+
+
+def _init_worker(module_name: str, token: str):
+    """工作进程启动时设置一次 token，此后该进程只服务这一个 token"""
+    global _worker_module, _worker_token
+    _worker_module = importlib.import_module(module_name)
+    _worker_token = token
+    set_token = getattr(_worker_module, 'set_token', None)
+    if set_token is not None:
+        set_token(token)
+
+
+def _worker_call(func_name: str, args: tuple, kwargs: dict) -> Any:
+    return getattr(_worker_module, func_name)(*args, **kwargs)
+
+
+def _worker_info() -> Dict[str, Any]:
+    return {"pid": os.getpid(), "token": _worker_token}
+
+
+class GMDataClient:
+    """绑定单个 token 的掘金数据客户端
+
+    掘金 SDK 的 token 是进程级全局状态，同一进程内切换 token 会与并发查询相互覆盖。这里为每个
+    token 维护一组常驻工作进程（spawn 启动，避免 fork 带入 API 进程的线程和连接），进程启动时
+    set_token 一次并复用与掘金终端的连接；调用方进程的 token 和 config 均不受影响。
+    """
+
+    def __init__(self, token: str, workers: Optional[int] = None, timeout: Optional[float] = None,
+                 module: str = 'gm.api'):
+        self.token = token
+        self.workers = max(1, int(config.gm_data_workers if workers is None else workers))
+        self.timeout = config.gm_call_timeout if timeout is None else timeout
+        self.module = module
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._errors = 0
+        self._restarts = 0
+        self._timeouts = 0
+        self._requeued = 0
+        # 因超时被结束的进程池，其上被连带中断的调用在新进程池上重新提交
+        self._killed_pools: "weakref.WeakSet[ProcessPoolExecutor]" = weakref.WeakSet()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker,
+                    initargs=(self.module, self.token),
+                )
+            return self._pool
+
+    def _reset_pool(self, pool: ProcessPoolExecutor, terminate: bool = False):
+        """丢弃进程池，下次调用重建；terminate 时同时结束仍在执行任务的工作进程（shutdown 不会中断它们）"""
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+                self._restarts += 1
+            if terminate:
+                self._killed_pools.add(pool)
+        processes = list((pool._processes or {}).values()) if terminate else []
+        pool.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    def _submit(self, fn, *args) -> Any:
+        """提交到工作进程并等待结果；工作进程异常退出时重建进程池并重试一次
+
+        进程池无法只结束某一个工作进程（任一进程被结束整个池即失效），某个调用超时会结束整个进程池。
+        同一进程池上被连带中断的其他调用（BrokenProcessPool/CancelledError，或提交时池已关闭）
+        在新进程池上重新提交，不计入重试次数。
+        """
+        crashes = 0
+        while True:
+            pool = self._get_pool()
+            future = None
+            try:
+                future = pool.submit(fn, *args)
+                return future.result(timeout=self.timeout if self.timeout > 0 else None)
+            except (BrokenProcessPool, CancelledError, RuntimeError) as e:
+                interrupted = isinstance(e, (BrokenProcessPool, CancelledError)) or future is None
+                if interrupted and pool in self._killed_pools:
+                    logger.info("掘金数据进程池因其他调用超时被重建，在新进程池上重新提交")
+                    with self._lock:
+                        self._requeued += 1
+                    continue
+                if not isinstance(e, BrokenProcessPool):
+                    raise
+                crashes += 1
+                logger.warning(f"掘金数据工作进程异常退出，重建进程池（第 {crashes} 次）")
+                self._reset_pool(pool)
+                if crashes >= 2:
+                    raise UpstreamUnavailable("掘金数据工作进程不可用") from None
+            except FutureTimeoutError:
+                # 已在执行的任务无法取消，结束卡住的工作进程并重建进程池，避免占满后续调用
+                logger.warning(f"掘金数据查询超时（{self.timeout}s），重建进程池")
+                with self._lock:
+                    self._timeouts += 1
+                self._reset_pool(pool, terminate=True)
+                raise UpstreamTimeout(f"掘金数据查询超时（{self.timeout}s）") from None
+
+    def call(self, func_name: str, *args, **kwargs) -> Any:
+        """在工作进程中调用 gm.api.<func_name>(*args, **kwargs)，参数和返回值需可 pickle"""
+        with self._lock:
+            self._calls += 1
+        try:
+            return self._submit(_worker_call, func_name, args, kwargs)
+        except Exception:
+            with self._lock:
+                self._errors += 1
+            raise
+
+    def get_instruments(self, **kwargs):
+        return self.call('get_instruments', **kwargs)
+
+    def get_constituents(self, **kwargs):
+        return self.call('get_constituents', **kwargs)
+
+    def worker_info(self) -> Dict[str, Any]:
+        return self._submit(_worker_info)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "started": self._pool is not None,
+                "calls": self._calls,
+                "errors": self._errors,
+                "restarts": self._restarts,
+                "timeouts": self._timeouts,
+                "requeued": self._requeued,
+            }
+
+    def close(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+_clients: Dict[str, GMDataClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_gm_data_client(token: Optional[str] = None) -> GMDataClient:
+    """按 token 获取进程级共享的数据客户端，默认使用回测 token（实盘 token 没有数据查询权限）"""
+    token = token or config.backtest_trading_token
+    with _clients_lock:
+        client = _clients.get(token)
+        if client is None:
+            client = GMDataClient(token)
+            _clients[token] = client
+        return client
+
+
+def gm_client_stats() -> Dict[str, Dict[str, Any]]:
+    """各客户端统计（token 只保留末 4 位）"""
+    with _clients_lock:
+        clients = list(_clients.items())
+    return {f"***{(token or '')[-4:]}": client.stats() for token, client in clients}
+
+
+def close_gm_data_clients():
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        client.close()
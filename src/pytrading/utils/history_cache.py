@@ -0,0 +1,319 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@Description    ：掘金 history 磁盘缓存 - 按股票/周期缓存已拉取的日期区间
+@Author  ：EEric
+@Date    ：2026-10-19
+"""
+import os
+import re
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from pytrading.config import config
+from pytrading.logger import logger
+from pytrading.utils.rate_limiter import get_rate_limiter
+
+
+class HistoryCache:
+    """掘金 history 的读穿缓存
+
+    每个 (symbol, frequency, adjust) 一个 pickle 文件，记录已覆盖的日期区间和K线：
+    1. 请求区间完全被覆盖时直接从本地返回
+    2. 否则只向上游请求未覆盖的子区间，合并后落盘
+    3. 已收盘的日期视为不可变；当日（及之后）的数据只缓存 today_ttl 秒
+    4. 上游返回空结果的区间（可能是停牌，也可能是上游临时故障）只缓存 empty_ttl 秒，
+       整段都是周末时视为确定无交易，永久记为已覆盖
+
+    目前只缓存日线（'1d'），其他周期和多股票请求直接透传。
+    """
+
+    CACHED_FREQUENCIES = ('1d',)
+    # 透传给上游但不影响缓存内容的参数
+    PASSTHROUGH_KWARGS = ('skip_suspended', 'fill_missing')
+
+    def __init__(self, cache_dir: str, today_ttl: int = 300, empty_ttl: int = 3600):
+        self.cache_dir = cache_dir
+        self.today_ttl = today_ttl
+        self.empty_ttl = empty_ttl
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "requests": 0,
+            "hits": 0,
+            "partial_hits": 0,
+            "misses": 0,
+            "bypassed": 0,
+            "upstream_calls": 0,
+            "rows_from_cache": 0,
+            "rows_from_upstream": 0,
+            "bytes_saved": 0,
+        }
+
+    # ==================== 上游 ====================
+
+    @staticmethod
+    def _upstream(symbol: str, frequency: str, start_time: str, end_time: str, fields: Optional[str],
+                  adjust=None, df: bool = True, **kwargs):
+        """调用掘金 history（受 gm 限流约束）"""
+        from gm.api import history
+        get_rate_limiter('gm').acquire()
+        if adjust is not None:
+            kwargs['adjust'] = adjust
+        return history(symbol=symbol, frequency=frequency, start_time=start_time, end_time=end_time,
+                       fields=fields, df=df, **kwargs)
+
+    # ==================== 存储 ====================
+
+    def _path(self, symbol: str, frequency: str, adjust) -> str:
+        name = re.sub(r'[^0-9A-Za-z._-]', '_', f"{symbol}_{frequency}_{adjust}")
+        return os.path.join(self.cache_dir, f"{name}.pkl")
+
+    def _lock_for(self, path: str) -> threading.Lock:
+        with self._locks_lock:
+            return self._locks.setdefault(path, threading.Lock())
+
+    @staticmethod
+    def _empty_entry() -> dict:
+        return {"columns": set(), "ranges": [], "empty_ranges": [], "today": None, "today_fetched_at": 0.0,
+                "frame": pd.DataFrame()}
+
+    def _load(self, path: str) -> dict:
+        if not os.path.exists(path):
+            return self._empty_entry()
+        try:
+            entry = pd.read_pickle(path)
+            entry.setdefault("empty_ranges", [])
+            return entry
+        except Exception as e:
+            logger.warning(f"行情缓存文件损坏，已忽略: {path}, error: {e}")
+            return self._empty_entry()
+
+    def _save(self, path: str, entry: dict):
+        """先写临时文件再替换，避免多进程读到半个文件"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        pd.to_pickle(entry, tmp_path)
+        os.replace(tmp_path, path)
+
+    # ==================== 区间计算 ====================
+
+    @staticmethod
+    def _parse_date(value) -> date:
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        return datetime.strptime(str(value)[:10], '%Y-%m-%d').date()
+
+    @staticmethod
+    def _bar_dates(frame: pd.DataFrame) -> pd.Series:
+        if frame.empty or 'eob' not in frame.columns:
+            return pd.Series([], dtype=object)
+        return pd.to_datetime(frame['eob']).dt.date
+
+    @staticmethod
+    def _merge_ranges(ranges: List[Tuple[date, date]]) -> List[Tuple[date, date]]:
+        """合并重叠或相邻的日期区间"""
+        merged = []
+        for start, end in sorted(ranges):
+            if merged and start <= merged[-1][1] + timedelta(days=1):
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        return merged
+
+    @staticmethod
+    def _has_weekday(start: date, end: date) -> bool:
+        """区间内是否有工作日（连续 3 天必含工作日）"""
+        return any((start + timedelta(days=i)).weekday() < 5 for i in range(min((end - start).days + 1, 3)))
+
+    def _fresh_empty_ranges(self, entry: dict) -> List[Tuple[date, date]]:
+        now = time.time()
+        return [(r_start, r_end) for r_start, r_end, fetched_at in entry["empty_ranges"]
+                if now - fetched_at < self.empty_ttl]
+
+    def _missing(self, entry: dict, start: date, end: date, today: date) -> List[Tuple[date, date]]:
+        """计算 [start, end] 中未被缓存覆盖的子区间"""
+        missing = []
+        cursor = start
+        closed_end = min(end, today - timedelta(days=1))
+        covered = self._merge_ranges(entry["ranges"] + self._fresh_empty_ranges(entry))
+        for r_start, r_end in covered:
+            if cursor > closed_end:
+                break
+            if r_end < cursor:
+                continue
+            if r_start > cursor:
+                missing.append((cursor, min(r_start - timedelta(days=1), closed_end)))
+            cursor = max(cursor, r_end + timedelta(days=1))
+        if cursor <= closed_end:
+            missing.append((cursor, closed_end))
+
+        # 当日及之后的数据按 TTL 判断是否有效
+        if end >= today:
+            fresh = entry["today"] == today and time.time() - entry["today_fetched_at"] < self.today_ttl
+            if not fresh:
+                today_start = max(start, today)
+                if missing and missing[-1][1] + timedelta(days=1) >= today_start:
+                    missing[-1] = (missing[-1][0], end)
+                else:
+                    missing.append((today_start, end))
+        return missing
+
+    # ==================== 读取 ====================
+
+    def _bypass(self, **kwargs):
+        with self._stats_lock:
+            self._stats["requests"] += 1
+            self._stats["bypassed"] += 1
+            self._stats["upstream_calls"] += 1
+        return self._upstream(**kwargs)
+
+    def history(self, symbol: str, frequency: str, start_time, end_time, fields: Optional[str] = None,
+                adjust=None, df: bool = False, **kwargs):
+        """与 gm.api.history 参数兼容的缓存读取"""
+        extra = set(kwargs) - set(self.PASSTHROUGH_KWARGS)
+        if frequency not in self.CACHED_FREQUENCIES or ',' in symbol or extra:
+            return self._bypass(symbol=symbol, frequency=frequency, start_time=start_time, end_time=end_time,
+                                fields=fields, adjust=adjust, df=df, **kwargs)
+
+        start, end = self._parse_date(start_time), self._parse_date(end_time)
+        requested = [f.strip() for f in fields.split(',') if f.strip()] if fields else None
+        path = self._path(symbol, frequency, adjust)
+
+        with self._lock_for(path):
+            entry = self._load(path)
+            # 缓存中缺少请求的字段时整个文件失效，按字段并集重新拉取
+            if requested and not set(requested) <= entry["columns"]:
+                columns = entry["columns"] | set(requested)
+                entry = self._empty_entry()
+                entry["columns"] = columns
+            fetch_fields = ','.join(sorted(entry["columns"] | {'symbol', 'eob'})) if entry["columns"] else None
+
+            today = datetime.now().date()
+            missing = self._missing(entry, start, end, today)
+            fetched = []
+            for gap_start, gap_end in missing:
+                bars = self._upstream(symbol=symbol, frequency=frequency,
+                                      start_time=gap_start.strftime('%Y-%m-%d 00:00:00'),
+                                      end_time=gap_end.strftime('%Y-%m-%d 23:59:59'),
+                                      fields=fetch_fields, adjust=adjust, df=True, **kwargs)
+                has_bars = bars is not None and not bars.empty
+                if has_bars:
+                    fetched.append(bars)
+                if gap_start < today:
+                    closed = (gap_start, min(gap_end, today - timedelta(days=1)))
+                    if has_bars or not self._has_weekday(*closed):
+                        entry["ranges"].append(closed)
+                    else:
+                        # 空结果无法区分停牌和上游临时故障，只短期缓存
+                        entry["empty_ranges"].append(closed + (time.time(),))
+                if gap_end >= today:
+                    entry["today"] = today
+                    entry["today_fetched_at"] = time.time()
+
+            if missing:
+                if fetched:
+                    frames = [f for f in [entry["frame"]] + fetched if not f.empty]
+                    frame = pd.concat(frames, ignore_index=True)
+                    frame = frame.drop_duplicates(subset='eob', keep='last').sort_values('eob')
+                    entry["frame"] = frame.reset_index(drop=True)
+                    if not entry["columns"]:
+                        entry["columns"] = set(entry["frame"].columns)
+                entry["ranges"] = self._merge_ranges(entry["ranges"])
+                now = time.time()
+                entry["empty_ranges"] = [r for r in entry["empty_ranges"] if now - r[2] < self.empty_ttl]
+                try:
+                    self._save(path, entry)
+                except Exception as e:
+                    logger.warning(f"行情缓存写入失败: {path}, error: {e}")
+
+        frame = entry["frame"]
+        dates = self._bar_dates(frame)
+        result = frame[((dates >= start) & (dates <= end)).values] if not frame.empty else frame
+        if requested and not result.empty:
+            result = result[[c for c in requested if c in result.columns]]
+        result = result.reset_index(drop=True)
+
+        self._record(result, missing, start, end)
+        return result if df else result.to_dict('records')
+
+    def _record(self, result: pd.DataFrame, missing: List[Tuple[date, date]], start: date, end: date):
+        """累计命中率和节省的传输量"""
+        if result.empty:
+            local = result
+        else:
+            dates = self._bar_dates(result)
+            in_gap = pd.Series(False, index=result.index)
+            for gap_start, gap_end in missing:
+                in_gap |= ((dates >= gap_start) & (dates <= gap_end)).values
+            local = result[~in_gap.values]
+
+        with self._stats_lock:
+            self._stats["requests"] += 1
+            self._stats["upstream_calls"] += len(missing)
+            if not missing:
+                self._stats["hits"] += 1
+            elif missing == [(start, end)]:
+                self._stats["misses"] += 1
+            else:
+                self._stats["partial_hits"] += 1
+            self._stats["rows_from_cache"] += len(local)
+            self._stats["rows_from_upstream"] += len(result) - len(local)
+            if not local.empty:
+                self._stats["bytes_saved"] += int(local.memory_usage(index=False, deep=True).sum())
+
+    # ==================== 统计 ====================
+
+    def stats(self) -> dict:
+        """命中统计和磁盘占用"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        cached = stats["requests"] - stats["bypassed"]
+        stats["hit_ratio"] = round(stats["hits"] / cached, 4) if cached else None
+        files, size = 0, 0
+        if os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                if name.endswith('.pkl'):
+                    files += 1
+                    size += os.path.getsize(os.path.join(self.cache_dir, name))
+        stats.update({"cache_dir": self.cache_dir, "files": files, "disk_bytes": size})
+        return stats
+
+    def clear(self, symbol: Optional[str] = None):
+        """清空缓存文件（可指定股票）"""
+        if not os.path.isdir(self.cache_dir):
+            return
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.pkl') and (symbol is None or name.startswith(f"{symbol}_")):
+                os.remove(os.path.join(self.cache_dir, name))
+
+
+_history_cache: Optional[HistoryCache] = None
+_history_cache_lock = threading.Lock()
+
+
+def get_history_cache() -> HistoryCache:
+    """获取进程级行情缓存实例"""
+    global _history_cache
+    with _history_cache_lock:
+        if _history_cache is None:
+            _history_cache = HistoryCache(config.history_cache_dir, config.history_cache_today_ttl,
+                                          config.history_cache_empty_ttl)
+        return _history_cache
+
+
+def cached_history(symbol: str, frequency: str, start_time, end_time, fields: Optional[str] = None,
+                   adjust=None, df: bool = False, **kwargs):
+    """带磁盘缓存的 gm history，HISTORY_CACHE_ENABLED=false 时直接请求上游"""
+    if not config.history_cache_enabled:
+        return HistoryCache._upstream(symbol=symbol, frequency=frequency, start_time=start_time,
+                                      end_time=end_time, fields=fields, adjust=adjust, df=df, **kwargs)
+    return get_history_cache().history(symbol, frequency, start_time, end_time, fields=fields,
+                                       adjust=adjust, df=df, **kwargs)
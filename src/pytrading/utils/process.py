@@ -97,28 +97,24 @@ def start_process(cmd, env: dict = None, cwd: str = None):
 
 
 def wait_process(process):
+    """等待子进程结束并转发输出
+
+    一直读到 stdout EOF（子进程在首次 poll 之前就已退出时，缓冲中的输出同样会被读出），返回码取自 wait()。
+    """
     rc = 1
-    pid = int(process.pid)
-    process_name = get_process_name(pid)
     try:
-        while process.poll() is None and is_process_running(pid, process_name):
-            for line in iter(process.stdout.readline, ''):
-                if line:
-                    # 确保输出是UTF-8编码
-                    try:
-                        if isinstance(line, bytes):
-                            line = line.decode('utf-8', errors='replace')
-                        sys.stdout.write(line)
-                        sys.stdout.flush()
-                    except UnicodeDecodeError:
-                        # 如果解码失败，使用replace模式
-                        sys.stdout.write(line.encode('utf-8', errors='replace').decode('utf-8'))
-                        sys.stdout.flush()
-                
-                if process.poll() is not None and line == "":
-                    break
-            process.stdout.flush()
-            rc = 0 if process.wait() is None else process.wait()
+        for line in iter(process.stdout.readline, ''):
+            # 确保输出是UTF-8编码
+            try:
+                if isinstance(line, bytes):
+                    line = line.decode('utf-8', errors='replace')
+                sys.stdout.write(line)
+                sys.stdout.flush()
+            except UnicodeDecodeError:
+                # 如果解码失败，使用replace模式
+                sys.stdout.write(line.encode('utf-8', errors='replace').decode('utf-8'))
+                sys.stdout.flush()
+        rc = process.wait()
     except Exception as e:
         logger.exception(f"Wait process error: {e}")
         rc = 1
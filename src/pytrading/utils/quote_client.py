@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@Description    ：腾讯行情异步客户端 - 连接复用、多代码合并请求、并发拉取、短时缓存
+@Author  ：EEric
+@Date    ：2026-10-19
+"""
+import asyncio
+import re
+from typing import Dict, Iterable, List, Optional
+
+from pytrading.config.settings import config
+from pytrading.logger import logger
+from pytrading.utils.blocking import UpstreamUnavailable
+from pytrading.utils.ttl_cache import TTLCache
+
+_LINE_PATTERN = re.compile(r'v_(\w+)="([^"]*)"')
+
+
+class TencentQuoteClient:
+    """腾讯财经实时行情
+
+    qt.gtimg.cn 一次请求可查询多个代码（逗号分隔），超过 MAX_CODES_PER_REQUEST 时拆分为多个请求并发执行。
+    httpx.AsyncClient 复用连接；每个代码的行情缓存 QUOTE_CACHE_TTL 秒。
+    """
+
+    BATCH_URL = "https://qt.gtimg.cn/q="
+    MAX_CODES_PER_REQUEST = 60
+    # 返回字段（~ 分隔）：3 当前价, 31 涨跌额, 32 涨跌幅%
+    FIELD_PRICE, FIELD_CHANGE_AMOUNT, FIELD_CHANGE_PCT = 3, 31, 32
+
+    def __init__(self, timeout: Optional[float] = None, cache_ttl: Optional[float] = None,
+                 max_connections: Optional[int] = None, transport=None):
+        self.timeout = timeout if timeout is not None else config.quote_timeout
+        self.max_connections = max_connections or config.quote_max_connections
+        self._transport = transport
+        self._client = None
+        self._cache = TTLCache("quotes", config.quote_cache_ttl if cache_ttl is None else cache_ttl, maxsize=2000)
+
+    @staticmethod
+    def to_tencent_symbol(code: str) -> str:
+        """SHSE.600000 -> sh600000, SZSE.000001 -> sz000001，其他格式原样返回"""
+        if code.startswith('SHSE.'):
+            return 'sh' + code.split('.')[-1]
+        if code.startswith('SZSE.'):
+            return 'sz' + code.split('.')[-1]
+        return code
+
+    @classmethod
+    def parse_batch(cls, text: str) -> Dict[str, Dict[str, float]]:
+        """解析批量行情响应，返回 {腾讯代码: 行情}；字段不足或无法解析的代码跳过"""
+        quotes = {}
+        for symbol, body in _LINE_PATTERN.findall(text):
+            fields = body.split('~')
+            if len(fields) <= cls.FIELD_CHANGE_PCT:
+                continue
+            try:
+                quotes[symbol] = {
+                    "price": float(fields[cls.FIELD_PRICE]),
+                    "change_amount": float(fields[cls.FIELD_CHANGE_AMOUNT]),
+                    "change_pct": float(fields[cls.FIELD_CHANGE_PCT]),
+                }
+            except ValueError:
+                continue
+        return quotes
+
+    def _get_client(self):
+        if self._client is None:
+            import httpx
+            limits = httpx.Limits(max_connections=self.max_connections,
+                                  max_keepalive_connections=self.max_connections)
+            self._client = httpx.AsyncClient(timeout=self.timeout, limits=limits, transport=self._transport)
+        return self._client
+
+    async def _fetch_chunk(self, symbols: List[str]) -> Optional[Dict[str, Dict[str, float]]]:
+        """请求一批代码，失败时返回 None"""
+        try:
+            resp = await self._get_client().get(self.BATCH_URL + ','.join(symbols))
+            resp.raise_for_status()
+            # 响应为 GBK 编码
+            return self.parse_batch(resp.content.decode('gbk', errors='replace'))
+        except Exception as e:
+            logger.warning(f"获取行情失败: {','.join(symbols)}, {e}")
+            return None
+
+    async def fetch_quotes(self, codes: Iterable[str]) -> Dict[str, Dict[str, float]]:
+        """批量获取行情，返回 {原始代码: {price, change_amount, change_pct}}
+
+        部分请求失败时，失败的代码不在结果中；需要请求的批次全部失败时抛出 UpstreamUnavailable，
+        避免调用方把空结果当作正常数据（并被接口缓存）。
+        """
+        codes = list(dict.fromkeys(codes))
+        result = {}
+        missing = {}
+        for code in codes:
+            quote = self._cache.get(code)
+            if quote is not None:
+                result[code] = quote
+            else:
+                missing[self.to_tencent_symbol(code)] = code
+
+        if missing:
+            symbols = list(missing)
+            chunks = [symbols[i:i + self.MAX_CODES_PER_REQUEST]
+                      for i in range(0, len(symbols), self.MAX_CODES_PER_REQUEST)]
+            responses = await asyncio.gather(*[self._fetch_chunk(chunk) for chunk in chunks])
+            if all(fetched is None for fetched in responses):
+                raise UpstreamUnavailable(f"行情接口不可用（{len(chunks)} 个请求全部失败）")
+            for fetched in responses:
+                for symbol, quote in (fetched or {}).items():
+                    code = missing.get(symbol)
+                    if code is not None:
+                        self._cache.set(code, quote)
+                        result[code] = quote
+        return {code: result[code] for code in codes if code in result}
+
+    async def fetch_quote(self, code: str) -> Dict[str, float]:
+        return (await self.fetch_quotes([code])).get(code, {})
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+_quote_client: Optional[TencentQuoteClient] = None
+
+
+def get_quote_client() -> TencentQuoteClient:
+    """获取进程级行情客户端（在事件循环中使用）"""
+    global _quote_client
+    if _quote_client is None:
+        _quote_client = TencentQuoteClient()
+    return _quote_client
+
+
+async def close_quote_client():
+    global _quote_client
+    if _quote_client is not None:
+        await _quote_client.aclose()
+        _quote_client = None
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@Description    ：令牌桶限流 - 控制对掘金/AkShare 等上游的请求速率
+@Author  ：EEric
+@Date    ：2026-10-19
+"""
+import threading
+import time
+from typing import Dict, Optional
+
+from pytrading.config import config
+
+
+class TokenBucket:
+    """线程安全的令牌桶
+
+    rate 为每秒补充的令牌数，capacity 为允许的突发量；rate <= 0 表示不限流。
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity else max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def acquire(self, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """获取令牌，令牌不足时阻塞等待
+
+        Args:
+            tokens: 需要的令牌数
+            timeout: 最长等待秒数，None 表示一直等待
+
+        Returns:
+            bool: 是否成功获取
+        """
+        if self.rate <= 0:
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return True
+                wait = (tokens - self._tokens) / self.rate
+            if deadline is not None and now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+_limiters: Dict[str, TokenBucket] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(upstream: str) -> TokenBucket:
+    """获取上游对应的进程级限流器（同一进程内所有调用共享配额）
+
+    Args:
+        upstream: 上游名称，'gm' 或 'akshare'
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(upstream)
+        if limiter is None:
+            rate = config.get(f'{upstream}_rate_limit', 0)
+            burst = config.get(f'{upstream}_rate_burst', None)
+            limiter = TokenBucket(rate, burst)
+            _limiters[upstream] = limiter
+        return limiter
@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@Description    ：接口结果缓存 - TTL + LRU，并发相同未命中只加载一次（single-flight）
+@Author  ：EEric
+@Date    ：2026-10-19
+"""
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from pytrading.logger import logger
+
+
+class TTLCache:
+    """带过期时间和容量上限的内存缓存
+
+    - 条目超过 ttl 秒视为过期，超过 maxsize 时淘汰最久未使用的条目
+    - get_or_load: 同一 key 并发未命中时只执行一次 loader，其余协程等待同一结果；loader 异常不缓存
+    - invalidate: 底层数据写入后显式失效（整个缓存或单个 key）
+    """
+
+    def __init__(self, name: str, ttl: float, maxsize: int = 128):
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        # 失效代数：加载期间发生失效时，加载结果不写入缓存
+        self._generation = 0
+        self._stats = {"hits": 0, "misses": 0, "loads": 0, "coalesced": 0, "errors": 0,
+                       "evictions": 0, "invalidations": 0}
+
+    def get(self, key: Hashable, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                return default
+            self._data.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        with self._lock:
+            self._set_locked(key, value, ttl)
+
+    def _set_locked(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """失效单个 key；key 为 None 时清空整个缓存"""
+        with self._lock:
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+            self._generation += 1
+            self._stats["invalidations"] += 1
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """命中直接返回；未命中时执行 loader()（协程函数），并发的相同 key 共享同一次加载"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._data.move_to_end(key)
+                self._stats["hits"] += 1
+                return entry[1]
+            self._stats["misses"] += 1
+            waiting = self._inflight.get(key)
+            if waiting is None:
+                future = asyncio.get_running_loop().create_future()
+                self._inflight[key] = future
+                generation = self._generation
+            else:
+                self._stats["coalesced"] += 1
+        if waiting is not None:
+            # 等待者被取消不影响正在进行的加载
+            return await asyncio.shield(waiting)
+
+        try:
+            value = await loader()
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+                self._stats["errors"] += 1
+            future.set_exception(e)
+            # 没有其他等待者时避免 "exception was never retrieved" 警告
+            future.exception()
+            raise
+        with self._lock:
+            self._inflight.pop(key, None)
+            self._stats["loads"] += 1
+            if generation == self._generation:
+                self._set_locked(key, value)
+        future.set_result(value)
+        return value
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._data)
+        lookups = stats["hits"] + stats["misses"]
+        stats.update({
+            "ttl": self.ttl,
+            "maxsize": self.maxsize,
+            "hit_ratio": round(stats["hits"] / lookups, 4) if lookups else None,
+        })
+        return stats
+
+
+_caches: Dict[str, TTLCache] = {}
+_registry_lock = threading.Lock()
+# 会话中待失效的缓存名称（session.info 键），提交后统一失效
+_PENDING_KEY = "_ttl_cache_pending"
+_session_hooks_installed = False
+# 缓存名称 -> 失效时的回调（依赖同一份数据的其他内存结构，如股票索引）
+_invalidate_listeners: Dict[str, list] = {}
+
+
+def get_cache(name: str, ttl: float, maxsize: int = 128) -> TTLCache:
+    """按名称获取进程内共享的缓存（首次调用时创建）"""
+    cache = _caches.get(name)
+    if cache is None:
+        with _registry_lock:
+            cache = _caches.get(name)
+            if cache is None:
+                cache = TTLCache(name, ttl, maxsize)
+                _caches[name] = cache
+    return cache
+
+
+def invalidate(*names: str):
+    """失效指定名称的缓存；不传名称时失效全部"""
+    for name in (names or list(set(_caches) | set(_invalidate_listeners))):
+        cache = _caches.get(name)
+        if cache is not None:
+            cache.invalidate()
+        for callback in _invalidate_listeners.get(name, ()):
+            try:
+                callback()
+            except Exception as e:
+                logger.warning(f"缓存失效回调执行失败: {name}, {e}")
+
+
+def on_invalidate(name: str, callback):
+    """注册名称为 name 的缓存失效时的回调（无论该缓存是否已创建）"""
+    with _registry_lock:
+        _invalidate_listeners.setdefault(name, []).append(callback)
+
+
+def all_stats() -> Dict[str, dict]:
+    return {name: cache.stats() for name, cache in list(_caches.items())}
+
+
+def invalidate_on_write(model, *names: str):
+    """ORM 会话中写入 model（新增/修改/删除）并提交后失效对应缓存"""
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session
+
+    @event.listens_for(Session, "after_flush")
+    def _mark(session, flush_context):
+        if any(isinstance(obj, model) for obj in (*session.new, *session.dirty, *session.deleted)):
+            session.info.setdefault(_PENDING_KEY, set()).update(names)
+
+    global _session_hooks_installed
+    if _session_hooks_installed:
+        return
+    _session_hooks_installed = True
+
+    @event.listens_for(Session, "after_commit")
+    def _invalidate(session):
+        pending = session.info.pop(_PENDING_KEY, None)
+        if pending:
+            logger.debug(f"数据已写入，失效缓存: {sorted(pending)}")
+            invalidate(*pending)
+
+    @event.listens_for(Session, "after_rollback")
+    def _discard(session):
+        session.info.pop(_PENDING_KEY, None)
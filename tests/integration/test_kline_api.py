@@ -0,0 +1,97 @@
+"""
+K线 API 集成测试
+
+验证 /api/kline/{symbol} 的按列格式、ETag 缓存校验和降采样，以及单只同步的失败返回.
+"""
+
+from datetime import date, timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+SYMBOL = "SHSE.600900"
+
+
+@pytest.fixture
+def client(db_session, mock_gm_api, monkeypatch):
+    """K线表预置 300 条数据，接口复用测试会话"""
+    for name in ('set_token', 'get_constituents', 'get_instruments', 'history'):
+        monkeypatch.setattr(mock_gm_api, name, MagicMock(), raising=False)
+    from pytrading.api import main
+    from pytrading.db.mysql import StockKline
+
+    start = date(2024, 1, 1)
+    for i in range(300):
+        db_session.add(StockKline(symbol=SYMBOL, date=start + timedelta(days=i), open=10, high=11, low=9,
+                                  close=10 + (i % 7), volume=1000 + i, macd_diff=0.1, macd_dea=0.05,
+                                  macd_hist=0.02))
+    db_session.flush()
+
+    from pytrading.db import async_session
+    with patch.object(async_session, 'get_async_engine', return_value=None), \
+            patch.object(async_session, '_sync_session', return_value=db_session), \
+            patch.object(db_session, 'close'):
+        yield TestClient(main.app)
+
+
+class TestKlineAPI:
+    """测试K线查询接口"""
+
+    def test_columnar_format_returns_parallel_arrays(self, client):
+        """format=columnar 时各字段为等长数组"""
+        response = client.get(f"/api/kline/{SYMBOL}", params={"format": "columnar"})
+
+        assert response.status_code == 200
+        data = response.json()["data"]
+        assert len(data["date"]) == len(data["close"]) == 300
+        assert data["date"][0] == "2024-01-01"
+        assert data["volume"][-1] == 1299
+
+    def test_unchanged_data_returns_304(self, client):
+        """携带 If-None-Match 且数据未变化时返回 304"""
+        first = client.get(f"/api/kline/{SYMBOL}")
+        etag = first.headers["etag"]
+
+        second = client.get(f"/api/kline/{SYMBOL}", headers={"If-None-Match": etag})
+
+        assert second.status_code == 304
+        assert second.content == b""
+
+    def test_in_place_update_changes_etag(self, client, db_session):
+        """重新同步原地更新已有K线（created_at 不变）时 ETag 变化，不返回 304"""
+        from pytrading.db.mysql import StockKline
+        etag = client.get(f"/api/kline/{SYMBOL}").headers["etag"]
+
+        bar = db_session.query(StockKline).filter_by(symbol=SYMBOL, date=date(2024, 6, 1)).one()
+        bar.close = 99
+        db_session.flush()
+        response = client.get(f"/api/kline/{SYMBOL}", headers={"If-None-Match": etag})
+
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+
+    def test_max_points_downsamples(self, client):
+        """max_points 限制返回点数并保留首尾"""
+        response = client.get(f"/api/kline/{SYMBOL}", params={"format": "columnar", "max_points": 50})
+
+        dates = response.json()["data"]["date"]
+        assert len(dates) == 50
+        assert dates[0] == "2024-01-01"
+        assert dates[-1] == (date(2024, 1, 1) + timedelta(days=299)).strftime('%Y-%m-%d')
+
+
+class TestKlineSyncAPI:
+    """测试单只股票K线同步接口"""
+
+    def test_no_upstream_data_returns_500(self, client, db_session):
+        """上游无数据且库中没有该股票时返回失败，而不是同步成功"""
+        from pytrading.service.kline_service import KlineService
+        with patch.object(KlineService, '_get_session', return_value=db_session), \
+                patch.object(KlineService, '_trading_dates', return_value=None), \
+                patch.object(KlineService, '_fetch_bars', return_value=None):
+            response = client.post("/api/kline/sync", json={"symbol": "SHSE.699999", "days": 30})
+
+        assert response.status_code == 500
+        assert "SHSE.699999" in response.json()["detail"]
@@ -0,0 +1,60 @@
+"""
+异步数据库访问单元测试
+
+验证未启用异步驱动时，查询在有界线程池中执行且不阻塞事件循环.
+命名遵循: test_<场景>_<预期结果>
+"""
+
+import asyncio
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+
+@pytest.fixture
+def sync_fallback():
+    from pytrading.db import async_session
+    session = MagicMock()
+    with patch.object(async_session, 'get_async_engine', return_value=None), \
+            patch.object(async_session, '_sync_session', return_value=session):
+        yield session
+
+
+class TestRunDb:
+    """测试 run_db / run_blocking"""
+
+    @pytest.mark.asyncio
+    async def test_run_db_passes_session_and_closes(self, sync_fallback):
+        """查询函数收到会话，执行后会话被关闭"""
+        from pytrading.db.async_session import run_db
+
+        result = await run_db(lambda session, x: (session, x), 42)
+
+        assert result == (sync_fallback, 42)
+        sync_fallback.close.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_run_db_runs_off_event_loop_thread(self, sync_fallback):
+        """同步查询在线程池中执行，事件循环可以并发处理其他协程"""
+        from pytrading.db.async_session import run_db
+
+        loop_thread = threading.get_ident()
+
+        def slow_query(session):
+            time.sleep(0.2)
+            return threading.get_ident()
+
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            for _ in range(5):
+                await asyncio.sleep(0.02)
+                ticks += 1
+
+        query_thread, _ = await asyncio.gather(run_db(slow_query), ticker())
+
+        assert query_thread != loop_thread
+        assert ticks == 5
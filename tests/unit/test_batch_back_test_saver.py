@@ -0,0 +1,218 @@
+"""
+回测结果批量写入单元测试
+
+验证结果文件读写、结果提交后才删除结果文件、遗留文件恢复、按行数/定时 flush、唯一键 upsert、
+失败重试和任务进度更新.
+命名遵循: test_<场景>_<预期结果>
+"""
+
+import glob
+import os
+import sys
+import time
+from datetime import datetime
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+
+def _backtest(symbol='SZSE.300001', pnl=0.1234, task_id='t-batch'):
+    from pytrading.db.mysql import BacktestStatus
+    from pytrading.model.back_test import BackTest
+
+    obj = BackTest()
+    obj.init_attr(symbol=symbol, name='测试', strategy_name='MACD', task_id=task_id,
+                  backtest_start_time='2024-01-01 00:00:00', backtest_end_time='2024-06-30 00:00:00',
+                  pnl_ratio=pnl, win_ratio=0.5, open_count=3, status=BacktestStatus.finished)
+    return obj
+
+
+@pytest.fixture
+def batch_saver(db_session, tmp_path):
+    """使用测试会话的批量写入器（commit 改为 flush，测试结束回滚）"""
+    from pytrading.model.batch_back_test_saver import BatchBackTestSaver
+    from pytrading.model.mysql_back_test_saver import MySQLBackTestSaver
+
+    client = MagicMock()
+    client.get_session.return_value = db_session
+    saver = BatchBackTestSaver(task_id='t-batch', flush_rows=3, flush_interval=0, mysql_client=client,
+                               spool_dir=str(tmp_path / 'spool'))
+    with patch.object(db_session, 'close'), patch.object(db_session, 'commit', db_session.flush), \
+            patch.object(MySQLBackTestSaver, 'invalidate_cache'):
+        yield saver
+
+
+def _rows(db_session):
+    from pytrading.db.mysql import BackTestResult
+    return db_session.query(BackTestResult).order_by(BackTestResult.symbol).all()
+
+
+class TestResultFile:
+    """测试子进程结果文件"""
+
+    def test_emit_and_consume_roundtrip(self, batch_saver, db_session, tmp_path):
+        """子进程写入的结果文件经主进程读取后完整落库"""
+        from pytrading.model.batch_back_test_saver import emit_result
+
+        path = str(tmp_path / 'result.jsonl')
+        emit_result(_backtest(), path)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write("\n")
+
+        assert batch_saver.consume_file(path) == 1
+        assert batch_saver.flush() == 1
+
+        row = _rows(db_session)[0]
+        assert row.backtest_start_time == datetime(2024, 1, 1)
+        assert row.pnl_ratio == Decimal('0.123')
+        assert row.status.value == 'finished'
+        assert row.open_count == 3
+
+    def test_run_process_collects_results_despite_stderr_noise(self, batch_saver):
+        """结果经独立文件传递：stderr 输出不影响结果，子进程快速退出也不丢失"""
+        script = (
+            "import os, sys; sys.stderr.write('warning without newline'); "
+            "open(os.environ['PYTRADING_RESULT_SINK'], 'a').write("
+            "'{\"symbol\": \"SZSE.300009\", \"backtest_start_time\": \"2024-01-01 00:00:00\", "
+            "\"backtest_end_time\": \"2024-06-30 00:00:00\"}\\n')"
+        )
+        assert batch_saver.run_process([sys.executable, '-c', script]) == 0
+        assert batch_saver.pending() == 1
+
+    def test_result_file_kept_until_flush_commits(self, batch_saver, db_session):
+        """结果文件在其中的结果提交后才删除，写库失败时保留"""
+        from pytrading.model.mysql_back_test_saver import MySQLBackTestSaver
+
+        script = (
+            "import os; open(os.environ['PYTRADING_RESULT_SINK'], 'a').write("
+            "'{\"symbol\": \"SZSE.300010\", \"backtest_start_time\": \"2024-01-01 00:00:00\", "
+            "\"backtest_end_time\": \"2024-06-30 00:00:00\"}\\n')"
+        )
+        batch_saver.run_process([sys.executable, '-c', script])
+        files = glob.glob(os.path.join(batch_saver.spool_dir, '*.jsonl'))
+        assert len(files) == 1
+
+        with patch.object(MySQLBackTestSaver, 'upsert_rows', side_effect=RuntimeError('db down')):
+            assert batch_saver.flush() == 0
+        assert os.path.exists(files[0])
+
+        assert batch_saver.flush() == 1
+        assert not os.path.exists(files[0])
+
+    def test_recover_reads_files_of_exited_parent(self, batch_saver, db_session):
+        """主进程已退出的遗留结果文件被读入并写库，当前进程的文件不动"""
+        import psutil
+        from pytrading.model.batch_back_test_saver import emit_result
+
+        dead_pid = next(pid for pid in range(999999, 0, -1) if not psutil.pid_exists(pid))
+        os.makedirs(batch_saver.spool_dir)
+        orphan = os.path.join(batch_saver.spool_dir, f'pytrading-result-{dead_pid}-a.jsonl')
+        running = os.path.join(batch_saver.spool_dir, f'pytrading-result-{os.getpid()}-b.jsonl')
+        emit_result(_backtest('SZSE.300011'), orphan)
+        emit_result(_backtest('SZSE.300012'), running)
+
+        assert batch_saver.recover() == 1
+        assert batch_saver.flush() == 1
+        assert [r.symbol for r in _rows(db_session)] == ['SZSE.300011']
+        assert not os.path.exists(orphan)
+        assert os.path.exists(running)
+
+    def test_exec_process_reads_output_of_exited_child(self, capsys):
+        """子进程在首次 poll 之前已退出时仍读出全部输出，返回码取自子进程"""
+        from pytrading.utils import process
+
+        real_start = process.start_process
+
+        def delayed_start(*args, **kwargs):
+            proc = real_start(*args, **kwargs)
+            proc.wait()
+            return proc
+
+        with patch.object(process, 'start_process', side_effect=delayed_start):
+            rc = process.exec_process([sys.executable, '-c', "print('done'); raise SystemExit(3)"])
+
+        assert rc == 3
+        assert 'done' in capsys.readouterr().out
+
+
+class TestBatchFlush:
+    """测试批量写入"""
+
+    def test_flush_when_buffer_full(self, batch_saver, db_session):
+        """满 flush_rows 行自动写库，同一唯一键只保留最后一次"""
+        batch_saver.save(_backtest('SZSE.300001', pnl=0.1))
+        batch_saver.save(_backtest('SZSE.300001', pnl=0.2))
+        batch_saver.save(_backtest('SZSE.300002'))
+        assert batch_saver.pending() == 2
+        assert _rows(db_session) == []
+
+        batch_saver.save(_backtest('SZSE.300003'))
+        assert batch_saver.pending() == 0
+        rows = _rows(db_session)
+        assert [r.symbol for r in rows] == ['SZSE.300001', 'SZSE.300002', 'SZSE.300003']
+        assert rows[0].pnl_ratio == Decimal('0.2')
+
+    def test_upsert_updates_existing_row(self, batch_saver, db_session):
+        """同 symbol+回测区间再次写入时原地更新，保留 id 和 created_at"""
+        batch_saver.save(_backtest(pnl=0.1))
+        batch_saver.flush()
+        first = _rows(db_session)[0]
+        row_id, created_at = first.id, first.created_at
+
+        batch_saver.save(_backtest(pnl=-0.3))
+        batch_saver.flush()
+        db_session.expire_all()
+        rows = _rows(db_session)
+        assert len(rows) == 1
+        assert rows[0].id == row_id
+        assert rows[0].created_at == created_at
+        assert rows[0].pnl_ratio == Decimal('-0.3')
+
+    def test_failed_flush_keeps_rows(self, batch_saver, db_session):
+        """写库失败的行留在缓冲区，下次 flush 写入"""
+        from pytrading.model.mysql_back_test_saver import MySQLBackTestSaver
+
+        batch_saver.save(_backtest())
+        with patch.object(MySQLBackTestSaver, 'upsert_rows', side_effect=RuntimeError('db down')):
+            assert batch_saver.flush() == 0
+        assert batch_saver.pending() == 1
+
+        batch_saver.close()
+        assert batch_saver.pending() == 0
+        assert len(_rows(db_session)) == 1
+
+    def test_flush_updates_task_progress(self, batch_saver, db_session):
+        """写库后按完成结果更新任务进度"""
+        from pytrading.db.mysql import BacktestTask
+
+        task = BacktestTask(task_id='t-batch', strategy_id=1, symbols=['SZSE.300001', 'SZSE.300002'],
+                            start_time=datetime(2024, 1, 1), end_time=datetime(2024, 6, 30), progress=0)
+        db_session.add(task)
+        db_session.flush()
+
+        batch_saver.save(_backtest('SZSE.300001'))
+        batch_saver.flush()
+        assert task.progress == 50
+
+
+class TestLifecycle:
+    """测试定时 flush 与关闭"""
+
+    def test_interval_thread_flushes(self, db_session, tmp_path):
+        """定时线程按间隔写出缓冲区"""
+        from pytrading.model.batch_back_test_saver import BatchBackTestSaver
+
+        saver = BatchBackTestSaver(flush_rows=100, flush_interval=0.01, mysql_client=MagicMock(),
+                                   spool_dir=str(tmp_path))
+        with patch.object(saver, 'flush', wraps=saver.flush) as flush, \
+                patch('pytrading.model.mysql_back_test_saver.MySQLBackTestSaver.upsert_rows'):
+            with saver:
+                saver.save(_backtest())
+                for _ in range(200):
+                    if saver.flush_count:
+                        break
+                    time.sleep(0.01)
+            assert saver.flush_count >= 1
+            assert flush.call_count >= 1
+        assert saver.pending() == 0
@@ -0,0 +1,157 @@
+"""
+阻塞调用隔离单元测试
+
+验证上游线程池的并发上限、超时、排队拒绝与上游间互不影响，以及事件循环卡顿监控能记录卡顿时长和调用栈.
+命名遵循: test_<场景>_<预期结果>
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+
+def _executor(workers=1, timeout=5.0, max_pending=4):
+    from pytrading.utils.blocking import UpstreamExecutor
+    return UpstreamExecutor('test', workers=workers, timeout=timeout, max_pending=max_pending)
+
+
+class TestUpstreamExecutor:
+    """测试 UpstreamExecutor"""
+
+    @pytest.mark.asyncio
+    async def test_run_executes_off_loop_thread(self):
+        """同步函数在上游线程池中执行，参数透传"""
+        executor = _executor()
+        loop_thread = threading.get_ident()
+
+        thread, value = await executor.run(lambda x, y=0: (threading.get_ident(), x + y), 1, y=2)
+
+        assert thread != loop_thread
+        assert value == 3
+        assert executor.stats()["calls"] == 1
+        assert executor.stats()["in_flight"] == 0
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_timeout_raises_and_slot_released_after_thread_finishes(self):
+        """超时抛 UpstreamTimeout；线程结束后才释放名额"""
+        from pytrading.utils.blocking import UpstreamTimeout
+        executor = _executor(timeout=0.05)
+        release = threading.Event()
+
+        with pytest.raises(UpstreamTimeout) as exc_info:
+            await executor.run(release.wait, 2)
+
+        assert exc_info.value.status_code == 504
+        assert executor.stats()["timeouts"] == 1
+        assert executor.stats()["in_flight"] == 1
+        release.set()
+        for _ in range(50):
+            if executor.stats()["in_flight"] == 0:
+                break
+            await asyncio.sleep(0.01)
+        assert executor.stats()["in_flight"] == 0
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_pending_limit_reached_rejects_immediately(self):
+        """进行中 + 排队达到上限后立即拒绝"""
+        from pytrading.utils.blocking import UpstreamBusy
+        executor = _executor(workers=1, max_pending=1)
+        release = threading.Event()
+
+        running = [asyncio.ensure_future(executor.run(release.wait, 2)) for _ in range(2)]
+        await asyncio.sleep(0.02)
+        with pytest.raises(UpstreamBusy):
+            await executor.run(lambda: None)
+
+        release.set()
+        assert await asyncio.gather(*running) == [True, True]
+        assert executor.stats()["rejected"] == 1
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_errors_propagate_and_counted(self):
+        """上游异常原样抛出并计数"""
+        executor = _executor()
+
+        def boom():
+            raise ValueError("upstream down")
+
+        with pytest.raises(ValueError):
+            await executor.run(boom)
+        assert executor.stats()["errors"] == 1
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_slow_upstream_does_not_block_other_upstream(self):
+        """慢的上游占满自己的线程池，其他上游调用不受影响"""
+        from pytrading.utils.blocking import UpstreamExecutor
+        slow = UpstreamExecutor('slow', workers=1, timeout=5, max_pending=4)
+        fast = UpstreamExecutor('fast', workers=1, timeout=5, max_pending=4)
+        release = threading.Event()
+
+        blocked = asyncio.ensure_future(slow.run(release.wait, 2))
+        started = time.monotonic()
+        assert await fast.run(lambda: "ok") == "ok"
+        assert time.monotonic() - started < 0.5
+        assert not blocked.done()
+
+        release.set()
+        await blocked
+        slow.shutdown()
+        fast.shutdown()
+
+
+class TestLoopLagMonitor:
+    """测试 LoopLagMonitor"""
+
+    @pytest.mark.asyncio
+    async def test_blocking_call_on_loop_recorded_as_stall_with_stack(self):
+        """事件循环上的同步阻塞被记录为卡顿，并带有阻塞位置的调用栈"""
+        from pytrading.utils.blocking import LoopLagMonitor
+        monitor = LoopLagMonitor(interval=0.02, threshold_ms=50)
+        monitor.start()
+        await asyncio.sleep(0.05)
+
+        def blocking_upstream_call():
+            time.sleep(0.3)
+
+        blocking_upstream_call()
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+
+        stats = monitor.stats()
+        assert stats["stalls"] >= 1
+        assert stats["max_lag_ms"] >= 200
+        stall = stats["recent"][-1]
+        assert any("blocking_upstream_call" in frame for frame in stall["stack"])
+
+    @pytest.mark.asyncio
+    async def test_idle_loop_no_stalls(self):
+        """事件循环空闲时不记录卡顿"""
+        from pytrading.utils.blocking import LoopLagMonitor
+        monitor = LoopLagMonitor(interval=0.02, threshold_ms=200)
+        monitor.start()
+        await asyncio.sleep(0.15)
+        await monitor.stop()
+
+        stats = monitor.stats()
+        assert stats["samples"] > 0
+        assert stats["stalls"] == 0
+        assert stats["running"] is False
+
+    def test_zero_threshold_disabled(self):
+        """阈值为 0 时不启动"""
+        from pytrading.utils.blocking import LoopLagMonitor
+
+        async def start():
+            monitor = LoopLagMonitor(interval=0.02, threshold_ms=0)
+            monitor.start()
+            return monitor.stats()
+
+        stats = asyncio.run(start())
+        assert stats["enabled"] is False
+        assert stats["running"] is False
@@ -163,3 +163,20 @@ class TestDataCollectorService:
                     assert "events" in result
                     assert "news" in result
                     assert isinstance(result["sentiment"], SentimentData)
+
+    @pytest.mark.asyncio
+    async def test_collect_market_sentiment_refreshes_off_event_loop(self):
+        """测试市场情绪的快照刷新在 AkShare 线程池中执行，不阻塞事件循环"""
+        import threading
+        loop_thread = threading.current_thread()
+        snapshot = MagicMock()
+        snapshot.breadth.return_value = {"up_ratio": 0.7}
+        service = MagicMock()
+        threads = []
+        service.get.side_effect = lambda: threads.append(threading.current_thread()) or snapshot
+
+        with patch('pytrading.service.spot_snapshot_service.get_spot_snapshot_service', return_value=service):
+            result = await self.service.collect_market_sentiment()
+
+        assert result.sentiment == "bullish"
+        assert threads and threads[0] is not loop_thread
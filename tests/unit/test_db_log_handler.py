@@ -0,0 +1,102 @@
+"""
+数据库日志处理器单元测试
+
+验证日志异步批量写入、队列满时的丢弃策略和关闭时写出剩余日志.
+命名遵循: test_<场景>_<预期结果>
+"""
+
+import logging
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import create_engine
+
+
+@pytest.fixture
+def repo(tmp_path):
+    from pytrading.db.log_repository import LogRepository
+    from pytrading.db.mysql import Base
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'logs.db'}")
+    Base.metadata.create_all(engine)
+    yield LogRepository(engine=engine)
+    engine.dispose()
+
+
+def _handler(repo, **kwargs):
+    from pytrading.logger import DBLogHandler
+
+    handler = DBLogHandler()
+    handler._repo = repo
+    for key, value in kwargs.items():
+        setattr(handler, key, value)
+    return handler
+
+
+def _record(message, level=logging.INFO, task_id='t-log', symbol=None):
+    record = logging.LogRecord('xtrading', level, __file__, 1, message, None, None)
+    if task_id:
+        record.task_id = task_id
+    if symbol:
+        record.symbol = symbol
+    return record
+
+
+class TestDBLogHandler:
+    """测试异步批量写入"""
+
+    def test_records_written_in_batch(self, repo):
+        """emit 不直接写库，flush 后以一次多行 INSERT 写入"""
+        handler = _handler(repo, flush_interval=5.0)
+        append_logs = MagicMock(wraps=repo.append_logs)
+        repo.append_logs = append_logs
+
+        for i in range(5):
+            handler.emit(_record(f"第{i}条", symbol='SZSE.300001' if i % 2 else None))
+        handler.emit(_record("无任务", task_id=None))
+        handler.flush()
+
+        append_logs.assert_called_once()
+        assert len(append_logs.call_args[0][0]) == 5
+        assert len(repo.query_logs('t-log')['items']) == 3
+        assert [i['message'] for i in repo.query_logs('t-log', symbol='SZSE.300001')['items']] == ['第1条', '第3条']
+        handler.close()
+
+    def test_full_queue_drops_info_and_reports(self, repo):
+        """队列满时丢弃 INFO，并写入一条丢弃汇总"""
+        handler = _handler(repo, queue_size=2, block_timeout=0.01, flush_interval=0.05)
+        release = threading.Event()
+        original = repo.append_logs
+
+        def slow_append(rows):
+            release.wait(5)
+            return original(rows)
+
+        repo.append_logs = slow_append
+        handler.emit(_record("占住写线程"))
+        # 等写线程取走第一条并阻塞在写库上
+        for _ in range(100):
+            if handler._queue.qsize() == 0:
+                break
+            threading.Event().wait(0.01)
+        for i in range(10):
+            handler.emit(_record(f"info{i}"))
+        assert handler.stats()['dropped'] == 8
+
+        release.set()
+        handler.close()
+        messages = [i['message'] for i in repo.query_logs('t-log')['items']]
+        assert "日志队列已满，丢弃 8 条日志" in messages
+        assert len(messages) == 4
+
+    def test_close_writes_pending(self, repo):
+        """close 时写出队列中剩余的日志"""
+        handler = _handler(repo, flush_interval=10.0, batch_size=1000)
+        for i in range(20):
+            handler.emit(_record(f"msg{i}", level=logging.WARNING))
+        handler.close()
+
+        items = repo.query_logs('t-log')['items']
+        assert len(items) == 20
+        assert items[0]['level'] == 'WARN'
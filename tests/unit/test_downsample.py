@@ -0,0 +1,32 @@
+"""
+LTTB 降采样单元测试
+
+命名遵循: test_<场景>_<预期结果>
+"""
+
+import numpy as np
+
+from pytrading.utils.downsample import lttb_indices
+
+
+class TestLttbIndices:
+    """测试 LTTB 下标选择"""
+
+    def test_short_series_returned_unchanged(self):
+        """点数不超过阈值时不降采样"""
+        assert list(lttb_indices([1, 2, 3], 10)) == [0, 1, 2]
+
+    def test_keeps_endpoints_and_threshold(self):
+        """结果点数等于阈值，且保留首尾点、下标严格递增"""
+        y = np.sin(np.linspace(0, 20, 5000))
+        indices = lttb_indices(y, 500)
+
+        assert len(indices) == 500
+        assert indices[0] == 0 and indices[-1] == 4999
+        assert np.all(np.diff(indices) > 0)
+
+    def test_preserves_spike(self):
+        """孤立尖峰不会被降采样丢弃"""
+        y = np.zeros(1000)
+        y[437] = 100.0
+        assert 437 in lttb_indices(y, 50)
@@ -0,0 +1,173 @@
+"""
+嵌入式存储后端单元测试
+
+验证 DB_TYPE=sqlite 时 MySQLClient 切换到 SQLite 文件，以及 DuckDB 筛选与 ORM 查询结果一致.
+命名遵循: test_<场景>_<预期结果>
+"""
+
+from datetime import datetime
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+
+
+@pytest.fixture
+def sqlite_config(tmp_path):
+    from pytrading.config.settings import config
+    with patch.object(config, 'db_type', 'sqlite'), \
+            patch.object(config, 'sqlite_path', str(tmp_path / 'pytrading.db')):
+        yield config
+
+
+@pytest.fixture
+def saver(sqlite_config):
+    from pytrading.db.mysql import BackTestResult, Strategy
+    from pytrading.model.mysql_back_test_saver import MySQLBackTestSaver
+
+    saver = MySQLBackTestSaver()
+    session = saver.mysql_client.get_session()
+    session.add(Strategy(name='MACD', display_name='MACD', strategy_type='trend'))
+    for i, pnl in enumerate([0.12, -0.05, None, 0.30]):
+        session.add(BackTestResult(
+            symbol=f"SHSE.60000{i}", name=f"股票{i}", strategy_name='MACD', trending_type='上涨',
+            backtest_start_time=datetime(2024, 1, 1), backtest_end_time=datetime(2024, 6, 30 - i),
+            pnl_ratio=Decimal(str(pnl)) if pnl is not None else None, win_ratio=Decimal('0.5'),
+            created_at=datetime(2025, 1, 1 + i)))
+    session.commit()
+    session.close()
+    return saver
+
+
+class TestSqliteBackend:
+    """测试 SQLite 后端"""
+
+    def test_mysql_client_uses_sqlite_file(self, sqlite_config):
+        """DB_TYPE=sqlite 时忽略 MySQL 连接参数"""
+        from pytrading.db.mysql import MySQLClient
+
+        client = MySQLClient(host="db", db_name="pytrading")
+
+        assert client.engine.url.get_backend_name() == 'sqlite'
+        assert client.engine.url.database == sqlite_config.sqlite_path
+
+    def test_orm_screening_runs_on_sqlite(self, saver):
+        """ORM 筛选、排序、分页在 SQLite 上可用"""
+        with patch('pytrading.db.analytics.DuckDBAnalytics.available', return_value=False):
+            result = saver.get_all_results(min_pnl_ratio=0, sort_by='pnl_ratio', sort_order='desc')
+
+        assert [r['symbol'] for r in result['data']] == ["SHSE.600003", "SHSE.600000"]
+        assert result['data'][0]['strategy_id'] == 1
+
+
+class TestDuckDBScreening:
+    """测试 DuckDB 列式筛选"""
+
+    @pytest.fixture
+    def duckdb_saver(self, saver, sqlite_config):
+        """把 SQLite 表加载到 DuckDB 的 src schema（测试环境无法下载 sqlite 扩展）"""
+        duckdb = pytest.importorskip("duckdb")
+        import sqlite3
+        import pandas as pd
+        from pytrading.db.analytics import DuckDBAnalytics
+
+        connection = duckdb.connect()
+        connection.execute("CREATE SCHEMA src")
+        source = sqlite3.connect(sqlite_config.sqlite_path)
+        for table in ('backtest_results', 'strategies'):
+            frame = pd.read_sql(f"SELECT * FROM {table}", source,
+                                parse_dates=['backtest_start_time', 'backtest_end_time', 'created_at'])
+            connection.register('frame', frame)
+            connection.execute(f"CREATE TABLE src.{table} AS SELECT * FROM frame")
+            connection.unregister('frame')
+        source.close()
+
+        with patch.object(DuckDBAnalytics, '_connect', return_value=connection):
+            DuckDBAnalytics._local.connection = None
+            yield saver
+            DuckDBAnalytics._local.connection = None
+
+    @pytest.mark.parametrize("kwargs", [
+        {},
+        {"sort_by": "pnl_ratio", "sort_order": "asc"},
+        {"sort_by": "pnl_ratio", "sort_order": "desc", "per_page": 2, "page": 2},
+        {"symbol": "600001"},
+        {"min_pnl_ratio": 0, "end_date": "2024-06-29"},
+    ])
+    def test_matches_orm_results(self, duckdb_saver, kwargs):
+        """DuckDB 筛选结果与 ORM 查询一致"""
+        from pytrading.db.analytics import DuckDBAnalytics
+
+        with patch.object(DuckDBAnalytics, 'available', return_value=False):
+            expected = duckdb_saver.get_all_results(**kwargs)
+        actual = duckdb_saver._screen_results_duckdb(**kwargs)
+
+        assert actual['total'] == expected['total']
+        assert [r['symbol'] for r in actual['data']] == [r['symbol'] for r in expected['data']]
+        assert [r['pnl_ratio'] for r in actual['data']] == [r['pnl_ratio'] for r in expected['data']]
+
+    @pytest.mark.parametrize("sort_by, sort_order", [(None, 'desc'), ('pnl_ratio', 'asc'), ('pnl_ratio', 'desc')])
+    def test_next_cursor_continues_with_keyset(self, duckdb_saver, sort_by, sort_order):
+        """DuckDB 返回的 next_cursor 可继续键集分页，结果与 OFFSET 第二页一致"""
+        from pytrading.db.analytics import DuckDBAnalytics
+
+        first = duckdb_saver._screen_results_duckdb(per_page=2, sort_by=sort_by, sort_order=sort_order)
+        with patch.object(DuckDBAnalytics, 'available', return_value=False):
+            expected = duckdb_saver.get_all_results(per_page=2, page=2, sort_by=sort_by, sort_order=sort_order)
+        following = duckdb_saver.get_all_results(per_page=2, sort_by=sort_by, sort_order=sort_order,
+                                                 cursor=first['next_cursor'])
+
+        assert first['next_cursor']
+        assert [r['symbol'] for r in following['data']] == [r['symbol'] for r in expected['data']]
+
+
+@pytest.fixture(scope="module")
+def sqlite_extension():
+    """只探测一次 duckdb 的 sqlite 扩展（离线环境下载失败较慢）"""
+    duckdb = pytest.importorskip("duckdb")
+    try:
+        duckdb.connect().execute("INSTALL sqlite; LOAD sqlite")
+    except duckdb.Error as e:
+        pytest.skip(f"duckdb sqlite 扩展不可用: {e}")
+
+
+class TestDuckDBAttach:
+    """测试真实 ATTACH SQLite 文件后执行的 SQL（需要 duckdb 及其 sqlite 扩展）"""
+
+    @pytest.fixture
+    def attached(self, sqlite_extension, saver, sqlite_config):
+        from pytrading.db.analytics import DuckDBAnalytics
+
+        DuckDBAnalytics._local.connection = None
+        connection = DuckDBAnalytics._connect()
+        with patch.object(sqlite_config, 'duckdb_analytics', True), \
+                patch.object(DuckDBAnalytics, '_disabled', False):
+            DuckDBAnalytics._local.connection = connection
+            yield saver
+            DuckDBAnalytics._local.connection = None
+        connection.close()
+
+    def test_attach_reads_sqlite_tables(self, attached):
+        """ATTACH 后可直接读取 SQLite 表"""
+        from pytrading.db.analytics import DuckDBAnalytics
+
+        rows = DuckDBAnalytics.query(f"SELECT COUNT(*) AS n FROM {DuckDBAnalytics.table('backtest_results')}")
+
+        assert DuckDBAnalytics.available()
+        assert rows == [{"n": 4}]
+
+    @pytest.mark.parametrize("kwargs", [
+        {"sort_by": "pnl_ratio", "sort_order": "desc", "per_page": 2, "page": 2},
+        {"symbol": "600001"},
+        {"min_pnl_ratio": 0, "end_date": "2024-06-29"},
+    ])
+    def test_attached_screening_matches_orm(self, attached, kwargs):
+        """真实 ATTACH 下的筛选 SQL 与 ORM 查询结果一致"""
+        from pytrading.db.analytics import DuckDBAnalytics
+
+        with patch.object(DuckDBAnalytics, 'available', return_value=False):
+            expected = attached.get_all_results(**kwargs)
+        actual = attached._screen_results_duckdb(**kwargs)
+
+        assert actual['total'] == expected['total']
+        assert [r['symbol'] for r in actual['data']] == [r['symbol'] for r in expected['data']]
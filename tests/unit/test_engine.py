@@ -0,0 +1,51 @@
+"""
+数据库引擎注册表单元测试
+
+验证同一连接串复用 Engine、连接池状态和 fork 后的连接丢弃.
+命名遵循: test_<场景>_<预期结果>
+"""
+
+from unittest.mock import patch
+
+
+class TestEngineRegistry:
+    """测试进程级 Engine 注册表"""
+
+    def test_same_url_returns_same_engine(self, tmp_path):
+        """同一连接串只创建一个 Engine 和 sessionmaker"""
+        from pytrading.db.engine import get_engine, get_sessionmaker
+
+        url = f"sqlite:///{tmp_path / 'a.db'}"
+        assert get_engine(url) is get_engine(url)
+        assert get_sessionmaker(url) is get_sessionmaker(url)
+        assert get_engine(f"sqlite:///{tmp_path / 'b.db'}") is not get_engine(url)
+
+    def test_mysql_client_reuses_registry(self):
+        """多次构造 MySQLClient 不再重复创建连接池"""
+        from pytrading.db.mysql import MySQLClient
+
+        first = MySQLClient(host="db", db_name="pytrading", username="u", password="p")
+        second = MySQLClient(host="db", db_name="pytrading", username="u", password="p")
+
+        assert first.engine is second.engine
+
+    def test_pool_status_hides_password(self):
+        """连接池状态中不暴露密码"""
+        from pytrading.db.engine import build_mysql_url, get_engine, pool_status
+
+        get_engine(build_mysql_url("db", "pytrading", username="u", password="secret"))
+        status = pool_status()
+
+        assert status
+        assert all("secret" not in item["url"] for item in status)
+        assert any("checkedout" in item for item in status)
+
+    def test_after_fork_disposes_without_closing(self, tmp_path):
+        """fork 后子进程丢弃继承的连接池"""
+        from pytrading.db import engine as engine_module
+
+        engine = engine_module.get_engine(f"sqlite:///{tmp_path / 'c.db'}")
+        with patch.object(engine, 'dispose') as dispose:
+            engine_module._after_fork_in_child()
+
+        dispose.assert_called_once_with(close=False)
@@ -0,0 +1,120 @@
+"""
+掘金数据客户端单元测试
+
+验证每个 token 使用独立的常驻工作进程、调用方进程的全局 token 不被修改、工作进程复用，
+工作进程异常退出后自动重建，以及查询超时后替换卡住的工作进程、被连带中断的调用重新提交.
+命名遵循: test_<场景>_<预期结果>
+"""
+
+import os
+
+import pytest
+
+
+@pytest.fixture
+def make_client():
+    from pytrading.utils.gm_client import GMDataClient
+    clients = []
+
+    def factory(token, module='os', **kwargs):
+        client = GMDataClient(token, workers=kwargs.pop('workers', 1), timeout=kwargs.pop('timeout', 30),
+                              module=module)
+        clients.append(client)
+        return client
+
+    yield factory
+    for client in clients:
+        client.close()
+
+
+class TestGMDataClient:
+    """测试 GMDataClient"""
+
+    def test_call_runs_in_reused_worker_process(self, make_client):
+        """调用在独立进程中执行，多次调用复用同一工作进程"""
+        client = make_client('token-a')
+
+        first = client.call('getpid')
+        second = client.call('getpid')
+
+        assert first != os.getpid()
+        assert first == second
+        assert client.stats()["calls"] == 2
+
+    def test_tokens_isolated_caller_token_untouched(self, make_client):
+        """不同 token 的客户端各自持有 token 和工作进程，调用方进程的 token 不变"""
+        from pytrading.config import config
+        caller_token = config.token
+
+        info_a = make_client('token-a').worker_info()
+        info_b = make_client('token-b').worker_info()
+
+        assert info_a["token"] == 'token-a' and info_b["token"] == 'token-b'
+        assert info_a["pid"] != info_b["pid"]
+        assert config.token == caller_token
+
+    def test_upstream_error_propagates(self, make_client):
+        """上游异常原样抛回调用方并计数"""
+        client = make_client('token-a')
+
+        with pytest.raises(FileNotFoundError):
+            client.call('stat', '/path/does/not/exist')
+        assert client.stats()["errors"] == 1
+
+    def test_worker_crash_pool_rebuilt(self, make_client):
+        """工作进程异常退出后重建进程池，后续调用正常"""
+        client = make_client('token-a')
+        pid = client.call('getpid')
+
+        with pytest.raises(Exception):
+            client.call('_exit', 1)
+        new_pid = client.call('getpid')
+
+        assert new_pid != pid
+        assert client.stats()["restarts"] >= 1
+
+    def test_timeout_replaces_stuck_worker(self, make_client):
+        """查询超时后结束卡住的工作进程并重建进程池，后续调用不受影响"""
+        from pytrading.utils.blocking import UpstreamTimeout
+        client = make_client('token-a', module='time', timeout=5)
+        pid = client.worker_info()["pid"]
+
+        with pytest.raises(UpstreamTimeout):
+            client.call('sleep', 60)
+
+        assert client.worker_info()["pid"] != pid
+        stats = client.stats()
+        assert stats["timeouts"] == 1 and stats["restarts"] == 1
+
+    def test_timeout_requeues_sibling_calls(self, make_client):
+        """一个调用超时结束进程池时，排队中的其他调用在新进程池上重新提交并正常返回"""
+        import time
+        from concurrent.futures import ThreadPoolExecutor
+        from pytrading.utils.blocking import UpstreamTimeout
+        client = make_client('token-a', module='time', workers=1, timeout=5)
+
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            hung = executor.submit(client.call, 'sleep', 60)
+            time.sleep(1)
+            # 一个已进入调用队列（进程池失效时 BrokenProcessPool），一个仍在等待（被取消时 CancelledError）
+            siblings = [executor.submit(client.call, 'sleep', 0.5) for _ in range(2)]
+
+            assert [sibling.result() for sibling in siblings] == [None, None]
+            with pytest.raises(UpstreamTimeout):
+                hung.result()
+
+        stats = client.stats()
+        assert stats["timeouts"] == 1 and stats["requeued"] == 2
+        assert stats["errors"] == 1
+
+    def test_registry_one_client_per_token(self):
+        """同一 token 共享客户端，默认使用回测 token"""
+        from pytrading.config import config
+        from pytrading.utils import gm_client
+
+        try:
+            assert gm_client.get_gm_data_client('x') is gm_client.get_gm_data_client('x')
+            assert gm_client.get_gm_data_client().token == config.backtest_trading_token
+            assert "***x" in gm_client.gm_client_stats()
+        finally:
+            gm_client.close_gm_data_clients()
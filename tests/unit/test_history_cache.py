@@ -0,0 +1,128 @@
+"""
+HistoryCache 单元测试
+
+验证行情缓存的区间覆盖、子区间拉取、当日 TTL 和命中统计.
+命名遵循: test_<场景>_<预期结果>
+"""
+
+from datetime import date, datetime, timedelta
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+
+def _bars(start: date, end: date):
+    """构造 [start, end] 内每个自然日一根的日K线"""
+    days = pd.date_range(start, end, freq='D')
+    return pd.DataFrame({
+        'symbol': 'SHSE.600000',
+        'open': [10.0] * len(days),
+        'close': [10.5] * len(days),
+        'volume': [1000] * len(days),
+        'eob': [datetime(d.year, d.month, d.day, 15) for d in days],
+    })
+
+
+def _fake_upstream(symbol, frequency, start_time, end_time, fields=None, adjust=None, df=True, **kwargs):
+    return _bars(datetime.strptime(start_time[:10], '%Y-%m-%d').date(),
+                 datetime.strptime(end_time[:10], '%Y-%m-%d').date())
+
+
+@pytest.fixture
+def cache(tmp_path):
+    from pytrading.utils.history_cache import HistoryCache
+    cache = HistoryCache(str(tmp_path), today_ttl=300)
+    with patch.object(HistoryCache, '_upstream', side_effect=_fake_upstream) as upstream:
+        cache.upstream = upstream
+        yield cache
+
+
+class TestHistoryCache:
+    """测试读穿缓存"""
+
+    def test_sub_range_served_locally(self, cache):
+        """已缓存区间的子区间不再请求上游"""
+        cache.history('SHSE.600000', '1d', '2025-01-01', '2025-01-31', df=True)
+        result = cache.history('SHSE.600000', '1d', '2025-01-10', '2025-01-20', df=True)
+
+        assert cache.upstream.call_count == 1
+        assert len(result) == 11
+        assert cache.stats()['hits'] == 1
+        assert cache.stats()['bytes_saved'] > 0
+
+    def test_only_uncovered_gap_fetched(self, cache):
+        """部分覆盖时只拉取缺失的子区间"""
+        cache.history('SHSE.600000', '1d', '2025-01-01', '2025-01-31', df=True)
+        result = cache.history('SHSE.600000', '1d', '2025-01-20', '2025-02-10', df=True)
+
+        gap_call = cache.upstream.call_args_list[-1].kwargs
+        assert gap_call['start_time'].startswith('2025-02-01')
+        assert gap_call['end_time'].startswith('2025-02-10')
+        assert len(result) == 22
+        assert cache.stats()['partial_hits'] == 1
+
+    def test_cache_persisted_to_disk(self, cache, tmp_path):
+        """新实例从磁盘读取已缓存区间"""
+        from pytrading.utils.history_cache import HistoryCache
+
+        cache.history('SHSE.600000', '1d', '2025-01-01', '2025-01-31', df=True)
+        reloaded = HistoryCache(str(tmp_path))
+        reloaded.history('SHSE.600000', '1d', '2025-01-05', '2025-01-06', df=True)
+
+        assert cache.upstream.call_count == 1
+
+    def test_today_refetched_after_ttl(self, cache):
+        """当日数据在 TTL 内命中，过期后重新拉取"""
+        today = datetime.now().date()
+        start = (today - timedelta(days=5)).strftime('%Y-%m-%d')
+        end = today.strftime('%Y-%m-%d')
+
+        cache.history('SHSE.600000', '1d', start, end, df=True)
+        cache.history('SHSE.600000', '1d', start, end, df=True)
+        assert cache.upstream.call_count == 1
+
+        cache.today_ttl = 0
+        cache.history('SHSE.600000', '1d', start, end, df=True)
+        assert cache.upstream.call_count == 2
+        assert cache.upstream.call_args_list[-1].kwargs['start_time'].startswith(end)
+
+    def test_fields_projection_and_records(self, cache):
+        """按请求字段返回，df=False 时返回字典列表"""
+        records = cache.history('SHSE.600000', '1d', '2025-01-01', '2025-01-02', fields='close,eob')
+
+        assert isinstance(records, list)
+        assert set(records[0].keys()) == {'close', 'eob'}
+
+    def test_intraday_frequency_bypassed(self, cache):
+        """非日线周期不缓存"""
+        cache.history('SHSE.600000', '60s', '2025-01-01', '2025-01-02', df=True)
+        cache.history('SHSE.600000', '60s', '2025-01-01', '2025-01-02', df=True)
+
+        assert cache.upstream.call_count == 2
+        assert cache.stats()['bypassed'] == 2
+
+    def test_empty_result_refetched_after_empty_ttl(self, cache, tmp_path):
+        """上游返回空结果的区间不永久记为已覆盖，empty_ttl 过期后重新拉取"""
+        from pytrading.utils.history_cache import HistoryCache
+
+        cache.upstream.side_effect = lambda **kwargs: pd.DataFrame()
+        cache.history('SHSE.600000', '1d', '2025-01-06', '2025-01-10', df=True)
+        cache.history('SHSE.600000', '1d', '2025-01-06', '2025-01-10', df=True)
+        assert cache.upstream.call_count == 1
+
+        cache.upstream.side_effect = _fake_upstream
+        reloaded = HistoryCache(str(tmp_path), empty_ttl=0)
+        result = reloaded.history('SHSE.600000', '1d', '2025-01-06', '2025-01-10', df=True)
+
+        assert cache.upstream.call_count == 2
+        assert len(result) == 5
+
+    def test_empty_weekend_range_covered(self, cache):
+        """整段都是周末的空结果视为确定无交易，不再请求上游"""
+        cache.upstream.side_effect = lambda **kwargs: pd.DataFrame()
+        cache.empty_ttl = 0
+        cache.history('SHSE.600000', '1d', '2025-01-04', '2025-01-05', df=True)
+        cache.history('SHSE.600000', '1d', '2025-01-04', '2025-01-05', df=True)
+
+        assert cache.upstream.call_count == 1
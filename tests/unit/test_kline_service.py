@@ -0,0 +1,273 @@
+"""
+KlineService 单元测试
+
+验证K线增量同步的缺口计算、上游无数据缺口段记录、交易日历缓存、预热数据复用和批量 upsert.
+命名遵循: test_<场景>_<预期结果>
+"""
+
+import sys
+import types
+from datetime import date, datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def _trading_days(start: date, end: date):
+    """工作日作为测试交易日历"""
+    days = []
+    d = start
+    while d <= end:
+        if d.weekday() < 5:
+            days.append(d)
+        d += timedelta(days=1)
+    return days
+
+
+def _bars(days):
+    """构造 history(df=True) 返回的K线"""
+    return pd.DataFrame({
+        'symbol': ['SHSE.600000'] * len(days),
+        'open': [10.0 + i for i in range(len(days))],
+        'high': [11.0 + i for i in range(len(days))],
+        'low': [9.0 + i for i in range(len(days))],
+        'close': [10.5 + i for i in range(len(days))],
+        'volume': [1000 + i for i in range(len(days))],
+        'eob': [datetime(d.year, d.month, d.day, 15) for d in days],
+    })
+
+
+def _fake_macd(closes):
+    """与输入等长的伪 MACD"""
+    closes = np.asarray(closes, dtype=float)
+    return closes * 0.1, closes * 0.05, closes * 0.02
+
+
+@pytest.fixture
+def kline_service():
+    from pytrading.service.kline_service import KlineService
+    with patch.object(KlineService, '_compute_macd', side_effect=_fake_macd):
+        yield KlineService
+
+
+def _store(db_session, symbol, days):
+    from pytrading.db.mysql import StockKline
+    for d in days:
+        db_session.add(StockKline(symbol=symbol, date=d, open=1, high=1, low=1, close=1, volume=1))
+    db_session.flush()
+
+
+class TestFindMissingRanges:
+    """测试缺口计算"""
+
+    def test_current_table_returns_no_ranges(self, db_session, kline_service):
+        """库中数据完整时无需拉取"""
+        start, end = date(2025, 3, 3), date(2025, 3, 14)
+        calendar = _trading_days(start, end)
+        _store(db_session, "SHSE.600001", calendar)
+
+        with patch.object(kline_service, '_trading_dates', return_value=calendar):
+            ranges = kline_service.find_missing_ranges(db_session, "SHSE.600001", start, end)
+
+        assert ranges == []
+
+    def test_tail_and_hole_detected_as_separate_ranges(self, db_session, kline_service):
+        """尾部缺口和中间空洞分别返回"""
+        start, end = date(2025, 3, 3), date(2025, 3, 14)
+        calendar = _trading_days(start, end)
+        stored = [d for d in calendar if d not in (date(2025, 3, 6), date(2025, 3, 7))][:-1]
+        _store(db_session, "SHSE.600002", stored)
+
+        with patch.object(kline_service, '_trading_dates', return_value=calendar):
+            ranges = kline_service.find_missing_ranges(db_session, "SHSE.600002", start, end)
+
+        assert ranges == [(date(2025, 3, 6), date(2025, 3, 7)), (date(2025, 3, 14), date(2025, 3, 14))]
+
+    def test_without_calendar_falls_back_to_tail(self, db_session, kline_service):
+        """交易日历不可用时只补最大日期之后的尾部"""
+        start, end = date(2025, 3, 3), date(2025, 3, 14)
+        _store(db_session, "SHSE.600003", [date(2025, 3, 3), date(2025, 3, 10)])
+
+        with patch.object(kline_service, '_trading_dates', return_value=None):
+            ranges = kline_service.find_missing_ranges(db_session, "SHSE.600003", start, end)
+
+        assert ranges == [(date(2025, 3, 11), end)]
+
+    def test_dates_before_list_date_not_missing(self, db_session, kline_service):
+        """上市日期之前的交易日不算缺口"""
+        from pytrading.db.mysql import StockSymbol
+        start, end = date(2025, 3, 3), date(2025, 3, 14)
+        db_session.add(StockSymbol(symbol="SHSE.600004", name="新股", list_date=date(2025, 3, 12)))
+        db_session.flush()
+
+        with patch.object(kline_service, '_trading_dates', return_value=_trading_days(start, end)):
+            ranges = kline_service.find_missing_ranges(db_session, "SHSE.600004", start, end)
+
+        assert ranges == [(date(2025, 3, 12), end)]
+
+
+class TestEmptyGaps:
+    """测试上游无数据缺口段的记录"""
+
+    def test_suspension_hole_recorded_and_not_refetched(self, db_session, kline_service):
+        """中间空洞上游无数据（停牌）时记录下来，下次同步不再拉取"""
+        symbol = "SHSE.600005"
+        calendar = _trading_days(date(2024, 1, 1), date(2025, 6, 30))
+        hole = calendar[-10:-7]
+        _store(db_session, symbol, [d for d in calendar if d not in hole])
+
+        with patch.object(kline_service, '_trading_dates', return_value=calendar), \
+                patch.object(kline_service, '_fetch_bars', return_value=None) as fetch:
+            assert kline_service.build_rows(db_session, symbol, start_date="2024-01-01", end_date="2025-06-30") == []
+            fetch.assert_called_once()
+            ranges = kline_service.find_missing_ranges(db_session, symbol, date(2024, 1, 1), date(2025, 6, 30))
+
+        assert ranges == []
+
+    def test_pre_listing_dates_recorded_on_first_sync(self, db_session, kline_service):
+        """无上市日期时，首次同步中首根K线之前的日期记为无数据"""
+        symbol = "SHSE.600006"
+        start, end = date(2025, 3, 3), date(2025, 3, 14)
+        calendar = _trading_days(start, end)
+        listed = [d for d in calendar if d >= date(2025, 3, 10)]
+
+        with patch.object(kline_service, '_trading_dates', return_value=calendar), \
+                patch.object(kline_service, '_fetch_bars', return_value=_bars(listed)):
+            rows = kline_service.build_rows(db_session, symbol, start_date="2025-03-03", end_date="2025-03-14")
+            kline_service.write_rows(db_session, rows)
+            ranges = kline_service.find_missing_ranges(db_session, symbol, start, end)
+
+        assert [r['date'] for r in rows] == listed
+        assert ranges == []
+
+    def test_tail_gap_not_recorded(self, db_session, kline_service):
+        """尾部缺口（当日数据可能尚未发布）不记录，下次同步仍会拉取"""
+        symbol = "SHSE.600007"
+        calendar = _trading_days(date(2024, 6, 1), date(2025, 6, 30))
+        _store(db_session, symbol, calendar[:-1])
+
+        with patch.object(kline_service, '_trading_dates', return_value=calendar), \
+                patch.object(kline_service, '_fetch_bars', return_value=None):
+            kline_service.build_rows(db_session, symbol, start_date="2024-06-01", end_date="2025-06-30")
+            ranges = kline_service.find_missing_ranges(db_session, symbol, date(2024, 6, 1), date(2025, 6, 30))
+
+        assert ranges == [(calendar[-1], calendar[-1])]
+
+
+class TestTradingDates:
+    """测试交易日历缓存"""
+
+    def test_calendar_fetched_once_per_exchange_and_range(self, monkeypatch):
+        """同一交易所、同一区间的交易日历只请求一次上游，失败结果不缓存"""
+        from pytrading.service.kline_service import KlineService
+        from pytrading.utils.ttl_cache import TTLCache
+        start, end = date(2025, 3, 3), date(2025, 3, 14)
+        fetch = MagicMock(side_effect=[RuntimeError("down"), ['2025-03-03', '2025-03-04'], ['2025-03-03']])
+        monkeypatch.setitem(sys.modules, 'gm.api', types.SimpleNamespace(get_trading_dates=fetch))
+        monkeypatch.setattr(KlineService, '_calendar_cache', TTLCache("trading_calendar", 60))
+
+        assert KlineService._trading_dates("SHSE.600000", start, end) is None
+        first = KlineService._trading_dates("SHSE.600000", start, end)
+        second = KlineService._trading_dates("SHSE.601318", start, end)
+        other = KlineService._trading_dates("SZSE.000001", start, end)
+
+        assert first == second == [date(2025, 3, 3), date(2025, 3, 4)]
+        assert other == [date(2025, 3, 3)]
+        assert fetch.call_count == 3
+
+
+class TestBuildRows:
+    """测试增量行构造"""
+
+    def test_daily_sync_fetches_only_missing_day(self, db_session, kline_service):
+        """库中已有预热数据时，只拉取并写入缺失的一天"""
+        symbol = "SHSE.600010"
+        end = date(2025, 6, 30)
+        calendar = _trading_days(date(2024, 6, 1), end)
+        _store(db_session, symbol, calendar[:-1])
+
+        with patch.object(kline_service, '_trading_dates', return_value=calendar), \
+                patch.object(kline_service, '_fetch_bars', return_value=_bars([end])) as fetch:
+            rows = kline_service.build_rows(db_session, symbol, start_date="2024-06-01", end_date="2025-06-30")
+
+        fetch.assert_called_once_with(symbol, end, end)
+        assert [r['date'] for r in rows] == [end]
+        assert rows[0]['close'] == 10.5
+        assert rows[0]['macd_diff'] == pytest.approx(1.05)
+
+    def test_hole_rewrites_following_indicators(self, db_session, kline_service):
+        """补齐中间空洞后，空洞之后已有K线的指标一并更新"""
+        symbol = "SHSE.600011"
+        calendar = _trading_days(date(2024, 1, 1), date(2025, 6, 30))
+        hole = calendar[-5]
+        _store(db_session, symbol, [d for d in calendar if d != hole])
+
+        with patch.object(kline_service, '_trading_dates', return_value=calendar), \
+                patch.object(kline_service, '_fetch_bars', return_value=_bars([hole])):
+            rows = kline_service.build_rows(db_session, symbol, start_date="2024-01-01", end_date="2025-06-30")
+
+        assert [r['date'] for r in rows] == calendar[-5:]
+
+    def test_first_sync_fetches_warmup_but_writes_target_range(self, db_session, kline_service):
+        """首次同步向前多取预热数据，但只写入目标区间"""
+        symbol = "SHSE.600012"
+        start, end = date(2025, 3, 3), date(2025, 3, 14)
+        calendar = _trading_days(start, end)
+        warmup_days = _trading_days(start - timedelta(days=kline_service.WARMUP_DAYS), end)
+
+        with patch.object(kline_service, '_trading_dates', return_value=calendar), \
+                patch.object(kline_service, '_fetch_bars', return_value=_bars(warmup_days)) as fetch:
+            rows = kline_service.build_rows(db_session, symbol, start_date="2025-03-03", end_date="2025-03-14")
+
+        fetch.assert_called_once_with(symbol, start - timedelta(days=kline_service.WARMUP_DAYS), end)
+        assert [r['date'] for r in rows] == calendar
+
+    def test_nothing_fetched_without_stored_bars_raises(self, db_session, kline_service):
+        """上游无数据且库中没有该股票时视为失败，而不是“已是最新”"""
+        from pytrading.service.kline_service import KlineDataUnavailable
+        start, end = date(2025, 3, 3), date(2025, 3, 14)
+
+        with patch.object(kline_service, '_trading_dates', return_value=_trading_days(start, end)), \
+                patch.object(kline_service, '_fetch_bars', return_value=None), \
+                pytest.raises(KlineDataUnavailable):
+            kline_service.build_rows(db_session, "SHSE.699999", start_date="2025-03-03", end_date="2025-03-14")
+
+    def test_nothing_fetched_with_stored_bars_returns_empty(self, db_session, kline_service):
+        """库中已有数据时，缺口内无新数据（停牌、尚未收盘）不算失败"""
+        symbol = "SHSE.600013"
+        calendar = _trading_days(date(2024, 6, 1), date(2025, 6, 30))
+        _store(db_session, symbol, calendar[:-1])
+
+        with patch.object(kline_service, '_trading_dates', return_value=calendar), \
+                patch.object(kline_service, '_fetch_bars', return_value=pd.DataFrame()):
+            rows = kline_service.build_rows(db_session, symbol, start_date="2024-06-01", end_date="2025-06-30")
+
+        assert rows == []
+
+    def test_warmup_days_cover_warmup_bars_across_holidays(self, kline_service):
+        """预热自然日扣除春节、国庆长假后仍能覆盖 WARMUP_BARS 个交易日"""
+        end = date(2025, 2, 28)
+        weekdays = _trading_days(end - timedelta(days=kline_service.WARMUP_DAYS), end)
+        # 国庆 + 春节约 10 个工作日休市
+        assert len(weekdays) - 10 >= kline_service.WARMUP_BARS
+
+
+class TestWriteRows:
+    """测试批量 upsert"""
+
+    def test_write_rows_upserts_on_symbol_date(self, db_session, kline_service):
+        """重复写入同一 (symbol, date) 时更新而不是报错"""
+        from pytrading.db.mysql import StockKline
+
+        row = {
+            'symbol': "SHSE.600020", 'date': date(2025, 3, 3), 'open': 1.0, 'high': 1.0, 'low': 1.0,
+            'close': 1.0, 'volume': 1, 'macd_diff': None, 'macd_dea': None, 'macd_hist': None,
+        }
+        kline_service.write_rows(db_session, [row])
+        kline_service.write_rows(db_session, [dict(row, close=2.0)])
+
+        stored = db_session.query(StockKline).filter_by(symbol="SHSE.600020").all()
+        assert len(stored) == 1
+        assert float(stored[0].close) == 2.0
@@ -0,0 +1,103 @@
+"""
+KlineSyncJob 单元测试
+
+验证批量K线同步任务的并发拉取、攒批写库、失败统计和限流器.
+命名遵循: test_<场景>_<预期结果>
+"""
+
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+
+def _rows(symbol, n):
+    return [{'symbol': symbol, 'date': i} for i in range(n)]
+
+
+@pytest.fixture
+def kline_service():
+    from pytrading.service.kline_service import KlineService
+    with patch.object(KlineService, '_get_session', side_effect=lambda: MagicMock()):
+        yield KlineService
+
+
+class TestKlineSyncJob:
+    """测试批量同步任务"""
+
+    def test_run_writes_rows_in_batches(self, kline_service):
+        """按 kline_sync_batch_rows 攒批写库，剩余行在结束时写入"""
+        from pytrading.config.settings import config
+        from pytrading.service.kline_sync_job import KlineSyncJob
+
+        symbols = [f"SHSE.60000{i}" for i in range(5)]
+        job = KlineSyncJob(symbols=symbols)
+        with patch.object(config, 'kline_sync_batch_rows', 6), \
+                patch.object(config, 'kline_sync_workers', 2), \
+                patch.object(kline_service, 'build_rows', side_effect=lambda s, sym, *a, **k: _rows(sym, 3)), \
+                patch.object(kline_service, 'write_rows') as write:
+            job.run()
+
+        assert job.status == 'completed'
+        assert job.completed == 5
+        assert job.rows_written == 15
+        assert [len(c.args[1]) for c in write.call_args_list] == [6, 6, 3]
+
+    def test_failed_symbol_recorded_without_stopping_job(self, kline_service):
+        """单只股票失败只计入 failed，不影响其余股票"""
+        from pytrading.service.kline_sync_job import KlineSyncJob
+
+        def build(session, symbol, *args, **kwargs):
+            if symbol == "SHSE.600001":
+                raise RuntimeError("upstream error")
+            return _rows(symbol, 2)
+
+        job = KlineSyncJob(symbols=["SHSE.600000", "SHSE.600001", "SHSE.600002"])
+        with patch.object(kline_service, 'build_rows', side_effect=build), \
+                patch.object(kline_service, 'write_rows'):
+            job.run()
+
+        progress = job.to_dict()
+        assert progress['status'] == 'completed'
+        assert progress['completed'] == 2
+        assert progress['failed'] == 1
+        assert progress['progress'] == 100
+        assert progress['errors'][0]['symbol'] == "SHSE.600001"
+
+    def test_index_symbols_expanded_to_constituents(self, kline_service):
+        """指数代码展开为成分股并去重"""
+        from pytrading.py_trading import PyTrading
+        from pytrading.service.kline_sync_job import KlineSyncJob
+
+        job = KlineSyncJob(symbols=["SHSE.600000"], index_symbols=["SHSE.000300"])
+        with patch.object(PyTrading, 'get_index_symbols', return_value=["SHSE.600000", "SZSE.000001"]), \
+                patch.object(kline_service, 'build_rows', return_value=[]) as build, \
+                patch.object(kline_service, 'write_rows'):
+            job.run()
+
+        assert job.total == 2
+        assert sorted(c.args[1] for c in build.call_args_list) == ["SHSE.600000", "SZSE.000001"]
+
+
+class TestTokenBucket:
+    """测试令牌桶限流"""
+
+    def test_burst_then_throttled(self):
+        """突发额度用完后按速率补充令牌"""
+        from pytrading.utils.rate_limiter import TokenBucket
+
+        bucket = TokenBucket(rate=50, capacity=2)
+        assert bucket.acquire(timeout=0)
+        assert bucket.acquire(timeout=0)
+        assert not bucket.acquire(timeout=0)
+
+        started = time.monotonic()
+        assert bucket.acquire()
+        assert time.monotonic() - started >= 0.01
+
+    def test_zero_rate_unlimited(self):
+        """rate 为 0 时不限流"""
+        from pytrading.utils.rate_limiter import TokenBucket
+
+        bucket = TokenBucket(rate=0)
+        assert all(bucket.acquire(timeout=0) for _ in range(1000))
@@ -0,0 +1,187 @@
+"""
+回测日志保留策略单元测试
+
+验证过期任务日志归档为 gzip、分批清理、从归档透明查询以及删除任务时清理日志.
+命名遵循: test_<场景>_<预期结果>
+"""
+
+import json
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+
+@pytest.fixture
+def log_db(tmp_path):
+    """文件 SQLite 库（清理需要跨会话提交），预置一个过期任务、一个运行中任务和孤儿日志"""
+    from pytrading.db.log_repository import LogRepository
+    from pytrading.db.mysql import Base, BacktestTask
+    from pytrading.service.log_retention_service import LogRetentionService
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'logs.db'}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    session = Session()
+    old = datetime.now() - timedelta(days=40)
+    session.add_all([
+        BacktestTask(task_id='t-old', strategy_id=1, symbols=[], start_time=old, end_time=old,
+                     status='completed', updated_at=old),
+        BacktestTask(task_id='t-run', strategy_id=1, symbols=[], start_time=old, end_time=old,
+                     status='running', updated_at=old),
+    ])
+    session.commit()
+    session.close()
+
+    repo = LogRepository(engine=engine)
+    rows = []
+    for task_id in ('t-old', 't-run', 't-gone'):
+        for i in range(7):
+            rows.append({"task_id": task_id, "symbol": 'SZSE.300001' if i % 2 else None,
+                         "level": 'INFO', "message": f"{task_id}-{i}"})
+    repo.append_logs(rows)
+
+    with patch.object(LogRetentionService, '_get_session', side_effect=Session), \
+            patch('pytrading.service.log_retention_service.config.log_archive_dir', str(tmp_path / 'archive')), \
+            patch('pytrading.service.log_retention_service.config.log_purge_chunk', 2):
+        yield repo
+    engine.dispose()
+
+
+class TestArchive:
+    """测试归档与清理"""
+
+    def test_expired_tasks_selected(self, log_db):
+        """只选择超期的已结束任务和孤儿日志"""
+        from pytrading.service.log_retention_service import LogRetentionService
+
+        assert LogRetentionService.expired_task_ids(30) == ['t-gone', 't-old']
+
+    def test_archive_moves_rows_to_file(self, log_db):
+        """归档后数据库行被删除，查询从归档返回相同结果"""
+        from pytrading.service.log_retention_service import LogRetentionService
+
+        before_task = log_db.query_logs('t-old')
+        before_symbol = log_db.query_logs('t-old', symbol='SZSE.300001', after_id=before_task['items'][0]['id'])
+
+        result = LogRetentionService.archive_expired(30)
+        assert result == {"archived_tasks": 2, "archived_rows": 14}
+        assert log_db.query_logs('t-old')['items'] == []
+        assert len(log_db.query_logs('t-run')['items']) == 4
+
+        archived = LogRetentionService.query_archived('t-old')
+        assert archived['items'] == before_task['items']
+        assert archived['last_id'] == before_task['last_id']
+        after = before_task['items'][0]['id']
+        assert LogRetentionService.query_archived('t-old', 'SZSE.300001', after_id=after)['items'] \
+            == before_symbol['items']
+
+    def test_rearchive_merges_new_rows(self, log_db):
+        """已归档任务再次产生的日志合并进同一归档"""
+        from pytrading.service.log_retention_service import LogRetentionService
+
+        LogRetentionService.archive_task('t-old')
+        log_db.append_task_log('t-old', '补充日志')
+        assert LogRetentionService.archive_task('t-old') == 1
+
+        messages = [i['message'] for i in LogRetentionService.query_archived('t-old', limit=100)['items']]
+        assert messages[-1] == '补充日志'
+        assert len(messages) == 5
+
+    def test_unpurged_archived_rows_not_duplicated(self, log_db):
+        """归档已写入但清理失败的行，下次归档时只清理不重复写入"""
+        from pytrading.service.log_retention_service import LogRetentionService
+
+        with patch.object(LogRetentionService, '_purge_rows', side_effect=RuntimeError('locked')):
+            with pytest.raises(RuntimeError):
+                LogRetentionService.archive_task('t-old')
+        assert len(log_db.query_logs('t-old')['items']) == 4
+
+        assert LogRetentionService.archive_task('t-old') == 0
+        assert log_db.query_logs('t-old')['items'] == []
+        assert len(LogRetentionService.query_archived('t-old', limit=100)['items']) == 4
+
+    def test_archived_query_pages_without_loading_all(self, log_db):
+        """归档按 after_id 分页读取，取满一页即停止"""
+        from pytrading.service.log_retention_service import LogRetentionService
+
+        LogRetentionService.archive_task('t-old')
+        first = LogRetentionService.query_archived('t-old', limit=2)
+        second = LogRetentionService.query_archived('t-old', after_id=first['last_id'], limit=2)
+
+        assert [i['message'] for i in first['items'] + second['items']] == ['t-old-0', 't-old-2', 't-old-4', 't-old-6']
+        with patch('pytrading.service.log_retention_service.json.loads', wraps=json.loads) as loads:
+            LogRetentionService.query_archived('t-old', limit=1)
+        assert loads.call_count == 1
+
+    def test_archived_query_seeks_to_chunk_after_id(self, log_db):
+        """按索引定位到 after_id 所在的 member，不从头解压前面的日志"""
+        from pytrading.service.log_retention_service import LogRetentionService
+
+        LogRetentionService.archive_task('t-old')
+        log_db.append_task_log('t-old', '补充日志')
+        LogRetentionService.archive_task('t-old')
+        items = LogRetentionService.query_archived('t-old', limit=100)['items']
+        # 7 行按每 2 行一个 member 写入，再归档的 1 行追加为新的 member
+        assert len(LogRetentionService._load_index('t-old')['chunks']) == 5
+
+        with patch('pytrading.service.log_retention_service.json.loads', wraps=json.loads) as loads:
+            result = LogRetentionService.query_archived('t-old', after_id=items[-2]['id'], limit=1)
+        assert [i['message'] for i in result['items']] == ['补充日志']
+        assert loads.call_count == 1
+
+    def test_legacy_archive_without_index_still_readable(self, log_db):
+        """没有索引的旧归档整体作为一个 member 读取，并补写索引"""
+        import gzip
+        import os
+        from pytrading.service.log_retention_service import LogRetentionService
+
+        items = log_db.query_logs('t-old')['items']
+        os.makedirs(os.path.dirname(LogRetentionService.archive_path('t-old')))
+        with gzip.open(LogRetentionService.archive_path('t-old'), 'wt', encoding='utf-8') as f:
+            for item in items:
+                f.write(json.dumps(item, ensure_ascii=False) + "\n")
+
+        assert LogRetentionService.query_archived('t-old', after_id=items[0]['id'])['items'] == items[1:]
+        assert os.path.exists(LogRetentionService.index_path('t-old'))
+        assert LogRetentionService.archive_max_id('t-old') == items[-1]['id']
+
+    def test_query_merges_archive_and_partially_purged_db(self, log_db):
+        """清理进行到一半时，归档中的低 id 日志和数据库中的新日志合并返回，不重复"""
+        from pytrading.db.mysql import BacktestLog
+        from pytrading.service.log_retention_service import LogRetentionService
+
+        with patch.object(LogRetentionService, '_purge_rows'):
+            LogRetentionService.archive_task('t-old')
+        archived_ids = [i['id'] for i in log_db.query_logs('t-old')['items']]
+        # 只清理掉前两条
+        session = LogRetentionService._get_session()
+        session.query(BacktestLog).filter(BacktestLog.id.in_(archived_ids[:2])).delete(synchronize_session=False)
+        session.commit()
+        session.close()
+        log_db.append_task_log('t-old', '补充日志')
+
+        def query_db(after_id, limit):
+            return log_db.query_logs('t-old', after_id=after_id, limit=limit)
+
+        result = LogRetentionService.query_with_archive('t-old', None, 0, 100, query_db)
+        assert [i['message'] for i in result['items']] == ['t-old-0', 't-old-2', 't-old-4', 't-old-6', '补充日志']
+        assert result['last_id'] == result['items'][-1]['id']
+
+        first = LogRetentionService.query_with_archive('t-old', None, 0, 3, query_db)
+        rest = LogRetentionService.query_with_archive('t-old', None, first['last_id'], 3, query_db)
+        assert [i['message'] for i in first['items'] + rest['items']] \
+            == ['t-old-0', 't-old-2', 't-old-4', 't-old-6', '补充日志']
+        assert LogRetentionService.query_with_archive('t-old', None, rest['last_id'], 3, query_db)['items'] == []
+
+    def test_purge_task_removes_rows_and_archive(self, log_db):
+        """删除任务时清除数据库日志和归档文件"""
+        from pytrading.service.log_retention_service import LogRetentionService
+
+        LogRetentionService.archive_task('t-old')
+        assert LogRetentionService.purge_task('t-run') == 7
+        assert LogRetentionService.purge_task('t-old') == 0
+        assert not LogRetentionService.has_archive('t-old')
+        assert log_db.query_logs('t-run')['items'] == []
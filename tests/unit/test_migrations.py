@@ -0,0 +1,79 @@
+"""
+数据库迁移与慢查询建议单元测试
+
+命名遵循: test_<场景>_<预期结果>
+"""
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+
+@pytest.fixture
+def legacy_engine(tmp_path):
+    """模拟旧库：表已存在但缺少新增索引"""
+    from pytrading.db.mysql import Base
+    from pytrading.db.migrations.m0001_access_path_indexes import INDEXES
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        for _, name, _ in INDEXES:
+            connection.execute(text(f"DROP INDEX {name}"))
+    yield engine
+    engine.dispose()
+
+
+def _index_names(engine, table):
+    return {ix['name'] for ix in inspect(engine).get_indexes(table)}
+
+
+class TestMigrations:
+    """测试迁移执行"""
+
+    def test_upgrade_adds_missing_indexes_once(self, legacy_engine):
+        """旧库补齐索引并记录版本，重复执行不再运行"""
+        from pytrading.db.migrations import run_migrations
+
+        assert 'idx_log_task_symbol_id' not in _index_names(legacy_engine, 'backtest_logs')
+
+        assert run_migrations(legacy_engine) == ['0001']
+        assert 'idx_log_task_symbol_id' in _index_names(legacy_engine, 'backtest_logs')
+        assert 'idx_result_task_status' in _index_names(legacy_engine, 'backtest_results')
+        assert run_migrations(legacy_engine) == []
+
+    def test_log_query_uses_index(self, legacy_engine):
+        """迁移后日志增量查询走 (task_id, symbol, id) 索引"""
+        from pytrading.db.migrations import run_migrations
+        from pytrading.db.query_advisor import explain
+
+        run_migrations(legacy_engine)
+        plan = explain(legacy_engine,
+                       "SELECT * FROM backtest_logs WHERE task_id = ? AND symbol = ? AND id > ? ORDER BY id LIMIT 500",
+                       ("t1", "SHSE.600000", 0))
+
+        details = " ".join(str(step['detail']) for step in plan)
+        assert 'idx_log_task_symbol_id' in details
+        assert 'TEMP B-TREE' not in details
+
+
+class TestQueryAdvisor:
+    """测试慢查询采集与建议"""
+
+    def test_slow_full_scan_reported(self, tmp_path, monkeypatch):
+        """超过阈值的查询被采集，全表扫描给出提示"""
+        from pytrading.db import query_advisor
+
+        monkeypatch.setattr(query_advisor, '_recorder', None)
+        engine = create_engine(f"sqlite:///{tmp_path / 'slow.db'}")
+        with engine.begin() as connection:
+            connection.execute(text("CREATE TABLE t (id INTEGER PRIMARY KEY, v INTEGER)"))
+        query_advisor.install_slow_query_capture(engine, threshold_ms=1e-6)
+
+        with engine.connect() as connection:
+            connection.execute(text("SELECT * FROM t WHERE v = :v"), {"v": 1}).fetchall()
+
+        report = query_advisor.advise()
+        item = next(i for i in report if i['statement'].startswith('SELECT * FROM t'))
+        assert item['count'] == 1
+        assert any('全表扫描' in w for w in item['warnings'])
+        engine.dispose()
@@ -0,0 +1,90 @@
+"""
+腾讯行情异步客户端单元测试
+
+验证批量响应解析、多代码合并为一次请求、超量拆分并发请求、短时缓存以及请求全部失败时抛出异常.
+命名遵循: test_<场景>_<预期结果>
+"""
+
+import httpx
+import pytest
+
+from pytrading.utils.quote_client import TencentQuoteClient
+
+
+def _line(symbol, price, change_amount, change_pct):
+    fields = [''] * 40
+    fields[3], fields[31], fields[32] = str(price), str(change_amount), str(change_pct)
+    return f'v_{symbol}="{"~".join(fields)}";\n'
+
+
+def _transport(requests, fail=False):
+    def handler(request: httpx.Request):
+        requests.append(request)
+        if fail:
+            return httpx.Response(502)
+        symbols = str(request.url).split('q=')[1].split(',')
+        body = ''.join(_line(s, 10.5, 0.5, 5.0) for s in symbols if s != 'sz000000')
+        return httpx.Response(200, content=body.encode('gbk'))
+    return httpx.MockTransport(handler)
+
+
+class TestParseBatch:
+    """响应解析"""
+
+    def test_parse_batch_extracts_price_fields(self):
+        """按 ~ 分隔提取当前价、涨跌额、涨跌幅"""
+        text = _line('sh000001', 3200.12, -12.3, -0.38) + 'v_sz399001="1~short";\n'
+        assert TencentQuoteClient.parse_batch(text) == {
+            'sh000001': {"price": 3200.12, "change_amount": -12.3, "change_pct": -0.38},
+        }
+
+    def test_to_tencent_symbol(self):
+        """交易所前缀转换"""
+        assert TencentQuoteClient.to_tencent_symbol('SHSE.600000') == 'sh600000'
+        assert TencentQuoteClient.to_tencent_symbol('SZSE.399001') == 'sz399001'
+
+
+class TestFetchQuotes:
+    """批量拉取"""
+
+    @pytest.mark.asyncio
+    async def test_multiple_codes_one_request(self):
+        """多个代码合并为一次请求，结果按原始代码返回"""
+        requests = []
+        client = TencentQuoteClient(cache_ttl=5, transport=_transport(requests))
+        quotes = await client.fetch_quotes(['SHSE.000001', 'SZSE.399001', 'SZSE.000000'])
+        await client.aclose()
+        assert len(requests) == 1
+        assert set(quotes) == {'SHSE.000001', 'SZSE.399001'}
+        assert quotes['SHSE.000001']['change_pct'] == 5.0
+
+    @pytest.mark.asyncio
+    async def test_large_batch_split_into_chunks(self):
+        """超过单次上限时拆分请求"""
+        requests = []
+        client = TencentQuoteClient(cache_ttl=5, transport=_transport(requests))
+        codes = [f"SHSE.{600000 + i}" for i in range(TencentQuoteClient.MAX_CODES_PER_REQUEST + 1)]
+        quotes = await client.fetch_quotes(codes)
+        await client.aclose()
+        assert len(requests) == 2
+        assert len(quotes) == len(codes)
+
+    @pytest.mark.asyncio
+    async def test_cached_quotes_not_requested_again(self):
+        """缓存有效期内不再请求"""
+        requests = []
+        client = TencentQuoteClient(cache_ttl=5, transport=_transport(requests))
+        await client.fetch_quotes(['SHSE.000001'])
+        assert await client.fetch_quote('SHSE.000001') == {"price": 10.5, "change_amount": 0.5, "change_pct": 5.0}
+        await client.aclose()
+        assert len(requests) == 1
+
+    @pytest.mark.asyncio
+    async def test_all_chunks_failed_raises(self):
+        """请求全部失败时抛出 UpstreamUnavailable，而不是返回空结果"""
+        from pytrading.utils.blocking import UpstreamUnavailable
+
+        client = TencentQuoteClient(cache_ttl=5, transport=_transport([], fail=True))
+        with pytest.raises(UpstreamUnavailable):
+            await client.fetch_quotes(['SHSE.000001'])
+        await client.aclose()
@@ -0,0 +1,122 @@
+"""
+快速 JSON 响应与选择性 GZip 单元测试
+
+验证 NumPy/Decimal/datetime 直接序列化、输出与 FastAPI 默认路径一致、无 orjson 时的标准库退化，
+以及 GZip 只压缩超过阈值的非 SSE 响应.
+命名遵循: test_<场景>_<预期结果>
+"""
+
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+
+PAYLOAD = {
+    "price": Decimal("12.34"),
+    "count": Decimal("5"),
+    "created_at": datetime(2025, 1, 2, 3, 4, 5),
+    "day": date(2025, 1, 2),
+    "closes": np.array([1.5, 2.5]),
+    "volume": np.int64(100),
+    "ratio": np.float32(0.5),
+    "name": "浦发银行",
+}
+
+
+class TestDumps:
+    """测试 dumps / FastJSONResponse"""
+
+    def test_special_types_serialized_directly(self):
+        """Decimal、datetime、NumPy 数组和标量无需预处理即可序列化"""
+        from pytrading.api.responses import dumps
+
+        data = json.loads(dumps(PAYLOAD))
+
+        assert data == {
+            "price": 12.34, "count": 5, "created_at": "2025-01-02T03:04:05", "day": "2025-01-02",
+            "closes": [1.5, 2.5], "volume": 100, "ratio": 0.5, "name": "浦发银行",
+        }
+
+    def test_plain_payload_matches_fastapi_default_bytes(self):
+        """普通 dict 的输出与 FastAPI 默认 JSONResponse 字节一致"""
+        from fastapi.encoders import jsonable_encoder
+        from starlette.responses import JSONResponse
+        from pytrading.api.responses import FastJSONResponse
+
+        payload = {"data": [{"id": 1, "symbol": "SHSE.600000", "name": "浦发银行", "pnl_ratio": 0.25,
+                             "price": Decimal("10.5"), "tags": None, "ok": True}], "total": 1}
+
+        assert FastJSONResponse(payload).body == JSONResponse(jsonable_encoder(payload)).body
+
+    def test_nan_serialized_as_null(self):
+        """NaN 输出为 null 而不是非法 JSON"""
+        from pytrading.api.responses import dumps
+        assert json.loads(dumps({"v": float("nan")})) == {"v": None}
+
+    def test_without_orjson_stdlib_fallback_equivalent(self):
+        """未安装 orjson 时退回标准库，结果一致"""
+        from pytrading.api import responses
+        expected = json.loads(responses.dumps(PAYLOAD))
+
+        with patch.object(responses, "orjson", None):
+            body = responses.dumps({**PAYLOAD, "bad": float("inf")})
+
+        assert json.loads(body) == {**expected, "bad": None}
+
+    def test_unknown_type_raises(self):
+        """无法序列化的类型抛出 TypeError"""
+        from pytrading.api.responses import dumps
+        with pytest.raises(TypeError):
+            dumps({"v": object()})
+
+
+class TestSelectiveGZip:
+    """测试 SelectiveGZipMiddleware"""
+
+    @pytest.fixture
+    def client(self):
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+        from pytrading.api.responses import FastJSONResponse, SelectiveGZipMiddleware
+
+        app = FastAPI(default_response_class=FastJSONResponse)
+        app.add_middleware(SelectiveGZipMiddleware, minimum_size=1024)
+
+        @app.get("/api/big")
+        async def big():
+            return {"data": ["SHSE.600000"] * 500}
+
+        @app.get("/api/small")
+        async def small():
+            return {"ok": True}
+
+        @app.get("/api/stream/big")
+        async def stream_big():
+            return {"data": ["SHSE.600000"] * 500}
+
+        @app.get("/api/backtest-results/export")
+        async def export():
+            return {"data": ["SHSE.600000"] * 500}
+
+        return TestClient(app)
+
+    def test_large_response_compressed(self, client):
+        """超过阈值的响应 gzip 压缩，内容不变"""
+        response = client.get("/api/big", headers={"Accept-Encoding": "gzip"})
+        assert response.headers.get("content-encoding") == "gzip"
+        assert len(response.json()["data"]) == 500
+
+    def test_small_response_not_compressed(self, client):
+        """小响应不压缩"""
+        response = client.get("/api/small", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in response.headers
+
+    @pytest.mark.parametrize("path", ["/api/stream/big", "/api/backtest-results/export"])
+    def test_stream_and_export_paths_excluded(self, client, path):
+        """SSE 推送和流式导出路径不压缩"""
+        response = client.get(path, headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in response.headers
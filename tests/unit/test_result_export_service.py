@@ -0,0 +1,93 @@
+"""
+回测结果流式导出单元测试
+
+验证服务端游标分批读取、CSV 逐批输出（表头先行、字段转义）以及 Parquet/Arrow 分批写出后可完整读回.
+命名遵循: test_<场景>_<预期结果>
+"""
+
+import csv
+import io
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+
+@pytest.fixture
+def saver(db_session):
+    """使用测试会话的 saver，预置 25 条结果（含 NULL 收益率和带逗号的名称）"""
+    from pytrading.db.mysql import BackTestResult
+    from pytrading.model.mysql_back_test_saver import MySQLBackTestSaver
+
+    for i in range(25):
+        db_session.add(BackTestResult(
+            symbol=f"SHSE.{600000 + i}", name=f"股票,{i}", strategy_name='MACD', trending_type='UpTrend',
+            backtest_start_time=datetime(2024, 1, 1), backtest_end_time=datetime(2024, 6, 30) - timedelta(days=i),
+            pnl_ratio=None if i == 0 else Decimal("0.1234"), win_ratio=Decimal("0.5"), open_count=i,
+            created_at=datetime(2025, 1, 1) + timedelta(minutes=i)))
+    db_session.flush()
+
+    saver = MySQLBackTestSaver.__new__(MySQLBackTestSaver)
+    saver.mysql_client = MagicMock()
+    saver.mysql_client.get_session.return_value = db_session
+    with patch.object(db_session, 'close'):
+        yield saver
+
+
+class TestIterResultRows:
+    """分批读取"""
+
+    def test_rows_streamed_in_chunks_newest_first(self, saver):
+        """按 chunk_size 分批，顺序与列表默认排序一致"""
+        from pytrading.db.mysql import BackTestResult
+        chunks = list(saver.iter_result_rows([BackTestResult.symbol], chunk_size=10))
+        assert [len(c) for c in chunks] == [10, 10, 5]
+        assert chunks[0][0][0] == "SHSE.600024"
+
+    def test_filters_applied(self, saver):
+        """筛选条件与列表查询一致"""
+        from pytrading.db.mysql import BackTestResult
+        rows = [r for c in saver.iter_result_rows([BackTestResult.symbol], symbol="SHSE.600001") for r in c]
+        assert [r[0] for r in rows] == ["SHSE.600001"]
+        assert saver.has_results(symbol="SHSE.600001")
+        assert not saver.has_results(symbol="SZSE.000001")
+
+
+class TestCsvExport:
+    """CSV 导出"""
+
+    def test_header_first_then_one_block_per_chunk(self, saver):
+        """首块只有 BOM+表头，之后每批一块，带逗号的字段正确转义"""
+        from pytrading.service.result_export_service import ResultExportService
+        blocks = list(ResultExportService.iter_csv(saver, {}, chunk_size=10))
+        assert len(blocks) == 4
+        assert blocks[0].decode('utf-8').startswith('﻿股票代码,股票名称')
+        rows = list(csv.reader(io.StringIO(b''.join(blocks).decode('utf-8-sig'))))
+        assert len(rows) == 26
+        last = rows[-1]
+        assert last[0] == "SHSE.600000" and last[1] == "股票,0"
+        assert last[4] == "0.00%" and last[7] == "50.00%"
+        assert rows[1][4] == "12.34%" and rows[1][10] == "2024-01-01 00:00:00"
+
+
+class TestArrowExport:
+    """Parquet / Arrow 导出"""
+
+    @pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+    def test_batches_read_back_complete(self, saver, fmt):
+        """分批写出的字节拼接后可完整读回，数值保持原始比例"""
+        pa = pytest.importorskip("pyarrow")
+        from pytrading.service.result_export_service import ResultExportService
+
+        data = b''.join(ResultExportService.iter_arrow(saver, {}, fmt=fmt, chunk_size=10))
+        if fmt == "parquet":
+            import pyarrow.parquet as pq
+            table = pq.read_table(pa.BufferReader(data))
+            assert pq.ParquetFile(pa.BufferReader(data)).num_row_groups == 3
+        else:
+            table = pa.ipc.open_stream(data).read_all()
+        assert table.num_rows == 25
+        assert table.column("pnl_ratio").to_pylist()[-1] is None
+        assert table.column("pnl_ratio").to_pylist()[0] == pytest.approx(0.1234)
+        assert table.column("name").to_pylist()[0] == "股票,24"
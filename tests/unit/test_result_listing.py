@@ -0,0 +1,88 @@
+"""
+回测结果列表单元测试
+
+验证键集分页（含 NULL 排序值）与 OFFSET 分页结果一致，以及总数缓存失效.
+命名遵循: test_<场景>_<预期结果>
+"""
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+
+@pytest.fixture
+def saver(db_session):
+    """使用测试会话的 saver，预置 23 条结果（含 NULL 收益率和重复值）"""
+    from pytrading.db.mysql import BackTestResult
+    from pytrading.model.mysql_back_test_saver import MySQLBackTestSaver
+
+    for i in range(23):
+        pnl = None if i % 5 == 0 else Decimal(str(round((i % 7) * 0.01, 4)))
+        db_session.add(BackTestResult(
+            symbol=f"SZSE.{300000 + i}", name=f"股票{i}", strategy_name='MACD',
+            backtest_start_time=datetime(2024, 1, 1), backtest_end_time=datetime(2024, 6, 30) - timedelta(days=i),
+            pnl_ratio=pnl, created_at=datetime(2025, 1, 1) + timedelta(hours=i % 4)))
+    db_session.flush()
+
+    saver = MySQLBackTestSaver.__new__(MySQLBackTestSaver)
+    saver.mysql_client = MagicMock()
+    saver.mysql_client.get_session.return_value = db_session
+    MySQLBackTestSaver.invalidate_cache()
+    with patch.object(db_session, 'close'), \
+            patch('pytrading.db.analytics.DuckDBAnalytics.available', return_value=False):
+        yield saver
+
+
+def _walk_cursor(saver, **kwargs):
+    ids, cursor = [], None
+    while True:
+        page = saver.get_all_results(per_page=4, cursor=cursor, **kwargs)
+        ids += [r['id'] for r in page['data']]
+        cursor = page['next_cursor']
+        if not cursor:
+            return ids
+
+
+class TestKeysetPagination:
+    """测试键集分页"""
+
+    @pytest.mark.parametrize("sort_by,sort_order", [
+        (None, 'desc'),
+        ('pnl_ratio', 'desc'),
+        ('pnl_ratio', 'asc'),
+        ('created_at', 'asc'),
+    ])
+    def test_cursor_walk_matches_offset_order(self, saver, sort_by, sort_order):
+        """沿游标翻页得到的顺序与一次性排序一致，且不重不漏"""
+        full = saver.get_all_results(per_page=100, sort_by=sort_by, sort_order=sort_order)
+        walked = _walk_cursor(saver, sort_by=sort_by, sort_order=sort_order)
+
+        assert walked == [r['id'] for r in full['data']]
+        assert len(walked) == 23
+
+    def test_invalid_cursor_raises_value_error(self, saver):
+        """无法解析的游标抛出 ValueError"""
+        with pytest.raises(ValueError):
+            saver.get_all_results(cursor="not-a-cursor")
+
+
+class TestCountCache:
+    """测试总数缓存"""
+
+    def test_count_cached_until_invalidated(self, saver, db_session):
+        """相同筛选条件复用总数，写入后失效"""
+        from pytrading.db.mysql import BackTestResult
+        from pytrading.model.mysql_back_test_saver import MySQLBackTestSaver
+
+        assert saver.get_all_results()['total'] == 23
+        with patch('sqlalchemy.orm.Query.count', side_effect=AssertionError("count should be cached")):
+            assert saver.get_all_results()['total'] == 23
+
+        db_session.add(BackTestResult(symbol="SZSE.399999", backtest_start_time=datetime(2023, 1, 1),
+                                      backtest_end_time=datetime(2023, 6, 30)))
+        db_session.flush()
+        MySQLBackTestSaver.invalidate_cache()
+
+        assert saver.get_all_results()['total'] == 24
@@ -0,0 +1,109 @@
+"""
+回测结果汇总服务单元测试
+
+验证 SQL 聚合结果与逐条计算一致，以及已完成任务的汇总缓存.
+命名遵循: test_<场景>_<预期结果>
+"""
+
+from datetime import datetime
+from decimal import Decimal
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+START = datetime(2024, 1, 1)
+END = datetime(2024, 6, 30)
+
+
+@pytest.fixture
+def results(db_session):
+    """预置 37 条 MACD 结果（含 NULL）和 1 条其他策略结果"""
+    from pytrading.db.mysql import BackTestResult
+
+    pnls, wins = [], []
+    for i in range(37):
+        pnl = None if i % 9 == 0 else Decimal(str(round((i * 7 % 23 - 11) * 0.013, 4)))
+        win = Decimal(str(round((i % 11) / 10, 4)))
+        pnls.append(float(pnl or 0))
+        wins.append(float(win))
+        db_session.add(BackTestResult(
+            symbol=f"SZSE.{300000 + i}", strategy_name='MACD', trending_type=['ZZ', 'DZ', None][i % 3],
+            backtest_start_time=START, backtest_end_time=END, pnl_ratio=pnl, win_ratio=win,
+            sharp_ratio=Decimal('0.5'), max_drawdown=Decimal('0.1')))
+    db_session.add(BackTestResult(symbol='SZSE.000001', strategy_name='BOLL', pnl_ratio=Decimal('9'),
+                                  backtest_start_time=START, backtest_end_time=END))
+    db_session.flush()
+    return np.array(pnls), np.array(wins)
+
+
+class TestSummarize:
+    """测试按策略和区间汇总"""
+
+    def test_aggregates_match_python(self, db_session, results):
+        """均值、分位数、盈利数量与逐条计算一致"""
+        from pytrading.service.result_summary_service import ResultSummaryService
+
+        pnls, _ = results
+        summary = ResultSummaryService.summarize(db_session, 'MACD', START, END)
+
+        assert summary['total_count'] == 37
+        assert summary['avg_pnl_ratio'] == round(pnls.mean(), 4)
+        assert summary['profitable_count'] == int((pnls > 0).sum())
+        for key, p in (('p10', 10), ('p25', 25), ('p50', 50), ('p75', 75), ('p90', 90)):
+            assert summary['pnl_ratio_percentiles'][key] == pytest.approx(np.percentile(pnls, p), abs=1e-4)
+        assert summary['median_pnl_ratio'] == summary['pnl_ratio_percentiles']['p50']
+
+    def test_distribution_and_trending_counts(self, db_session, results):
+        """胜率分布区间计数和趋势类型计数正确"""
+        from pytrading.service.result_summary_service import ResultSummaryService
+
+        _, wins = results
+        summary = ResultSummaryService.summarize(db_session, 'MACD', START, END)
+
+        expected = np.histogram(wins, bins=[0, 0.2, 0.4, 0.6, 0.8, 1.0001])[0].tolist()
+        assert [b['count'] for b in summary['win_ratio_distribution']] == expected
+        assert summary['trending_type_counts'] == {'ZZ': 13, 'DZ': 12, 'unknown': 12}
+
+    def test_no_results_returns_empty_summary(self, db_session):
+        """无结果时返回 total_count=0"""
+        from pytrading.service.result_summary_service import ResultSummaryService
+
+        summary = ResultSummaryService.summarize(db_session, 'NONE', START, END)
+        assert summary['total_count'] == 0
+
+
+class TestTaskSummaryCache:
+    """测试任务汇总缓存"""
+
+    def test_completed_task_summary_cached(self, db_session, results):
+        """已完成任务计算一次后复用 result_summary"""
+        from pytrading.db.mysql import BacktestTask, Strategy
+        from pytrading.service.result_summary_service import ResultSummaryService
+
+        strategy = Strategy(name='MACD', display_name='MACD', strategy_type='trend')
+        db_session.add(strategy)
+        db_session.flush()
+        task = BacktestTask(task_id='t-summary', strategy_id=strategy.id, symbols=[], start_time=START,
+                            end_time=END, status='completed', result_summary={'total_count': 1})
+        db_session.add(task)
+        db_session.flush()
+
+        with patch.object(db_session, 'commit', db_session.flush):
+            first = ResultSummaryService.task_summary(db_session, task)
+            assert task.result_summary['total_count'] == 37
+            with patch.object(ResultSummaryService, 'summarize') as summarize:
+                assert ResultSummaryService.task_summary(db_session, task) == first
+                summarize.assert_not_called()
+
+
+class TestSystemOverview:
+    """测试系统状态统计"""
+
+    def test_overview_limited_to_sample(self, db_session, results):
+        """只统计最近 sample 条结果"""
+        from pytrading.service.result_summary_service import ResultSummaryService
+
+        overview = ResultSummaryService.system_overview(db_session, sample=10)
+        assert overview['result_count'] == 10
+        assert 0 <= overview['profitable_count'] <= 10
@@ -0,0 +1,119 @@
+"""
+全市场行情快照服务单元测试
+
+验证列式快照的概况/排行/宽度计算、过期刷新、并发共享刷新以及刷新失败时回退旧快照.
+命名遵循: test_<场景>_<预期结果>
+"""
+
+import threading
+import time
+from datetime import datetime
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pytrading.service.spot_snapshot_service import SpotSnapshot, SpotSnapshotService
+
+
+def _spot_df():
+    return pd.DataFrame({
+        '代码': ['600000', '600036', '000001', '000002', '300750', '688981'],
+        '名称': ['浦发银行', '招商银行', '平安银行', '万科A', '宁德时代', '中芯国际'],
+        '最新价': [10.0, 35.0, 12.0, 8.0, 200.0, None],
+        '涨跌幅': [10.01, 1.5, 0.0, -10.0, -2.3, None],
+        '成交额': [1e8, 3e9, 2e9, 5e8, 8e9, 4e9],
+    })
+
+
+class TestSpotSnapshot:
+    """列式快照计算"""
+
+    def test_summary_matches_dataframe_counts(self):
+        """概况统计与 DataFrame 逐列过滤结果一致"""
+        snapshot = SpotSnapshot.from_dataframe(_spot_df())
+        assert snapshot.summary() == {
+            "limit_up": 1, "limit_down": 1, "up_count": 2, "down_count": 2, "flat_count": 1,
+            "total_amount": 176.0, "total_stocks": 6,
+        }
+
+    def test_top_uses_partition_order_and_skips_nan(self):
+        """排行按值排序，NaN 不参与"""
+        snapshot = SpotSnapshot.from_dataframe(_spot_df())
+        assert [r["code"] for r in snapshot.top("change_pct", 3)] == ['600000', '600036', '000001']
+        assert [r["code"] for r in snapshot.top("change_pct", 10, largest=False)][:2] == ['000002', '300750']
+        assert len(snapshot.top("change_pct", 10)) == 5
+        assert snapshot.top("amount", 1)[0] == {
+            "code": '300750', "name": '宁德时代', "price": 200.0, "change_pct": -2.3, "amount": 8e9,
+        }
+
+    def test_top_matches_nlargest_on_random_data(self):
+        """随机数据下与 pandas nlargest 结果一致"""
+        rng = np.random.default_rng(0)
+        df = pd.DataFrame({'代码': [f"{i:06d}" for i in range(500)], '名称': ['x'] * 500,
+                           '最新价': rng.random(500), '涨跌幅': rng.normal(size=500), '成交额': rng.random(500)})
+        snapshot = SpotSnapshot.from_dataframe(df)
+        expected = df.nlargest(10, '涨跌幅')['代码'].tolist()
+        assert [r["code"] for r in snapshot.top("change_pct", 10)] == expected
+
+    def test_breadth_up_ratio(self):
+        """上涨占比按全部标的计算"""
+        breadth = SpotSnapshot.from_dataframe(_spot_df()).breadth()
+        assert breadth["up_ratio"] == pytest.approx(2 / 6)
+
+
+class TestSpotSnapshotService:
+    """快照刷新"""
+
+    def test_get_reuses_fresh_snapshot(self):
+        """有效期内只请求一次上游"""
+        calls = []
+        service = SpotSnapshotService(interval=60, idle_ttl=60, fetcher=lambda: calls.append(1) or _spot_df())
+        assert service.get() is service.get()
+        assert len(calls) == 1
+
+    def test_expired_snapshot_refreshes(self):
+        """过期后重新请求"""
+        calls = []
+        service = SpotSnapshotService(interval=60, idle_ttl=60, fetcher=lambda: calls.append(1) or _spot_df())
+        first = service.get()
+        first.created_monotonic -= 61
+        assert service.get() is not first
+        assert len(calls) == 2
+
+    def test_concurrent_get_shares_one_refresh(self):
+        """并发获取只刷新一次"""
+        calls = []
+
+        def slow_fetch():
+            calls.append(1)
+            time.sleep(0.05)
+            return _spot_df()
+
+        service = SpotSnapshotService(interval=60, idle_ttl=60, fetcher=slow_fetch)
+        threads = [threading.Thread(target=service.get) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len(calls) == 1
+
+    def test_refresh_failure_returns_stale_snapshot(self):
+        """刷新失败时返回旧快照，无快照时抛出异常"""
+        service = SpotSnapshotService(interval=60, idle_ttl=60, fetcher=_spot_df)
+        first = service.get()
+        first.created_monotonic -= 61
+        with patch.object(service, '_fetcher', side_effect=RuntimeError("timeout")):
+            assert service.get() is first
+        assert service.stats()["failure_count"] == 1
+
+        empty = SpotSnapshotService(interval=60, idle_ttl=60, fetcher=lambda: pd.DataFrame())
+        with pytest.raises(ValueError):
+            empty.get()
+
+    def test_is_trading_time_sessions(self):
+        """交易时段判定"""
+        assert SpotSnapshotService.is_trading_time(datetime(2026, 10, 19, 10, 0))
+        assert not SpotSnapshotService.is_trading_time(datetime(2026, 10, 19, 12, 0))
+        assert not SpotSnapshotService.is_trading_time(datetime(2026, 10, 18, 10, 0))
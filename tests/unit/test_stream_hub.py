@@ -0,0 +1,182 @@
+"""
+服务端推送（SSE）单元测试
+
+验证同一主题多个订阅共享一个生产者、日志游标分页、任务进度只推送变化、补齐去重以及慢订阅者断开.
+命名遵循: test_<场景>_<预期结果>
+"""
+
+import asyncio
+
+import pytest
+
+from pytrading.api.stream_hub import (LogTopic, QuoteTopic, StreamHub, Subscription, TaskProgressTopic, Topic,
+                                      format_sse, sse_stream)
+
+
+class CountingTopic(Topic):
+    interval = 0.01
+
+    def __init__(self, key):
+        super().__init__(key)
+        self.n = 0
+
+    async def poll(self):
+        self.n += 1
+        return [("tick", {"n": self.n}, self.n)]
+
+
+def _log_query(total):
+    calls = []
+
+    async def query(task_id, symbol, after_id, limit):
+        calls.append(after_id)
+        items = [{"id": i, "message": f"line {i}"} for i in range(after_id + 1, min(after_id + limit, total) + 1)]
+        return {"items": items, "last_id": items[-1]["id"] if items else after_id}
+    return query, calls
+
+
+async def _never_disconnected():
+    return False
+
+
+class TestStreamHub:
+    """主题共享与生命周期"""
+
+    @pytest.mark.asyncio
+    async def test_subscribers_share_one_producer(self):
+        """同一 key 的两个订阅共享一个主题，收到相同事件"""
+        hub = StreamHub(queue_size=100)
+        first, created_first = hub.subscribe("k", lambda: CountingTopic("k"))
+        second, created_second = hub.subscribe("k", lambda: CountingTopic("k"))
+        assert created_first and not created_second
+        assert first.topic is second.topic
+        e1 = await first.get(1)
+        e2 = await second.get(1)
+        assert e1 == e2
+        hub.unsubscribe(first)
+        hub.unsubscribe(second)
+        assert hub.stats()["topics"] == []
+
+    @pytest.mark.asyncio
+    async def test_last_unsubscribe_stops_producer(self):
+        """最后一个订阅离开后生产者停止"""
+        hub = StreamHub(queue_size=100)
+        sub, _ = hub.subscribe("k", lambda: CountingTopic("k"))
+        task = sub.topic.task
+        await sub.get(1)
+        hub.unsubscribe(sub)
+        await asyncio.sleep(0.02)
+        assert task.cancelled()
+
+    def test_full_queue_marks_lagged(self):
+        """队列满时标记为 lagged 而不阻塞生产者"""
+        sub = Subscription(CountingTopic("k"), maxsize=1)
+        sub.put(("a", 1, None))
+        sub.put(("b", 2, None))
+        assert sub.lagged and sub.queue.qsize() == 1
+
+
+class TestTopics:
+    """主题轮询"""
+
+    @pytest.mark.asyncio
+    async def test_log_topic_pages_from_cursor(self):
+        """日志主题从游标开始分页拉取到最新"""
+        query, calls = _log_query(total=1200)
+        topic = LogTopic("k", query, "t1", None, after_id=100)
+        events = await topic.poll()
+        assert [e[2] for e in events] == list(range(101, 1201))
+        assert topic.cursor == 1200
+        assert await topic.poll() == []
+
+    @pytest.mark.asyncio
+    async def test_task_topic_emits_only_changes(self):
+        """任务主题只推送状态或进度变化"""
+        rows = [{"task_id": "t1", "status": "running", "progress": 10},
+                {"task_id": "t2", "status": "pending", "progress": 0}]
+
+        async def query():
+            return [dict(r) for r in rows]
+
+        topic = TaskProgressTopic("tasks", query)
+        assert len(await topic.poll()) == 2
+        rows[0]["progress"] = 20
+        events = await topic.poll()
+        assert [e[1]["task_id"] for e in events] == ["t1"]
+        assert len(topic.snapshot()) == 2
+
+    @pytest.mark.asyncio
+    async def test_quote_topic_pushes_changed_quotes(self):
+        """行情主题只推送变化的代码"""
+        quotes = {"SHSE.000001": {"price": 1.0}, "SZSE.399001": {"price": 2.0}}
+
+        async def fetch(symbols):
+            return {k: dict(v) for k, v in quotes.items()}
+
+        topic = QuoteTopic("q", fetch, list(quotes))
+        await topic.poll()
+        quotes["SZSE.399001"]["price"] = 2.1
+        assert await topic.poll() == [("quotes", {"SZSE.399001": {"price": 2.1}}, None)]
+
+
+class TestSseStream:
+    """SSE 输出"""
+
+    def test_format_sse(self):
+        """事件按 id/event/data 行编码"""
+        assert format_sse("log", {"m": "中文"}, 5) == 'id: 5\nevent: log\ndata: {"m": "中文"}\n\n'
+
+    @pytest.mark.asyncio
+    async def test_catch_up_dedupes_overlapping_events(self):
+        """加入已存在的主题时先发送补齐事件，与队列中的实时事件按 ID 去重"""
+        hub = StreamHub(queue_size=100)
+        topic = CountingTopic("k")
+        topic.interval = 60
+        owner, _ = hub.subscribe("k", lambda: topic)
+
+        async def before():
+            return [("tick", {}, 1), ("tick", {}, 2)]
+
+        stream = sse_stream(hub, "k", lambda: CountingTopic("k"), _never_disconnected, before=before, min_id=0)
+        chunks = [await stream.__anext__()]
+        topic.publish(("tick", {}, 2))
+        topic.publish(("tick", {}, 3))
+        chunks += [await stream.__anext__() for _ in range(3)]
+        await stream.aclose()
+        ids = [c.split("\n")[0] for c in chunks[1:]]
+        assert ids == ["id: 1", "id: 2", "id: 3"]
+        assert len(topic.subscribers) == 1
+
+        hub.unsubscribe(owner)
+        assert hub.stats()["topics"] == []
+
+    @pytest.mark.asyncio
+    async def test_unstarted_stream_leaves_no_subscription(self):
+        """响应开始前客户端断开（生成器从未迭代）时不建立订阅"""
+        hub = StreamHub(queue_size=100)
+        stream = sse_stream(hub, "k", lambda: CountingTopic("k"), _never_disconnected)
+        await stream.aclose()
+        assert hub.stats()["topics"] == []
+
+    @pytest.mark.asyncio
+    async def test_lagged_subscriber_gets_lagged_event_and_closes(self):
+        """慢订阅者收到 lagged 事件后断开"""
+        hub = StreamHub(queue_size=1)
+        topic = CountingTopic("k")
+        topic.interval = 60
+        stream = sse_stream(hub, "k", lambda: topic, _never_disconnected)
+        await stream.__anext__()
+        await asyncio.sleep(0)
+        topic.publish(("tick", {}, 99))
+        assert topic.subscribers[0].lagged
+        chunks = [chunk async for chunk in stream]
+        assert chunks[-1].startswith("event: lagged")
+        assert hub.stats()["topics"] == []
+
+    def test_topic_requires_poll(self):
+        """Topic 是抽象基类，未实现 poll 的子类不能实例化"""
+        class NoPoll(Topic):
+            pass
+
+        with pytest.raises(TypeError):
+            NoPoll("k")
@@ -0,0 +1,181 @@
+"""
+股票检索索引单元测试
+
+验证代码精确/后缀、代码前缀、名称前缀、名称包含、拼音首字母检索，索引失效后重建，
+以及回测结果按关键字筛选时保留子串匹配并补充拼音首字母命中.
+命名遵循: test_<场景>_<预期结果>
+"""
+
+import time
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+ROWS = [
+    {"id": 1, "symbol": "SHSE.600000", "name": "浦发银行", "market": "A", "industry": "银行"},
+    {"id": 2, "symbol": "SHSE.601318", "name": "中国平安", "market": "A", "industry": "保险"},
+    {"id": 3, "symbol": "SZSE.000001", "name": "平安银行", "market": "A", "industry": "银行"},
+    {"id": 4, "symbol": "SZSE.000002", "name": "万科A", "market": "A", "industry": "房地产"},
+    {"id": 5, "symbol": "SHSE.600036", "name": "招商银行", "market": "A", "industry": "银行"},
+]
+
+
+@pytest.fixture
+def index():
+    from pytrading.service.symbol_index_service import SymbolIndex
+    return SymbolIndex(ROWS)
+
+
+def _symbols(entries):
+    return [entry["symbol"] for entry in entries]
+
+
+class TestSymbolIndex:
+    """测试 SymbolIndex"""
+
+    def test_lookup_full_symbol_and_code_suffix(self, index):
+        """完整代码（不区分大小写）和纯数字代码都能定位"""
+        assert index.lookup("shse.600000")["name"] == "浦发银行"
+        assert index.lookup("000001")["name"] == "平安银行"
+        assert index.lookup("sz000002")["name"] == "万科A"
+        assert index.lookup("999999") is None
+
+    def test_search_code_prefix_sorted(self, index):
+        """代码前缀返回有序结果，精确代码排在最前"""
+        assert _symbols(index.search("6000")) == ["SHSE.600000", "SHSE.600036"]
+        assert _symbols(index.search("000002"))[0] == "SZSE.000002"
+
+    def test_search_name_prefix_before_contains(self, index):
+        """名称前缀命中排在名称包含之前"""
+        assert _symbols(index.search("平安")) == ["SZSE.000001", "SHSE.601318"]
+        assert _symbols(index.search("银行")) == ["SHSE.600000", "SZSE.000001", "SHSE.600036"]
+
+    def test_search_limit_respected(self, index):
+        """结果数不超过 limit"""
+        assert len(index.search("银", limit=2)) == 2
+        assert index.search("", limit=5) == []
+
+    def test_match_pinyin_prefix_and_limit(self):
+        """拼音首字母前缀解析为代码列表，命中超过上限时返回 None，非字母关键字不走拼音"""
+        from pytrading.service.symbol_index_service import SymbolIndex
+        initials = {"浦发银行": "pfyh", "中国平安": "zgpa", "平安银行": "payh", "万科a": "wka", "招商银行": "zsyh"}
+        index = SymbolIndex(ROWS, initials=initials.get)
+
+        assert index.match_pinyin("PA") == ["SZSE.000001"]
+        assert index.match_pinyin("z", limit=1) is None
+        assert index.match_pinyin("6000") == []
+        assert SymbolIndex(ROWS).match_pinyin("pa") == []
+
+    def test_search_pinyin_initials(self):
+        """安装 pypinyin 时支持拼音首字母前缀"""
+        pytest.importorskip("pypinyin")
+        from pytrading.service.symbol_index_service import SymbolIndex, _pinyin_initials
+        index = SymbolIndex(ROWS, initials=_pinyin_initials())
+
+        assert index.pinyin_enabled
+        assert _symbols(index.search("pfyh")) == ["SHSE.600000"]
+        assert _symbols(index.search("zgpa")) == ["SHSE.601318"]
+
+
+class TestSymbolIndexService:
+    """测试 SymbolIndexService"""
+
+    def test_get_builds_once_then_reuses(self):
+        """首次访问同步构建，之后复用同一索引"""
+        from pytrading.service.symbol_index_service import SymbolIndexService
+        loader = MagicMock(return_value=ROWS)
+        service = SymbolIndexService(loader=loader, ttl=0)
+
+        assert service.peek() is None
+        assert service.lookup("600036")["name"] == "招商银行"
+        assert service.search("招商")[0]["symbol"] == "SHSE.600036"
+        assert loader.call_count == 1
+        assert service.stats()["size"] == 5
+
+    def test_invalidate_rebuilds_in_background_serving_old_index(self):
+        """失效后继续返回旧索引，后台重建完成后切换"""
+        from pytrading.service.symbol_index_service import SymbolIndexService
+        rows = list(ROWS)
+        service = SymbolIndexService(loader=lambda: rows, ttl=0)
+        old = service.get()
+
+        rows.append({"id": 6, "symbol": "SHSE.600519", "name": "贵州茅台"})
+        service.invalidate()
+        assert service.get() is old
+
+        for _ in range(100):
+            if service.peek() is not old:
+                break
+            time.sleep(0.01)
+        assert service.lookup("600519")["name"] == "贵州茅台"
+        assert service.stats()["stale"] is False
+
+    def test_symbols_cache_invalidation_marks_stale(self):
+        """symbols 缓存失效（股票池写入提交）时索引标记过期"""
+        from pytrading.service.symbol_index_service import SymbolIndexService
+        from pytrading.utils import ttl_cache
+        service = SymbolIndexService(loader=lambda: ROWS, ttl=0)
+        service.get()
+
+        with patch.dict(ttl_cache._invalidate_listeners, {"symbols": [service.invalidate]}):
+            with patch.object(service, "_refresh_in_background"):
+                ttl_cache.invalidate("symbols")
+                assert service.stats()["stale"] is True
+
+
+class TestResultKeywordFilter:
+    """回测结果按关键字筛选"""
+
+    @pytest.fixture
+    def saver(self, db_session):
+        from pytrading.db.mysql import BackTestResult
+        from pytrading.model.mysql_back_test_saver import MySQLBackTestSaver
+
+        for i, row in enumerate(ROWS):
+            db_session.add(BackTestResult(
+                symbol=row["symbol"], name=row["name"], strategy_name='MACD',
+                backtest_start_time=datetime(2024, 1, 1), backtest_end_time=datetime(2024, 6, 30),
+                created_at=datetime(2025, 1, 1, 0, i)))
+        db_session.add(BackTestResult(
+            symbol="BJSE.830799", name="艾融软件", strategy_name='MACD',
+            backtest_start_time=datetime(2024, 1, 1), backtest_end_time=datetime(2024, 6, 30)))
+        db_session.flush()
+
+        saver = MySQLBackTestSaver.__new__(MySQLBackTestSaver)
+        saver.mysql_client = MagicMock()
+        saver.mysql_client.get_session.return_value = db_session
+        with patch.object(db_session, 'close'):
+            yield saver
+
+    def _filter_symbols(self, saver, keyword):
+        from pytrading.db.mysql import BackTestResult
+        return sorted(r[0] for c in saver.iter_result_rows([BackTestResult.symbol], symbol=keyword) for r in c)
+
+    def test_keyword_keeps_substring_match(self, saver):
+        """关键字按代码/名称子串匹配，与索引内容无关（股票池外的结果同样可查）"""
+        from pytrading.service.symbol_index_service import SymbolIndex
+        service = MagicMock()
+        service.peek.return_value = SymbolIndex(ROWS)
+        with patch('pytrading.service.symbol_index_service.get_symbol_index_service', return_value=service):
+            assert self._filter_symbols(saver, "平安") == ["SHSE.601318", "SZSE.000001"]
+            assert self._filter_symbols(saver, "0000") == ["SHSE.600000", "SZSE.000001", "SZSE.000002"]
+            assert self._filter_symbols(saver, "00") == ["SHSE.600000", "SHSE.600036", "SZSE.000001", "SZSE.000002"]
+            assert self._filter_symbols(saver, "艾融") == ["BJSE.830799"]
+
+    def test_pinyin_hits_added_to_substring_match(self, saver):
+        """拼音首字母命中的代码与子串匹配 OR 组合"""
+        from pytrading.service.symbol_index_service import SymbolIndex
+        initials = {"浦发银行": "pfyh", "中国平安": "zgpa", "平安银行": "payh", "万科a": "wka", "招商银行": "zsyh"}
+        service = MagicMock()
+        service.peek.return_value = SymbolIndex(ROWS, initials=initials.get)
+        with patch('pytrading.service.symbol_index_service.get_symbol_index_service', return_value=service):
+            assert self._filter_symbols(saver, "zgpa") == ["SHSE.601318"]
+            assert self._filter_symbols(saver, "BJSE") == ["BJSE.830799"]
+
+    def test_index_not_built_falls_back_to_like(self, saver):
+        """索引尚未构建时只做模糊匹配"""
+        service = MagicMock()
+        service.peek.return_value = None
+        with patch('pytrading.service.symbol_index_service.get_symbol_index_service', return_value=service):
+            assert self._filter_symbols(saver, "银行") == ["SHSE.600000", "SHSE.600036", "SZSE.000001"]
@@ -0,0 +1,127 @@
+"""
+交易记录服务单元测试
+
+验证交易信号只进入内存缓冲，flush 时批量 insert-ignore 写库，写库失败后退避重试并溢出到磁盘.
+命名遵循: test_<场景>_<预期结果>
+"""
+
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+
+
+@pytest.fixture
+def buffer(db_session, tmp_path):
+    """使用测试会话的缓冲（commit 改为 flush，测试结束回滚）"""
+    from pytrading.service.trade_record_service import TradeRecordBuffer, TradeRecordService
+
+    with patch.object(TradeRecordService, '_get_session', return_value=db_session), \
+            patch.object(db_session, 'close'), patch.object(db_session, 'commit', db_session.flush):
+        yield TradeRecordBuffer(max_rows=10, retry_interval=60, spill_dir=str(tmp_path))
+
+
+def _signal(bar_time, action='buy', task_id='t-trade'):
+    return dict(task_id=task_id, symbol='SZSE.300001', action=action, target_percent=0.5, price=10.5,
+                volume=None, signal_type='MACD金叉', bar_time=bar_time)
+
+
+def _records(db_session):
+    from pytrading.db.mysql import TradeRecord
+    return db_session.query(TradeRecord).order_by(TradeRecord.bar_time).all()
+
+
+class TestTradeRecordBuffer:
+    """测试交易信号缓冲"""
+
+    def test_add_does_not_touch_db(self, buffer, db_session):
+        """add 只写内存，flush 后一次写入"""
+        from pytrading.service.trade_record_service import TradeRecordService
+
+        with patch.object(TradeRecordService, '_get_session') as get_session:
+            buffer.add(**_signal('2024-01-02 15:00:00'))
+            buffer.add(**_signal(datetime(2024, 1, 3, 15)))
+            get_session.assert_not_called()
+        assert buffer.pending() == 2
+
+        assert buffer.flush() == 2
+        assert [r.bar_time for r in _records(db_session)] == [datetime(2024, 1, 2, 15), datetime(2024, 1, 3, 15)]
+
+    def test_duplicate_signal_ignored(self, buffer, db_session):
+        """与已落库信号重复的行被忽略"""
+        buffer.add(**_signal('2024-01-02 15:00:00'))
+        buffer.flush()
+        buffer.add(**_signal('2024-01-02 15:00:00'))
+        buffer.add(**_signal('2024-01-02 15:00:00', action='sell'))
+        buffer.flush()
+
+        assert [r.action for r in _records(db_session)] == ['buy', 'sell']
+
+    def test_full_buffer_flushes(self, buffer, db_session):
+        """达到 max_rows 时立即写库"""
+        for day in range(1, 11):
+            buffer.add(**_signal(datetime(2024, 1, day, 15)))
+        assert buffer.pending() == 0
+        assert len(_records(db_session)) == 10
+
+    def test_failed_flush_retried(self, buffer, db_session):
+        """写库失败的行保留，close 时重试写入"""
+        buffer.add(**_signal('2024-01-02 15:00:00'))
+        with patch('pytrading.service.trade_record_service.bulk_insert_ignore', side_effect=RuntimeError('down')):
+            assert buffer.flush() == 0
+        assert buffer.pending() == 1
+
+        buffer.close()
+        assert len(_records(db_session)) == 1
+
+    def test_failure_backs_off_and_spills_to_disk(self, buffer, db_session, tmp_path):
+        """写库失败后重试间隔内 add 不访问数据库，缓冲写满时溢出到磁盘"""
+        from pytrading.service.trade_record_service import TradeRecordService
+
+        buffer.add(**_signal(datetime(2024, 1, 1, 15)))
+        with patch('pytrading.service.trade_record_service.bulk_insert_ignore', side_effect=RuntimeError('down')):
+            assert buffer.flush() == 0
+
+        with patch.object(TradeRecordService, '_get_session') as get_session:
+            for day in range(2, 12):
+                buffer.add(**_signal(datetime(2024, 1, day, 15)))
+            get_session.assert_not_called()
+        assert buffer.pending() == 1
+        assert buffer.spilled_count == 10
+        assert len(list(tmp_path.glob('*.jsonl'))) == 1
+
+    def test_spilled_rows_written_on_next_flush(self, buffer, db_session, tmp_path):
+        """恢复后溢出文件与内存缓冲一并写库，文件删除"""
+        with patch('pytrading.service.trade_record_service.bulk_insert_ignore', side_effect=RuntimeError('down')):
+            buffer.flush()
+            buffer.add(**_signal(datetime(2024, 1, 1, 15)))
+            assert buffer.flush() == 0
+        for day in range(2, 12):
+            buffer.add(**_signal(datetime(2024, 1, day, 15)))
+        assert buffer.pending() == 1
+
+        assert buffer.flush() == 11
+        assert len(_records(db_session)) == 11
+        assert list(tmp_path.glob('*.jsonl')) == []
+
+    def test_unparseable_bar_time_skipped(self, buffer):
+        """bar_time 无法解析时跳过该信号，不抛出到策略 on_bar"""
+        buffer.add(**_signal('2024-01-02'))
+        buffer.add(**_signal('2024-01-02 15:00:00'))
+
+        assert buffer.pending() == 1
+
+
+class TestSaveTradeRecord:
+    """测试服务入口"""
+
+    def test_save_disabled_without_task(self):
+        """未开启 SAVE_DB 或无 task_id 时不缓冲"""
+        from pytrading.service.trade_record_service import TradeRecordService
+
+        with patch.object(TradeRecordService, 'get_buffer') as get_buffer, \
+                patch('pytrading.service.trade_record_service.config.save_db', True):
+            TradeRecordService.save_trade_record(None, 'SZSE.300001', 'buy', 0.5, 10, None, 'x', datetime.now())
+            get_buffer.assert_not_called()
+            TradeRecordService.save_trade_record('t', 'SZSE.300001', 'buy', 0.5, 10, None, 'x', datetime.now())
+            get_buffer.return_value.add.assert_called_once()
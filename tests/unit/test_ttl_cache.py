@@ -0,0 +1,155 @@
+"""
+接口缓存单元测试
+
+验证 TTL 过期、LRU 淘汰、并发未命中合并加载、异常不缓存以及表写入提交后失效.
+命名遵循: test_<场景>_<预期结果>
+"""
+
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from pytrading.utils.ttl_cache import TTLCache, get_cache, invalidate_on_write
+
+
+def _loader(calls, value, delay=0.0):
+    async def load():
+        calls.append(value)
+        await asyncio.sleep(delay)
+        return value
+    return load
+
+
+class TestTTLCache:
+    """TTL 与 LRU"""
+
+    @pytest.mark.asyncio
+    async def test_hit_within_ttl_loads_once(self):
+        """TTL 内重复读取只加载一次"""
+        cache = TTLCache("t", ttl=60)
+        calls = []
+        assert await cache.get_or_load("k", _loader(calls, 1)) == 1
+        assert await cache.get_or_load("k", _loader(calls, 2)) == 1
+        assert calls == [1]
+        stats = cache.stats()
+        assert stats["hits"] == 1 and stats["misses"] == 1 and stats["hit_ratio"] == 0.5
+
+    @pytest.mark.asyncio
+    async def test_expired_entry_reloads(self):
+        """过期后重新加载"""
+        cache = TTLCache("t", ttl=10)
+        calls = []
+        with patch("pytrading.utils.ttl_cache.time.monotonic", return_value=100.0):
+            await cache.get_or_load("k", _loader(calls, 1))
+        with patch("pytrading.utils.ttl_cache.time.monotonic", return_value=111.0):
+            assert await cache.get_or_load("k", _loader(calls, 2)) == 2
+        assert calls == [1, 2]
+
+    def test_maxsize_evicts_least_recently_used(self):
+        """超过容量淘汰最久未使用的条目"""
+        cache = TTLCache("t", ttl=60, maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1 and cache.get("c") == 3
+        assert cache.stats()["evictions"] == 1
+
+    def test_invalidate_clears_entries(self):
+        """invalidate 清空缓存"""
+        cache = TTLCache("t", ttl=60)
+        cache.set("a", 1)
+        cache.invalidate()
+        assert cache.get("a") is None
+
+
+class TestSingleFlight:
+    """并发未命中合并"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_share_one_load(self):
+        """同一 key 并发未命中只执行一次 loader"""
+        cache = TTLCache("t", ttl=60)
+        calls = []
+        results = await asyncio.gather(*[cache.get_or_load("k", _loader(calls, 7, delay=0.05)) for _ in range(10)])
+        assert results == [7] * 10
+        assert calls == [7]
+        assert cache.stats()["coalesced"] == 9
+
+    @pytest.mark.asyncio
+    async def test_loader_error_not_cached_and_propagated(self):
+        """加载异常传给所有等待者且不缓存"""
+        cache = TTLCache("t", ttl=60)
+
+        async def failing():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("upstream down")
+
+        results = await asyncio.gather(cache.get_or_load("k", failing), cache.get_or_load("k", failing),
+                                       return_exceptions=True)
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert cache.stats()["errors"] == 1
+        calls = []
+        assert await cache.get_or_load("k", _loader(calls, 3)) == 3
+
+    @pytest.mark.asyncio
+    async def test_invalidate_during_load_discards_result(self):
+        """加载期间失效，结果不写入缓存"""
+        cache = TTLCache("t", ttl=60)
+
+        async def load():
+            cache.invalidate()
+            return 1
+
+        assert await cache.get_or_load("k", load) == 1
+        assert cache.get("k") is None
+
+
+class TestInvalidateOnWrite:
+    """表写入失效"""
+
+    def test_commit_invalidates_rollback_keeps(self, db_session):
+        """写入提交后失效缓存，回滚不失效"""
+        from pytrading.db.mysql import StockSymbol
+
+        cache = get_cache("test_symbols", ttl=60)
+        invalidate_on_write(StockSymbol, "test_symbols")
+
+        cache.set("active", ["old"])
+        db_session.add(StockSymbol(symbol="SHSE.600000", name="浦发银行"))
+        db_session.flush()
+        db_session.rollback()
+        assert cache.get("active") == ["old"]
+
+        db_session.add(StockSymbol(symbol="SHSE.600000", name="浦发银行"))
+        db_session.commit()
+        assert cache.get("active") is None
+
+
+class TestConfigEndpoint:
+    """/api/config 的缓存行为"""
+
+    @pytest.mark.asyncio
+    async def test_db_error_fallback_not_cached(self, mock_gm_api, db_session, monkeypatch):
+        """数据库临时异常时返回默认值但不缓存，恢复后立即读到真实配置"""
+        for name in ('set_token', 'get_constituents', 'get_instruments', 'history'):
+            monkeypatch.setattr(mock_gm_api, name, MagicMock(), raising=False)
+        from pytrading.api import main
+        from pytrading.db.mysql import SystemConfig
+        from pytrading.utils import ttl_cache
+
+        db_session.add(SystemConfig(config_key="watchlist_auto_backtest_time", config_value="18:30"))
+        db_session.flush()
+        ttl_cache._caches.pop("config", None)
+
+        with patch.object(main, 'get_db_client', side_effect=RuntimeError("db down")):
+            fallback = await main.get_config()
+        with patch.object(main, 'get_db_client') as get_db_client, patch.object(db_session, 'close'):
+            get_db_client.return_value.get_session.return_value = db_session
+            current = await main.get_config()
+
+        assert fallback["watchlist_auto_backtest_time"] == "17:00"
+        assert current["watchlist_auto_backtest_time"] == "18:30"
+        ttl_cache._caches.pop("config", None)
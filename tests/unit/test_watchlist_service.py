@@ -178,3 +178,123 @@ class TestWatchlistItemChangeTracking:
 
         result = db_session.query(WatchlistItem).filter_by(symbol="SHSE.600308").first()
         assert result.type_changed is False
+
+
+class TestGetWatchlist:
+    """测试关注列表查询（单次联表查询 + 数据库排序）"""
+
+    @pytest.fixture
+    def watchlist(self, db_session):
+        """3 个有回测结果的条目（其中一个类型变化）+ 1 个无回测结果的条目"""
+        from decimal import Decimal
+        from unittest.mock import patch
+
+        from pytrading.db.mysql import BackTestResult, Strategy, WatchlistItem
+        from pytrading.service.watchlist_service import WatchlistService
+
+        strategy = Strategy(name='WL_MACD', display_name='MACD', strategy_type='trend')
+        db_session.add(strategy)
+        db_session.flush()
+        for i, pnl in enumerate(['0.30', '-0.10', '0.05']):
+            symbol = f"SHSE.6009{i:02d}"
+            db_session.add(WatchlistItem(symbol=symbol, name=f"股票{i}", strategy_id=strategy.id,
+                                         last_backtest_task_id='wl-task', type_changed=(i == 2)))
+            db_session.add(BackTestResult(task_id='wl-task', symbol=symbol, strategy_name='WL_MACD',
+                                          pnl_ratio=Decimal(pnl), backtest_start_time=datetime(2024, 1, 1),
+                                          backtest_end_time=datetime(2024, 6, 30)))
+        db_session.add(WatchlistItem(symbol="SHSE.600999", name="无回测", strategy_id=strategy.id))
+        db_session.flush()
+
+        with patch.object(WatchlistService, '_get_session', return_value=db_session), \
+                patch.object(db_session, 'close'):
+            yield WatchlistService
+
+    def test_metrics_and_strategy_joined(self, watchlist):
+        """条目带出回测指标和策略名称"""
+        result = watchlist.get_watchlist()
+
+        assert result["total"] == 4
+        assert result["type_changed_count"] == 1
+        by_symbol = {e["item"].symbol: e for e in result["data"]}
+        assert by_symbol["SHSE.600900"]["pnl_ratio"] == 0.3
+        assert by_symbol["SHSE.600900"]["backtest_end_time"] == datetime(2024, 6, 30)
+        assert by_symbol["SHSE.600999"]["pnl_ratio"] is None
+        assert {e["strategy_name"] for e in result["data"]} == {'WL_MACD'}
+
+    @pytest.mark.parametrize("sort_order,expected", [
+        ("desc", ["SHSE.600902", "SHSE.600900", "SHSE.600901", "SHSE.600999"]),
+        ("asc", ["SHSE.600902", "SHSE.600901", "SHSE.600900", "SHSE.600999"]),
+    ])
+    def test_metric_sort_in_sql(self, watchlist, sort_order, expected):
+        """按指标排序：类型变化置顶，无指标的条目排最后"""
+        result = watchlist.get_watchlist(sort_by="pnl_ratio", sort_order=sort_order)
+        assert [e["item"].symbol for e in result["data"]] == expected
+
+    def test_constant_query_count(self, watchlist, db_session):
+        """查询次数与条目数量无关"""
+        from sqlalchemy import event
+
+        statements = []
+
+        def count(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        engine = db_session.get_bind()
+        event.listen(engine, "before_cursor_execute", count)
+        try:
+            watchlist.get_watchlist(sort_by="pnl_ratio")
+        finally:
+            event.remove(engine, "before_cursor_execute", count)
+        assert len(statements) == 2
+
+
+class TestUpdateMetricsBulk:
+    """测试回测完成后批量更新关注类型"""
+
+    def test_bulk_update_matches_rules(self, db_session):
+        """按趋势类型和最后一根K线的清仓信号批量更新，只影响任务策略下的条目"""
+        from unittest.mock import patch
+
+        from pytrading.config.strategy_enum import TrendingType
+        from pytrading.db.mysql import BacktestTask, BackTestResult, TradeRecord, WatchlistItem
+        from pytrading.service.watchlist_service import WatchlistService
+
+        db_session.add(BacktestTask(task_id='bulk-task', strategy_id=7, symbols=[], start_time=datetime(2024, 1, 1),
+                                    end_time=datetime(2024, 6, 30), status='completed'))
+        cases = {
+            # symbol: (当前类型, 趋势类型)
+            "SHSE.601001": ("趋势下行", TrendingType.RisingUp),
+            "SHSE.601002": ("无状态", TrendingType.Observing),
+            "SHSE.601003": ("趋势上涨", TrendingType.RisingUp),
+            "SHSE.601004": ("趋势上涨", TrendingType.DeadXDecliningDown),
+        }
+        for symbol, (watch_type, trending_type) in cases.items():
+            db_session.add(WatchlistItem(symbol=symbol, name=symbol, strategy_id=7, watch_type=watch_type))
+            db_session.add(BackTestResult(task_id='bulk-task', symbol=symbol, trending_type=trending_type,
+                                          backtest_start_time=datetime(2024, 1, 1),
+                                          backtest_end_time=datetime(2024, 6, 30)))
+        # 其他策略下的同一股票不受影响
+        db_session.add(WatchlistItem(symbol="SHSE.601001", name="x", strategy_id=8, watch_type="趋势下行"))
+        # 601003 最后一根K线清仓；601004 清仓后又买入
+        db_session.add_all([
+            TradeRecord(task_id='bulk-task', symbol="SHSE.601003", action='buy', bar_time=datetime(2024, 3, 1)),
+            TradeRecord(task_id='bulk-task', symbol="SHSE.601003", action='close', bar_time=datetime(2024, 5, 1)),
+            TradeRecord(task_id='bulk-task', symbol="SHSE.601004", action='close', bar_time=datetime(2024, 3, 1)),
+            TradeRecord(task_id='bulk-task', symbol="SHSE.601004", action='buy', bar_time=datetime(2024, 5, 1)),
+        ])
+        db_session.flush()
+
+        with patch.object(WatchlistService, '_get_session', return_value=db_session), \
+                patch.object(db_session, 'close'), patch.object(db_session, 'commit', db_session.flush):
+            assert WatchlistService.update_metrics_bulk('bulk-task') == 4
+
+        items = {(i.symbol, i.strategy_id): i for i in db_session.query(WatchlistItem).filter(
+            WatchlistItem.symbol.like("SHSE.6010%")).all()}
+        changed = items[("SHSE.601001", 7)]
+        assert (changed.watch_type, changed.previous_watch_type, changed.type_changed) == ("趋势上涨", "趋势下行", True)
+        assert changed.last_backtest_task_id == 'bulk-task'
+        assert (items[("SHSE.601002", 7)].watch_type, items[("SHSE.601002", 7)].type_changed) == ("关注中", False)
+        assert items[("SHSE.601003", 7)].watch_type == "趋势结束"
+        assert items[("SHSE.601004", 7)].watch_type == "趋势下行"
+        assert items[("SHSE.601001", 8)].watch_type == "趋势下行"
+        assert items[("SHSE.601001", 8)].last_backtest_task_id is None